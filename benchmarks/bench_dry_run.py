@@ -0,0 +1,71 @@
+"""Measures the time taken by a dry run to predict the summary of a submission.
+
+Usage:
+
+    python benchmarks/bench_dry_run.py [NUMBER_OF_ROWS]
+
+The script writes a synthetic snapshot of the active configuration and a configuration
+file that activates, updates and deactivates a few sources with respect to it, and
+prints the time taken to predict the request summary, both with the hash-set indexes of
+summarize_body_changes and by comparing the symbols of every source.
+"""
+import pathlib
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from watchlist_api_client import config_diff
+
+
+def write_synthetic_configuration(
+    path: pathlib.Path,
+    number_of_rows: int,
+    renamed_source_ids: Dict[int, int],
+    updated_source_id: int,
+) -> None:
+    """Writes a configuration file spread over 600 sources, some renamed and one updated."""
+    with path.open('w') as outfile:
+        outfile.write("sourceId,RTSsymbol\n")
+        for index in range(number_of_rows):
+            source_id = 200 + index % 600
+            suffix = "H21" if source_id == updated_source_id else "Z20"
+            source_id = renamed_source_ids.get(source_id, source_id)
+            outfile.write(f"{source_id},F:FDAX{index:08d}\\{suffix}\n")
+
+
+def main() -> None:
+    number_of_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        path_to_snapshot = pathlib.Path(temporary_directory).joinpath(
+            "watchlist_config@20201118T123052Z.csv",
+        )
+        path_to_config_file = pathlib.Path(temporary_directory).joinpath("watchlist_config.csv")
+        write_synthetic_configuration(path_to_snapshot, number_of_rows, {}, 0)
+        write_synthetic_configuration(
+            path_to_config_file,
+            number_of_rows,
+            {source_id: source_id + 800 for source_id in range(200, 210)},
+            500,
+        )
+        start = time.perf_counter()
+        summary = config_diff.predict_request_summary(
+            path_to_config_file.as_posix(), path_to_snapshot.as_posix(),
+        ).summary
+        indexed_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        config_diff.summarize_changes(
+            config_diff.load_source_symbols(path_to_config_file.as_posix()),
+            config_diff.load_source_symbols(path_to_snapshot.as_posix()),
+        )
+        per_source_elapsed = time.perf_counter() - start
+    print(
+        f"{number_of_rows:,} rows per file: {summary['nbCreated']} created, "
+        f"{summary['nbUpdated']} updated, {summary['nbDeactivated']} deactivated"
+    )
+    print(f"  {'hash-set indexes':<24}{indexed_elapsed:8.3f} s")
+    print(f"  {'per-source symbol sets':<24}{per_source_elapsed:8.3f} s")
+
+
+if __name__ == '__main__':
+    main()
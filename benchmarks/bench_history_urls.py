@@ -0,0 +1,67 @@
+"""Measures the time taken to prepare the point-in-time URLs of a history workload.
+
+Usage:
+
+    python benchmarks/bench_history_urls.py [NUMBER_OF_URLS]
+
+The script prepares the URLs retrieving the configurations active every minute from
+November 1, 2020, and prints the number of URLs per second prepared one by one, as
+history.prepare_history_url does, and in a single batch by
+helpers.format_utc_timestamp_range, helpers.prepare_timestamp_query_strings and
+helpers.join_base_url_and_query_strings, with NumPy if it is installed and without.
+"""
+import datetime
+import sys
+import time
+from typing import Callable, List
+
+from watchlist_api_client import client, helpers, history
+
+START = datetime.datetime(2020, 11, 1, tzinfo=datetime.timezone.utc)
+STEP = datetime.timedelta(minutes=1)
+
+
+def prepare_urls_one_by_one(end: datetime.datetime) -> List[str]:
+    """Prepares the URLs of the range one by one."""
+    return [
+        history.prepare_history_url(client.WATCHLIST_API_ENDPOINT, timestamp)
+        for timestamp in history.generate_timestamps(START, end, STEP)
+    ]
+
+
+def prepare_urls_in_batch(end: datetime.datetime) -> List[str]:
+    """Prepares the URLs of the range in a single batch."""
+    return helpers.join_base_url_and_query_strings(
+        client.WATCHLIST_API_ENDPOINT,
+        helpers.prepare_timestamp_query_strings(
+            helpers.format_utc_timestamp_range(START, end, STEP),
+        ),
+    )
+
+
+def measure(function: Callable[[datetime.datetime], List[str]], end: datetime.datetime) -> float:
+    """Returns the number of URLs per second prepared by function."""
+    start = time.perf_counter()
+    number_of_urls = len(function(end))
+    return number_of_urls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    number_of_urls = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    end = START + (number_of_urls - 1) * STEP
+    assert prepare_urls_one_by_one(end) == prepare_urls_in_batch(end)
+    measurements = {"one by one": measure(prepare_urls_one_by_one, end)}
+    import_numpy = helpers.import_numpy
+    if import_numpy() is not None:
+        measurements["batch (NumPy)"] = measure(prepare_urls_in_batch, end)
+    helpers.import_numpy = lambda: None
+    try:
+        measurements["batch (pure Python)"] = measure(prepare_urls_in_batch, end)
+    finally:
+        helpers.import_numpy = import_numpy
+    for name, urls_per_second in measurements.items():
+        print(f"{name:<20} {urls_per_second:>14,.0f} URLs/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Measures the time taken to parse and convert the timestamps of a history workload.
+
+Usage:
+
+    python benchmarks/bench_timestamps.py [NUMBER_OF_TIMESTAMPS]
+
+The script generates hourly timestamps in the formats met by the history and bisection
+workloads, i.e. the ISO 8601 timestamps passed to the CLI, the basic ISO 8601 ones of the
+retrieved files and the RFC 1123 ones of the HTTP Date header, and prints the number of
+timestamps per second parsed by dateutil and by helpers.parse_utc_timestamp, and
+converted by helpers.convert_raw_utc_timestamp_to_string with its cache cold and warm.
+"""
+import datetime
+import email.utils
+import sys
+import time
+from typing import Callable, List
+
+import dateutil.parser
+
+from watchlist_api_client import helpers
+
+
+def generate_timestamps(
+    number_of_timestamps: int, to_string: Callable[[datetime.datetime], str],
+) -> List[str]:
+    """Generates hourly timestamps from November 1, 2020 formatted by to_string."""
+    start = datetime.datetime(2020, 11, 1, tzinfo=datetime.timezone.utc)
+    return [
+        to_string(start + datetime.timedelta(hours=index))
+        for index in range(number_of_timestamps)
+    ]
+
+
+def measure(function: Callable[[str], object], timestamps: List[str]) -> float:
+    """Returns the number of timestamps per second processed by function."""
+    start = time.perf_counter()
+    for timestamp in timestamps:
+        function(timestamp)
+    return len(timestamps) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    number_of_timestamps = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    formats = {
+        "ISO 8601": lambda moment: moment.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "basic ISO 8601": lambda moment: moment.strftime("%Y%m%dT%H%M%SZ"),
+        "RFC 1123": lambda moment: email.utils.format_datetime(moment, usegmt=True),
+    }
+    for format_name, to_string in formats.items():
+        timestamps = generate_timestamps(number_of_timestamps, to_string)
+        helpers.convert_raw_utc_timestamp_to_string.cache_clear()
+        # The cache holds TIMESTAMP_CACHE_SIZE entries, so that only the last of them are
+        # converted again from the cache.
+        warm_timestamps = timestamps[-helpers.TIMESTAMP_CACHE_SIZE:]
+        measurements = {
+            "dateutil.parser.parse": measure(dateutil.parser.parse, timestamps),
+            "parse_utc_timestamp": measure(helpers.parse_utc_timestamp, timestamps),
+            "convert_raw_utc_timestamp_to_string (cold)": measure(
+                helpers.convert_raw_utc_timestamp_to_string, timestamps,
+            ),
+            "convert_raw_utc_timestamp_to_string (warm)": measure(
+                helpers.convert_raw_utc_timestamp_to_string, warm_timestamps,
+            ),
+        }
+        print(format_name)
+        for name, timestamps_per_second in measurements.items():
+            print(f"  {name:<44} {timestamps_per_second:>14,.0f} timestamps/s")
+
+
+if __name__ == '__main__':
+    main()
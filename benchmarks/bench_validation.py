@@ -0,0 +1,72 @@
+"""Compares the throughput of the Watchlist configuration file validators.
+
+Usage:
+
+    python benchmarks/bench_validation.py [NUMBER_OF_ROWS]
+
+The script writes a synthetic configuration file to a temporary directory, validates it
+with the original csv-based implementation and with the config_validator engine (in a
+single process, on the memory-mapped bytes of the file, and across a pool of at least
+two worker processes), and prints the number of rows validated per second by each of
+them.
+"""
+import csv
+import functools
+import os
+import pathlib
+import re
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from watchlist_api_client import config_validator
+
+
+def legacy_validation(path_to_watchlist_config_file: str) -> None:
+    """Validates a file the way config_sender did before the config_validator engine."""
+    with pathlib.Path(path_to_watchlist_config_file).open('r') as csv_file:
+        csv_reader = csv.reader(csv_file, delimiter=',')
+        for index, row in enumerate(csv_reader):
+            if index == 0:
+                if not re.match(r"^sourceId,RTSsymbol$", ','.join(row)):
+                    raise ValueError("Improperly formatted header")
+            elif not re.match(r"^[0-9]{3,4},[A-Z0-9\\+;()!*\-.:/$@&_%#]+$", ','.join(row)):
+                raise ValueError(f"Line {index} - Improperly formatted")
+
+
+def write_synthetic_configuration(path: pathlib.Path, number_of_rows: int) -> None:
+    """Writes a properly formatted configuration file with the given number of rows."""
+    with path.open('w') as outfile:
+        outfile.write("sourceId,RTSsymbol\n")
+        for index in range(number_of_rows):
+            outfile.write(f"{207 + index % 600},F:FDAX{index:08d}\\Z20\n")
+
+
+def measure(validator: Callable[[str], object], path: pathlib.Path, number_of_rows: int) -> float:
+    """Returns the number of rows per second validated by the passed validator."""
+    start = time.perf_counter()
+    validator(path.as_posix())
+    return number_of_rows / (time.perf_counter() - start)
+
+
+def main() -> None:
+    number_of_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        path = pathlib.Path(temporary_directory).joinpath("watchlist_config.csv")
+        write_synthetic_configuration(path, number_of_rows)
+        workers = max(os.cpu_count() or 1, 2)
+        validators = {
+            "csv.reader + re.match (legacy)": legacy_validation,
+            "validate_configuration_file": config_validator.validate_configuration_file,
+            "validate_configuration_file_mmap": config_validator.validate_configuration_file_mmap,
+            f"validate_configuration_file(workers={workers})": functools.partial(
+                config_validator.validate_configuration_file, workers=workers,
+            ),
+        }
+        for name, validator in validators.items():
+            print(f"{name:<48} {measure(validator, path, number_of_rows):>14,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
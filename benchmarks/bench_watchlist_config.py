@@ -0,0 +1,84 @@
+"""Compares the memory and construction time of the in-memory forms of a configuration.
+
+Usage:
+
+    python benchmarks/bench_watchlist_config.py [NUMBER_OF_ROWS ...]
+
+For every number of rows, 1,000,000 and 10,000,000 by default, the script builds the body
+of a synthetic configuration spread over 600 sources, and prints the time taken to
+build, from the body, a list of (source ID, RTS symbol) tuples and a WatchlistConfig, as
+well as the memory each of them retains once built and the peak memory allocated while
+building it, as measured by tracemalloc.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from watchlist_api_client.data_structures import WatchlistConfig
+
+
+def build_synthetic_body(number_of_rows: int) -> bytes:
+    """Builds a configuration body whose RTS symbols are each listed under three sources."""
+    return b"sourceId,RTSsymbol\n" + b"".join(
+        f"{200 + index % 600},F:FDAX{index // 3:08d}\\Z20\n".encode()
+        for index in range(number_of_rows)
+    )
+
+
+def build_list_of_tuples(config_body: bytes) -> List[Tuple[int, str]]:
+    """Parses the rows of a configuration body into a list of tuples."""
+    rows = []
+    for line in config_body.decode().splitlines()[1:]:
+        source_id, _, symbol = line.partition(",")
+        rows.append((int(source_id), symbol))
+    return rows
+
+
+def build_watchlist_config(config_body: bytes) -> WatchlistConfig:
+    """Builds the columns of a WatchlistConfig eagerly."""
+    watchlist_config = WatchlistConfig(config_body)
+    len(watchlist_config)
+    return watchlist_config
+
+
+def measure(
+    builder: Callable[[bytes], object], config_body: bytes,
+) -> Tuple[float, int, int]:
+    """Returns the seconds taken by a builder, the bytes retained by what it built, and the
+    peak number of bytes allocated while building it."""
+    gc.collect()
+    start = time.perf_counter()
+    built = builder(config_body)
+    elapsed = time.perf_counter() - start
+    del built
+    gc.collect()
+    tracemalloc.start()
+    built = builder(config_body)
+    retained_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return elapsed, retained_bytes, peak_bytes
+
+
+def main() -> None:
+    row_counts = [int(argument) for argument in sys.argv[1:]] or [1_000_000, 10_000_000]
+    builders = {
+        "list of (source ID, RTS symbol) tuples": build_list_of_tuples,
+        "WatchlistConfig": build_watchlist_config,
+    }
+    for number_of_rows in row_counts:
+        config_body = build_synthetic_body(number_of_rows)
+        print(f"{number_of_rows:,} rows, {len(config_body) / 2 ** 20:,.1f} MiB of CSV")
+        print(f"  {'':<40} {'time':>10} {'retained':>14} {'peak':>14}")
+        for name, builder in builders.items():
+            elapsed, retained_bytes, peak_bytes = measure(builder, config_body)
+            print(
+                f"  {name:<40} {elapsed:>8.2f} s {retained_bytes / 2 ** 20:>10,.1f} MiB "
+                f"{peak_bytes / 2 ** 20:>10,.1f} MiB"
+            )
+
+
+if __name__ == '__main__':
+    main()
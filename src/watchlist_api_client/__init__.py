@@ -4,8 +4,10 @@
 
 """Watchlist API Client Library for Python."""
 
-
-from watchlist_api_client import config_retriever, config_sender, data_structures, helpers
+import importlib
+import sys
+import types
+from typing import List
 
 
 __version__ = "0.1.0"
@@ -21,8 +23,42 @@ __coyright__ = "copyright (c) 2020 " + __author__
 
 
 __all__ = [
+    "async_client",
+    "change_points",
+    "client",
+    "compression",
+    "config_diff",
     "config_sender",
     "config_retriever",
+    "config_validator",
+    "daemon",
     "data_structures",
+    "defaults",
+    "external_sort",
     "helpers",
+    "history",
+    "history_database",
+    "retry",
+    "snapshot_cache",
+    "snapshot_store",
+    "validation_cache",
 ]
+
+
+def __getattr__(name: str) -> types.ModuleType:
+    # The submodules are imported on first access (PEP 562), so that importing the package,
+    # e.g. to run the CLI, does not import requests and the other heavy dependencies of
+    # the submodules that are not used.
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if sys.version_info < (3, 7):
+    # Module-level __getattr__ is only supported from Python 3.7.
+    for _submodule in __all__:
+        importlib.import_module(f"{__name__}.{_submodule}")
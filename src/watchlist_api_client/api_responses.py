@@ -0,0 +1,128 @@
+"""Implements the handling of the responses sent back by the Watchlist API."""
+import pathlib
+from typing import TYPE_CHECKING, Optional
+import urllib.parse
+
+from watchlist_api_client.compression import get_compression_suffix
+from watchlist_api_client.data_structures import RequestSummary, RetrievedConfig
+from watchlist_api_client.helpers import convert_raw_utc_timestamp_to_string
+
+
+if TYPE_CHECKING:
+    import requests
+
+
+def infer_timestamp_from_retrieved_response(response: "requests.Response") -> str:
+    """Infers the timestamp of the retrieved response from the request URL.
+
+    The function uses the fact that the retrieval of the active configuration is initiated
+    by sending a GET request to the Watchlist API GET endpoint, without the specification
+    of a dateTime query string. This signals to the function that the retrieved
+    configuration is the active configuration at the time of the API call, and therefore
+    returns as the timestamp associated with the retrieved configuration, the timestamp
+    that is contained in the header of the response sent back by the Watchlist API.
+    Conversely, when trying to retrieve a deactivated configuration, the GET request is
+    sent to the Watchlist API GET endpoint with a specific dateTime query string, which
+    specifies the point in time where we want to retrieve the at the time active
+    configuration from. The returned deactivated configuration, will have a timestamp
+    that is therefore equal to the passed dateTime query string, since the returned
+    configuration is the one that was active at that specific point in time.
+
+    Parameters
+    ----------
+    response: requests.Response
+        A Response object that is returned as a result of the API call initiated to
+        retrieve the active or a deactivated configuration.
+
+    Returns
+    -------
+    str
+        A string representing the timestamp of the retrieved configuration.
+    """
+    if urllib.parse.urlparse(response.request.url).query == '':
+        return convert_raw_utc_timestamp_to_string(
+            response.headers['Date'],
+            date_format="%Y%m%dT%H%M%SZ",
+        )
+    else:
+        return convert_raw_utc_timestamp_to_string(
+            urllib.parse.urlparse(response.request.url).query.split("=")[1],
+            date_format="%Y%m%dT%H%M%SZ",
+        )
+
+
+def package_retrieved_configuration(response: "requests.Response") -> RetrievedConfig:
+    """Packages the retrieved configuration in a RetrievedConfig named tuple.
+
+    Parameters
+    ----------
+    response: requests.Response
+        A Response object that is returned as a result of the API call initiated to
+        retrieve the active or a deactivated configuration.
+
+    Returns
+    -------
+    RetrievedConfig
+        A named tuple containing the timestamp of the retrieved configuration, and a
+        byte-string object containing the body of the retrieved configuration.
+    """
+    return RetrievedConfig(
+        timestamp=infer_timestamp_from_retrieved_response(response),
+        config_body=response.content,
+    )
+
+
+def react_to_status_code_200(response: "requests.Response") -> RequestSummary:
+    """Embeds the submission time and the subscription summary in a ConfigSummary object.
+
+    The function is designed to deal with the scenario of a successful request to update
+    the configuration of the personal profile on the Watchlist API. In case of a
+    successful submission of a new configuration file, in fact, the Watchlist API returns
+    a JSON object that contains the summary of the actions performed as a result of the
+    update request, stating the sources that were created, updated, duplicated, unchanged,
+    failed and missing.
+
+    The request summary, together with the timestamp of the response, are stored in a
+    RequestSummary named-tuple and returned for further use.
+
+    Parameters
+    ----------
+    response: requests.Response
+        A Response object obtained by submitting a POST request to the Watchlist API.
+
+    Returns
+    -------
+    RequestSummary
+        A RequestSummary named-tuple containing the timestamp of the response and a
+        dictionary that contains the summary of the action performed as a result of
+        the request to update the configuration of the watchlist configuration file.
+    """
+    return RequestSummary(
+        submission_time=response.headers.get('Date'),
+        summary=response.json(),
+    )
+
+
+def get_retrieved_config_path(
+    path_to_directory: str,
+    timestamp: str,
+    compression: Optional[str] = None,
+) -> str:
+    """Returns the path of the csv file where a retrieved configuration is written.
+
+    Parameters
+    ----------
+    path_to_directory: str
+        The directory where retrieved configurations are written.
+    timestamp: str
+        The timestamp of the retrieved configuration, e.g. 20201118T123052Z.
+    compression: Optional[str]
+        The compression of the file, "gzip" or "zstd", which adds the .gz or .zst suffix.
+
+    Returns
+    -------
+    str
+        The path to the watchlist_config@<timestamp>.csv file in the directory.
+    """
+    file_name = f"watchlist_config@{timestamp}.csv{get_compression_suffix(compression)}"
+    return pathlib.Path(path_to_directory).joinpath(file_name).as_posix()
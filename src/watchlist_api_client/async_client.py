@@ -0,0 +1,226 @@
+"""Implements an asyncio interface to submit and retrieve configurations concurrently."""
+import asyncio
+import concurrent.futures
+import functools
+import sys
+from typing import Callable, Optional, Tuple, TypeVar
+
+from watchlist_api_client.client import WATCHLIST_API_ENDPOINT, WatchlistClient, get_default_client
+from watchlist_api_client.data_structures import (
+    RequestSummary,
+    RetrievedConfig,
+    RetrievedConfigFile,
+)
+
+
+T = TypeVar("T")
+
+# asyncio.get_running_loop was added in Python 3.7; before, get_event_loop returns the
+# running loop when called from a coroutine.
+if sys.version_info >= (3, 7):
+    get_running_loop = asyncio.get_running_loop
+else:
+    get_running_loop = asyncio.get_event_loop
+
+DEFAULT_MAX_CONCURRENCY = 10
+
+
+class AsyncWatchlistClient:
+    """An asyncio client of the Watchlist API with bounded concurrency.
+
+    The client wraps a WatchlistClient, whose pooled connections are shared by all the
+    requests, and runs the blocking calls on a dedicated pool of max_concurrency threads,
+    which bounds the number of requests in flight: the requests in excess wait in the
+    queue of the pool until a thread is free. The connection pool has the same size, so
+    that every request in flight has a connection available.
+
+    The coroutines return the same RequestSummary and RetrievedConfig named tuples returned
+    by config_sender.send_config and config_retriever.retrieve_config.
+    """
+
+    def __init__(
+        self,
+        credentials: Optional[Tuple[str, str]] = None,
+        base_url: str = WATCHLIST_API_ENDPOINT,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Initialises the client.
+
+        Parameters
+        ----------
+        credentials: Optional[Tuple[str, str]]
+            A tuple containing the username and password used to access the Watchlist API.
+            If None, the credentials have to be passed to every call.
+        base_url: str
+            The URL of the Watchlist API endpoint.
+        max_concurrency: int
+            The maximum number of requests in flight at any time.
+        timeout: Optional[float]
+            The number of seconds after which a request times out. If None, the requests
+            never time out.
+        """
+        self.max_concurrency = max_concurrency
+        self.client = WatchlistClient(
+            credentials, base_url, pool_maxsize=max_concurrency, timeout=timeout,
+        )
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def __aenter__(self) -> "AsyncWatchlistClient":
+        """Returns the client itself when entering an async with statement."""
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Closes the client when exiting an async with statement."""
+        await self.aclose()
+
+    def close(self) -> None:
+        """Shuts down the thread pool and closes the pooled connections.
+
+        The call blocks until the requests in flight are done; from a coroutine, use
+        aclose instead.
+        """
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    async def aclose(self) -> None:
+        """Closes the client as close does, without blocking the event loop."""
+        await get_running_loop().run_in_executor(None, self.close)
+
+    async def _run(self, function: Callable[[], T]) -> T:
+        return await get_running_loop().run_in_executor(self._executor, function)
+
+    async def post_config(
+        self,
+        watchlist_endpoint: str,
+        path_to_watchlist_config_file: str,
+        credentials: Optional[Tuple[str, str]] = None,
+    ) -> RequestSummary:
+        """Submits a Watchlist configuration file to an endpoint of the Watchlist API.
+
+        See WatchlistClient.post_config for the details of the parameters.
+        """
+        return await self._run(
+            functools.partial(
+                self.client.post_config,
+                watchlist_endpoint,
+                path_to_watchlist_config_file,
+                credentials,
+            ),
+        )
+
+    async def get_config(
+        self,
+        watchlist_endpoint: str,
+        credentials: Optional[Tuple[str, str]] = None,
+    ) -> RetrievedConfig:
+        """Retrieves a configuration from an endpoint of the Watchlist API.
+
+        See WatchlistClient.get_config for the details of the parameters.
+        """
+        return await self._run(
+            functools.partial(self.client.get_config, watchlist_endpoint, credentials),
+        )
+
+    async def download_config(
+        self,
+        watchlist_endpoint: str,
+        path_to_directory: str,
+        credentials: Optional[Tuple[str, str]] = None,
+        compression: Optional[str] = None,
+    ) -> RetrievedConfigFile:
+        """Retrieves a configuration from an endpoint of the Watchlist API to a file.
+
+        See WatchlistClient.download_config for the details of the parameters.
+        """
+        return await self._run(
+            functools.partial(
+                self.client.download_config,
+                watchlist_endpoint,
+                path_to_directory,
+                credentials,
+                compression=compression,
+            ),
+        )
+
+    async def submit(self, path_to_watchlist_config_file: str) -> RequestSummary:
+        """Submits a Watchlist configuration file to the base URL of the client."""
+        return await self._run(
+            functools.partial(self.client.submit, path_to_watchlist_config_file),
+        )
+
+    async def retrieve_active(self) -> RetrievedConfig:
+        """Retrieves the configuration that is active at the time of the call."""
+        return await self._run(self.client.retrieve_active)
+
+    async def retrieve_at(self, raw_timestamp: str) -> RetrievedConfig:
+        """Retrieves the configuration that was active at a given point in time."""
+        return await self._run(functools.partial(self.client.retrieve_at, raw_timestamp))
+
+
+async def send_config_async(
+    watchlist_endpoint: str,
+    credentials: Tuple[str, str],
+    path_to_watchlist_config_file: str,
+) -> RequestSummary:
+    """Submits a Watchlist configuration file without blocking the event loop.
+
+    This is the asyncio counterpart of config_sender.send_config. The request is run on the
+    default executor of the event loop, through the default WatchlistClient. To bound the
+    number of concurrent requests, use an AsyncWatchlistClient instead.
+
+    Parameters
+    ----------
+    watchlist_endpoint: str
+        The POST endpoint of the Watchlist API.
+    credentials: Tuple[str, str]
+        A tuple containing the user name and password used to access the Watchlist API.
+    path_to_watchlist_config_file
+        The path to the location of the Watchlist configuration file that has to be
+        uploaded.
+
+    Returns
+    -------
+    RequestSummary
+        A RequestSummary named-tuple containing the timestamp of the response and a
+        dictionary that contains the summary of the action performed as a result of
+        the request to update the configuration of the watchlist configuration file.
+    """
+    return await get_running_loop().run_in_executor(
+        None,
+        functools.partial(
+            get_default_client().post_config,
+            watchlist_endpoint,
+            path_to_watchlist_config_file,
+            credentials,
+        ),
+    )
+
+
+async def retrieve_config_async(
+    watchlist_endpoint: str,
+    credentials: Tuple[str, str],
+) -> RetrievedConfig:
+    """Retrieves an active or deactivated configuration without blocking the event loop.
+
+    This is the asyncio counterpart of config_retriever.retrieve_config. The request is run
+    on the default executor of the event loop, through the default WatchlistClient. To
+    bound the number of concurrent requests, use an AsyncWatchlistClient instead.
+
+    Parameters
+    ----------
+    watchlist_endpoint: str
+        The watchlist API GET endpoint.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the Watchlist API.
+
+    Returns
+    -------
+    RetrievedConfig
+        A named tuple containing the timestamp of the retrieved configuration, and a
+        byte-string object containing the body of the retrieved configuration.
+    """
+    return await get_running_loop().run_in_executor(
+        None,
+        functools.partial(get_default_client().get_config, watchlist_endpoint, credentials),
+    )
@@ -0,0 +1,183 @@
+"""Implements the search of the points in time where the active configuration changed."""
+import datetime
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from watchlist_api_client import config_diff, config_retriever
+from watchlist_api_client.data_structures import ChangePoint
+from watchlist_api_client.helpers import format_utc_timestamp
+from watchlist_api_client.history import prepare_history_url
+from watchlist_api_client.retry import RetryPolicy
+
+DEFAULT_RESOLUTION = datetime.timedelta(minutes=1)
+
+
+def compute_config_digest(config_body: bytes, source_id: Optional[str] = None) -> str:
+    """Computes the SHA-256 digest of a configuration, or of the symbols of one source.
+
+    Parameters
+    ----------
+    config_body: bytes
+        The body of a configuration retrieved from the Watchlist API.
+    source_id: Optional[str]
+        If passed, only the symbols of this source are hashed, sorted so that the digest
+        does not depend on the order of the rows.
+
+    Returns
+    -------
+    str
+        The hexadecimal representation of the digest.
+    """
+    if source_id is None:
+        return hashlib.sha256(config_body).hexdigest()
+    symbols = config_diff.load_source_symbols_from_body(config_body).get(source_id, frozenset())
+    return hashlib.sha256("\n".join(sorted(symbols)).encode()).hexdigest()
+
+
+class ConfigurationProbe:
+    """Retrieves the digest of the configuration active at points in time, memoizing them.
+
+    Every point in time is retrieved at most once per probe, so that the overlapping
+    intervals examined by a bisection share their end points. Across probes and runs, the
+    retrievals go through the snapshot cache, in which historical configurations are kept
+    permanently. A point in time at which no configuration was active has a None digest.
+    """
+
+    def __init__(
+        self,
+        watchlist_endpoint: str,
+        credentials: Tuple[str, str],
+        source_id: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        use_cache: bool = True,
+    ) -> None:
+        """Initialises the probe.
+
+        Parameters
+        ----------
+        watchlist_endpoint: str
+            The watchlist API GET endpoint, without query string.
+        credentials: Tuple[str, str]
+            A tuple containing the username and password used to access the Watchlist API.
+        source_id: Optional[str]
+            If passed, only the changes to the symbols of this source are considered.
+        retry_policy: Optional[RetryPolicy]
+            The policy controlling how each retrieval is retried after a transient failure.
+        use_cache: bool
+            Whether the snapshot cache is used.
+        """
+        self.watchlist_endpoint = watchlist_endpoint
+        self.credentials = credentials
+        self.source_id = source_id
+        self.retry_policy = retry_policy
+        self.use_cache = use_cache
+        self.retrievals = 0
+        self._digests: Dict[datetime.datetime, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def digest_at(self, timestamp: datetime.datetime) -> Optional[str]:
+        """Returns the digest of the configuration active at a point in time.
+
+        Parameters
+        ----------
+        timestamp: datetime.datetime
+            The point in time, in UTC.
+
+        Returns
+        -------
+        Optional[str]
+            The digest of the configuration, or None if no configuration was active.
+        """
+        with self._lock:
+            if timestamp in self._digests:
+                return self._digests[timestamp]
+        try:
+            retrieved_config = config_retriever.retrieve_config(
+                prepare_history_url(self.watchlist_endpoint, timestamp),
+                self.credentials,
+                self.retry_policy,
+                use_cache=self.use_cache,
+            )
+        except requests.exceptions.HTTPError as http_error:
+            if http_error.response is None or http_error.response.status_code != 404:
+                raise
+            digest = None
+        else:
+            digest = compute_config_digest(retrieved_config.config_body, self.source_id)
+        with self._lock:
+            self.retrievals += 1
+            self._digests[timestamp] = digest
+        return digest
+
+
+def find_change_points(
+    probe: ConfigurationProbe,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    resolution: datetime.timedelta = DEFAULT_RESOLUTION,
+) -> List[ChangePoint]:
+    """Finds the points in time where the active configuration changed, by bisection.
+
+    The interval from start to end is split in two halves on the grid of points in time
+    spaced by resolution from start. A half whose two ends have the same digest is assumed
+    to hold no change, and the halves whose ends differ are split again, until they are
+    resolution wide. Each change is therefore located with about log2 of the number of
+    grid points retrievals, instead of one retrieval per grid point.
+
+    The end of the interval is rounded down to the grid. Bisection cannot see changes that
+    are undone within the same half: a configuration that changes and changes back between
+    two probed points in time is not reported.
+
+    Parameters
+    ----------
+    probe: ConfigurationProbe
+        The probe retrieving the digests of the configurations.
+    start: datetime.datetime
+        The beginning of the searched interval, in UTC.
+    end: datetime.datetime
+        The end of the searched interval, in UTC.
+    resolution: datetime.timedelta
+        The width of the intervals to which the change points are narrowed down.
+
+    Returns
+    -------
+    List[ChangePoint]
+        The change points, in chronological order.
+
+    Raises
+    ------
+    ValueError
+        If start is after end.
+    """
+    if start > end:
+        raise ValueError(
+            f"The start of the interval, {format_utc_timestamp(start)}, is after its end, "
+            f"{format_utc_timestamp(end)}"
+        )
+    steps = (end - start) // resolution
+    change_points = []
+    intervals = [(0, steps)]
+    while intervals:
+        first_step, last_step = intervals.pop()
+        first_timestamp = start + first_step * resolution
+        last_timestamp = start + last_step * resolution
+        first_digest = probe.digest_at(first_timestamp)
+        last_digest = probe.digest_at(last_timestamp)
+        if first_digest == last_digest:
+            continue
+        if last_step - first_step <= 1:
+            change_points.append(ChangePoint(
+                last_before_change=format_utc_timestamp(first_timestamp),
+                first_after_change=format_utc_timestamp(last_timestamp),
+                digest_before_change=first_digest,
+                digest_after_change=last_digest,
+            ))
+            continue
+        middle_step = (first_step + last_step) // 2
+        # The later half is pushed first, so that the change points come out in order.
+        intervals.append((middle_step, last_step))
+        intervals.append((first_step, middle_step))
+    return change_points
@@ -0,0 +1,468 @@
+"""Implements a reusable client that keeps a pool of connections to the Watchlist API."""
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, Optional, Tuple, cast
+
+import requests
+import requests.adapters
+
+from watchlist_api_client.api_responses import (
+    get_retrieved_config_path,
+    infer_timestamp_from_retrieved_response,
+    package_retrieved_configuration,
+    react_to_status_code_200,
+)
+from watchlist_api_client.compression import STDIN_PATH, compress_chunks, open_decompressed
+from watchlist_api_client.config_validator import ValidatingReader
+from watchlist_api_client.data_structures import (
+    RequestSummary,
+    RetrievedConfig,
+    RetrievedConfigFile,
+)
+from watchlist_api_client.helpers import (
+    convert_raw_utc_timestamp_to_string,
+    join_base_url_and_query_string,
+    prepare_timestamp_query_string,
+    write_file_atomically,
+)
+from watchlist_api_client.multipart import MultipartFileStream, get_content_size
+from watchlist_api_client.retry import NO_RETRY, CircuitBreaker, RetryPolicy
+
+
+WATCHLIST_API_ENDPOINT = (
+    "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
+)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class WatchlistClient:
+    """A client of the Watchlist API that reuses its connections across calls.
+
+    The client owns an HTTPAdapter that keeps a pool of connections to the Watchlist API
+    alive between requests, so that only the first call to the API pays for the TCP
+    connection and the TLS handshake. The requests made with each set of credentials go
+    through a requests.Session of their own, mounting that adapter, so that the cookies
+    set in response to the requests of one user are never sent with the requests of
+    another. The client also stores the credentials and the base URL of the API, and can
+    be used as a context manager to release the pooled connections when done.
+
+    Failed requests are retried according to a RetryPolicy, which by default retries only
+    the GET requests. An optional CircuitBreaker makes the client fail fast, raising a
+    CircuitOpenError, after repeated server-side failures.
+    """
+
+    def __init__(
+        self,
+        credentials: Optional[Tuple[str, str]] = None,
+        base_url: str = WATCHLIST_API_ENDPOINT,
+        pool_connections: int = 1,
+        pool_maxsize: int = 10,
+        keep_alive: bool = True,
+        timeout: Optional[float] = None,
+        retry_policy: RetryPolicy = RetryPolicy(),
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        """Initialises the client and its connection pool.
+
+        Parameters
+        ----------
+        credentials: Optional[Tuple[str, str]]
+            A tuple containing the username and password used to access the Watchlist API.
+            If None, the credentials have to be passed to every call.
+        base_url: str
+            The URL of the Watchlist API endpoint.
+        pool_connections: int
+            The number of per-host connection pools kept by the session.
+        pool_maxsize: int
+            The maximum number of connections kept alive in each pool. This should be at
+            least the number of threads sharing the client.
+        keep_alive: bool
+            Whether the connections are kept alive between requests.
+        timeout: Optional[float]
+            The number of seconds after which a request times out. If None, the requests
+            never time out.
+        retry_policy: RetryPolicy
+            The policy controlling how failed requests are retried.
+        circuit_breaker: Optional[CircuitBreaker]
+            The circuit breaker shared by the requests of the client. If None, the client
+            never fails fast.
+        """
+        self.credentials = credentials
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.keep_alive = keep_alive
+        self.adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+        self._sessions: Dict[Optional[Tuple[str, str]], requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+        self.session = self.get_session(credentials)
+
+    def __enter__(self) -> "WatchlistClient":
+        """Returns the client itself when entering a with statement."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Closes the client when exiting a with statement."""
+        self.close()
+
+    def close(self) -> None:
+        """Closes the sessions and the pooled connections."""
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def get_session(self, credentials: Optional[Tuple[str, str]] = None) -> requests.Session:
+        """Returns the session of the requests made with a set of credentials.
+
+        The session is created on first use. All the sessions share the adapter of the
+        client, and thereby its pool of connections, but each keeps its own cookies.
+
+        Parameters
+        ----------
+        credentials: Optional[Tuple[str, str]]
+            The username and password sent with the requests, or None for the requests
+            made without credentials.
+
+        Returns
+        -------
+        requests.Session
+            The session of the credentials.
+        """
+        session_key = credentials or None
+        with self._sessions_lock:
+            session = self._sessions.get(session_key)
+            if session is None:
+                session = requests.Session()
+                session.mount("https://", self.adapter)
+                session.mount("http://", self.adapter)
+                if not self.keep_alive:
+                    session.headers["Connection"] = "close"
+                self._sessions[session_key] = session
+        return session
+
+    def send_with_retries(
+        self,
+        method: str,
+        send_request: Callable[[], requests.Response],
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> requests.Response:
+        """Sends a request, retrying it according to the retry policy.
+
+        Parameters
+        ----------
+        method: str
+            The HTTP method of the request, which determines whether it can be retried.
+        send_request: Callable[[], requests.Response]
+            A function sending the request once and returning its response. It is called
+            again for every attempt, so it has to rebuild any streamed body.
+        retry_policy: Optional[RetryPolicy]
+            The policy used for this request. If None, the policy of the client is used.
+
+        Returns
+        -------
+        requests.Response
+            The response to the last attempt, whatever its status code.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit breaker of the client is open.
+        requests.exceptions.ConnectionError, requests.exceptions.Timeout
+            If the last attempt failed without a response.
+        """
+        retry_policy = retry_policy or self.retry_policy
+        can_retry = retry_policy.allows_retry_of(method)
+        attempt = 1
+        while True:
+            if self.circuit_breaker:
+                self.circuit_breaker.before_request()
+            is_last_attempt = not can_retry or attempt >= retry_policy.max_attempts
+            try:
+                response = send_request()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure()
+                if is_last_attempt:
+                    raise
+                time.sleep(retry_policy.compute_backoff(attempt))
+                attempt += 1
+                continue
+            if self.circuit_breaker:
+                if response.status_code >= 500:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+            if is_last_attempt or response.status_code not in retry_policy.retry_on_status:
+                return response
+            response.close()
+            time.sleep(retry_policy.compute_delay(attempt, response.headers.get("Retry-After")))
+            attempt += 1
+
+    def post_config(
+        self,
+        watchlist_endpoint: str,
+        path_to_watchlist_config_file: str,
+        credentials: Optional[Tuple[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        validate: bool = False,
+    ) -> RequestSummary:
+        """Submits a Watchlist configuration file to an endpoint of the Watchlist API.
+
+        A file compressed with gzip, bzip2, xz or zstd is decompressed while it is uploaded,
+        and "-" uploads the standard input. Since the size of such content is unknown in
+        advance, it is sent with chunked transfer encoding; and since the standard input
+        can only be read once, its submission is never retried.
+
+        Parameters
+        ----------
+        watchlist_endpoint: str
+            The POST endpoint of the Watchlist API.
+        path_to_watchlist_config_file: str
+            The path to the location of the Watchlist configuration file that has to be
+            uploaded, possibly compressed, or "-" for the standard input.
+        credentials: Optional[Tuple[str, str]]
+            The credentials used for the request. If None, the credentials of the client
+            are used.
+        retry_policy: Optional[RetryPolicy]
+            The retry policy used for the request. If None, the policy of the client is
+            used. Note that the submission is retried only if the policy has retry_post set.
+        validate: bool
+            Whether to validate the configuration while it is uploaded, in the same pass.
+            The upload is then interrupted before the end of the body is sent if the
+            configuration turns out to be invalid, so that the server never receives a
+            complete request.
+
+        Returns
+        -------
+        RequestSummary
+            A RequestSummary named-tuple containing the timestamp of the response and a
+            dictionary that contains the summary of the action performed as a result of
+            the request to update the configuration of the watchlist configuration file.
+
+        Raises
+        ------
+        requests.exceptions.HTTPError
+            If the API call is not successful.
+        config_validator.InvalidConfigurationError
+            If validate is set and the configuration is improperly formatted.
+        """
+        def send_request() -> requests.Response:
+            with open_decompressed(path_to_watchlist_config_file) as config_file:
+                content_size = get_content_size(config_file)
+                if validate:
+                    # The reader is only ever read from, which is all the stream needs.
+                    config_file = cast(BinaryIO, ValidatingReader(config_file))
+                config_payload = MultipartFileStream(config_file, content_size=content_size)
+                return self.get_session(credentials or self.credentials).post(
+                    watchlist_endpoint,
+                    auth=credentials or self.credentials,
+                    data=config_payload if config_payload.length is not None
+                    else iter(config_payload),
+                    headers={"Content-Type": config_payload.content_type},
+                    timeout=self.timeout,
+                )
+
+        if path_to_watchlist_config_file == STDIN_PATH:
+            retry_policy = NO_RETRY
+
+        with self.send_with_retries("POST", send_request, retry_policy) as response:
+            response.raise_for_status()
+            return react_to_status_code_200(response)
+
+    def get_config(
+        self,
+        watchlist_endpoint: str,
+        credentials: Optional[Tuple[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        on_response: Optional[Callable[[requests.Response], None]] = None,
+    ) -> RetrievedConfig:
+        """Retrieves a configuration from an endpoint of the Watchlist API.
+
+        Parameters
+        ----------
+        watchlist_endpoint: str
+            The GET endpoint of the Watchlist API, optionally with a dateTime query string.
+        credentials: Optional[Tuple[str, str]]
+            The credentials used for the request. If None, the credentials of the client
+            are used.
+        retry_policy: Optional[RetryPolicy]
+            The retry policy used for the request. If None, the policy of the client is
+            used.
+        on_response: Optional[Callable[[requests.Response], None]]
+            A function called with the successful response, e.g. to read its headers.
+
+        Returns
+        -------
+        RetrievedConfig
+            A named tuple containing the timestamp of the retrieved configuration, and a
+            byte-string object containing the body of the retrieved configuration.
+
+        Raises
+        ------
+        requests.exceptions.HTTPError
+            If the API call is not successful.
+        """
+        def send_request() -> requests.Response:
+            return self.get_session(credentials or self.credentials).get(
+                watchlist_endpoint,
+                auth=credentials or self.credentials,
+                timeout=self.timeout,
+            )
+
+        with self.send_with_retries("GET", send_request, retry_policy) as response:
+            response.raise_for_status()
+            if on_response:
+                on_response(response)
+            return package_retrieved_configuration(response)
+
+    def download_config(
+        self,
+        watchlist_endpoint: str,
+        path_to_directory: str,
+        credentials: Optional[Tuple[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        compression: Optional[str] = None,
+        on_response: Optional[Callable[[requests.Response], None]] = None,
+    ) -> RetrievedConfigFile:
+        """Retrieves a configuration from an endpoint of the Watchlist API to a file.
+
+        The response is streamed and written in chunks of chunk_size bytes to a temporary
+        file in path_to_directory, which is atomically renamed to
+        watchlist_config@<timestamp>.csv once the whole body has been received. With a
+        compression, the chunks go through the compressor as they are received, and the
+        file name gets the .gz or .zst suffix.
+
+        Parameters
+        ----------
+        watchlist_endpoint: str
+            The GET endpoint of the Watchlist API, optionally with a dateTime query string.
+        path_to_directory: str
+            The directory where the retrieved configuration is written.
+        credentials: Optional[Tuple[str, str]]
+            The credentials used for the request. If None, the credentials of the client
+            are used.
+        retry_policy: Optional[RetryPolicy]
+            The retry policy used for the request. If None, the policy of the client is
+            used.
+        chunk_size: int
+            The number of bytes read from the response at a time.
+        compression: Optional[str]
+            The compression of the written file, "gzip" or "zstd". If None, the file is
+            written uncompressed.
+        on_response: Optional[Callable[[requests.Response], None]]
+            A function called with the successful response, e.g. to read its headers.
+
+        Returns
+        -------
+        RetrievedConfigFile
+            A named tuple containing the timestamp of the retrieved configuration, the path
+            to the file it was written to and its size in bytes.
+
+        Raises
+        ------
+        requests.exceptions.HTTPError
+            If the API call is not successful.
+        """
+        def send_request() -> requests.Response:
+            return self.get_session(credentials or self.credentials).get(
+                watchlist_endpoint,
+                auth=credentials or self.credentials,
+                timeout=self.timeout,
+                stream=True,
+            )
+
+        with self.send_with_retries("GET", send_request, retry_policy) as response:
+            response.raise_for_status()
+            if on_response:
+                on_response(response)
+            timestamp = infer_timestamp_from_retrieved_response(response)
+            path_to_file = get_retrieved_config_path(
+                path_to_directory, timestamp, compression,
+            )
+            size = write_file_atomically(
+                path_to_file, compress_chunks(response.iter_content(chunk_size), compression),
+            )
+        return RetrievedConfigFile(timestamp=timestamp, path=path_to_file, size=size)
+
+    def submit(self, path_to_watchlist_config_file: str) -> RequestSummary:
+        """Submits a Watchlist configuration file to the base URL of the client.
+
+        Parameters
+        ----------
+        path_to_watchlist_config_file: str
+            The path to the location of the Watchlist configuration file that has to be
+            uploaded.
+
+        Returns
+        -------
+        RequestSummary
+            A RequestSummary named-tuple containing the timestamp of the response and the
+            summary of the actions performed as a result of the submission.
+        """
+        return self.post_config(self.base_url, path_to_watchlist_config_file)
+
+    def retrieve_active(self) -> RetrievedConfig:
+        """Retrieves the configuration that is active at the time of the call.
+
+        Returns
+        -------
+        RetrievedConfig
+            A named tuple containing the timestamp of the retrieved configuration, and a
+            byte-string object containing the body of the retrieved configuration.
+        """
+        return self.get_config(self.base_url)
+
+    def retrieve_at(self, raw_timestamp: str) -> RetrievedConfig:
+        """Retrieves the configuration that was active at a given point in time.
+
+        Parameters
+        ----------
+        raw_timestamp: str
+            A string containing a raw UTC timestamp, e.g. 2020-11-20T17:59:00Z.
+
+        Returns
+        -------
+        RetrievedConfig
+            A named tuple containing the timestamp of the retrieved configuration, and a
+            byte-string object containing the body of the retrieved configuration.
+        """
+        return self.get_config(
+            join_base_url_and_query_string(
+                self.base_url,
+                prepare_timestamp_query_string(
+                    convert_raw_utc_timestamp_to_string(raw_timestamp),
+                ),
+            ),
+        )
+
+
+_default_client: Optional[WatchlistClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> WatchlistClient:
+    """Returns the client shared by the module-level functions of the library.
+
+    The client is created on first use, without credentials and with a circuit breaker,
+    and is then reused by every call to config_sender.send_config and
+    config_retriever.retrieve_config, so that consecutive calls share the same pool of
+    connections and the same circuit. The client is created under a lock, so that threads
+    calling the function concurrently, e.g. the jobs of the daemon, share a single client.
+
+    Returns
+    -------
+    WatchlistClient
+        The default client.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = WatchlistClient(circuit_breaker=CircuitBreaker())
+    return _default_client
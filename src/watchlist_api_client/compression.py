@@ -0,0 +1,246 @@
+"""Implements the streaming compression and decompression of configurations and summaries."""
+import bz2
+import gzip
+import io
+import lzma
+import pathlib
+import sys
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Union, cast
+import zlib
+
+from watchlist_api_client.defaults import COMPRESSION_SUFFIXES, COMPRESSIONS
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MAGIC_NUMBERS = {
+    "gzip": b"\x1f\x8b",
+    "bzip2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+MAGIC_NUMBER_LENGTH = max(len(magic_number) for magic_number in COMPRESSION_MAGIC_NUMBERS.values())
+GZIP_COMPRESSION_LEVEL = 6
+ZSTD_COMPRESSION_LEVEL = 3
+READ_CHUNK_SIZE = 1024 * 1024
+STDIN_PATH = "-"
+
+
+class CompressionUnavailableError(ImportError):
+    """An exception class that is raised when the library needed by a compression is missing."""
+
+    pass
+
+
+def check_compression(compression: Optional[str]) -> None:
+    """Checks that a compression is known and that the library it relies on is installed.
+
+    Parameters
+    ----------
+    compression: Optional[str]
+        The compression, one of "gzip", "bzip2", "xz" and "zstd", or None for no
+        compression.
+
+    Raises
+    ------
+    ValueError
+        If the compression is unknown.
+    CompressionUnavailableError
+        If the compression is zstd and the zstandard package is not installed.
+    """
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(
+            f"Unknown compression {compression!r}, expected one of {', '.join(COMPRESSIONS)}"
+        )
+    if compression == "zstd" and zstandard is None:
+        raise CompressionUnavailableError(
+            "The zstd compression requires the zstandard package: pip install zstandard"
+        )
+
+
+def get_compression_suffix(compression: Optional[str]) -> str:
+    """Returns the suffix appended to the names of the files written with a compression."""
+    check_compression(compression)
+    return COMPRESSION_SUFFIXES[compression] if compression else ""
+
+
+def infer_compression(path_to_file: str) -> Optional[str]:
+    """Infers the compression of a file from its suffix.
+
+    Parameters
+    ----------
+    path_to_file: str
+        The location of the file.
+
+    Returns
+    -------
+    Optional[str]
+        The compression of the file, or None if its suffix is not a compression suffix.
+    """
+    suffix = pathlib.Path(path_to_file).suffix
+    for compression, compression_suffix in COMPRESSION_SUFFIXES.items():
+        if suffix == compression_suffix:
+            return compression
+    return None
+
+
+def detect_compression(leading_bytes: bytes) -> Optional[str]:
+    """Detects the compression of a content from the magic number it starts with.
+
+    Parameters
+    ----------
+    leading_bytes: bytes
+        The first bytes of the content, at least MAGIC_NUMBER_LENGTH of them if available.
+
+    Returns
+    -------
+    Optional[str]
+        The compression of the content, or None if it does not start with the magic number
+        of any supported compression, as is the case of Watchlist configuration files.
+    """
+    for compression, magic_number in COMPRESSION_MAGIC_NUMBERS.items():
+        if leading_bytes.startswith(magic_number):
+            return compression
+    return None
+
+
+def is_plain_file(path_to_file: str) -> bool:
+    """Whether a path refers to an uncompressed file, rather than to a compressed one or stdin.
+
+    Plain files can be read more than once, memory-mapped and sized in advance; compressed
+    files and the standard input can only be read as a stream.
+    """
+    if path_to_file == STDIN_PATH:
+        return False
+    with open(path_to_file, 'rb') as infile:
+        return detect_compression(infile.read(MAGIC_NUMBER_LENGTH)) is None
+
+
+def compress_chunks(chunks: Iterable[bytes], compression: Optional[str]) -> Iterator[bytes]:
+    """Compresses a sequence of chunks lazily, as they are produced.
+
+    The chunks go through an incremental compressor, so that the compressed content is
+    never built in memory as a whole and can be written to disk while it is produced,
+    e.g. while a configuration is being downloaded. The gzip output does not embed any
+    modification time, so that compressing the same content always gives the same bytes.
+
+    Parameters
+    ----------
+    chunks: Iterable[bytes]
+        The content to compress.
+    compression: Optional[str]
+        The compression, one of "gzip", "bzip2", "xz" and "zstd". If None, the chunks are
+        left untouched.
+
+    Returns
+    -------
+    Iterator[bytes]
+        The compressed content.
+
+    Raises
+    ------
+    ValueError
+        If the compression is unknown.
+    CompressionUnavailableError
+        If the compression is zstd and the zstandard package is not installed.
+    """
+    # The compression is checked eagerly, before the first chunk is requested.
+    check_compression(compression)
+    if compression is None:
+        return iter(chunks)
+    if compression == "gzip":
+        gzip_compressor = zlib.compressobj(
+            GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS,
+        )
+        return _compress_chunks(chunks, gzip_compressor.compress, gzip_compressor.flush)
+    if compression == "bzip2":
+        bzip2_compressor = bz2.BZ2Compressor()
+        return _compress_chunks(chunks, bzip2_compressor.compress, bzip2_compressor.flush)
+    if compression == "xz":
+        xz_compressor = lzma.LZMACompressor()
+        return _compress_chunks(chunks, xz_compressor.compress, xz_compressor.flush)
+    zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).compressobj()
+    return _compress_chunks(chunks, zstd_compressor.compress, zstd_compressor.flush)
+
+
+def _compress_chunks(
+    chunks: Iterable[bytes],
+    compress: Callable[[bytes], bytes],
+    flush: Callable[[], bytes],
+) -> Iterator[bytes]:
+    for chunk in chunks:
+        compressed_chunk = compress(chunk)
+        if compressed_chunk:
+            yield compressed_chunk
+    yield flush()
+
+
+def _open_decompressor(source: Union[str, BinaryIO], compression: str) -> BinaryIO:
+    # A decompressor opened on a path owns the underlying file, while one opened on a file
+    # object leaves it open. The decompressed files are binary files, which the standard
+    # library does not declare as BinaryIO.
+    if compression == "gzip":
+        return cast(BinaryIO, gzip.open(source, 'rb'))
+    if compression == "bzip2":
+        return cast(BinaryIO, bz2.open(source, 'rb'))
+    if compression == "xz":
+        return cast(BinaryIO, lzma.open(source, 'rb'))
+    check_compression(compression)
+    decompressor = zstandard.ZstdDecompressor()
+    if isinstance(source, str):
+        return io.BufferedReader(decompressor.stream_reader(open(source, 'rb'), closefd=True))
+    return io.BufferedReader(decompressor.stream_reader(source, closefd=False))
+
+
+def open_decompressed(path_to_file: str) -> BinaryIO:
+    """Opens a file for reading, decompressing it transparently.
+
+    The compression is detected from the magic number the content starts with, whatever
+    the name of the file, among gzip, bzip2, xz and zstd. The content is decompressed as it
+    is read, never as a whole. Passing "-" reads the standard input, which can be
+    compressed as well.
+
+    Parameters
+    ----------
+    path_to_file: str
+        The location of the file, possibly compressed, or "-" for the standard input.
+
+    Returns
+    -------
+    BinaryIO
+        A binary file object producing the decompressed content.
+
+    Raises
+    ------
+    CompressionUnavailableError
+        If the content is compressed with zstd and the zstandard package is not installed.
+    """
+    if path_to_file == STDIN_PATH:
+        stdin = sys.stdin.buffer
+        if not hasattr(stdin, "peek"):
+            stdin = io.BufferedReader(stdin)
+        compression = detect_compression(stdin.peek(MAGIC_NUMBER_LENGTH)[:MAGIC_NUMBER_LENGTH])
+        return _open_decompressor(stdin, compression) if compression else stdin
+    infile = open(path_to_file, 'rb')
+    compression = detect_compression(infile.peek(MAGIC_NUMBER_LENGTH)[:MAGIC_NUMBER_LENGTH])
+    if compression is None:
+        return infile
+    infile.close()
+    return _open_decompressor(path_to_file, compression)
+
+
+def read_decompressed_chunks(
+    path_to_file: str, chunk_size: int = READ_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Reads the decompressed content of a file lazily, in chunks of chunk_size bytes."""
+    with open_decompressed(path_to_file) as infile:
+        yield from iter(lambda: infile.read(chunk_size), b"")
+
+
+def read_decompressed_bytes(path_to_file: str) -> bytes:
+    """Reads the whole decompressed content of a file."""
+    with open_decompressed(path_to_file) as infile:
+        return infile.read()
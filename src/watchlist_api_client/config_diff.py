@@ -0,0 +1,785 @@
+"""Implements the comparison of Watchlist configurations source by source."""
+from collections import defaultdict
+import email.utils
+import io
+import itertools
+import json
+import operator
+import pathlib
+import re
+from typing import BinaryIO, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from watchlist_api_client import external_sort
+from watchlist_api_client.compression import open_decompressed, read_decompressed_bytes
+from watchlist_api_client.data_structures import (
+    ConfigurationDiff,
+    RequestSummary,
+    RetrievedConfig,
+    SourceDiff,
+    WatchlistConfig,
+)
+from watchlist_api_client.defaults import COMPRESSION_SUFFIXES
+from watchlist_api_client.helpers import parse_row, unquote_line
+
+
+SourceSymbols = Dict[str, FrozenSet[str]]
+Configuration = Union[RetrievedConfig, WatchlistConfig, str]
+
+ANY_SOURCE_ID_PATTERN = re.compile(rb"^([0-9]+),", re.MULTILINE)
+MAX_SOURCE_IDS_PER_PATTERN = 16
+
+
+def index_rows(rows: Iterable[str]) -> SourceSymbols:
+    """Indexes the rows of a Watchlist configuration by source ID.
+
+    Every source ID is mapped to the hash set of its RTS symbols, so that comparing the
+    symbols of a source across two configurations takes time proportional to the number
+    of symbols of that source only. Blank rows are skipped, quoted fields are unquoted as
+    by the validator, duplicated rows collapse into one and source IDs are normalised
+    numerically, so that 0207 and 207 are the same source, as when the rows are merged in
+    order.
+
+    Parameters
+    ----------
+    rows: Iterable[str]
+        The rows of a Watchlist configuration, header excluded and line endings stripped.
+
+    Returns
+    -------
+    SourceSymbols
+        A dictionary mapping every source ID to the set of its RTS symbols.
+    """
+    source_symbols: Dict[str, Set[str]] = defaultdict(set)
+    for row in rows:
+        if row:
+            source_id, _, symbol = unquote_line(row).partition(",")
+            source_symbols[source_id].add(symbol)
+    normalised_source_symbols: Dict[str, Set[str]] = defaultdict(set)
+    for source_id, symbols in source_symbols.items():
+        normalised_source_symbols[str(int(source_id))] |= symbols
+    return {
+        source_id: frozenset(symbols)
+        for source_id, symbols in normalised_source_symbols.items()
+    }
+
+
+def load_source_symbols(path_to_watchlist_config_file: str) -> SourceSymbols:
+    """Loads the symbols of each source from a Watchlist configuration file.
+
+    Parameters
+    ----------
+    path_to_watchlist_config_file: str
+        The location of the Watchlist configuration file, which is decompressed if its name
+        ends with .gz or .zst.
+
+    Returns
+    -------
+    SourceSymbols
+        A dictionary mapping every source ID to the set of its RTS symbols.
+    """
+    return load_source_symbols_from_body(read_decompressed_bytes(path_to_watchlist_config_file))
+
+
+def load_source_symbols_from_body(config_body: bytes) -> SourceSymbols:
+    """Loads the symbols of each source from the body of a retrieved configuration.
+
+    The body is decoded and split in one pass, rather than line by line, which keeps the
+    indexing of configurations with millions of rows fast.
+
+    Parameters
+    ----------
+    config_body: bytes
+        The body of a configuration retrieved from the Watchlist API.
+
+    Returns
+    -------
+    SourceSymbols
+        A dictionary mapping every source ID to the set of its RTS symbols.
+    """
+    return index_rows(itertools.islice(config_body.decode().splitlines(), 1, None))
+
+
+def find_snapshots(path_to_directory: str) -> List[str]:
+    """Finds the configurations written to a directory by the retrieve command.
+
+    Parameters
+    ----------
+    path_to_directory: str
+        The directory containing the watchlist_config@<timestamp>.csv files, possibly
+        compressed.
+
+    Returns
+    -------
+    List[str]
+        The paths to the files, sorted by timestamp.
+    """
+    snapshot_suffixes = {".csv"} | {f".csv{suffix}" for suffix in COMPRESSION_SUFFIXES.values()}
+    snapshots = sorted(
+        (
+            snapshot
+            for snapshot in pathlib.Path(path_to_directory).glob("watchlist_config@*.csv*")
+            if "".join(snapshot.suffixes) in snapshot_suffixes
+        ),
+        key=lambda snapshot: get_snapshot_timestamp(snapshot.as_posix()),
+    )
+    return [snapshot.as_posix() for snapshot in snapshots]
+
+
+def get_snapshot_timestamp(path_to_snapshot: str) -> str:
+    """Returns the timestamp in the name of a watchlist_config@<timestamp>.csv file."""
+    return pathlib.Path(path_to_snapshot).name.partition("@")[2].partition(".")[0]
+
+
+def find_latest_snapshot(path_to_directory: str) -> Optional[str]:
+    """Finds the most recent configuration written to a directory by the retrieve command.
+
+    Parameters
+    ----------
+    path_to_directory: str
+        The directory containing the watchlist_config@<timestamp>.csv files, possibly
+        compressed.
+
+    Returns
+    -------
+    Optional[str]
+        The path to the file with the latest timestamp, or None if there is none.
+    """
+    snapshots = find_snapshots(path_to_directory)
+    return snapshots[-1] if snapshots else None
+
+
+def sort_source_ids(source_ids: Iterable[str]) -> List[str]:
+    """Sorts source IDs in numerical order."""
+    return sorted(source_ids, key=lambda source_id: (len(source_id), source_id))
+
+
+def summarize_changes(
+    local_source_symbols: SourceSymbols,
+    active_source_symbols: SourceSymbols,
+) -> Dict[str, Union[int, List[str]]]:
+    """Summarises the changes that submitting a configuration would make to the active one.
+
+    The summary has the same shape as the one returned by the Watchlist API after a
+    submission: sources only present in the local configuration are created, sources whose
+    symbols differ are updated, and sources only present in the active configuration are
+    deactivated. Since entitlements are only known to the server, no source is reported as
+    failed.
+
+    Parameters
+    ----------
+    local_source_symbols: SourceSymbols
+        The symbols of each source of the configuration to submit.
+    active_source_symbols: SourceSymbols
+        The symbols of each source of the active configuration.
+
+    Returns
+    -------
+    Dict[str, Union[int, List[str]]]
+        A dictionary with the nbCreated, nbUpdated, nbFailed and nbDeactivated counts and
+        the created, updated, failed and deactivated lists of source IDs.
+    """
+    created = sort_source_ids(local_source_symbols.keys() - active_source_symbols.keys())
+    deactivated = sort_source_ids(active_source_symbols.keys() - local_source_symbols.keys())
+    updated = sort_source_ids(
+        source_id
+        for source_id in local_source_symbols.keys() & active_source_symbols.keys()
+        if local_source_symbols[source_id] != active_source_symbols[source_id]
+    )
+    return {
+        "nbCreated": len(created),
+        "nbUpdated": len(updated),
+        "nbFailed": 0,
+        "nbDeactivated": len(deactivated),
+        "created": created,
+        "updated": updated,
+        "failed": [],
+        "deactivated": deactivated,
+    }
+
+
+def index_rows_of_body(config_body: bytes) -> Set[bytes]:
+    """Indexes the rows of a Watchlist configuration body, header excluded, in a hash set.
+
+    The rows are neither decoded nor split into source ID and symbol, so that the index of
+    a configuration with millions of rows is built at C speed.
+    """
+    rows = set(itertools.islice(config_body.splitlines(), 1, None))
+    rows.discard(b"")
+    return rows
+
+
+def find_source_ids(config_body: bytes, candidate_source_ids: Set[bytes]) -> Set[bytes]:
+    """Finds which of the candidate source IDs have at least one row in a configuration.
+
+    A few candidates are looked up in a single scan of the body, with a pattern matching
+    them only; many candidates are looked up among all the source IDs of the body.
+
+    Parameters
+    ----------
+    config_body: bytes
+        The content of a Watchlist configuration file.
+    candidate_source_ids: Set[bytes]
+        The source IDs to look up.
+
+    Returns
+    -------
+    Set[bytes]
+        The candidate source IDs found in the configuration.
+    """
+    if not candidate_source_ids:
+        return set()
+    if len(candidate_source_ids) <= MAX_SOURCE_IDS_PER_PATTERN:
+        source_id_pattern = re.compile(
+            rb"^(" + b"|".join(map(re.escape, candidate_source_ids)) + rb"),", re.MULTILINE,
+        )
+    else:
+        source_id_pattern = ANY_SOURCE_ID_PATTERN
+    return candidate_source_ids.intersection(source_id_pattern.findall(config_body))
+
+
+def has_canonical_rows(config_body: bytes) -> bool:
+    """Whether the rows of a configuration body are written as normalised by index_rows.
+
+    The rows must not be quoted, their source IDs must not be zero-padded, and their lines
+    must end with a line feed, possibly preceded by a carriage return.
+    """
+    is_unquoted = b'"' not in config_body
+    is_unpadded = b"\n0" not in config_body
+    return is_unquoted and is_unpadded and config_body.count(b"\r") == config_body.count(b"\r\n")
+
+
+def summarize_body_changes(
+    local_config_body: bytes,
+    active_config_body: bytes,
+) -> Dict[str, Union[int, List[str]]]:
+    """Summarises the changes that a configuration would make to the active one.
+
+    The result is the same as summarize_changes on the source symbols of the two
+    configurations. Instead of indexing the symbols of every source, the rows of each
+    configuration are indexed in a hash set, and only the rows that differ between the two
+    are split into source ID and symbol, which keeps the comparison fast for
+    configurations with millions of rows that mostly match. Rows can only be compared as
+    bytes if they are written the same way in both configurations, so that configurations
+    with quoted rows, zero-padded source IDs or lone carriage returns are compared through
+    their source symbols instead.
+
+    Parameters
+    ----------
+    local_config_body: bytes
+        The content of the configuration to submit.
+    active_config_body: bytes
+        The content of the active configuration.
+
+    Returns
+    -------
+    Dict[str, Union[int, List[str]]]
+        A dictionary with the nbCreated, nbUpdated, nbFailed and nbDeactivated counts and
+        the created, updated, failed and deactivated lists of source IDs.
+    """
+    if not (has_canonical_rows(local_config_body) and has_canonical_rows(active_config_body)):
+        return summarize_changes(
+            load_source_symbols_from_body(local_config_body),
+            load_source_symbols_from_body(active_config_body),
+        )
+    local_rows = index_rows_of_body(local_config_body)
+    active_rows = index_rows_of_body(active_config_body)
+    local_only_source_ids = {row.partition(b",")[0] for row in local_rows - active_rows}
+    active_only_source_ids = {row.partition(b",")[0] for row in active_rows - local_rows}
+    # A source whose differing rows are all on one side may still have rows in common with
+    # the other side, in which case it is updated rather than created or deactivated.
+    updated_source_ids = local_only_source_ids & active_only_source_ids
+    updated_source_ids |= find_source_ids(
+        active_config_body, local_only_source_ids - active_only_source_ids,
+    )
+    updated_source_ids |= find_source_ids(
+        local_config_body, active_only_source_ids - local_only_source_ids,
+    )
+    created = [source_id.decode() for source_id in local_only_source_ids - updated_source_ids]
+    updated = [source_id.decode() for source_id in updated_source_ids]
+    deactivated = [
+        source_id.decode() for source_id in active_only_source_ids - updated_source_ids
+    ]
+    return {
+        "nbCreated": len(created),
+        "nbUpdated": len(updated),
+        "nbFailed": 0,
+        "nbDeactivated": len(deactivated),
+        "created": sort_source_ids(created),
+        "updated": sort_source_ids(updated),
+        "failed": [],
+        "deactivated": sort_source_ids(deactivated),
+    }
+
+
+def stringify_changes(summary: Dict[str, Union[int, List[str]]]) -> str:
+    """Converts a summary of the changes to the active configuration in a readable string.
+
+    Parameters
+    ----------
+    summary: Dict[str, Union[int, List[str]]]
+        A summary of changes, as returned by summarize_changes.
+
+    Returns
+    -------
+    str
+        A representation of the summary in a human readable form.
+    """
+    changes = (
+        f"Changes with respect to the active configuration:\n"
+        f"  - {summary['nbCreated']} sources will be activated\n"
+        f"  - {summary['nbUpdated']} sources will be updated\n"
+        f"  - {summary['nbDeactivated']} sources will be deactivated\n"
+    )
+    for key, verb in (
+        ("created", "activated"), ("updated", "updated"), ("deactivated", "deactivated"),
+    ):
+        source_ids = summary[key]
+        if isinstance(source_ids, list) and source_ids:
+            changes += f"The following sources will be {verb}: {', '.join(source_ids)}\n"
+    return changes
+
+
+def predict_request_summary(
+    path_to_watchlist_config_file: str,
+    path_to_snapshot: str,
+) -> RequestSummary:
+    """Predicts the request summary that submitting a configuration file would produce.
+
+    The prediction compares the file to submit with a snapshot of the active configuration
+    previously retrieved to disk, without any request to the Watchlist API. Its summary is
+    the one returned by summarize_body_changes, so that the prediction can be rendered with
+    config_sender.stringify_response_summary like the summary of an actual submission.
+    Sources that the server would reject for lack of entitlements cannot be predicted, and
+    the prediction is only as recent as the snapshot.
+
+    Parameters
+    ----------
+    path_to_watchlist_config_file: str
+        The location of the Watchlist configuration file to submit, possibly compressed, or
+        "-" for the standard input.
+    path_to_snapshot: str
+        The location of a retrieved copy of the active configuration, which is decompressed
+        if its name ends with .gz or .zst.
+
+    Returns
+    -------
+    RequestSummary
+        A RequestSummary named-tuple containing the current time and the predicted summary.
+    """
+    return RequestSummary(
+        submission_time=email.utils.formatdate(usegmt=True),
+        summary=summarize_body_changes(
+            read_decompressed_bytes(path_to_watchlist_config_file),
+            read_decompressed_bytes(path_to_snapshot),
+        ),
+    )
+
+
+def load_configuration_source_symbols(configuration: Configuration) -> SourceSymbols:
+    """Loads the symbols of each source of a configuration held in memory or on disk.
+
+    Parameters
+    ----------
+    configuration: Configuration
+        A retrieved configuration, a WatchlistConfig, or the location of a Watchlist
+        configuration file, possibly compressed, or "-" for the standard input.
+
+    Returns
+    -------
+    SourceSymbols
+        A dictionary mapping every source ID to the set of its RTS symbols.
+    """
+    if isinstance(configuration, RetrievedConfig):
+        return load_source_symbols_from_body(configuration.config_body)
+    if isinstance(configuration, WatchlistConfig):
+        return {
+            str(source_id): frozenset(configuration.symbols_for(source_id))
+            for source_id in configuration.sources()
+        }
+    return load_source_symbols(configuration)
+
+
+def iterate_sorted_rows(configuration: Configuration) -> Iterator[Tuple[int, str]]:
+    """Iterates over the distinct rows of a configuration whose rows are sorted.
+
+    The rows are read one at a time, from memory or from a file, without being indexed,
+    and are decoded as UTF-8 with universal newlines and unquoted, as by the validator.
+    A WatchlistConfig is always iterated in order; the rows of a retrieved configuration or
+    of a file have to be sorted by numerical source ID and then by RTS symbol, e.g. with
+    ``sort -t, -k1,1n -k2,2``.
+
+    Parameters
+    ----------
+    configuration: Configuration
+        A retrieved configuration, a WatchlistConfig, or the location of a Watchlist
+        configuration file, possibly compressed, or "-" for the standard input.
+
+    Returns
+    -------
+    Iterator[Tuple[int, str]]
+        The (source ID, RTS symbol) rows, in order and without duplicates.
+
+    Raises
+    ------
+    ValueError
+        If the rows are not sorted, or if a row is malformed.
+    """
+    if isinstance(configuration, WatchlistConfig):
+        yield from configuration
+        return
+    config_file: BinaryIO
+    if isinstance(configuration, RetrievedConfig):
+        config_file = io.BytesIO(configuration.config_body)
+    else:
+        config_file = open_decompressed(configuration)
+    with io.TextIOWrapper(config_file, encoding="utf-8", errors="replace") as lines:
+        next(lines, None)
+        previous_row = None
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            row = parse_row(line)
+            if previous_row is not None and row < previous_row:
+                raise ValueError(
+                    f"The rows are not sorted by source ID and RTS symbol: "
+                    f"{line!r} follows {previous_row[0]},{previous_row[1]}"
+                )
+            if row != previous_row:
+                yield row
+            previous_row = row
+
+
+def group_sorted_rows(rows: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, List[str]]]:
+    """Groups sorted rows into the source ID and the sorted RTS symbols of every source."""
+    for source_id, source_rows in itertools.groupby(rows, key=operator.itemgetter(0)):
+        yield source_id, [symbol for _, symbol in source_rows]
+
+
+def merge_sorted_symbols(old_symbols: List[str], new_symbols: List[str]) -> SourceDiff:
+    """Compares two sorted lists of RTS symbols of a source in a single merge pass."""
+    added: List[str] = []
+    removed: List[str] = []
+    unchanged: List[str] = []
+    old_index = new_index = 0
+    while old_index < len(old_symbols) and new_index < len(new_symbols):
+        old_symbol, new_symbol = old_symbols[old_index], new_symbols[new_index]
+        if old_symbol < new_symbol:
+            removed.append(old_symbol)
+            old_index += 1
+        elif new_symbol < old_symbol:
+            added.append(new_symbol)
+            new_index += 1
+        else:
+            unchanged.append(old_symbol)
+            old_index += 1
+            new_index += 1
+    removed.extend(old_symbols[old_index:])
+    added.extend(new_symbols[new_index:])
+    return SourceDiff(added=added, removed=removed, unchanged=unchanged)
+
+
+def iterate_source_diffs(
+    old_rows: Iterable[Tuple[int, str]],
+    new_rows: Iterable[Tuple[int, str]],
+) -> Iterator[Tuple[str, SourceDiff]]:
+    """Compares two configurations given as sorted rows, merging them source by source.
+
+    The differences are produced lazily, in the order of the source IDs, so that only the
+    symbols of one source of each configuration are held in memory at a time, and no row
+    is hashed.
+
+    Parameters
+    ----------
+    old_rows: Iterable[Tuple[int, str]]
+        The distinct (source ID, RTS symbol) rows of the old configuration, in order, as
+        returned by iterate_sorted_rows or external_sort.sort_rows_externally.
+    new_rows: Iterable[Tuple[int, str]]
+        The distinct (source ID, RTS symbol) rows of the new configuration, in order.
+
+    Returns
+    -------
+    Iterator[Tuple[str, SourceDiff]]
+        The ID of every source of either configuration, with the differences between its
+        symbols.
+    """
+    old_groups, new_groups = group_sorted_rows(old_rows), group_sorted_rows(new_rows)
+    old_group, new_group = next(old_groups, None), next(new_groups, None)
+    while old_group is not None or new_group is not None:
+        if old_group is not None and (new_group is None or old_group[0] < new_group[0]):
+            yield str(old_group[0]), merge_sorted_symbols(old_group[1], [])
+            old_group = next(old_groups, None)
+        elif new_group is not None and (old_group is None or new_group[0] < old_group[0]):
+            yield str(new_group[0]), merge_sorted_symbols([], new_group[1])
+            new_group = next(new_groups, None)
+        elif old_group is not None and new_group is not None:
+            yield str(old_group[0]), merge_sorted_symbols(old_group[1], new_group[1])
+            old_group, new_group = next(old_groups, None), next(new_groups, None)
+
+
+def get_source_status(source_diff: SourceDiff) -> Optional[str]:
+    """Returns "activated" or "deactivated" for a source only present on one side, or None."""
+    if source_diff.unchanged:
+        return None
+    if not source_diff.removed:
+        return "activated"
+    if not source_diff.added:
+        return "deactivated"
+    return None
+
+
+def collect_source_diffs(source_diffs: Iterable[Tuple[str, SourceDiff]]) -> ConfigurationDiff:
+    """Gathers the differences of every source, as returned by iterate_source_diffs."""
+    activated: List[str] = []
+    deactivated: List[str] = []
+    sources: Dict[str, SourceDiff] = {}
+    for source_id, source_diff in source_diffs:
+        source_status = get_source_status(source_diff)
+        if source_status == "activated":
+            activated.append(source_id)
+        elif source_status == "deactivated":
+            deactivated.append(source_id)
+        sources[source_id] = source_diff
+    return ConfigurationDiff(activated=activated, deactivated=deactivated, sources=sources)
+
+
+def diff_source_symbols(
+    old_source_symbols: SourceSymbols,
+    new_source_symbols: SourceSymbols,
+) -> ConfigurationDiff:
+    """Compares two configurations indexed by source ID with hash set operations.
+
+    Parameters
+    ----------
+    old_source_symbols: SourceSymbols
+        The symbols of each source of the old configuration.
+    new_source_symbols: SourceSymbols
+        The symbols of each source of the new configuration.
+
+    Returns
+    -------
+    ConfigurationDiff
+        The differences between the two configurations.
+    """
+    no_symbols: FrozenSet[str] = frozenset()
+    sources = {}
+    for source_id in sort_source_ids(old_source_symbols.keys() | new_source_symbols.keys()):
+        old_symbols = old_source_symbols.get(source_id, no_symbols)
+        new_symbols = new_source_symbols.get(source_id, no_symbols)
+        sources[source_id] = SourceDiff(
+            added=sorted(new_symbols - old_symbols),
+            removed=sorted(old_symbols - new_symbols),
+            unchanged=sorted(old_symbols & new_symbols),
+        )
+    return ConfigurationDiff(
+        activated=sort_source_ids(new_source_symbols.keys() - old_source_symbols.keys()),
+        deactivated=sort_source_ids(old_source_symbols.keys() - new_source_symbols.keys()),
+        sources=sources,
+    )
+
+
+def stream_diff(
+    old: Configuration,
+    new: Configuration,
+    presorted: bool = False,
+    max_memory: Optional[int] = None,
+    temporary_directory: Optional[str] = None,
+) -> Iterator[Tuple[str, SourceDiff]]:
+    """Compares two configurations, producing the differences of every source in turn.
+
+    This is the streaming counterpart of diff. With max_memory, the rows of both
+    configurations are sorted on disk by external_sort.sort_rows_externally, in runs of
+    at most max_memory bytes, and merged source by source, so that configurations larger
+    than the available memory can be compared; the memory used is then bounded by
+    max_memory, besides the symbols of the source being compared.
+
+    Parameters
+    ----------
+    old: Configuration
+        The old configuration: a retrieved configuration, a WatchlistConfig, or the
+        location of a Watchlist configuration file, possibly compressed.
+    new: Configuration
+        The new configuration.
+    presorted: bool
+        Whether the rows of both configurations are sorted by numerical source ID and then
+        by RTS symbol, as described in iterate_sorted_rows.
+    max_memory: Optional[int]
+        The number of bytes of rows sorted in memory at a time. If None, the
+        configurations are not sorted on disk.
+    temporary_directory: Optional[str]
+        The directory where the sorted runs are written. If None, the default temporary
+        directory is used.
+
+    Returns
+    -------
+    Iterator[Tuple[str, SourceDiff]]
+        The ID of every source of either configuration, in numerical order, with the
+        differences between its symbols.
+
+    Raises
+    ------
+    ValueError
+        If presorted is True and the rows of a configuration are not sorted.
+    """
+    if max_memory is not None:
+        return iterate_source_diffs(
+            external_sort.sort_rows_externally(old, max_memory, temporary_directory),
+            external_sort.sort_rows_externally(new, max_memory, temporary_directory),
+        )
+    if presorted or (isinstance(old, WatchlistConfig) and isinstance(new, WatchlistConfig)):
+        return iterate_source_diffs(iterate_sorted_rows(old), iterate_sorted_rows(new))
+    return iter(
+        diff_source_symbols(
+            load_configuration_source_symbols(old), load_configuration_source_symbols(new),
+        ).sources.items()
+    )
+
+
+def diff(
+    old: Configuration,
+    new: Configuration,
+    presorted: bool = False,
+    max_memory: Optional[int] = None,
+) -> ConfigurationDiff:
+    """Compares two configurations, reporting the changes to the symbols of every source.
+
+    Every source of either configuration is reported with the symbols added, removed and
+    left unchanged by the new configuration, and the sources only present in the new or
+    the old configuration are reported as activated or deactivated. Duplicated rows, blank
+    rows and line endings are ignored.
+
+    The configurations are indexed by source ID in hash sets, unless both are
+    WatchlistConfig instances or presorted is True, in which case their rows are merged
+    in order, one source at a time, which uses much less memory on large files. With
+    max_memory, the rows are first sorted on disk, as described in stream_diff.
+
+    Parameters
+    ----------
+    old: Configuration
+        The old configuration: a retrieved configuration, a WatchlistConfig, or the
+        location of a Watchlist configuration file, possibly compressed.
+    new: Configuration
+        The new configuration.
+    presorted: bool
+        Whether the rows of both configurations are sorted by numerical source ID and then
+        by RTS symbol, as described in iterate_sorted_rows.
+    max_memory: Optional[int]
+        The number of bytes of rows sorted in memory at a time. If None, the
+        configurations are not sorted on disk.
+
+    Returns
+    -------
+    ConfigurationDiff
+        The differences between the two configurations.
+
+    Raises
+    ------
+    ValueError
+        If presorted is True and the rows of a configuration are not sorted.
+    """
+    if max_memory is None and not presorted and not (
+        isinstance(old, WatchlistConfig) and isinstance(new, WatchlistConfig)
+    ):
+        return diff_source_symbols(
+            load_configuration_source_symbols(old), load_configuration_source_symbols(new),
+        )
+    return collect_source_diffs(stream_diff(old, new, presorted, max_memory))
+
+
+def convert_source_diff_to_dict(
+    source_diff: SourceDiff,
+    include_unchanged: bool = False,
+) -> Optional[Dict[str, object]]:
+    """Converts the differences of a source into a JSON serialisable form.
+
+    Returns None for a source whose symbols did not change, unless include_unchanged is
+    True.
+    """
+    if not (include_unchanged or source_diff.added or source_diff.removed):
+        return None
+    source_dict: Dict[str, object] = {
+        "added": source_diff.added,
+        "removed": source_diff.removed,
+        "nbUnchanged": len(source_diff.unchanged),
+    }
+    if include_unchanged:
+        source_dict["unchanged"] = source_diff.unchanged
+    return source_dict
+
+
+def convert_diff_to_dict(
+    configuration_diff: ConfigurationDiff,
+    include_unchanged: bool = False,
+) -> Dict[str, object]:
+    """Converts the differences between two configurations into a JSON serialisable form.
+
+    Parameters
+    ----------
+    configuration_diff: ConfigurationDiff
+        The differences, as returned by diff.
+    include_unchanged: bool
+        Whether to list the unchanged symbols of every source, and the sources whose
+        symbols did not change, rather than only counting the unchanged symbols.
+
+    Returns
+    -------
+    Dict[str, object]
+        A dictionary with, under "sources", the added and removed symbols and the
+        nbUnchanged count of every source, and the activated and deactivated lists of
+        source IDs.
+    """
+    sources = {}
+    for source_id, source_diff in configuration_diff.sources.items():
+        source_dict = convert_source_diff_to_dict(source_diff, include_unchanged)
+        if source_dict is not None:
+            sources[source_id] = source_dict
+    return {
+        "sources": sources,
+        "activated": configuration_diff.activated,
+        "deactivated": configuration_diff.deactivated,
+    }
+
+
+def iterate_diff_json(
+    source_diffs: Iterable[Tuple[str, SourceDiff]],
+    include_unchanged: bool = False,
+) -> Iterator[str]:
+    """Serialises the differences of every source to JSON as they are produced.
+
+    The text is the one json.dumps would produce, with an indent of 2, for the dictionary
+    returned by convert_diff_to_dict, but every source is serialised as soon as it is
+    compared, so that the differences between configurations larger than memory can be
+    written without being gathered first.
+
+    Parameters
+    ----------
+    source_diffs: Iterable[Tuple[str, SourceDiff]]
+        The differences of every source, as returned by stream_diff.
+    include_unchanged: bool
+        Whether to list the unchanged symbols of every source, and the sources whose
+        symbols did not change, rather than only counting the unchanged symbols.
+
+    Returns
+    -------
+    Iterator[str]
+        The chunks of the JSON document.
+    """
+    activated: List[str] = []
+    deactivated: List[str] = []
+    separator = "\n"
+    yield '{\n  "sources": {'
+    for source_id, source_diff in source_diffs:
+        source_status = get_source_status(source_diff)
+        if source_status == "activated":
+            activated.append(source_id)
+        elif source_status == "deactivated":
+            deactivated.append(source_id)
+        source_dict = convert_source_diff_to_dict(source_diff, include_unchanged)
+        if source_dict is not None:
+            source_json = json.dumps(source_dict, indent=2).replace("\n", "\n    ")
+            yield f"{separator}    {json.dumps(source_id)}: {source_json}"
+            separator = ",\n"
+    yield "}" if separator == "\n" else "\n  }"
+    for key, source_ids in (("activated", activated), ("deactivated", deactivated)):
+        yield f',\n  "{key}": ' + json.dumps(source_ids, indent=2).replace("\n", "\n  ")
+    yield "\n}"
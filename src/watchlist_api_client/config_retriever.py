@@ -1,61 +1,68 @@
 """Implements the utilities needed to retrieve the active configuration from the Watchlist API."""
 import pathlib
-from typing import Tuple
-import urllib.parse
+from typing import TYPE_CHECKING, Optional, Tuple
 
-import requests
+# The handling of the responses is shared with the client, and is still importable from here.
+from watchlist_api_client.api_responses import (  # noqa: F401
+    get_retrieved_config_path,
+    infer_timestamp_from_retrieved_response,
+    package_retrieved_configuration,
+)
+from watchlist_api_client.client import WatchlistClient, get_default_client
+from watchlist_api_client.compression import compress_chunks
+from watchlist_api_client.data_structures import RetrievedConfig, RetrievedConfigFile
+from watchlist_api_client.defaults import DEFAULT_ACTIVE_TTL
+from watchlist_api_client.helpers import write_file_atomically
+from watchlist_api_client.retry import RetryPolicy
+from watchlist_api_client.snapshot_cache import SnapshotCache, read_file_in_chunks
 
-from watchlist_api_client.data_structures import RetrievedConfig
-from watchlist_api_client.helpers import convert_raw_utc_timestamp_to_string
 
+if TYPE_CHECKING:
+    import requests
 
-def infer_timestamp_from_retrieved_response(response: requests.Response) -> str:
-    """Infers the timestamp of the retrieved response from the request URL.
 
-    The function uses the fact that the retrieval of the active configuration is initiated
-    by sending a GET request to the Watchlist API GET endpoint, without the specification
-    of a dateTime query string. This signals to the function that the retrieved
-    configuration is the active configuration at the time of the API call, and therefore
-    returns as the timestamp associated with the retrieved configuration, the timestamp
-    that is contained in the header of the response sent back by the Watchlist API.
-    Conversely, when trying to retrieve a deactivated configuration, the GET request is
-    sent to the Watchlist API GET endpoint with a specific dateTime query string, which
-    specifies the point in time where we want to retrieve the at the time active
-    configuration from. The returned deactivated configuration, will have a timestamp
-    that is therefore equal to the passed dateTime query string, since the returned
-    configuration is the one that was active at that specific point in time.
+class ResponseDateRecorder:
+    """Records the Date header of a response, which the snapshot cache needs to know."""
 
-    Parameters
-    ----------
-    response: requests.Response
-        A Response object that is returned as a result of the API call initiated to
-        retrieve the active or a deactivated configuration.
+    def __init__(self) -> None:
+        """Initialises a recorder that has not seen a response yet."""
+        self.response_date: Optional[str] = None
+
+    def __call__(self, response: "requests.Response") -> None:
+        """Records the Date header of the response."""
+        self.response_date = response.headers.get("Date")
 
-    Returns
-    -------
-    str
-        A string representing the timestamp of the retrieved configuration.
-    """
-    if urllib.parse.urlparse(response.request.url).query == '':
-        return convert_raw_utc_timestamp_to_string(
-            response.headers['Date'],
-            date_format="%Y%m%dT%H%M%SZ",
-        )
-    else:
-        return convert_raw_utc_timestamp_to_string(
-            urllib.parse.urlparse(response.request.url).query.split("=")[1],
-            date_format="%Y%m%dT%H%M%SZ",
-        )
 
+def retrieve_config(
+    watchlist_endpoint: str,
+    credentials: Tuple[str, str],
+    retry_policy: Optional[RetryPolicy] = None,
+    use_cache: bool = False,
+    active_ttl: float = DEFAULT_ACTIVE_TTL,
+) -> RetrievedConfig:
+    """Retrieves an active or deactivated configuration from the Watchlist API.
 
-def package_retrieved_configuration(response: requests.Response) -> RetrievedConfig:
-    """Packages the retrieved configuration in a RetrievedConfig named tuple.
+    The request goes through the default WatchlistClient, so that consecutive calls reuse
+    the same pooled connection. If use_cache is True, retrieved configurations are kept in
+    a persistent SnapshotCache: a configuration retrieved at a point in time that has
+    passed never changes, and is served from the cache without any request to the
+    Watchlist API, while the active configuration is served from the cache for active_ttl
+    seconds.
 
     Parameters
     ----------
-    response: requests.Response
-        A Response object that is returned as a result of the API call initiated to
-        retrieve the active or a deactivated configuration.
+    watchlist_endpoint: str
+        The watchlist API GET endpoint.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the Watchlist API.
+    retry_policy: Optional[RetryPolicy]
+        The policy controlling how the retrieval is retried after a transient failure. If
+        None, the policy of the default client is used.
+    use_cache: bool
+        Whether the configuration is looked up in and stored to the snapshot cache. By
+        default, the configuration is always retrieved from the Watchlist API.
+    active_ttl: float
+        The number of seconds during which a cached active configuration is served.
 
     Returns
     -------
@@ -63,17 +70,45 @@ def package_retrieved_configuration(response: requests.Response) -> RetrievedCon
         A named tuple containing the timestamp of the retrieved configuration, and a
         byte-string object containing the body of the retrieved configuration.
     """
-    return RetrievedConfig(
-        timestamp=infer_timestamp_from_retrieved_response(response),
-        config_body=response.content,
+    if not use_cache:
+        return get_default_client().get_config(watchlist_endpoint, credentials, retry_policy)
+    cache = SnapshotCache(active_ttl=active_ttl)
+    cached_config_file = cache.lookup(watchlist_endpoint, credentials)
+    if cached_config_file is not None:
+        return RetrievedConfig(
+            timestamp=cached_config_file.timestamp,
+            config_body=pathlib.Path(cached_config_file.path).read_bytes(),
+        )
+    response_date_recorder = ResponseDateRecorder()
+    retrieved_config = get_default_client().get_config(
+        watchlist_endpoint, credentials, retry_policy, on_response=response_date_recorder,
+    )
+    cache.store(
+        watchlist_endpoint, credentials, retrieved_config, response_date_recorder.response_date,
     )
+    return retrieved_config
 
 
-def retrieve_config(
+def retrieve_config_to_file(
     watchlist_endpoint: str,
     credentials: Tuple[str, str],
-) -> RetrievedConfig:
-    """Retrieves an active or deactivated configuration from the Watchlist API.
+    path_to_directory: str,
+    retry_policy: Optional[RetryPolicy] = None,
+    use_cache: bool = False,
+    active_ttl: float = DEFAULT_ACTIVE_TTL,
+    watchlist_client: Optional[WatchlistClient] = None,
+    compression: Optional[str] = None,
+) -> RetrievedConfigFile:
+    """Retrieves a configuration from the Watchlist API, streaming it straight to disk.
+
+    Unlike retrieve_config, the body of the response is never held in memory as a whole:
+    it is written chunk by chunk to a temporary file in the target directory, which is
+    then atomically renamed to watchlist_config@<timestamp>.csv, so that an interrupted
+    retrieval never leaves a truncated configuration behind. The request goes through the
+    default WatchlistClient, unless another client is passed. The snapshot cache is used
+    as in retrieve_config: cached configurations are copied to the target directory
+    without any request. With a compression, the file is compressed on the fly, while it is
+    written, and the cache keeps the configuration uncompressed.
 
     Parameters
     ----------
@@ -81,19 +116,63 @@ def retrieve_config(
         The watchlist API GET endpoint.
     credentials: Tuple[str, str]
         A tuple containing the username and password used to access the Watchlist API.
+    path_to_directory: str
+        The path to the directory where the csv file containing the retrieved
+        configuration will be written.
+    retry_policy: Optional[RetryPolicy]
+        The policy controlling how the retrieval is retried after a transient failure. If
+        None, the policy of the default client is used.
+    use_cache: bool
+        Whether the configuration is looked up in and stored to the snapshot cache. By
+        default, the configuration is always retrieved from the Watchlist API.
+    active_ttl: float
+        The number of seconds during which a cached active configuration is served.
+    watchlist_client: Optional[WatchlistClient]
+        The client used for the request. If None, the default client is used.
+    compression: Optional[str]
+        The compression of the written file, "gzip" or "zstd". If None, the file is written
+        uncompressed.
 
     Returns
     -------
-    RetrievedConfig
-        A named tuple containing the timestamp of the retrieved configuration, and a
-        byte-string object containing the body of the retrieved configuration.
+    RetrievedConfigFile
+        A named tuple containing the timestamp of the retrieved configuration, the path to
+        the file it was written to and its size in bytes.
     """
-    with requests.get(watchlist_endpoint, auth=credentials) as response:
-        response.raise_for_status()
-        return package_retrieved_configuration(response)
+    watchlist_client = watchlist_client or get_default_client()
+    if not use_cache:
+        return watchlist_client.download_config(
+            watchlist_endpoint, path_to_directory, credentials, retry_policy,
+            compression=compression,
+        )
+    cache = SnapshotCache(active_ttl=active_ttl)
+    cached_config_file = cache.lookup(watchlist_endpoint, credentials)
+    if cached_config_file is not None:
+        path_to_file = get_retrieved_config_path(
+            path_to_directory, cached_config_file.timestamp, compression,
+        )
+        size = write_file_atomically(
+            path_to_file,
+            compress_chunks(read_file_in_chunks(cached_config_file.path), compression),
+        )
+        return cached_config_file._replace(path=path_to_file, size=size)
+    response_date_recorder = ResponseDateRecorder()
+    retrieved_config_file = watchlist_client.download_config(
+        watchlist_endpoint, path_to_directory, credentials, retry_policy,
+        compression=compression, on_response=response_date_recorder,
+    )
+    cache.store_file(
+        watchlist_endpoint, credentials, retrieved_config_file,
+        response_date_recorder.response_date,
+    )
+    return retrieved_config_file
 
 
-def retrieved_config_writer(retrieved_config: RetrievedConfig, path_to_directory: str) -> str:
+def retrieved_config_writer(
+    retrieved_config: RetrievedConfig,
+    path_to_directory: str,
+    compression: Optional[str] = None,
+) -> str:
     """Writes the content of a RetrievedConfig named tuple to a csv file.
 
     Parameters
@@ -104,15 +183,17 @@ def retrieved_config_writer(retrieved_config: RetrievedConfig, path_to_directory
     path_to_directory: str
         The path to the directory where the csv file containing the retrieved
         configuration will be written.
+    compression: Optional[str]
+        The compression of the csv file, "gzip" or "zstd". If None, the file is written
+        uncompressed.
 
     Returns
     -------
     str
         The file path of the csv file containing the retrieved configuration.
     """
-    file_path = pathlib.Path(path_to_directory).joinpath(
-        f"watchlist_config@{retrieved_config.timestamp}.csv")
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with pathlib.Path(file_path).open('wb') as outfile:
-        outfile.write(retrieved_config.config_body)
-    return file_path.as_posix()
+    file_path = get_retrieved_config_path(
+        path_to_directory, retrieved_config.timestamp, compression,
+    )
+    write_file_atomically(file_path, compress_chunks([retrieved_config.config_body], compression))
+    return file_path
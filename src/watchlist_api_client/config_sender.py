@@ -1,14 +1,25 @@
 """Implements the utilities needed to submit a configuration file to the Watchlist API."""
-import csv
 import json
 import pathlib
-import re
-from typing import Tuple
+from typing import Optional, Tuple
 
 import requests
 
-from watchlist_api_client.data_structures import RequestSummary
-from watchlist_api_client.helpers import convert_raw_utc_timestamp_to_string
+from watchlist_api_client import config_diff, config_retriever, config_validator, validation_cache
+
+# The handling of the responses is shared with the client, and is still importable from here.
+from watchlist_api_client.api_responses import react_to_status_code_200  # noqa: F401
+from watchlist_api_client.client import get_default_client
+from watchlist_api_client.compression import (
+    STDIN_PATH,
+    compress_chunks,
+    get_compression_suffix,
+    read_decompressed_bytes,
+)
+from watchlist_api_client.data_structures import ConditionalSubmission, RequestSummary
+from watchlist_api_client.helpers import convert_raw_utc_timestamp_to_string, write_file_atomically
+from watchlist_api_client.retry import RetryPolicy
+from watchlist_api_client.snapshot_cache import SnapshotCache
 
 
 class ImproperFileFormat(Exception):
@@ -31,9 +42,8 @@ def validate_header(header: str) -> None:
         The exception is accompanied by a message that informs that the header is not
         formatted accordingly to the specification.
     """
-    header_pattern = r"^sourceId,RTSsymbol$"
-    if not re.match(header_pattern, header):
-        raise ImproperFileFormat("Improperly formatted header")
+    if not config_validator.HEADER_PATTERN.match(header):
+        raise ImproperFileFormat(config_validator.HEADER_REASON)
 
 
 def validate_row(row: str, row_index: int) -> None:
@@ -59,18 +69,35 @@ def validate_row(row: str, row_index: int) -> None:
         accordingly to the specifications, together with the index of the row within the
         file.
     """
-    row_pattern = r"^[0-9]{3,4},[A-Z0-9\\+;()!*\-.:/$@&_%#]+$"
-    if not re.match(row_pattern, row):
-        raise ImproperFileFormat(f"Line {row_index} - Improperly formatted")
+    if not config_validator.ROW_PATTERN.match(row):
+        raise ImproperFileFormat(f"Line {row_index} - {config_validator.ROW_REASON}")
 
 
-def validate_watchlist_configuration_file(path_to_watchlist_config_file: str) -> None:
+def validate_watchlist_configuration_file(
+    path_to_watchlist_config_file: str,
+    workers: int = 1,
+    use_cache: bool = True,
+) -> None:
     """Checks if a Watchlist configuration file is properly formatted.
 
+    The file is validated in a single pass by the config_validator engine, which stops at
+    the first improperly formatted line. To obtain a report of every invalid line, use
+    config_validator.validate_configuration_file directly.
+
     Parameters
     ----------
     path_to_watchlist_config_file: str
-        The location of the Watchlist configuration file to validate.
+        The location of the Watchlist configuration file to validate, which can be
+        compressed with gzip, bzip2, xz or zstd, or "-" for the standard input, which is
+        consumed by the validation.
+    workers: int
+        The number of processes used to validate the file. By default, the file is
+        validated in the calling process; with more than one worker, the rows are split
+        into chunks that are validated in parallel.
+    use_cache: bool
+        Whether to reuse the outcome of a previous validation of the same content, stored in
+        the persistent validation cache. Set it to False to bypass the cache and always
+        validate the file.
 
     Raises
     ------
@@ -79,58 +106,57 @@ def validate_watchlist_configuration_file(path_to_watchlist_config_file: str) ->
         raised, with attached a message that informs whether the file has an invalid
         formatting due to a mis-formatted header or due to a mis-formatted row.
     """
-    with pathlib.Path(path_to_watchlist_config_file).open('r') as csv_file:
-        csv_reader = csv.reader(csv_file, delimiter=',')
-        for index, row in enumerate(csv_reader):
-            if index == 0:
-                validate_header(','.join(row))
-            else:
-                validate_row(','.join(row), index)
-
-
-def react_to_status_code_200(response: requests.Response) -> RequestSummary:
-    """Embeds the submission time and the subscription summary in a ConfigSummary object.
-
-    The function is designed to deal with the scenario of a successful request to update
-    the configuration of the personal profile on the Watchlist API. In case of a
-    successful submission of a new configuration file, in fact, the Watchlist API returns
-    a JSON object that contains the summary of the actions performed as a result of the
-    update request, stating the sources that were created, updated, duplicated, unchanged,
-    failed and missing.
+    if use_cache:
+        validation_report = validation_cache.validate_configuration_file_with_cache(
+            path_to_watchlist_config_file,
+            max_errors=1,
+            workers=workers,
+        )
+    else:
+        validation_report = config_validator.validate_configuration_file(
+            path_to_watchlist_config_file,
+            max_errors=1,
+            workers=workers,
+        )
+    if not validation_report.is_valid:
+        raise ImproperFileFormat(
+            config_validator.describe_invalid_line(validation_report.invalid_lines[0]),
+        )
 
-    The request summary, together with the timestamp of the response, are stored in a
-    RequestSummary named-tuple and returned for further use.
 
-    Parameters
-    ----------
-    response: requests.Response
-        A Response object obtained by submitting a POST request to the Watchlist API.
+def invalidate_cached_active_config(watchlist_endpoint: str, credentials: Tuple[str, str]) -> None:
+    """Removes the cached copies of the active configuration after a submission.
 
-    Returns
-    -------
-    RequestSummary
-        A RequestSummary named-tuple containing the timestamp of the response and a
-        dictionary that contains the summary of the action performed as a result of
-        the request to update the configuration of the watchlist configuration file.
+    Nothing is done if the snapshot cache was never written, and a cache that cannot be
+    cleaned up does not fail the submission, which already succeeded.
     """
-    return RequestSummary(
-        submission_time=response.headers.get('Date'),
-        summary=response.json(),
-    )
+    snapshot_cache = SnapshotCache()
+    if not snapshot_cache.directory.is_dir():
+        return
+    try:
+        snapshot_cache.invalidate_active(watchlist_endpoint, credentials)
+    except OSError:
+        pass
 
 
 def send_config(
     watchlist_endpoint: str,
     credentials: Tuple[str, str],
     path_to_watchlist_config_file: str,
+    retry_policy: Optional[RetryPolicy] = None,
+    validate: bool = False,
 ) -> RequestSummary:
     """Submits a Watchlist configuration file and returns the request summary.
 
     The function sends a POST request to the Watchlist API POST endpoint, with the new
-    configuration file as a payload of the request. Depending on whether the request is
-    successful or not, it returns a RequestSummary named-tuple containing the timestamp
-    of the response and the request summary, or raises an HTTPError with the status code
-    associated with the failed request.
+    configuration file as a payload of the request. The payload is encoded as a
+    multipart/form-data body that is streamed from the open file in fixed-size chunks, so
+    that the memory used by the upload does not depend on the size of the file. The
+    request goes through the default WatchlistClient, so that consecutive calls reuse the
+    same pooled connection. Depending on whether the request is successful or not, it
+    returns a RequestSummary named-tuple containing the timestamp of the response and the
+    request summary, or raises an HTTPError with the status code associated with the
+    failed request.
 
     Parameters
     ----------
@@ -140,7 +166,17 @@ def send_config(
         A tuple containing the user name and password used to access the Watchlist API.
     path_to_watchlist_config_file
         The path to the location of the Watchlist configuration file that has to be
-        uploaded.
+        uploaded. The file can be compressed with gzip, bzip2, xz or zstd, in which case it
+        is decompressed on the fly, and "-" uploads the standard input.
+    retry_policy: Optional[RetryPolicy]
+        The policy controlling how the submission is retried after a transient failure.
+        If None, the policy of the default client is used, which does not retry POST
+        requests.
+    validate: bool
+        Whether to validate the file while it is uploaded, in a single pass, instead of
+        validating it beforehand with validate_watchlist_configuration_file. This is the
+        only way to validate the standard input before submitting it, since it can only be
+        read once. An invalid file is never submitted in full.
 
     Returns
     -------
@@ -155,12 +191,93 @@ def send_config(
         In case the API call is not successful, returns an HTTPError with the status code
         and the type of error that occurred (whether the error was initiated on the client
         side or on the server side).
+    ImproperFileFormat
+        If validate is set and the file is not properly formatted.
 
     """
-    config_payload = {"file": pathlib.Path(path_to_watchlist_config_file).read_bytes()}
-    with requests.post(watchlist_endpoint, auth=credentials, files=config_payload) as response:
-        response.raise_for_status()
-        return react_to_status_code_200(response)
+    try:
+        request_summary = get_default_client().post_config(
+            watchlist_endpoint, path_to_watchlist_config_file, credentials, retry_policy,
+            validate=validate,
+        )
+    except config_validator.InvalidConfigurationError as invalid_configuration_error:
+        raise ImproperFileFormat(str(invalid_configuration_error)) from invalid_configuration_error
+    invalidate_cached_active_config(watchlist_endpoint, credentials)
+    return request_summary
+
+
+def send_config_if_changed(
+    watchlist_endpoint: str,
+    credentials: Tuple[str, str],
+    path_to_watchlist_config_file: str,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> ConditionalSubmission:
+    """Submits a Watchlist configuration file only if it differs from the active one.
+
+    The active configuration is retrieved from the same endpoint and both configurations
+    are normalised into the set of RTS symbols of each source. If the two are equal, the
+    submission would be a no-op and the POST request is skipped altogether; otherwise the
+    file is submitted as with send_config. In both cases, the changes that the file makes
+    to the active configuration are summarised locally. If no configuration is active, the
+    whole file counts as new.
+
+    Parameters
+    ----------
+    watchlist_endpoint: str
+        The endpoint of the Watchlist API, used both to retrieve the active configuration
+        and to submit the new one.
+    credentials: Tuple[str, str]
+        A tuple containing the user name and password used to access the Watchlist API.
+    path_to_watchlist_config_file: str
+        The path to the location of the Watchlist configuration file that has to be
+        uploaded, possibly compressed. The standard input is not supported, since the file
+        is read twice: once to compare it and once to submit it.
+    retry_policy: Optional[RetryPolicy]
+        The policy controlling how the requests are retried after a transient failure. If
+        None, the policy of the default client is used.
+
+    Returns
+    -------
+    ConditionalSubmission
+        A named tuple stating whether the file was submitted, with the local summary of the
+        changes and, if the file was submitted, the RequestSummary returned by the API.
+
+    Raises
+    ------
+    requests.exceptions.HTTPError
+        If the retrieval of the active configuration, other than with a 404 status code,
+        or the submission is not successful.
+    ValueError
+        If the configuration file is the standard input.
+    """
+    if path_to_watchlist_config_file == STDIN_PATH:
+        raise ValueError("The standard input cannot be read twice to be compared and submitted")
+    try:
+        # The active configuration is always retrieved afresh: a stale copy could make the
+        # submission be skipped after a change made elsewhere.
+        active_configuration = config_retriever.retrieve_config(
+            watchlist_endpoint, credentials, retry_policy, use_cache=False,
+        )
+    except requests.exceptions.HTTPError as http_error:
+        if http_error.response is None or http_error.response.status_code != 404:
+            raise
+        active_config_body = b"sourceId,RTSsymbol\n"
+    else:
+        active_config_body = active_configuration.config_body
+    local_summary = config_diff.summarize_body_changes(
+        read_decompressed_bytes(path_to_watchlist_config_file), active_config_body,
+    )
+    if not (local_summary["created"] or local_summary["updated"] or local_summary["deactivated"]):
+        return ConditionalSubmission(
+            submitted=False, local_summary=local_summary, request_summary=None,
+        )
+    return ConditionalSubmission(
+        submitted=True,
+        local_summary=local_summary,
+        request_summary=send_config(
+            watchlist_endpoint, credentials, path_to_watchlist_config_file, retry_policy,
+        ),
+    )
 
 
 def stringify_response_summary(request_summary: RequestSummary) -> str:
@@ -221,9 +338,13 @@ def stringify_response_summary(request_summary: RequestSummary) -> str:
 def write_request_summary_to_json(
     request_summary: RequestSummary,
     path_to_parent_dir: str,
+    compression: Optional[str] = None,
 ) -> str:
     """Writes the request summary to a JSON file.
 
+    The JSON document is encoded and, optionally, compressed piece by piece while it is
+    written, rather than built in memory first.
+
     Parameters
     ----------
     request_summary: RequestSummary
@@ -234,6 +355,9 @@ def write_request_summary_to_json(
     path_to_parent_dir: str
         The path to the directory where the json file containing the request summary
         should be written to.
+    compression: Optional[str]
+        The compression of the json file, "gzip" or "zstd", which adds the .gz or .zst
+        suffix to its name. If None, the file is written uncompressed.
 
     Returns
     -------
@@ -245,8 +369,11 @@ def write_request_summary_to_json(
         request_summary.submission_time,
         date_format="%Y%m%dT%H%M%SZ",
     )
-    file_path = pathlib.Path(path_to_parent_dir).joinpath(f"request_summary_{formatted_time}.json")
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with file_path.open('w') as outfile:
-        json.dump(request_summary.summary, outfile, indent=2)
+    file_path = pathlib.Path(path_to_parent_dir).joinpath(
+        f"request_summary_{formatted_time}.json{get_compression_suffix(compression)}"
+    )
+    encoded_chunks = (
+        chunk.encode() for chunk in json.JSONEncoder(indent=2).iterencode(request_summary.summary)
+    )
+    write_file_atomically(file_path.as_posix(), compress_chunks(encoded_chunks, compression))
     return file_path.as_posix()
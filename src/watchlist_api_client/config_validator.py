@@ -0,0 +1,654 @@
+"""Implements a single-pass validation engine for Watchlist configuration files."""
+import codecs
+import concurrent.futures
+import io
+import mmap
+import os
+import pathlib
+import re
+from typing import BinaryIO, List, Optional, TextIO, Tuple
+
+from watchlist_api_client.compression import is_plain_file, open_decompressed
+from watchlist_api_client.data_structures import InvalidLine, ValidationReport
+from watchlist_api_client.helpers import unquote_line
+
+
+HEADER_PATTERN = re.compile(r"^sourceId,RTSsymbol$")
+ROW_PATTERN = re.compile(r"^[0-9]{3,4},[A-Z0-9\\+;()!*\-.:/$@&_%#]+$")
+ROWS_BLOCK_PATTERN = re.compile(r"(?:[0-9]{3,4},[A-Z0-9\\+;()!*\-.:/$@&_%#]+\n)*")
+
+HEADER_BYTES_PATTERN = re.compile(rb"sourceId,RTSsymbol")
+ROW_BYTES_PATTERN = re.compile(rb"[0-9]{3,4},[A-Z0-9\\+;()!*\-.:/$@&_%#]+")
+ROWS_BLOCK_BYTES_PATTERN = re.compile(
+    rb"(?:[0-9]{3,4},[A-Z0-9\\+;()!*\-.:/$@&_%#]+(?:\r\n?|\n))*",
+)
+LINE_END_BYTES_PATTERN = re.compile(rb"\r\n?|\n")
+
+# The version of the rules a line is validated against, which keys the cached validation
+# reports and has to be increased whenever a change to the validation accepts or rejects
+# different lines.
+VALIDATION_RULES_VERSION = 1
+
+HEADER_REASON = "Improperly formatted header"
+ROW_REASON = "Improperly formatted"
+
+CHUNK_SIZE = 1024 * 1024
+RANGES_PER_WORKER = 4
+
+
+class InvalidConfigurationError(ValueError):
+    """An exception class that is raised when a ValidatingReader reads an invalid configuration."""
+
+    def __init__(self, validation_report: ValidationReport) -> None:
+        """Initialises the exception from the report of the failed validation."""
+        super().__init__(describe_invalid_line(validation_report.invalid_lines[0]))
+        self.validation_report = validation_report
+
+
+def describe_invalid_line(invalid_line: InvalidLine) -> str:
+    """Builds the error message associated with an improperly formatted line.
+
+    Parameters
+    ----------
+    invalid_line: InvalidLine
+        A named tuple containing the line number, the reason why the line is invalid and
+        the offending text.
+
+    Returns
+    -------
+    str
+        The message used to report the invalid line, in the same form used by
+        config_sender.validate_header and config_sender.validate_row.
+    """
+    if invalid_line.reason == HEADER_REASON:
+        return HEADER_REASON
+    return f"Line {invalid_line.line_number} - {invalid_line.reason}"
+
+
+def validate_rows_block(
+    block: str,
+    first_line_number: int,
+    invalid_lines: List[InvalidLine],
+    max_errors: Optional[int] = None,
+) -> int:
+    """Validates a block of newline-terminated rows, collecting the invalid ones.
+
+    The block is matched against a pattern that consumes any run of properly formatted
+    rows in a single call to the regular expression engine, so that valid rows never go
+    through Python-level code. Whenever the run is interrupted, the row where it stopped
+    is recorded as invalid and the matching resumes from the following row.
+
+    Parameters
+    ----------
+    block: str
+        A string made of one or more rows, each of which is terminated by a newline.
+    first_line_number: int
+        The line number of the first row of the block within the file, where the header
+        has line number 0.
+    invalid_lines: List[InvalidLine]
+        The list the invalid rows are appended to.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, all the
+        rows of the block are validated.
+
+    Returns
+    -------
+    int
+        The line number following the last validated row.
+    """
+    line_number = first_line_number
+    position = 0
+    block_end = len(block)
+    while position < block_end:
+        valid_rows = ROWS_BLOCK_PATTERN.match(block, position)
+        valid_end = valid_rows.end() if valid_rows else position
+        line_number += block.count("\n", position, valid_end)
+        if valid_end == block_end:
+            break
+        line_end = block.index("\n", valid_end)
+        row = block[valid_end:line_end]
+        if not ROW_PATTERN.match(unquote_line(row)):
+            invalid_lines.append(InvalidLine(line_number, ROW_REASON, row))
+        line_number += 1
+        position = line_end + 1
+        if max_errors is not None and len(invalid_lines) >= max_errors:
+            break
+    return line_number
+
+
+def validate_header_line(header: str, invalid_lines: List[InvalidLine]) -> None:
+    """Validates the header of a Watchlist configuration file, collecting it if invalid.
+
+    Parameters
+    ----------
+    header: str
+        The first line of a Watchlist configuration file, with or without its newline.
+    invalid_lines: List[InvalidLine]
+        The list the header is appended to, if improperly formatted.
+    """
+    header = header.rstrip("\n")
+    if not HEADER_PATTERN.match(unquote_line(header)):
+        invalid_lines.append(InvalidLine(0, HEADER_REASON, header))
+
+
+def validate_stream(
+    stream: TextIO,
+    max_errors: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> ValidationReport:
+    """Validates the content of a Watchlist configuration file opened in text mode.
+
+    The stream is read in chunks of roughly chunk_size characters, each of which is cut at
+    its last newline and validated as a single block of rows.
+
+    Parameters
+    ----------
+    stream: TextIO
+        A Watchlist configuration file opened in text mode.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, every line
+        of the file is validated.
+    chunk_size: int
+        The number of characters read from the stream at a time.
+
+    Returns
+    -------
+    ValidationReport
+        A named tuple containing the number of checked lines, the list of invalid lines
+        and whether the validation stopped early because max_errors was reached.
+    """
+    invalid_lines: List[InvalidLine] = []
+    header = stream.readline()
+    if not header:
+        return ValidationReport(lines_checked=0, invalid_lines=invalid_lines, truncated=False)
+    validate_header_line(header, invalid_lines)
+    line_number = 1
+    remainder = ""
+    while max_errors is None or len(invalid_lines) < max_errors:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            if remainder:
+                line_number = validate_rows_block(
+                    f"{remainder}\n", line_number, invalid_lines, max_errors,
+                )
+            break
+        chunk = remainder + chunk
+        cut = chunk.rfind("\n") + 1
+        remainder = chunk[cut:]
+        line_number = validate_rows_block(chunk[:cut], line_number, invalid_lines, max_errors)
+    return ValidationReport(
+        lines_checked=line_number,
+        invalid_lines=invalid_lines,
+        truncated=max_errors is not None and len(invalid_lines) >= max_errors,
+    )
+
+
+class IncrementalValidator:
+    """Validates a Watchlist configuration file fed chunk by chunk, as it is read.
+
+    Every chunk of bytes is decoded incrementally and cut at its last newline, and the
+    complete rows are validated as a single block, exactly as by validate_stream; the
+    partial row at the end of a chunk is kept until the following chunk completes it.
+    Lines terminated by "\n", "\r\n" or a lone "\r" are accepted, as in universal newlines
+    mode. This lets content that can only be read once, such as the standard input or a
+    decompressed stream, be validated while it is consumed for another purpose, e.g. while
+    it is uploaded.
+    """
+
+    def __init__(self, max_errors: Optional[int] = None) -> None:
+        """Initialises the validator.
+
+        Parameters
+        ----------
+        max_errors: Optional[int]
+            The number of invalid lines after which the validation stops. If None, every
+            line is validated.
+        """
+        self.max_errors = max_errors
+        self.invalid_lines: List[InvalidLine] = []
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True,
+        )
+        self._line_number = 0
+        self._remainder = ""
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the validation stopped because max_errors was reached."""
+        return self.max_errors is not None and len(self.invalid_lines) >= self.max_errors
+
+    def _validate(self, text: str) -> None:
+        cut = text.rfind("\n") + 1
+        self._remainder = text[cut:]
+        block = text[:cut]
+        if not block or self.truncated:
+            return
+        if self._line_number == 0:
+            header, _, block = block.partition("\n")
+            validate_header_line(header, self.invalid_lines)
+            self._line_number = 1
+        if block and not self.truncated:
+            self._line_number = validate_rows_block(
+                block, self._line_number, self.invalid_lines, self.max_errors,
+            )
+
+    def feed(self, chunk: bytes) -> None:
+        """Validates the complete rows of a chunk, along with the partial row preceding it."""
+        self._validate(self._remainder + self._decoder.decode(chunk))
+
+    def close(self) -> ValidationReport:
+        """Validates the last row, if not terminated by a newline, and reports the outcome.
+
+        Returns
+        -------
+        ValidationReport
+            A named tuple containing the number of checked lines, the list of invalid lines
+            and whether the validation stopped early because max_errors was reached.
+        """
+        # A final "\r" is only released by the decoder once it knows no "\n" follows.
+        remainder = self._remainder + self._decoder.decode(b"", final=True)
+        if remainder and not remainder.endswith("\n"):
+            remainder += "\n"
+        self._validate(remainder)
+        return ValidationReport(
+            lines_checked=self._line_number,
+            invalid_lines=self.invalid_lines,
+            truncated=self.truncated,
+        )
+
+
+class ValidatingReader:
+    """A binary file-like object that validates the configuration it reads as it goes.
+
+    The reader wraps a binary stream, e.g. a configuration file being uploaded, and feeds
+    every chunk read from it to an IncrementalValidator. As soon as max_errors invalid
+    lines are found, or once the end of the stream is reached if the content is invalid,
+    the read raises an InvalidConfigurationError instead of returning. A consumer of the
+    reader, such as a multipart upload, is therefore interrupted before it receives the
+    end of an invalid configuration, while a valid one is read and validated in a single
+    pass.
+    """
+
+    def __init__(self, file_object: BinaryIO, max_errors: Optional[int] = 1) -> None:
+        """Initialises the reader.
+
+        Parameters
+        ----------
+        file_object: BinaryIO
+            The binary stream containing the Watchlist configuration.
+        max_errors: Optional[int]
+            The number of invalid lines after which the reads fail. If None, the reads
+            only fail at the end of an invalid stream.
+        """
+        self._file_object = file_object
+        self.validator = IncrementalValidator(max_errors)
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads and validates up to size bytes of the configuration.
+
+        Raises
+        ------
+        InvalidConfigurationError
+            If the configuration read so far is invalid.
+        """
+        chunk = self._file_object.read(size)
+        if chunk:
+            self.validator.feed(chunk)
+            if self.validator.truncated:
+                raise InvalidConfigurationError(self.validator.close())
+        else:
+            validation_report = self.validator.close()
+            if not validation_report.is_valid:
+                raise InvalidConfigurationError(validation_report)
+        return chunk
+
+
+def split_into_byte_ranges(
+    path_to_watchlist_config_file: str,
+    number_of_ranges: int,
+) -> List[Tuple[int, int]]:
+    """Splits the rows of a Watchlist configuration file into contiguous byte ranges.
+
+    The boundaries of the ranges are moved forward to the byte following the next line
+    ending, be it "\\n", "\\r\\n" or "\\r", so that every range starts at the beginning of
+    a row and ends right after the end of a row. The header is excluded from the ranges.
+
+    Parameters
+    ----------
+    path_to_watchlist_config_file: str
+        The location of the Watchlist configuration file to split.
+    number_of_ranges: int
+        The desired number of ranges. Fewer ranges are returned if the file is too small
+        to be split that many times.
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        A list of (start, end) byte offsets, ordered by position within the file.
+    """
+    with pathlib.Path(path_to_watchlist_config_file).open('rb') as config_file:
+        file_size = os.fstat(config_file.fileno()).st_size
+        if file_size == 0:
+            return []
+        with mmap.mmap(config_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            header_end = LINE_END_BYTES_PATTERN.search(buffer)
+            rows_start = header_end.end() if header_end else file_size
+            range_size = max((file_size - rows_start) // number_of_ranges, 1)
+            boundaries = [rows_start]
+            while boundaries[-1] < file_size:
+                line_end = LINE_END_BYTES_PATTERN.search(buffer, boundaries[-1] + range_size - 1)
+                boundaries.append(line_end.end() if line_end else file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def count_line_ends(data: bytes) -> int:
+    """Counts the lines terminated by "\\n", "\\r\\n" or "\\r" in a byte string."""
+    return data.count(b"\n") + data.count(b"\r") - data.count(b"\r\n")
+
+
+def find_window_end(buffer: mmap.mmap, start: int, limit: int, end: int) -> int:
+    """Finds the end of the last row terminated before limit, or of the first row if none.
+
+    The window is never cut between the "\\r" and the "\\n" of a "\\r\\n" line ending.
+    """
+    window_end = max(buffer.rfind(b"\n", start, limit), buffer.rfind(b"\r", start, limit)) + 1
+    if window_end == 0:
+        line_end = LINE_END_BYTES_PATTERN.search(buffer, start, end)
+        return line_end.end() if line_end else end
+    if window_end < end and buffer[window_end - 1:window_end + 1] == b"\r\n":
+        window_end += 1
+    return window_end
+
+
+def validate_buffer_window(
+    buffer: mmap.mmap,
+    start: int,
+    end: int,
+    first_line_number: int,
+    invalid_lines: List[InvalidLine],
+    max_errors: Optional[int] = None,
+) -> int:
+    """Validates the rows contained in a window of a memory-mapped configuration file.
+
+    The byte patterns are matched directly against the memory-mapped file by means of the
+    pos and endpos arguments, so that runs of properly formatted rows are consumed without
+    creating any Python object for them. Only the invalid rows are decoded into strings.
+    The newlines are counted on a copy of the window, whose size is bounded by CHUNK_SIZE
+    (unless a single row is longer than that).
+
+    Parameters
+    ----------
+    buffer: mmap.mmap
+        A memory-mapped Watchlist configuration file.
+    start: int
+        The offset of the first byte of the window, which has to be the first byte of a row.
+    end: int
+        The offset following the last byte of the window, which has to be the end of a row.
+    first_line_number: int
+        The line number of the first row of the window.
+    invalid_lines: List[InvalidLine]
+        The list the invalid rows are appended to.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, all the
+        rows of the window are validated.
+
+    Returns
+    -------
+    int
+        The line number following the last validated row.
+    """
+    line_number = first_line_number
+    position = start
+    while position < end:
+        valid_rows = ROWS_BLOCK_BYTES_PATTERN.match(buffer, position, end)
+        valid_end = valid_rows.end() if valid_rows else position
+        line_number += count_line_ends(buffer[position:valid_end])
+        if valid_end == end:
+            break
+        line_end = LINE_END_BYTES_PATTERN.search(buffer, valid_end, end)
+        content_end, position = line_end.span() if line_end else (end, end)
+        if not ROW_BYTES_PATTERN.fullmatch(buffer, valid_end, content_end):
+            row = buffer[valid_end:content_end].decode(errors="replace")
+            if not ROW_PATTERN.match(unquote_line(row)):
+                invalid_lines.append(InvalidLine(line_number, ROW_REASON, row))
+        line_number += 1
+        if max_errors is not None and len(invalid_lines) >= max_errors:
+            break
+    return line_number
+
+
+def validate_buffer_range(
+    buffer: mmap.mmap,
+    start: int,
+    end: int,
+    max_errors: Optional[int] = None,
+) -> Tuple[int, List[InvalidLine]]:
+    """Validates the rows contained in a byte range of a memory-mapped configuration file.
+
+    The range is processed in windows of about CHUNK_SIZE bytes, cut at the end of a row,
+    so that the memory used by the validation does not depend on the size of the range.
+
+    Parameters
+    ----------
+    buffer: mmap.mmap
+        A memory-mapped Watchlist configuration file.
+    start: int
+        The offset of the first byte of the range, which has to be the first byte of a row.
+    end: int
+        The offset following the last byte of the range.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, every row
+        of the range is validated.
+
+    Returns
+    -------
+    Tuple[int, List[InvalidLine]]
+        The number of rows validated within the range and the list of invalid rows, with
+        line numbers relative to the beginning of the range.
+    """
+    invalid_lines: List[InvalidLine] = []
+    line_number = 0
+    position = start
+    while position < end and (max_errors is None or len(invalid_lines) < max_errors):
+        window_end = find_window_end(buffer, position, min(position + CHUNK_SIZE, end), end)
+        line_number = validate_buffer_window(
+            buffer, position, window_end, line_number, invalid_lines, max_errors,
+        )
+        position = window_end
+    return line_number, invalid_lines
+
+
+def validate_byte_range(
+    path_to_watchlist_config_file: str,
+    start: int,
+    end: int,
+    max_errors: Optional[int] = None,
+) -> Tuple[int, List[InvalidLine]]:
+    """Validates the rows contained in a byte range of a Watchlist configuration file.
+
+    The file is memory-mapped and the range is validated by validate_buffer_range. The
+    rows are numbered starting from 0, relative to the beginning of the range.
+
+    Parameters
+    ----------
+    path_to_watchlist_config_file: str
+        The location of the Watchlist configuration file to validate.
+    start: int
+        The offset of the first byte of the range, which has to be the first byte of a row.
+    end: int
+        The offset following the last byte of the range.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, every row
+        of the range is validated.
+
+    Returns
+    -------
+    Tuple[int, List[InvalidLine]]
+        The number of rows validated within the range and the list of invalid rows, with
+        line numbers relative to the beginning of the range.
+    """
+    with pathlib.Path(path_to_watchlist_config_file).open('rb') as config_file:
+        with mmap.mmap(config_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return validate_buffer_range(buffer, start, end, max_errors)
+
+
+def validate_configuration_file_mmap(
+    path_to_watchlist_config_file: str,
+    max_errors: Optional[int] = None,
+) -> ValidationReport:
+    """Validates a memory-mapped Watchlist configuration file directly on its bytes.
+
+    Unlike validate_configuration_file, the file is not decoded: the header and row
+    patterns are matched as byte patterns against the memory-mapped file, and only the
+    invalid lines are turned into strings. The resident memory used by the validation
+    therefore stays flat whatever the size of the file. Lines terminated by "\\n", "\\r\\n"
+    or "\\r" are accepted, as by the universal newlines of a file opened in text mode, and
+    each line is accepted or rejected exactly as by validate_configuration_file.
+
+    Parameters
+    ----------
+    path_to_watchlist_config_file: str
+        The location of the Watchlist configuration file to validate.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, every line
+        of the file is validated.
+
+    Returns
+    -------
+    ValidationReport
+        A named tuple containing the number of checked lines, the list of invalid lines
+        and whether the validation stopped early because max_errors was reached.
+    """
+    invalid_lines: List[InvalidLine] = []
+    with pathlib.Path(path_to_watchlist_config_file).open('rb') as config_file:
+        if os.fstat(config_file.fileno()).st_size == 0:
+            return ValidationReport(lines_checked=0, invalid_lines=invalid_lines, truncated=False)
+        with mmap.mmap(config_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            header_line_end = LINE_END_BYTES_PATTERN.search(buffer)
+            header_end, rows_start = (
+                header_line_end.span() if header_line_end else (len(buffer), len(buffer))
+            )
+            if not HEADER_BYTES_PATTERN.fullmatch(buffer, 0, header_end):
+                validate_header_line(buffer[:header_end].decode(errors="replace"), invalid_lines)
+            if max_errors is not None:
+                max_errors -= len(invalid_lines)
+            rows_count, rows_invalid_lines = validate_buffer_range(
+                buffer, rows_start, len(buffer), max_errors,
+            )
+    invalid_lines.extend(
+        invalid_line._replace(line_number=invalid_line.line_number + 1)
+        for invalid_line in rows_invalid_lines
+    )
+    return ValidationReport(
+        lines_checked=rows_count + 1,
+        invalid_lines=invalid_lines,
+        truncated=max_errors is not None and len(rows_invalid_lines) >= max_errors,
+    )
+
+
+def validate_configuration_file_in_parallel(
+    path_to_watchlist_config_file: str,
+    workers: int,
+    max_errors: Optional[int] = None,
+) -> ValidationReport:
+    """Validates a Watchlist configuration file across a pool of worker processes.
+
+    The rows of the file are split into byte ranges aligned on newlines, which are
+    validated independently by a ProcessPoolExecutor. The partial results are then merged
+    in file order, shifting the line numbers of each range by the number of lines that
+    precede it, so that they match the line numbers reported by the sequential validation.
+
+    Parameters
+    ----------
+    path_to_watchlist_config_file: str
+        The location of the Watchlist configuration file to validate.
+    workers: int
+        The number of worker processes used for the validation.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, every line
+        of the file is validated.
+
+    Returns
+    -------
+    ValidationReport
+        A named tuple containing the number of checked lines, the list of invalid lines
+        and whether the validation stopped early because max_errors was reached.
+    """
+    invalid_lines: List[InvalidLine] = []
+    with pathlib.Path(path_to_watchlist_config_file).open(
+        'r', encoding="utf-8", errors="replace",
+    ) as config_file:
+        header = config_file.readline()
+    if not header:
+        return ValidationReport(lines_checked=0, invalid_lines=invalid_lines, truncated=False)
+    validate_header_line(header, invalid_lines)
+    if max_errors is not None and len(invalid_lines) >= max_errors:
+        return ValidationReport(lines_checked=1, invalid_lines=invalid_lines, truncated=True)
+    byte_ranges = split_into_byte_ranges(
+        path_to_watchlist_config_file, workers * RANGES_PER_WORKER,
+    )
+    line_number = 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        range_results = executor.map(
+            validate_byte_range,
+            [path_to_watchlist_config_file] * len(byte_ranges),
+            [start for start, _ in byte_ranges],
+            [end for _, end in byte_ranges],
+            [max_errors] * len(byte_ranges),
+        )
+        for range_line_count, range_invalid_lines in range_results:
+            invalid_lines.extend(
+                invalid_line._replace(line_number=invalid_line.line_number + line_number)
+                for invalid_line in range_invalid_lines
+            )
+            line_number += range_line_count
+    if max_errors is not None and len(invalid_lines) >= max_errors:
+        del invalid_lines[max_errors:]
+        return ValidationReport(
+            lines_checked=invalid_lines[-1].line_number + 1,
+            invalid_lines=invalid_lines,
+            truncated=True,
+        )
+    return ValidationReport(lines_checked=line_number, invalid_lines=invalid_lines, truncated=False)
+
+
+def validate_configuration_file(
+    path_to_watchlist_config_file: str,
+    max_errors: Optional[int] = None,
+    workers: int = 1,
+) -> ValidationReport:
+    """Validates a Watchlist configuration file and reports all its invalid lines.
+
+    Parameters
+    ----------
+    path_to_watchlist_config_file: str
+        The location of the Watchlist configuration file to validate, which can be
+        compressed with gzip, bzip2, xz or zstd, or "-" for the standard input.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, every line
+        of the file is validated.
+    workers: int
+        The number of processes used to validate the file. With more than one worker,
+        the rows are validated in parallel by validate_configuration_file_in_parallel.
+        Compressed files and the standard input are always validated sequentially, as
+        they are decompressed, since they cannot be split into byte ranges.
+
+    Returns
+    -------
+    ValidationReport
+        A named tuple containing the number of checked lines, the list of invalid lines
+        and whether the validation stopped early because max_errors was reached.
+    """
+    if not is_plain_file(path_to_watchlist_config_file):
+        with io.TextIOWrapper(
+            open_decompressed(path_to_watchlist_config_file), encoding="utf-8", errors="replace",
+        ) as config_file:
+            return validate_stream(config_file, max_errors)
+    if workers > 1:
+        return validate_configuration_file_in_parallel(
+            path_to_watchlist_config_file, workers, max_errors,
+        )
+    with pathlib.Path(path_to_watchlist_config_file).open(
+        'r', encoding="utf-8", errors="replace",
+    ) as config_file:
+        return validate_stream(config_file, max_errors)
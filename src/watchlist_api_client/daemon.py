@@ -0,0 +1,591 @@
+"""Implements a local daemon running the submissions and retrievals of the CLI in a warm process.
+
+Every invocation of the CLI pays for the startup of the interpreter, the imports and a new
+TLS handshake, which make up most of its duration for small configurations. The daemon is a
+long-lived process that keeps the modules imported, the default WatchlistClient with its pool
+of open connections, and the caches, and runs the jobs sent to it by the CLI over a Unix
+domain socket.
+
+Each connection carries a single job: the client sends a JSON object followed by a line
+feed, {"job": <name>, "arguments": {...}, "environment": {...}}, and the daemon answers with
+a JSON object followed by a line feed, either {"result": ...} or
+{"error": {"type": ..., "message": ...}}. The environment holds the variables of the caller
+that change the outcome of a job, which the daemon reads from its own environment: a job is
+refused, and runs in the caller instead, unless they have the same values in both.
+"""
+import importlib
+import json
+import os
+import pathlib
+import socket
+import socketserver
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union, cast
+
+from watchlist_api_client.data_structures import (
+    ConditionalSubmission,
+    RequestSummary,
+    RetrievedConfigFile,
+)
+from watchlist_api_client.defaults import DEFAULT_ACTIVE_TTL
+from watchlist_api_client.helpers import (
+    CACHE_DIRECTORY_ENVIRONMENT_VARIABLE,
+    convert_raw_utc_timestamp_to_string,
+    get_cache_directory,
+    join_base_url_and_query_string,
+    prepare_timestamp_query_string,
+)
+
+
+DAEMON_SOCKET_ENVIRONMENT_VARIABLE = "WATCHLIST_API_CLIENT_DAEMON_SOCKET"
+SOCKET_FILE_NAME = "daemon.sock"
+SOCKET_PERMISSIONS = 0o600
+SOCKET_DIRECTORY_PERMISSIONS = 0o700
+# The seconds to wait for the daemon to accept a connection, for a job to complete, and for
+# a client to send its request once connected.
+CONNECT_TIMEOUT = 1.0
+JOB_TIMEOUT = 3600.0
+REQUEST_TIMEOUT = 10.0
+# The number of connections served at once. The daemon refuses the connections above it, as
+# soon as it accepts them, and their callers run their jobs themselves.
+MAX_CONNECTIONS = 16
+# The environment variables read by the jobs, for the caches, the proxies and the trusted
+# certificates. Setting them in the threads of the daemon would leak them across jobs.
+JOB_ENVIRONMENT_VARIABLES = (
+    CACHE_DIRECTORY_ENVIRONMENT_VARIABLE,
+    "XDG_CACHE_HOME",
+    "HTTP_PROXY",
+    "HTTPS_PROXY",
+    "ALL_PROXY",
+    "NO_PROXY",
+    "http_proxy",
+    "https_proxy",
+    "all_proxy",
+    "no_proxy",
+    "REQUESTS_CA_BUNDLE",
+    "CURL_CA_BUNDLE",
+    "SSL_CERT_FILE",
+    "SSL_CERT_DIR",
+)
+# The modules whose exceptions are raised again by the client as they were raised by a job.
+FORWARDED_EXCEPTION_MODULES = ("builtins", "requests.", "watchlist_api_client.")
+
+
+class DaemonError(Exception):
+    """An exception class that is raised when the daemon fails to run a job."""
+
+    pass
+
+
+class DaemonUnavailableError(DaemonError):
+    """An exception class that is raised when no daemon is listening on the socket."""
+
+    pass
+
+
+def get_socket_path() -> str:
+    """Returns the path of the Unix domain socket the daemon listens on.
+
+    The path is read from the WATCHLIST_API_CLIENT_DAEMON_SOCKET environment variable. If
+    the variable is not set, it defaults to daemon.sock within the daemon directory of the
+    caches of the library (see helpers.get_cache_directory).
+    """
+    socket_path = os.environ.get(DAEMON_SOCKET_ENVIRONMENT_VARIABLE)
+    if socket_path:
+        return socket_path
+    return get_cache_directory("daemon").joinpath(SOCKET_FILE_NAME).as_posix()
+
+
+def get_job_environment() -> Dict[str, Optional[str]]:
+    """Returns the values of the JOB_ENVIRONMENT_VARIABLES, None for those that are not set."""
+    return {name: os.environ.get(name) for name in JOB_ENVIRONMENT_VARIABLES}
+
+
+def submit_config(
+    credentials: Tuple[str, str],
+    config_file: str,
+    max_attempts: int = 4,
+    retry_post: bool = False,
+    validate_while_uploading: bool = False,
+    workers: int = 1,
+    use_cache: bool = True,
+    watchlist_endpoint: Optional[str] = None,
+) -> RequestSummary:
+    """Validates and submits a Watchlist configuration file, as the submit command does.
+
+    The file is validated first with config_sender.validate_watchlist_configuration_file,
+    using workers processes and the validation cache if use_cache is True, unless
+    validate_while_uploading is True, in which case it is validated while it is uploaded.
+    It is then submitted with config_sender.send_config, retried according to a
+    RetryPolicy of max_attempts attempts that retries the submission only if retry_post is
+    True, to watchlist_endpoint or, if it is None, to client.WATCHLIST_API_ENDPOINT.
+
+    Returns
+    -------
+    RequestSummary
+        The summary of the actions performed as a result of the submission.
+    """
+    # The sender depends on requests, which is slow to import, hence the import at call time.
+    from watchlist_api_client import client, config_sender
+    from watchlist_api_client.retry import RetryPolicy
+
+    if not validate_while_uploading:
+        config_sender.validate_watchlist_configuration_file(
+            config_file, workers=workers, use_cache=use_cache,
+        )
+    return config_sender.send_config(
+        watchlist_endpoint or client.WATCHLIST_API_ENDPOINT,
+        credentials,
+        path_to_watchlist_config_file=config_file,
+        retry_policy=RetryPolicy(max_attempts=max_attempts, retry_post=retry_post),
+        validate=validate_while_uploading,
+    )
+
+
+def submit_config_if_changed(
+    credentials: Tuple[str, str],
+    config_file: str,
+    max_attempts: int = 4,
+    retry_post: bool = False,
+    workers: int = 1,
+    use_cache: bool = True,
+    watchlist_endpoint: Optional[str] = None,
+) -> ConditionalSubmission:
+    """Validates a Watchlist configuration file and submits it only if it changes anything.
+
+    The file is validated as in submit_config and then submitted, only if it differs from
+    the active configuration, with config_sender.send_config_if_changed.
+
+    Returns
+    -------
+    ConditionalSubmission
+        Whether the file was submitted, the local summary of its changes and, if it was
+        submitted, the summary of the actions performed.
+    """
+    from watchlist_api_client import client, config_sender
+    from watchlist_api_client.retry import RetryPolicy
+
+    config_sender.validate_watchlist_configuration_file(
+        config_file, workers=workers, use_cache=use_cache,
+    )
+    return config_sender.send_config_if_changed(
+        watchlist_endpoint or client.WATCHLIST_API_ENDPOINT,
+        credentials,
+        path_to_watchlist_config_file=config_file,
+        retry_policy=RetryPolicy(max_attempts=max_attempts, retry_post=retry_post),
+    )
+
+
+def retrieve_config(
+    credentials: Tuple[str, str],
+    path_to_directory: str,
+    timestamp: Optional[str] = None,
+    max_attempts: int = 4,
+    use_cache: bool = True,
+    active_ttl: float = DEFAULT_ACTIVE_TTL,
+    compression: Optional[str] = None,
+    store: Optional[str] = None,
+    watchlist_endpoint: Optional[str] = None,
+) -> Tuple[RetrievedConfigFile, Optional[str]]:
+    """Retrieves a configuration to a file or to a snapshot store, as the retrieve command does.
+
+    The configuration active at the raw UTC timestamp, or the currently active one if
+    timestamp is None, is retrieved from watchlist_endpoint or, if it is None, from
+    client.WATCHLIST_API_ENDPOINT. It is retrieved with
+    config_retriever.retrieve_config_to_file to path_to_directory, or, if store is not
+    None, to a staging directory within the store, and then added to the snapshot store in
+    that directory.
+
+    Returns
+    -------
+    Tuple[RetrievedConfigFile, Optional[str]]
+        The retrieved configuration file, and its digest in the snapshot store if store is
+        not None. The file added to the store is removed from the staging directory.
+    """
+    # The retriever depends on requests, which is slow to import, hence the import at call
+    # time.
+    from watchlist_api_client import client, config_retriever
+    from watchlist_api_client.retry import RetryPolicy
+    from watchlist_api_client.snapshot_store import SnapshotStore
+
+    watchlist_endpoint = watchlist_endpoint or client.WATCHLIST_API_ENDPOINT
+    if timestamp:
+        watchlist_endpoint = join_base_url_and_query_string(
+            watchlist_endpoint,
+            prepare_timestamp_query_string(convert_raw_utc_timestamp_to_string(timestamp)),
+        )
+    retry_policy = RetryPolicy(max_attempts=max_attempts)
+    if store is None:
+        retrieved_config_file = config_retriever.retrieve_config_to_file(
+            watchlist_endpoint,
+            credentials,
+            path_to_directory,
+            retry_policy=retry_policy,
+            use_cache=use_cache,
+            active_ttl=active_ttl,
+            compression=compression,
+        )
+        return retrieved_config_file, None
+    store_content = SnapshotStore(store)
+    with tempfile.TemporaryDirectory(dir=store) as staging_directory:
+        retrieved_config_file = config_retriever.retrieve_config_to_file(
+            watchlist_endpoint,
+            credentials,
+            staging_directory,
+            retry_policy=retry_policy,
+            use_cache=use_cache,
+            active_ttl=active_ttl,
+        )
+        return retrieved_config_file, store_content.add_file(retrieved_config_file)
+
+
+# The JSON encodings of the results of the jobs, in which named tuples are encoded as lists.
+RawRequestSummary = Tuple[str, Dict[str, object]]
+RawRetrievedConfigFile = Tuple[str, str, int]
+
+
+def _decode_request_summary(raw_result: object) -> RequestSummary:
+    submission_time, summary = cast(RawRequestSummary, raw_result)
+    return RequestSummary(submission_time, cast(Dict[str, Union[int, List[str]]], summary))
+
+
+def _decode_conditional_submission(raw_result: object) -> ConditionalSubmission:
+    submitted, local_summary, raw_request_summary = cast(
+        Tuple[bool, Dict[str, Union[int, List[str]]], Optional[RawRequestSummary]], raw_result,
+    )
+    request_summary = _decode_request_summary(raw_request_summary) if raw_request_summary else None
+    return ConditionalSubmission(submitted, local_summary, request_summary)
+
+
+def _decode_retrieval(raw_result: object) -> Tuple[RetrievedConfigFile, Optional[str]]:
+    raw_retrieved_config_file, digest = cast(
+        Tuple[RawRetrievedConfigFile, Optional[str]], raw_result,
+    )
+    return RetrievedConfigFile(*raw_retrieved_config_file), digest
+
+
+# The jobs the daemon runs, and the functions rebuilding their results from their JSON
+# encoding. The jobs have different signatures, which a Callable can only express with an
+# ellipsis, an implicit Any.
+JOBS: Dict[str, Callable[..., object]] = {  # type: ignore[explicit-any]
+    "submit": submit_config,
+    "submit_if_changed": submit_config_if_changed,
+    "retrieve": retrieve_config,
+}
+RESULT_DECODERS: Dict[str, Callable[[object], object]] = {
+    "submit": _decode_request_summary,
+    "submit_if_changed": _decode_conditional_submission,
+    "retrieve": _decode_retrieval,
+}
+
+
+def run_job_request(request: Dict[str, object]) -> Dict[str, object]:
+    """Runs the job of a request received by the daemon and returns the response to send.
+
+    A request whose environment differs from the one of the daemon is refused with a
+    DaemonUnavailableError, without running its job, so that the caller runs it instead.
+    The files are validated in the thread of the job, whatever the number of workers
+    requested, since forking worker processes from a multithreaded process is unsafe.
+
+    Parameters
+    ----------
+    request: Dict[str, object]
+        The decoded request, holding the name of the job, its keyword arguments and the
+        environment of the caller.
+
+    Returns
+    -------
+    Dict[str, object]
+        The response, holding either the result of the job or the type and message of the
+        exception it raised.
+    """
+    try:
+        if request.get("environment") != get_job_environment():
+            raise DaemonUnavailableError(
+                "The environment of the daemon differs from the environment of the caller"
+            )
+        job = JOBS[str(request["job"])]
+        arguments = dict(cast(Dict[str, object], request.get("arguments", {})))
+        # JSON has no tuples, while requests only accepts the credentials as a tuple.
+        if "credentials" in arguments:
+            arguments["credentials"] = tuple(cast(List[str], arguments["credentials"]))
+        if "workers" in arguments:
+            arguments["workers"] = 1
+        return {"result": job(**arguments)}
+    except Exception as error:
+        return encode_job_error(error)
+
+
+def encode_job_error(error: Exception) -> Dict[str, object]:
+    """Encodes the exception raised by a job as the response to send, see raise_job_error."""
+    error_type = type(error)
+    return {
+        "error": {
+            "type": f"{error_type.__module__}.{error_type.__qualname__}",
+            "message": str(error),
+        },
+    }
+
+
+def raise_job_error(error: Dict[str, str]) -> None:
+    """Raises again on the client side the exception raised by a job in the daemon.
+
+    The exceptions of the standard library, of requests and of this library are raised
+    again with their type and message, so that the callers handle them as if the job had
+    run in their own process. Any other exception is raised as a DaemonError.
+
+    Raises
+    ------
+    Exception
+        The exception raised by the job.
+    """
+    module_name, _, type_name = error["type"].rpartition(".")
+    error_type = None
+    if f"{module_name}.".startswith(FORWARDED_EXCEPTION_MODULES):
+        try:
+            error_type = getattr(importlib.import_module(module_name), type_name, None)
+        except ImportError:
+            pass
+    if isinstance(error_type, type) and issubclass(error_type, Exception):
+        try:
+            exception = error_type(error["message"])
+        except TypeError:
+            pass
+        else:
+            raise exception
+    raise DaemonError(f"{error['type']}: {error['message']}")
+
+
+def send_job_request(
+    job: str,
+    arguments: Dict[str, object],
+    socket_path: Optional[str] = None,
+    timeout: Optional[float] = JOB_TIMEOUT,
+) -> object:
+    """Sends a job to the daemon and returns its result.
+
+    Parameters
+    ----------
+    job: str
+        The name of the job, one of the keys of JOBS.
+    arguments: Dict[str, object]
+        The keyword arguments of the job. Paths must be absolute, since the daemon does not
+        run in the working directory of the caller.
+    socket_path: Optional[str]
+        The path of the socket the daemon listens on. If None, get_socket_path is used.
+    timeout: Optional[float]
+        The number of seconds to wait for the result of the job. If None, the result is
+        waited for indefinitely.
+
+    Returns
+    -------
+    object
+        The result of the job, as returned by the job function.
+
+    Raises
+    ------
+    DaemonUnavailableError
+        If no daemon accepts a connection on the socket within CONNECT_TIMEOUT seconds,
+        e.g. because none is running or the socket belongs to another user, or if the
+        daemon refused the job because its environment differs or because it serves too
+        many connections. The job was not run, so that it can safely run elsewhere.
+    DaemonError
+        If the connection to the daemon broke or timed out after the job was sent, or if
+        the job raised an exception that is not raised again as is (see raise_job_error).
+    """
+    socket_path = socket_path or get_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(CONNECT_TIMEOUT)
+        try:
+            connection.connect(socket_path)
+        except OSError as connection_error:
+            raise DaemonUnavailableError(
+                f"No daemon is available on {socket_path}: {connection_error}"
+            ) from connection_error
+        connection.settimeout(timeout)
+        request = json.dumps(
+            {"job": job, "arguments": arguments, "environment": get_job_environment()},
+        ).encode()
+        try:
+            connection.sendall(request + b"\n")
+        except BrokenPipeError:
+            # A daemon refusing the connection answers without reading the request, and its
+            # answer is still read once it closed the connection.
+            pass
+        except OSError as connection_error:
+            raise DaemonError(f"The connection to the daemon broke: {connection_error}")
+        try:
+            with connection.makefile('rb') as response_file:
+                raw_response = response_file.readline()
+        except OSError as connection_error:
+            raise DaemonError(f"The connection to the daemon broke: {connection_error}")
+    if not raw_response:
+        raise DaemonError("The daemon closed the connection without answering")
+    response = json.loads(raw_response)
+    if "error" in response:
+        raise_job_error(response["error"])
+    return RESULT_DECODERS[job](response["result"])
+
+
+def run_job(
+    job: str,
+    arguments: Dict[str, object],
+    use_daemon: bool = True,
+    socket_path: Optional[str] = None,
+) -> object:
+    """Runs a job in the daemon if one is running, and in the current process otherwise.
+
+    The job is sent to the daemon only if it is listening on the socket and runs in the
+    same environment: if not, the job falls back to running in the current process. A job
+    that reached the daemon is never run again in the current process, even if the daemon
+    fails, since a submission may have been performed already. A job validating a file
+    with more than one worker always runs in the current process, since the daemon only
+    validates in the thread of the job.
+
+    Parameters
+    ----------
+    job: str
+        The name of the job, one of the keys of JOBS.
+    arguments: Dict[str, object]
+        The keyword arguments of the job, encodable as JSON. Paths must be absolute.
+    use_daemon: bool
+        Whether the job is sent to the daemon. If False, it always runs in the current
+        process.
+    socket_path: Optional[str]
+        The path of the socket the daemon listens on. If None, get_socket_path is used.
+
+    Returns
+    -------
+    object
+        The result of the job, as returned by the job function.
+    """
+    workers = arguments.get("workers", 1)
+    if use_daemon and not (isinstance(workers, int) and workers > 1):
+        try:
+            return send_job_request(job, arguments, socket_path)
+        except DaemonUnavailableError:
+            pass
+    return JOBS[job](**arguments)
+
+
+# The connections accepted by the daemon, as typed by socketserver.
+Request = Union[socket.socket, Tuple[bytes, socket.socket]]
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Answers the job request received on a connection to the daemon."""
+
+    timeout = REQUEST_TIMEOUT
+
+    def handle(self) -> None:
+        try:
+            raw_request = self.rfile.readline()
+        except socket.timeout:
+            return
+        if not raw_request:
+            return
+        try:
+            request = json.loads(raw_request)
+        except ValueError as value_error:
+            response: Dict[str, object] = {
+                "error": {"type": "builtins.ValueError", "message": str(value_error)},
+            }
+        else:
+            response = run_job_request(request)
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class WatchlistDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A daemon running the jobs sent over a Unix domain socket, each in its own thread.
+
+    At most max_connections connections are served at once: the connections above are
+    refused with a DaemonUnavailableError, without reading their requests, so that their
+    callers run the jobs themselves rather than waiting for a thread of the daemon.
+
+    The socket is only accessible to the user running the daemon: it is created with the
+    0600 permissions within a directory that, if created by the daemon, has the 0700
+    permissions. A socket file left behind by a daemon that is no longer running is
+    replaced. The jobs share the default WatchlistClient of the process, whose pool keeps
+    the connections to the Watchlist API open between jobs.
+
+    Parameters
+    ----------
+    socket_path: Optional[str]
+        The path of the socket to listen on. If None, get_socket_path is used.
+    max_connections: int
+        The number of connections served at once.
+
+    Raises
+    ------
+    DaemonError
+        If another daemon is already listening on the socket.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, socket_path: Optional[str] = None, max_connections: int = MAX_CONNECTIONS,
+    ) -> None:
+        self.socket_path = socket_path or get_socket_path()
+        self.connection_slots = threading.BoundedSemaphore(max_connections)
+        socket_file = pathlib.Path(self.socket_path)
+        socket_file.parent.mkdir(mode=SOCKET_DIRECTORY_PERMISSIONS, parents=True, exist_ok=True)
+        if socket_file.is_socket():
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(CONNECT_TIMEOUT)
+                try:
+                    connection.connect(self.socket_path)
+                except ConnectionRefusedError:
+                    socket_file.unlink()
+                except OSError as connection_error:
+                    raise DaemonError(
+                        f"Cannot check the socket {self.socket_path}: {connection_error}"
+                    ) from connection_error
+                else:
+                    raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+        # The umask makes the socket private from its creation, rather than from the chmod.
+        previous_umask = os.umask(0o777 & ~SOCKET_PERMISSIONS)
+        try:
+            super().__init__(self.socket_path, DaemonRequestHandler)
+        finally:
+            os.umask(previous_umask)
+        os.chmod(self.socket_path, SOCKET_PERMISSIONS)
+        # The modules of the jobs and the default client are loaded before the first job.
+        for module_name in ("config_retriever", "config_sender", "snapshot_store"):
+            importlib.import_module(f"watchlist_api_client.{module_name}")
+        importlib.import_module("watchlist_api_client.client").get_default_client()
+
+    def process_request(self, request: Request, client_address: object) -> None:
+        if not self.connection_slots.acquire(blocking=False):
+            self.refuse_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self.connection_slots.release()
+            raise
+
+    def process_request_thread(self, request: Request, client_address: object) -> None:
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.connection_slots.release()
+
+    def refuse_request(self, request: Request) -> None:
+        """Answers a connection above max_connections with a DaemonUnavailableError."""
+        response = encode_job_error(
+            DaemonUnavailableError("The daemon is serving too many connections"),
+        )
+        try:
+            cast(socket.socket, request).sendall(json.dumps(response).encode() + b"\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
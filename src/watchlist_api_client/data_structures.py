@@ -1,6 +1,17 @@
 """Module containing user-defined data structures."""
+from array import array
+import bisect
+from collections import defaultdict
+import itertools
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
 
-from typing import Dict, List, NamedTuple, Union
+from watchlist_api_client.helpers import parse_row
+
+
+# Matches every non-blank line, with its fields captured when it is an unquoted row, as
+# line endings are recognised by the validator: \r\n, \n or a lone \r.
+LINE_FIELDS_PATTERN = re.compile(rb'([0-9]+),([^"\r\n]+)(?=[\r\n]|\Z)|[^\r\n]+')
 
 
 class RequestSummary(NamedTuple):
@@ -10,8 +21,306 @@ class RequestSummary(NamedTuple):
     summary: Dict[str, Union[int, List[str]]]
 
 
+class ConditionalSubmission(NamedTuple):
+    """Stores the outcome of a submission that is skipped when nothing would change."""
+
+    submitted: bool
+    local_summary: Dict[str, Union[int, List[str]]]
+    request_summary: Optional[RequestSummary]
+
+
 class RetrievedConfig(NamedTuple):
     """Stores the content of the configuration retrieved from the Watchlist API."""
 
     timestamp: str
     config_body: bytes
+
+
+class RetrievedConfigFile(NamedTuple):
+    """Stores the location of a configuration retrieved from the Watchlist API to disk."""
+
+    timestamp: str
+    path: str
+    size: int
+
+
+class HistoryEntry(NamedTuple):
+    """Stores the outcome of the retrieval of one point in time of a configuration history."""
+
+    requested_timestamp: str
+    retrieved_config_file: Optional[RetrievedConfigFile]
+    error: Optional[str]
+
+
+class ChangePoint(NamedTuple):
+    """Stores the interval within which the active configuration changed."""
+
+    last_before_change: str
+    first_after_change: str
+    digest_before_change: Optional[str]
+    digest_after_change: Optional[str]
+
+
+class SourceDiff(NamedTuple):
+    """Stores how the RTS symbols of a source differ between two configurations."""
+
+    added: List[str]
+    removed: List[str]
+    unchanged: List[str]
+
+
+class ConfigurationDiff(NamedTuple):
+    """Stores the differences between two configurations, source by source."""
+
+    activated: List[str]
+    deactivated: List[str]
+    sources: Dict[str, SourceDiff]
+
+
+class MembershipInterval(NamedTuple):
+    """Stores a period during which a source held an RTS symbol.
+
+    The period starts with the first snapshot listing the symbol under the source and
+    ends with the first later snapshot that does not, or is open, with valid_to set to
+    None, if the symbol is still listed in the latest snapshot.
+    """
+
+    source_id: int
+    symbol: str
+    valid_from: str
+    valid_to: Optional[str]
+
+
+class InvalidLine(NamedTuple):
+    """Stores the details of an improperly formatted line of a Watchlist configuration file."""
+
+    line_number: int
+    reason: str
+    text: str
+
+
+class ValidationReport(NamedTuple):
+    """Stores the outcome of the validation of a Watchlist configuration file."""
+
+    lines_checked: int
+    invalid_lines: List[InvalidLine]
+    truncated: bool
+
+    @property
+    def is_valid(self) -> bool:
+        """Whether the validated file contained no improperly formatted lines."""
+        return not self.invalid_lines
+
+
+class WatchlistConfig:
+    """Stores the rows of a Watchlist configuration in a compact, columnar form.
+
+    The rows are grouped by source ID, in compressed sparse row layout: the distinct source
+    IDs are kept in numerical order in an integer array, and the symbols of the i-th source
+    are the entries offsets[i] to offsets[i + 1] of an array of symbol IDs. The symbols are
+    interned in a table shared by all the sources, sorted and concatenated in a single byte
+    string, so that a symbol listed under several sources is stored once and no Python
+    object is kept per row. Duplicated rows collapse into one, blank rows are skipped and
+    quoted fields are unquoted, as by the validator.
+
+    A configuration built from a RetrievedConfig keeps the body as is until its rows are
+    first accessed, at which point the columns are built and the body is released, or a
+    ValueError is raised if a row is malformed.
+    """
+
+    __slots__ = (
+        "timestamp",
+        "_config_body",
+        "_source_ids",
+        "_offsets",
+        "_symbol_ids",
+        "_symbol_table",
+        "_symbol_offsets",
+    )
+
+    def __init__(self, config_body: bytes, timestamp: Optional[str] = None) -> None:
+        """Initialises the configuration, without parsing its body yet.
+
+        Parameters
+        ----------
+        config_body: bytes
+            The content of a Watchlist configuration, header included.
+        timestamp: Optional[str]
+            The timestamp of the configuration, if it was retrieved from the Watchlist API.
+        """
+        self.timestamp = timestamp
+        self._config_body: Optional[bytes] = config_body
+        self._source_ids = array("q")
+        self._offsets = array("q", [0])
+        self._symbol_ids = array("q")
+        self._symbol_table = b""
+        self._symbol_offsets = array("q", [0])
+
+    @classmethod
+    def from_retrieved_config(cls, retrieved_config: RetrievedConfig) -> "WatchlistConfig":
+        """Wraps a configuration retrieved from the Watchlist API."""
+        return cls(retrieved_config.config_body, retrieved_config.timestamp)
+
+    def _build(self) -> None:
+        if self._config_body is None:
+            return
+        config_body, self._config_body = self._config_body, None
+        # The rows are grouped by source while they are scanned: the symbols are numbered
+        # in order of appearance, and every distinct symbol is kept once. The sets of
+        # symbol numbers still hold an entry per distinct row until the columns are built.
+        appearance_ids: Dict[bytes, int] = {}
+        source_appearance_ids: Dict[bytes, Set[int]] = defaultdict(set)
+        lines = LINE_FIELDS_PATTERN.finditer(config_body)
+        next(lines, None)
+        try:
+            for line in lines:
+                source_id, symbol = line.groups()
+                if source_id is None:
+                    # Quoted rows are unquoted, and malformed ones are rejected.
+                    source_number, text_symbol = parse_row(line.group().decode(errors="replace"))
+                    source_id, symbol = b"%d" % source_number, text_symbol.encode()
+                appearance_id = appearance_ids.setdefault(symbol, len(appearance_ids))
+                source_appearance_ids[source_id].add(appearance_id)
+        except ValueError:
+            # The body is kept, so that the configuration is never left silently empty.
+            self._config_body = config_body
+            raise
+        del config_body
+        symbols = sorted(appearance_ids)
+        # The symbol IDs follow the lexicographical order of the symbols.
+        symbol_ids = array(get_index_typecode(len(symbols)), [0]) * len(symbols)
+        for symbol_id, symbol in enumerate(symbols):
+            symbol_ids[appearance_ids[symbol]] = symbol_id
+        del appearance_ids
+        # Source IDs written with leading zeros refer to the same source.
+        grouped_appearance_ids: Dict[int, Set[int]] = defaultdict(set)
+        for source_id, appearance_id_set in source_appearance_ids.items():
+            grouped_appearance_ids[int(source_id)] |= appearance_id_set
+        del source_appearance_ids
+        self._source_ids = array("q", sorted(grouped_appearance_ids))
+        self._offsets = array("q", [0])
+        self._symbol_ids = array(get_index_typecode(len(symbols)))
+        for source_id in self._source_ids:
+            self._symbol_ids.extend(sorted(
+                symbol_ids[appearance_id]
+                for appearance_id in grouped_appearance_ids.pop(source_id)
+            ))
+            self._offsets.append(len(self._symbol_ids))
+        self._symbol_table = b"".join(symbols)
+        self._symbol_offsets = array("q", [0])
+        self._symbol_offsets.extend(itertools.accumulate(map(len, symbols)))
+
+    def _symbol(self, symbol_id: int) -> bytes:
+        return self._symbol_table[
+            self._symbol_offsets[symbol_id]:self._symbol_offsets[symbol_id + 1]
+        ]
+
+    def _source_index(self, source_id: object) -> Optional[int]:
+        if not isinstance(source_id, (int, str)):
+            return None
+        try:
+            source_number = int(source_id)
+        except ValueError:
+            return None
+        self._build()
+        index = bisect.bisect_left(self._source_ids, source_number)
+        if index < len(self._source_ids) and self._source_ids[index] == source_number:
+            return index
+        return None
+
+    def _symbol_id(self, symbol: str) -> Optional[int]:
+        symbol_bytes = symbol.encode()
+        symbols = _SymbolTable(self)
+        symbol_id = bisect.bisect_left(symbols, symbol_bytes)
+        if symbol_id < len(symbols) and symbols[symbol_id] == symbol_bytes:
+            return symbol_id
+        return None
+
+    def sources(self) -> List[int]:
+        """Returns the IDs of the sources of the configuration, in numerical order."""
+        self._build()
+        return self._source_ids.tolist()
+
+    def symbols_for(self, source_id: Union[int, str]) -> List[str]:
+        """Returns the RTS symbols of a source, in lexicographical order.
+
+        Parameters
+        ----------
+        source_id: Union[int, str]
+            The ID of the source, as an integer or as it is written in the configuration.
+
+        Returns
+        -------
+        List[str]
+            The RTS symbols of the source.
+
+        Raises
+        ------
+        KeyError
+            If the source is not part of the configuration.
+        """
+        index = self._source_index(source_id)
+        if index is None:
+            raise KeyError(source_id)
+        return [
+            self._symbol(symbol_id).decode()
+            for symbol_id in self._symbol_ids[self._offsets[index]:self._offsets[index + 1]]
+        ]
+
+    def __contains__(self, item: object) -> bool:
+        """Whether a source ID, or a (source ID, RTS symbol) row, is part of the configuration."""
+        if not isinstance(item, tuple):
+            return self._source_index(item) is not None
+        if len(item) != 2 or not isinstance(item[1], str):
+            return False
+        source_id, symbol = item
+        index = self._source_index(source_id)
+        if index is None:
+            return False
+        symbol_id = self._symbol_id(symbol)
+        if symbol_id is None:
+            return False
+        start, end = self._offsets[index], self._offsets[index + 1]
+        position = bisect.bisect_left(self._symbol_ids, symbol_id, start, end)
+        return position < end and self._symbol_ids[position] == symbol_id
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        """Iterates over the (source ID, RTS symbol) rows, grouped by source ID."""
+        self._build()
+        for index, source_id in enumerate(self._source_ids):
+            for symbol_id in self._symbol_ids[self._offsets[index]:self._offsets[index + 1]]:
+                yield source_id, self._symbol(symbol_id).decode()
+
+    def __len__(self) -> int:
+        """Returns the number of distinct rows of the configuration."""
+        self._build()
+        return len(self._symbol_ids)
+
+    def __repr__(self) -> str:
+        """Returns a short description of the configuration."""
+        return f"WatchlistConfig(timestamp={self.timestamp!r}, rows={len(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes taken by the columns and the symbol table."""
+        self._build()
+        columns = (self._source_ids, self._offsets, self._symbol_ids, self._symbol_offsets)
+        columns_nbytes = sum(column.itemsize * len(column) for column in columns)
+        return columns_nbytes + len(self._symbol_table)
+
+
+class _SymbolTable:
+    # A read-only view of the interned symbols of a WatchlistConfig, which bisect can search.
+    def __init__(self, watchlist_config: WatchlistConfig) -> None:
+        self._watchlist_config = watchlist_config
+
+    def __getitem__(self, symbol_id: int) -> bytes:
+        return self._watchlist_config._symbol(symbol_id)
+
+    def __len__(self) -> int:
+        return len(self._watchlist_config._symbol_offsets) - 1
+
+
+def get_index_typecode(size: int) -> str:
+    """Returns the typecode of the narrowest unsigned array able to index size elements."""
+    return "I" if size < 2 ** (8 * array("I").itemsize) else "Q"
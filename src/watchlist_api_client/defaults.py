@@ -0,0 +1,10 @@
+"""Defines the defaults shared by the modules of the library and the command line app.
+
+The module imports nothing, so that the command line app can show the defaults in its
+options, e.g. for 'watchlist --help', without running the modules they belong to.
+"""
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "bzip2": ".bz2", "xz": ".xz", "zstd": ".zst"}
+COMPRESSIONS = tuple(COMPRESSION_SUFFIXES)
+DEFAULT_ACTIVE_TTL = 60.0
+DEFAULT_MAX_WORKERS = 8
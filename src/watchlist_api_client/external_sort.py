@@ -0,0 +1,160 @@
+"""Implements the sorting of configurations larger than memory, in runs merged from disk."""
+import contextlib
+import heapq
+import io
+import os
+import sys
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from watchlist_api_client.compression import open_decompressed
+from watchlist_api_client.data_structures import RetrievedConfig, WatchlistConfig
+from watchlist_api_client.helpers import parse_row
+
+
+DEFAULT_MAX_MEMORY = 64 * 1024 * 1024
+MAX_MERGE_FAN_IN = 64
+SOURCE_ID_WIDTH = 20
+ROW_POINTER_SIZE = 8
+
+
+def encode_sortable_row(line: str) -> bytes:
+    """Encodes a row so that sorting the encoded rows as bytes sorts them by source ID.
+
+    The source ID is zero-padded to SOURCE_ID_WIDTH digits, so that the byte order of the
+    encoded rows is the order of their numerical source IDs and then of their RTS
+    symbols, and a trailing line feed is appended, which sorts before any symbol
+    character. Quoted fields are unquoted, as by the validator.
+    """
+    source_id, symbol = parse_row(line)
+    return ("%0*d,%s\n" % (SOURCE_ID_WIDTH, source_id, symbol)).encode()
+
+
+def decode_sortable_row(encoded_row: bytes) -> Tuple[int, str]:
+    """Decodes a row encoded by encode_sortable_row into its source ID and RTS symbol."""
+    return int(encoded_row[:SOURCE_ID_WIDTH]), encoded_row[SOURCE_ID_WIDTH + 1:-1].decode()
+
+
+def write_run(encoded_rows: Iterable[bytes], directory: str) -> str:
+    """Writes sorted encoded rows to a new run file within a directory and returns its path."""
+    with tempfile.NamedTemporaryFile('wb', dir=directory, suffix=".run", delete=False) as run:
+        run.writelines(encoded_rows)
+    return run.name
+
+
+def write_sorted_runs(lines: Iterable[str], max_memory: int, directory: str) -> List[str]:
+    """Splits the rows of a configuration into sorted runs written to disk.
+
+    Rows are accumulated in memory until their estimated size reaches max_memory, at
+    which point they are sorted and written to a run file. Blank lines are skipped.
+
+    Parameters
+    ----------
+    lines: Iterable[str]
+        The lines of a Watchlist configuration, header excluded, as read with universal
+        newlines.
+    max_memory: int
+        The number of bytes the rows of a run can take in memory.
+    directory: str
+        The directory where the run files are written.
+
+    Returns
+    -------
+    List[str]
+        The paths to the run files, each sorted.
+    """
+    runs: List[str] = []
+    encoded_rows: List[bytes] = []
+    run_size = 0
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        encoded_row = encode_sortable_row(line)
+        encoded_rows.append(encoded_row)
+        run_size += sys.getsizeof(encoded_row) + ROW_POINTER_SIZE
+        if run_size >= max_memory:
+            encoded_rows.sort()
+            runs.append(write_run(encoded_rows, directory))
+            encoded_rows.clear()
+            run_size = 0
+    if encoded_rows or not runs:
+        encoded_rows.sort()
+        runs.append(write_run(encoded_rows, directory))
+    return runs
+
+
+def merge_runs(runs: List[str]) -> Iterator[bytes]:
+    """Merges sorted run files into a single sorted sequence of distinct encoded rows."""
+    with contextlib.ExitStack() as stack:
+        run_files = [stack.enter_context(open(run, 'rb')) for run in runs]
+        previous_row = None
+        for encoded_row in heapq.merge(*run_files):
+            if encoded_row != previous_row:
+                yield encoded_row
+            previous_row = encoded_row
+
+
+def reduce_runs(runs: List[str], directory: str, fan_in: int = MAX_MERGE_FAN_IN) -> List[str]:
+    """Merges runs in batches of fan_in until at most fan_in of them are left.
+
+    Bounding the number of runs merged at once bounds the number of files open at the
+    same time and the memory taken by their read buffers.
+    """
+    while len(runs) > fan_in:
+        merged_runs = []
+        for start in range(0, len(runs), fan_in):
+            batch = runs[start:start + fan_in]
+            merged_runs.append(write_run(merge_runs(batch), directory))
+            for run in batch:
+                os.remove(run)
+        runs = merged_runs
+    return runs
+
+
+def sort_rows_externally(
+    configuration: Union[RetrievedConfig, WatchlistConfig, str],
+    max_memory: int = DEFAULT_MAX_MEMORY,
+    temporary_directory: Optional[str] = None,
+) -> Iterator[Tuple[int, str]]:
+    """Iterates over the distinct rows of a configuration in order, sorting it on disk.
+
+    The configuration is read once and split into runs of at most max_memory bytes of
+    rows, which are sorted in memory and written to a temporary directory. The runs are
+    then merged lazily, at most MAX_MERGE_FAN_IN at a time, so that configurations much
+    larger than the available memory can be sorted. The rows are decoded as UTF-8 with
+    universal newlines, as by the validator. The temporary files are removed once the
+    iteration is over. A WatchlistConfig is already sorted and is iterated directly.
+
+    Parameters
+    ----------
+    configuration: Union[RetrievedConfig, WatchlistConfig, str]
+        A retrieved configuration, a WatchlistConfig, or the location of a Watchlist
+        configuration file, possibly compressed, or "-" for the standard input. Any file
+        accepted by config_sender.validate_watchlist_configuration_file is accepted.
+    max_memory: int
+        The number of bytes the rows of a run can take in memory.
+    temporary_directory: Optional[str]
+        The directory where the runs are written. If None, the default temporary
+        directory is used.
+
+    Returns
+    -------
+    Iterator[Tuple[int, str]]
+        The (source ID, RTS symbol) rows, sorted by numerical source ID and then by RTS
+        symbol, without duplicates.
+    """
+    if isinstance(configuration, WatchlistConfig):
+        yield from configuration
+        return
+    config_file: BinaryIO
+    if isinstance(configuration, RetrievedConfig):
+        config_file = io.BytesIO(configuration.config_body)
+    else:
+        config_file = open_decompressed(configuration)
+    with tempfile.TemporaryDirectory(dir=temporary_directory) as run_directory:
+        with io.TextIOWrapper(config_file, encoding="utf-8", errors="replace") as lines:
+            next(lines, None)
+            runs = write_sorted_runs(lines, max_memory, run_directory)
+        for encoded_row in merge_runs(reduce_runs(runs, run_directory)):
+            yield decode_sortable_row(encoded_row)
@@ -1,14 +1,103 @@
 """Implements helper function used across the watchlist_api_client library."""
 import datetime
+import functools
+import hashlib
+import os
+import pathlib
+import re
+import sys
+import tempfile
+import types
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
 import urllib.parse
 
-import dateutil.parser
-import dateutil.tz
+
+if TYPE_CHECKING:
+    import numpy
+    import numpy.typing
+
+    Datetime64Array = numpy.typing.NDArray[numpy.datetime64]
+
+
+CACHE_DIRECTORY_ENVIRONMENT_VARIABLE = "WATCHLIST_API_CLIENT_CACHE_DIR"
+TIMESTAMP_CACHE_SIZE = 4096
+ISO_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+TIMESTAMP_QUERY_PARAMETER = "dateTime"
+HASHING_CHUNK_SIZE = 1024 * 1024
+
+UTC = datetime.timezone.utc
+ISO_TIMESTAMP_PATTERN = re.compile(
+    r"([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})Z"
+)
+BASIC_ISO_TIMESTAMP_PATTERN = re.compile(
+    r"([0-9]{4})([0-9]{2})([0-9]{2})T([0-9]{2})([0-9]{2})([0-9]{2})Z"
+)
+RFC_1123_TIMESTAMP_PATTERN = re.compile(
+    r"(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun), ([0-9]{2}) "
+    r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) "
+    r"([0-9]{4}) ([0-9]{2}):([0-9]{2}):([0-9]{2}) GMT"
+)
+# The ISO 8601 timestamps of a batch, each followed by a line feed, with valid times.
+ISO_TIMESTAMPS_PATTERN = re.compile(
+    r"(?:[0-9]{4}-[0-9]{2}-[0-9]{2}T(?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]Z\n)*"
+)
+ISO_TIMESTAMP_LENGTH = len("2020-11-20T17:59:00Z")
+# The characters left untouched by urlencode, plus the colon restored by
+# prepare_timestamp_query_string.
+QUERY_SAFE_VALUES_PATTERN = re.compile(r"[0-9A-Za-z_.~:-]*")
+SOURCE_ID_PATTERN = re.compile(r"[0-9]+")
+MONTHS = {
+    month: number
+    for number, month in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        start=1,
+    )
+}
+
+
+def parse_common_utc_timestamp(raw_timestamp: str) -> Optional[datetime.datetime]:
+    """Parses a UTC timestamp in one of the formats used by the Watchlist API and the CLI.
+
+    The recognised formats are the ISO 8601 one with a Z suffix (2020-11-20T17:59:00Z),
+    its basic variant used in the names of the retrieved files (20201120T175900Z), and
+    the RFC 1123 one of the HTTP Date header (Fri, 20 Nov 2020 17:59:00 GMT). They are
+    matched with precompiled patterns, which is much faster than the general parser.
+
+    Parameters
+    ----------
+    raw_timestamp: str
+        A string containing a raw UTC timestamp.
+
+    Returns
+    -------
+    Optional[datetime.datetime]
+        A datetime object with the date and time parsed from the raw timestamp, or None if
+        the timestamp is not in one of the recognised formats or is not a valid date.
+    """
+    iso_match = ISO_TIMESTAMP_PATTERN.fullmatch(raw_timestamp)
+    if iso_match is None:
+        iso_match = BASIC_ISO_TIMESTAMP_PATTERN.fullmatch(raw_timestamp)
+    if iso_match:
+        year, month, day, hour, minute, second = map(int, iso_match.groups())
+    else:
+        rfc_match = RFC_1123_TIMESTAMP_PATTERN.fullmatch(raw_timestamp)
+        if not rfc_match:
+            return None
+        raw_day, raw_month, raw_year, raw_hour, raw_minute, raw_second = rfc_match.groups()
+        year, month, day = int(raw_year), MONTHS[raw_month], int(raw_day)
+        hour, minute, second = int(raw_hour), int(raw_minute), int(raw_second)
+    try:
+        return datetime.datetime(year, month, day, hour, minute, second, tzinfo=UTC)
+    except ValueError:
+        return None
 
 
 def parse_utc_timestamp(raw_timestamp: str) -> datetime.datetime:
     """Parses a UTC timestamp and returns the parsed date as a datetime object.
 
+    The common formats recognised by parse_common_utc_timestamp are parsed directly; any
+    other format is parsed by dateutil.
+
     Parameters
     ----------
     raw_timestamp: str
@@ -22,7 +111,12 @@ def parse_utc_timestamp(raw_timestamp: str) -> datetime.datetime:
     datetime.datetime
         A datetime object with the date and time parsed from the raw timestamp.
     """
-    return dateutil.parser.parse(raw_timestamp).replace(tzinfo=dateutil.tz.tzutc())
+    parsed_timestamp = parse_common_utc_timestamp(raw_timestamp)
+    if parsed_timestamp is not None:
+        return parsed_timestamp
+    # dateutil is slow to import, hence the import at call time, for the uncommon formats.
+    import dateutil.parser
+    return dateutil.parser.parse(raw_timestamp).replace(tzinfo=UTC)
 
 
 def format_utc_timestamp(
@@ -56,12 +150,17 @@ def format_utc_timestamp(
     return datetime.datetime.strftime(utc_timestamp, date_format)
 
 
+@functools.lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
 def convert_raw_utc_timestamp_to_string(
     raw_timestamp: str,
     date_format: str = "%Y-%m-%dT%H:%M:%SZ",
 ) -> str:
     """Converts a raw UTC timestamp to a date and time string.
 
+    The conversions are memoized in a cache of the TIMESTAMP_CACHE_SIZE most recently
+    converted timestamps, since the same timestamps are converted over and over by the
+    history and bisection workloads.
+
     Parameters
     ----------
     raw_timestamp: str
@@ -103,7 +202,7 @@ def prepare_timestamp_query_string(iso_formatted_utc_timestamp: str) -> str:
         A query string with the format dateTime=YYYY-mm-ddTHH-MM-SSZ.
     """
     return urllib.parse.urlencode(
-        {"dateTime": iso_formatted_utc_timestamp},
+        {TIMESTAMP_QUERY_PARAMETER: iso_formatted_utc_timestamp},
     ).replace("%3A", ":")
 
 
@@ -125,3 +224,381 @@ def join_base_url_and_query_string(base_url: str, query_string: str) -> str:
     if base_url.endswith("/"):
         return f"{base_url[:-1]}?{query_string}"
     return f"{base_url}?{query_string}"
+
+
+@functools.lru_cache(maxsize=None)
+def import_numpy() -> Optional[types.ModuleType]:
+    """Imports NumPy on first use, as it is slow to import and only used by the batch helpers.
+
+    Returns
+    -------
+    Optional[ModuleType]
+        The numpy module, or None if NumPy is not installed.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _as_datetime64_array(utc_timestamps: object) -> Optional["Datetime64Array"]:
+    # An array can only have been created if NumPy has already been imported.
+    numpy = import_numpy() if "numpy" in sys.modules else None
+    if numpy is None or not isinstance(utc_timestamps, numpy.ndarray):
+        return None
+    if not numpy.issubdtype(utc_timestamps.dtype, numpy.datetime64):
+        return None
+    datetime64_array: Datetime64Array = utc_timestamps
+    return datetime64_array
+
+
+def _format_datetime64_array(utc_timestamps: "Datetime64Array", date_format: str) -> List[str]:
+    numpy = import_numpy()
+    assert numpy is not None
+    if date_format == ISO_DATE_FORMAT:
+        formatted_timestamps: List[str] = numpy.char.add(
+            numpy.datetime_as_string(utc_timestamps, unit="s"), "Z",
+        ).tolist()
+        return formatted_timestamps
+    return format_utc_timestamps(utc_timestamps.astype("datetime64[us]").tolist(), date_format)
+
+
+def _are_valid_iso_timestamps(raw_timestamps: List[str]) -> bool:
+    # The batch is matched at once, every timestamp followed by a line feed, so a line feed
+    # within a timestamp would split it in two; the length of the batch rules this out.
+    batch = "".join(f"{raw_timestamp}\n" for raw_timestamp in raw_timestamps)
+    if len(batch) != (ISO_TIMESTAMP_LENGTH + 1) * len(raw_timestamps):
+        return False
+    if not ISO_TIMESTAMPS_PATTERN.fullmatch(batch):
+        return False
+    # The pattern checks the times; the dates, which repeat within a batch, are checked once.
+    try:
+        for iso_date in {raw_timestamp[:10] for raw_timestamp in raw_timestamps}:
+            datetime.date(int(iso_date[:4]), int(iso_date[5:7]), int(iso_date[8:]))
+    except ValueError:
+        return False
+    return True
+
+
+def format_utc_timestamps(
+    utc_timestamps: Union[Iterable[datetime.datetime], "Datetime64Array"],
+    date_format: str = "%Y-%m-%dT%H:%M:%SZ",
+) -> List[str]:
+    """Formats a batch of datetime objects, as format_utc_timestamp does for one of them.
+
+    A NumPy datetime64 array, whose values are taken as UTC, is formatted by NumPy in a
+    single vectorized call. The ISO 8601 format of the other timestamps is produced by
+    datetime.isoformat, which is about twice as fast as strftime, and any other format by
+    strftime.
+
+    Parameters
+    ----------
+    utc_timestamps: Union[Iterable[datetime.datetime], numpy.ndarray]
+        The datetime objects containing the date and time components of UTC timestamps,
+        or a NumPy datetime64 array.
+    date_format: str
+        A string controlling the output format. By default, date_format is set
+        equal to the "%Y-%m-%dT%H:%M:%SZ" format string, which makes the function
+        produce date and time strings formatted according to the ISO 8601 standard.
+
+    Returns
+    -------
+    List[str]
+        The formatted timestamps, in the order of the input.
+    """
+    datetime64_array = _as_datetime64_array(utc_timestamps)
+    if datetime64_array is not None:
+        return _format_datetime64_array(datetime64_array, date_format)
+    if date_format == ISO_DATE_FORMAT:
+        # The first 19 characters of isoformat leave out the microseconds and the UTC
+        # offset, which strftime leaves out as well.
+        return [
+            f"{utc_timestamp.isoformat(timespec='seconds')[:19]}Z"
+            for utc_timestamp in utc_timestamps
+        ]
+    return [
+        datetime.datetime.strftime(utc_timestamp, date_format) for utc_timestamp in utc_timestamps
+    ]
+
+
+def format_utc_timestamp_range(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    step: datetime.timedelta,
+    date_format: str = "%Y-%m-%dT%H:%M:%SZ",
+) -> List[str]:
+    """Formats the points in time from start to end, both included, every step.
+
+    If NumPy is installed, the points in time are generated and formatted as a datetime64
+    array, without any per-element Python code for the ISO 8601 format.
+
+    Parameters
+    ----------
+    start: datetime.datetime
+        The first point in time, in UTC.
+    end: datetime.datetime
+        The last point in time, in UTC. It is only generated if it falls on a step.
+    step: datetime.timedelta
+        The interval between two consecutive points in time. It must be positive.
+    date_format: str
+        A string controlling the output format, as in format_utc_timestamp.
+
+    Returns
+    -------
+    List[str]
+        The formatted points in time, in chronological order.
+
+    Raises
+    ------
+    ValueError
+        If the step is not positive.
+    """
+    if step <= datetime.timedelta(0):
+        raise ValueError(f"Invalid step {step}: expected a positive interval")
+    numpy = import_numpy()
+    if numpy is not None:
+        utc_timestamps = numpy.arange(
+            numpy.datetime64(start.replace(tzinfo=None), "us"),
+            numpy.datetime64(end.replace(tzinfo=None), "us") + numpy.timedelta64(1, "us"),
+            numpy.timedelta64(step),
+        )
+        return _format_datetime64_array(utc_timestamps, date_format)
+    number_of_steps = (end - start) // step + 1 if end >= start else 0
+    return format_utc_timestamps(
+        (start + index * step for index in range(number_of_steps)), date_format,
+    )
+
+
+def convert_raw_utc_timestamps_to_strings(
+    raw_timestamps: Union[Iterable[str], "Datetime64Array"],
+    date_format: str = "%Y-%m-%dT%H:%M:%SZ",
+) -> List[str]:
+    """Converts a batch of raw UTC timestamps to date and time strings.
+
+    Raw timestamps that are all valid and in the ISO 8601 format with a Z suffix are
+    checked by a single pattern match, and their distinct dates one by one, and returned
+    as is when converted to that same format. The other ones are parsed one by one by
+    parse_utc_timestamp and formatted by format_utc_timestamps, which raises on invalid
+    timestamps as convert_raw_utc_timestamp_to_string does. A NumPy datetime64 array needs
+    no parsing and is formatted directly.
+
+    Parameters
+    ----------
+    raw_timestamps: Union[Iterable[str], numpy.ndarray]
+        Strings containing raw UTC timestamps in any of the formats accepted by
+        convert_raw_utc_timestamp_to_string, or a NumPy datetime64 array.
+    date_format: str
+        A string controlling the output format, as in convert_raw_utc_timestamp_to_string.
+
+    Returns
+    -------
+    List[str]
+        The converted timestamps, in the order of the input.
+    """
+    datetime64_array = _as_datetime64_array(raw_timestamps)
+    if datetime64_array is not None:
+        return _format_datetime64_array(datetime64_array, date_format)
+    raw_timestamps = list(raw_timestamps)
+    if date_format == ISO_DATE_FORMAT and _are_valid_iso_timestamps(raw_timestamps):
+        return raw_timestamps
+    return format_utc_timestamps(map(parse_utc_timestamp, raw_timestamps), date_format)
+
+
+def prepare_timestamp_query_strings(iso_formatted_utc_timestamps: Iterable[str]) -> List[str]:
+    """Creates the dateTime query strings of a batch of ISO8601 formatted UTC timestamps.
+
+    The query strings are the ones of prepare_timestamp_query_string. Since ISO 8601
+    timestamps only hold characters that need no escaping, a single pattern match over
+    the concatenated batch replaces urlencode, which is only called on batches holding
+    other characters.
+
+    Parameters
+    ----------
+    iso_formatted_utc_timestamps: Iterable[str]
+        Strings containing ISO8601 formatted UTC times and dates.
+
+    Returns
+    -------
+    List[str]
+        The query strings with the format dateTime=YYYY-mm-ddTHH-MM-SSZ, in the order of
+        the input.
+    """
+    timestamps = list(iso_formatted_utc_timestamps)
+    if not QUERY_SAFE_VALUES_PATTERN.fullmatch("".join(timestamps)):
+        return [prepare_timestamp_query_string(timestamp) for timestamp in timestamps]
+    prefix = f"{TIMESTAMP_QUERY_PARAMETER}="
+    return [prefix + timestamp for timestamp in timestamps]
+
+
+def join_base_url_and_query_strings(base_url: str, query_strings: Iterable[str]) -> List[str]:
+    """Joins a base url and each of a batch of query strings.
+
+    Parameters
+    ----------
+    base_url: str
+        The base url to which the query strings are to be attached.
+    query_strings: Iterable[str]
+        The query strings.
+
+    Returns
+    -------
+    List[str]
+        The base url with attached each of the query strings, in the order of the input.
+    """
+    prefix = join_base_url_and_query_string(base_url, "")
+    return [prefix + query_string for query_string in query_strings]
+
+
+def get_cache_directory(subdirectory: str) -> pathlib.Path:
+    """Returns the directory where the library persists one of its caches.
+
+    The root of the caches is read from the WATCHLIST_API_CLIENT_CACHE_DIR environment
+    variable. If the variable is not set, the root defaults to the watchlist_api_client
+    directory within $XDG_CACHE_HOME, or within ~/.cache if $XDG_CACHE_HOME is not set.
+
+    Parameters
+    ----------
+    subdirectory: str
+        The name of the directory, within the root of the caches, reserved to the cache.
+
+    Returns
+    -------
+    pathlib.Path
+        The path of the cache directory. The directory is not created by the function.
+    """
+    cache_root = os.environ.get(CACHE_DIRECTORY_ENVIRONMENT_VARIABLE)
+    if not cache_root:
+        xdg_cache_home = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home().joinpath(".cache")
+        cache_root = pathlib.Path(xdg_cache_home).joinpath("watchlist_api_client").as_posix()
+    return pathlib.Path(cache_root).joinpath(subdirectory)
+
+
+def compute_digest(chunks: Iterable[bytes]) -> str:
+    """Computes the SHA-256 digest of a content read in chunks.
+
+    Parameters
+    ----------
+    chunks: Iterable[bytes]
+        The content to hash, which can be produced lazily, e.g. while reading a file.
+
+    Returns
+    -------
+    str
+        The hexadecimal representation of the digest of the content.
+    """
+    content_hash = hashlib.sha256()
+    for chunk in chunks:
+        content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def compute_file_digest(path_to_file: str) -> str:
+    """Computes the SHA-256 digest of the content of a file.
+
+    Parameters
+    ----------
+    path_to_file: str
+        The location of the file to hash.
+
+    Returns
+    -------
+    str
+        The hexadecimal representation of the digest of the file content.
+    """
+    with pathlib.Path(path_to_file).open('rb') as infile:
+        return compute_digest(iter(lambda: infile.read(HASHING_CHUNK_SIZE), b""))
+
+
+@functools.lru_cache(maxsize=None)
+def get_umask() -> int:
+    """Returns the file mode creation mask of the process.
+
+    The mask can only be read by setting it, so it is read once and cached, rather than
+    being briefly cleared while other threads may be creating files.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_file_atomically(path_to_file: str, chunks: Iterable[bytes]) -> int:
+    """Writes a sequence of chunks to a file, which appears only once fully written.
+
+    The chunks are written to a temporary file in the directory of the target file, which
+    is then renamed to the target with os.replace. Since the rename is atomic, readers
+    either see the previous version of the file or the complete new one, and an
+    interrupted write never leaves a truncated file behind. The temporary file, which
+    mkstemp creates readable by its owner only, is given the permissions of a file created
+    with open before being renamed.
+
+    Parameters
+    ----------
+    path_to_file: str
+        The location of the file to write. Its parent directories are created if needed.
+    chunks: Iterable[bytes]
+        The content of the file, which can be produced lazily, e.g. while downloading it.
+
+    Returns
+    -------
+    int
+        The number of bytes written.
+    """
+    file_path = pathlib.Path(path_to_file)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".part",
+    )
+    size = 0
+    try:
+        with os.fdopen(file_descriptor, 'wb') as outfile:
+            for chunk in chunks:
+                outfile.write(chunk)
+                size += len(chunk)
+        os.chmod(temporary_path, 0o666 & ~get_umask())
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+    return size
+
+
+def unquote_line(line: str) -> str:
+    """Joins the fields of a line whose fields are quoted, as the csv module reads them.
+
+    A line such as "207","F:FDAX\\Z20" is read by csv.reader as the fields 207 and
+    F:FDAX\\Z20, and is therefore accepted as the row 207,F:FDAX\\Z20. Lines without
+    quotes, or with unbalanced quotes, are returned unchanged.
+    """
+    if '"' not in line or line.count('"') % 2:
+        return line
+    # The csv module is only imported once a quoted line is met, which is rare.
+    import csv
+    return ",".join(next(csv.reader([line]), []))
+
+
+def parse_row(line: str) -> Tuple[int, str]:
+    """Splits a row of a Watchlist configuration into its source ID and RTS symbol.
+
+    The fields are unquoted first, as by the validator, so that "207","F:FDAX\\Z20" and
+    0207,F:FDAX\\Z20 are both the row 207,F:FDAX\\Z20.
+
+    Parameters
+    ----------
+    line: str
+        A row of a Watchlist configuration, without its line ending.
+
+    Returns
+    -------
+    Tuple[int, str]
+        The source ID and the RTS symbol of the row.
+
+    Raises
+    ------
+    ValueError
+        If the source ID of the row is not a number, or if the row has no RTS symbol.
+    """
+    source_id, _, symbol = unquote_line(line).partition(",")
+    if not SOURCE_ID_PATTERN.fullmatch(source_id) or not symbol:
+        raise ValueError(f"Malformed row: {line!r}")
+    return int(source_id), symbol
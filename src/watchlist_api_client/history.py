@@ -0,0 +1,183 @@
+"""Implements the parallel retrieval of the history of a configuration over a time range."""
+import concurrent.futures
+import datetime
+import re
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+
+from watchlist_api_client.data_structures import HistoryEntry
+from watchlist_api_client.defaults import DEFAULT_MAX_WORKERS
+from watchlist_api_client.helpers import (
+    format_utc_timestamp,
+    format_utc_timestamp_range,
+    join_base_url_and_query_string,
+    join_base_url_and_query_strings,
+    prepare_timestamp_query_string,
+    prepare_timestamp_query_strings,
+)
+
+if TYPE_CHECKING:
+    from watchlist_api_client.retry import RetryPolicy
+
+STEP_PATTERN = re.compile(r"^([0-9]+)([smhdw])$")
+STEP_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_step(raw_step: str) -> datetime.timedelta:
+    """Parses a step between two points in time, such as 30m, 1h or 7d.
+
+    Parameters
+    ----------
+    raw_step: str
+        A positive integer followed by one of the units s, m, h, d and w.
+
+    Returns
+    -------
+    datetime.timedelta
+        The parsed step.
+
+    Raises
+    ------
+    ValueError
+        If the step is not formatted as expected or is zero.
+    """
+    match = STEP_PATTERN.match(raw_step.strip())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid step {raw_step!r}: expected e.g. 30m, 1h or 7d")
+    return datetime.timedelta(**{STEP_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def generate_timestamps(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    step: datetime.timedelta,
+) -> Iterator[datetime.datetime]:
+    """Generates the points in time from start to end, both included, every step.
+
+    Parameters
+    ----------
+    start: datetime.datetime
+        The first point in time.
+    end: datetime.datetime
+        The last point in time. It is only generated if it falls on a step.
+    step: datetime.timedelta
+        The interval between two consecutive points in time.
+
+    Returns
+    -------
+    Iterator[datetime.datetime]
+        The points in time, in chronological order.
+    """
+    timestamp = start
+    while timestamp <= end:
+        yield timestamp
+        timestamp += step
+
+
+def prepare_history_url(watchlist_endpoint: str, timestamp: datetime.datetime) -> str:
+    """Builds the URL retrieving the configuration that was active at a point in time."""
+    return join_base_url_and_query_string(
+        watchlist_endpoint,
+        prepare_timestamp_query_string(format_utc_timestamp(timestamp)),
+    )
+
+
+def retrieve_history(
+    watchlist_endpoint: str,
+    credentials: Tuple[str, str],
+    path_to_directory: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    step: datetime.timedelta,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    retry_policy: Optional["RetryPolicy"] = None,
+    use_cache: bool = True,
+    compression: Optional[str] = None,
+) -> Iterator[HistoryEntry]:
+    """Retrieves the configurations that were active over a time range, in parallel.
+
+    The configurations active every step from start to end are retrieved by a pool of
+    max_workers threads, sharing a WatchlistClient whose pool holds a connection per
+    thread. Each configuration is streamed to a watchlist_config@<timestamp>.csv file in
+    path_to_directory as in config_retriever.retrieve_config_to_file, and the snapshots
+    already in the snapshot cache are not retrieved again.
+
+    The entries are yielded as soon as each retrieval completes, hence not necessarily in
+    chronological order. A failed retrieval, e.g. for a point in time at which no
+    configuration was active, does not stop the others: it is reported by the error field
+    of its entry.
+
+    Parameters
+    ----------
+    watchlist_endpoint: str
+        The watchlist API GET endpoint, without query string.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the Watchlist API.
+    path_to_directory: str
+        The directory where the retrieved configurations are written.
+    start: datetime.datetime
+        The first point in time to retrieve, in UTC.
+    end: datetime.datetime
+        The last point in time to retrieve, in UTC.
+    step: datetime.timedelta
+        The interval between two retrieved points in time.
+    max_workers: int
+        The maximum number of retrievals in flight at any time.
+    retry_policy: Optional[RetryPolicy]
+        The policy controlling how each retrieval is retried after a transient failure. If
+        None, the default RetryPolicy is used.
+    use_cache: bool
+        Whether the snapshot cache is used.
+    compression: Optional[str]
+        The compression of the written files, "gzip" or "zstd". If None, the files are
+        written uncompressed.
+
+    Returns
+    -------
+    Iterator[HistoryEntry]
+        The outcome of the retrieval of every point in time, in order of completion.
+    """
+    # The client modules depend on requests, which is slow to import, hence the import at
+    # call time, so that importing this module does not import them.
+    import requests
+
+    from watchlist_api_client import config_retriever
+    from watchlist_api_client.client import WatchlistClient
+    from watchlist_api_client.retry import RetryPolicy
+
+    watchlist_client = WatchlistClient(
+        credentials,
+        watchlist_endpoint,
+        pool_maxsize=max_workers,
+        retry_policy=retry_policy or RetryPolicy(),
+    )
+
+    def retrieve(requested_timestamp: str, history_url: str) -> HistoryEntry:
+        try:
+            retrieved_config_file = config_retriever.retrieve_config_to_file(
+                history_url,
+                credentials,
+                path_to_directory,
+                use_cache=use_cache,
+                watchlist_client=watchlist_client,
+                compression=compression,
+            )
+        except requests.exceptions.RequestException as request_error:
+            return HistoryEntry(requested_timestamp, None, str(request_error))
+        return HistoryEntry(requested_timestamp, retrieved_config_file, None)
+
+    # The timestamps and URLs of the whole range are formatted in a single batch.
+    requested_timestamps = format_utc_timestamp_range(start, end, step)
+    history_urls = join_base_url_and_query_strings(
+        watchlist_endpoint, prepare_timestamp_query_strings(requested_timestamps),
+    )
+    with watchlist_client, concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        futures = [
+            executor.submit(retrieve, requested_timestamp, history_url)
+            for requested_timestamp, history_url in zip(requested_timestamps, history_urls)
+        ]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
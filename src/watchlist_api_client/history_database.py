@@ -0,0 +1,433 @@
+"""Implements an indexed SQLite database of the history of the retrieved configurations."""
+import datetime
+import hashlib
+import io
+import pathlib
+import sqlite3
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from watchlist_api_client.compression import open_decompressed, read_decompressed_chunks
+from watchlist_api_client.config_diff import find_snapshots, get_snapshot_timestamp
+from watchlist_api_client.data_structures import (
+    MembershipInterval,
+    RetrievedConfig,
+    RetrievedConfigFile,
+)
+from watchlist_api_client.helpers import parse_row
+from watchlist_api_client.snapshot_store import INDEX_FILE_NAME, TIMESTAMP_FORMAT, SnapshotStore
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    timestamp TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    row_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memberships (
+    source_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT
+);
+CREATE INDEX IF NOT EXISTS memberships_by_symbol ON memberships (symbol, valid_from);
+CREATE INDEX IF NOT EXISTS memberships_by_source ON memberships (source_id, valid_from);
+CREATE INDEX IF NOT EXISTS open_memberships ON memberships (source_id, symbol)
+    WHERE valid_to IS NULL;
+CREATE TEMPORARY TABLE IF NOT EXISTS incoming_rows (
+    source_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL
+);
+"""
+CACHE_SIZE_KIB = 64 * 1024
+HELD_AT_CONDITION = "valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)"
+
+
+def iterate_rows(config_file: BinaryIO) -> Iterator[Tuple[int, str]]:
+    """Iterates over the (source ID, RTS symbol) rows of a configuration, line by line.
+
+    Quoted fields are unquoted, as by the validator. Raises a ValueError on a row whose
+    source ID is not a number.
+    """
+    next(config_file, None)
+    for line in config_file:
+        line = line.rstrip(b"\r\n")
+        if line:
+            yield parse_row(line.decode(errors="replace"))
+
+
+def get_checked_snapshot_timestamp(path_to_snapshot: str) -> str:
+    """Returns the timestamp in the name of a snapshot file, checking that it is valid."""
+    timestamp = get_snapshot_timestamp(path_to_snapshot)
+    try:
+        datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    except ValueError:
+        raise ValueError(
+            f"Cannot infer the timestamp of {path_to_snapshot}, which is not named "
+            f"watchlist_config@<timestamp>.csv"
+        ) from None
+    return timestamp
+
+
+def find_retrieved_config_files(
+    paths: Iterable[str],
+) -> List[Tuple[RetrievedConfigFile, Optional[str]]]:
+    """Lists the retrieved configurations found at a set of locations, to be ingested.
+
+    Parameters
+    ----------
+    paths: Iterable[str]
+        Locations that are either snapshot stores, directories of the
+        watchlist_config@<timestamp>.csv files written by the retrieve and history
+        commands, or such files, possibly compressed.
+
+    Returns
+    -------
+    List[Tuple[RetrievedConfigFile, Optional[str]]]
+        The configurations in chronological order, each with its digest if it is known
+        from the index of a store, or None otherwise.
+
+    Raises
+    ------
+    ValueError
+        If the timestamp of a file cannot be inferred from its name.
+    """
+    retrieved_config_files: List[Tuple[RetrievedConfigFile, Optional[str]]] = []
+    for path in map(pathlib.Path, paths):
+        if path.joinpath(INDEX_FILE_NAME).is_file():
+            snapshot_store = SnapshotStore(path.as_posix())
+            for timestamp, digest in snapshot_store.index().items():
+                blob_path = snapshot_store.blob_path(digest)
+                retrieved_config_files.append((
+                    RetrievedConfigFile(
+                        timestamp=timestamp,
+                        path=blob_path.as_posix(),
+                        size=blob_path.stat().st_size,
+                    ),
+                    digest,
+                ))
+            continue
+        snapshots = find_snapshots(path.as_posix()) if path.is_dir() else [path.as_posix()]
+        for snapshot in snapshots:
+            retrieved_config_files.append((
+                RetrievedConfigFile(
+                    timestamp=get_checked_snapshot_timestamp(snapshot),
+                    path=snapshot,
+                    size=pathlib.Path(snapshot).stat().st_size,
+                ),
+                None,
+            ))
+    return sorted(
+        retrieved_config_files,
+        key=lambda retrieved_config_file: retrieved_config_file[0].timestamp,
+    )
+
+
+class HistoryDatabase:
+    """A SQLite database of the symbols held by every source over time.
+
+    Rather than storing every snapshot in full, the database records, for every source
+    and RTS symbol, the intervals during which the source held the symbol, bounded by the
+    timestamps of the ingested snapshots. The intervals are indexed by symbol and by
+    source, so that questions such as which sources held a symbol at a point in time, or
+    when a symbol was first added, are answered by a single indexed query instead of a
+    scan of every retrieved file.
+
+    Snapshots are ingested in chronological order. Ingesting a snapshot only opens and
+    closes the intervals of the rows that changed since the previous snapshot, within a
+    single transaction, and a snapshot identical to the previous one only adds a record
+    of its timestamp.
+    """
+
+    def __init__(self, path_to_database: str) -> None:
+        """Opens the database, creating it if needed.
+
+        Parameters
+        ----------
+        path_to_database: str
+            The location of the SQLite database file.
+        """
+        self.path = path_to_database
+        self._connection = sqlite3.connect(path_to_database)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA temp_store=MEMORY")
+        self._connection.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "HistoryDatabase":
+        """Returns the database itself when entering a with statement."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Closes the database when exiting a with statement."""
+        self.close()
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        self._connection.close()
+
+    def _query(self, sql: str, *parameters: object) -> sqlite3.Cursor:
+        return self._connection.execute(sql, parameters)
+
+    def latest_snapshot(self) -> Optional[Tuple[str, str]]:
+        """Returns the timestamp and the digest of the latest ingested snapshot, if any."""
+        rows: List[Tuple[str, str]] = self._query(
+            "SELECT timestamp, digest FROM snapshots ORDER BY timestamp DESC LIMIT 1",
+        ).fetchall()
+        return rows[0] if rows else None
+
+    def snapshots(self) -> Dict[str, str]:
+        """Returns the timestamps of the ingested snapshots, mapped to their digests."""
+        rows: List[Tuple[str, str]] = self._query(
+            "SELECT timestamp, digest FROM snapshots ORDER BY timestamp",
+        ).fetchall()
+        return dict(rows)
+
+    def _ingest(self, timestamp: str, digest: str, rows: Iterable[Tuple[int, str]]) -> bool:
+        latest_snapshot = self.latest_snapshot()
+        if latest_snapshot is not None and timestamp <= latest_snapshot[0]:
+            if self._query("SELECT 1 FROM snapshots WHERE timestamp = ?", timestamp).fetchone():
+                return False
+            raise ValueError(
+                f"Cannot ingest the snapshot of {timestamp}, which is older than the latest "
+                f"ingested snapshot, of {latest_snapshot[0]}"
+            )
+        with self._connection:
+            if latest_snapshot is not None and digest == latest_snapshot[1]:
+                self._connection.execute(
+                    "INSERT INTO snapshots SELECT ?, digest, row_count FROM snapshots "
+                    "WHERE timestamp = ?",
+                    (timestamp, latest_snapshot[0]),
+                )
+                return True
+            # The rows are bulk-loaded into a bare table and indexed once loaded, which is
+            # much faster than maintaining the index row by row.
+            self._connection.executemany("INSERT INTO incoming_rows VALUES (?, ?)", rows)
+            self._connection.execute(
+                "CREATE INDEX incoming_rows_by_row ON incoming_rows (source_id, symbol)",
+            )
+            self._connection.execute(
+                "UPDATE memberships SET valid_to = ? WHERE valid_to IS NULL AND NOT EXISTS ("
+                "SELECT 1 FROM incoming_rows WHERE incoming_rows.source_id = "
+                "memberships.source_id AND incoming_rows.symbol = memberships.symbol)",
+                (timestamp,),
+            )
+            self._connection.execute(
+                "INSERT INTO memberships (source_id, symbol, valid_from) "
+                "SELECT DISTINCT source_id, symbol, ? FROM incoming_rows WHERE NOT EXISTS ("
+                "SELECT 1 FROM memberships WHERE memberships.valid_to IS NULL AND "
+                "memberships.source_id = incoming_rows.source_id AND "
+                "memberships.symbol = incoming_rows.symbol)",
+                (timestamp,),
+            )
+            self._connection.execute(
+                "INSERT INTO snapshots SELECT ?, ?, COUNT(*) FROM ("
+                "SELECT DISTINCT source_id, symbol FROM incoming_rows)",
+                (timestamp, digest),
+            )
+            self._connection.execute("DROP INDEX incoming_rows_by_row")
+            self._connection.execute("DELETE FROM incoming_rows")
+        return True
+
+    def ingest(self, retrieved_config: RetrievedConfig) -> bool:
+        """Ingests a configuration retrieved in memory.
+
+        Parameters
+        ----------
+        retrieved_config: RetrievedConfig
+            The retrieved configuration, more recent than any ingested one.
+
+        Returns
+        -------
+        bool
+            True if the configuration was ingested, False if a snapshot with the same
+            timestamp had already been ingested.
+
+        Raises
+        ------
+        ValueError
+            If the configuration is older than the latest ingested snapshot, or if one of
+            its rows is malformed, in which case nothing is ingested.
+        """
+        return self._ingest(
+            retrieved_config.timestamp,
+            hashlib.sha256(retrieved_config.config_body).hexdigest(),
+            iterate_rows(io.BytesIO(retrieved_config.config_body)),
+        )
+
+    def ingest_file(
+        self,
+        retrieved_config_file: RetrievedConfigFile,
+        digest: Optional[str] = None,
+    ) -> bool:
+        """Ingests a configuration retrieved to disk, possibly compressed.
+
+        The file is read line by line, so that snapshots with millions of rows are
+        ingested without being loaded in memory.
+
+        Parameters
+        ----------
+        retrieved_config_file: RetrievedConfigFile
+            The retrieved configuration, more recent than any ingested one.
+        digest: Optional[str]
+            The SHA-256 digest of the uncompressed content of the file, if known. If None,
+            it is computed from the file.
+
+        Returns
+        -------
+        bool
+            True if the configuration was ingested, False if a snapshot with the same
+            timestamp had already been ingested.
+
+        Raises
+        ------
+        ValueError
+            If the configuration is older than the latest ingested snapshot, or if one of
+            its rows is malformed, in which case nothing is ingested.
+        """
+        if digest is None:
+            file_hash = hashlib.sha256()
+            for chunk in read_decompressed_chunks(retrieved_config_file.path):
+                file_hash.update(chunk)
+            digest = file_hash.hexdigest()
+        with open_decompressed(retrieved_config_file.path) as config_file:
+            return self._ingest(
+                retrieved_config_file.timestamp, digest, iterate_rows(config_file),
+            )
+
+    def ingest_store(self, snapshot_store: SnapshotStore) -> int:
+        """Ingests the snapshots of a SnapshotStore more recent than the latest ingested one.
+
+        Parameters
+        ----------
+        snapshot_store: SnapshotStore
+            The store holding the snapshots.
+
+        Returns
+        -------
+        int
+            The number of ingested snapshots.
+        """
+        latest_snapshot = self.latest_snapshot()
+        ingested_snapshots = 0
+        for timestamp, digest in snapshot_store.index().items():
+            if latest_snapshot is not None and timestamp <= latest_snapshot[0]:
+                continue
+            blob_path = snapshot_store.blob_path(digest)
+            retrieved_config_file = RetrievedConfigFile(
+                timestamp=timestamp, path=blob_path.as_posix(), size=blob_path.stat().st_size,
+            )
+            ingested_snapshots += self.ingest_file(retrieved_config_file, digest=digest)
+        return ingested_snapshots
+
+    def sources_holding(self, symbol: str, timestamp: Optional[str] = None) -> List[int]:
+        """Returns the IDs of the sources that held an RTS symbol at a point in time.
+
+        Parameters
+        ----------
+        symbol: str
+            The RTS symbol.
+        timestamp: Optional[str]
+            The point in time, formatted as 20201118T123052Z. The latest ingested snapshot
+            is assumed to still hold after its timestamp. If None, the latest ingested
+            snapshot is queried.
+
+        Returns
+        -------
+        List[int]
+            The IDs of the sources, in numerical order.
+        """
+        rows: List[Tuple[int]]
+        if timestamp is None:
+            rows = self._query(
+                "SELECT source_id FROM memberships WHERE symbol = ? AND valid_to IS NULL "
+                "ORDER BY source_id",
+                symbol,
+            ).fetchall()
+        else:
+            rows = self._query(
+                f"SELECT DISTINCT source_id FROM memberships WHERE symbol = ? AND "
+                f"{HELD_AT_CONDITION} ORDER BY source_id",
+                symbol, timestamp, timestamp,
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def symbols_of(self, source_id: int, timestamp: Optional[str] = None) -> List[str]:
+        """Returns the RTS symbols held by a source at a point in time.
+
+        Parameters
+        ----------
+        source_id: int
+            The ID of the source.
+        timestamp: Optional[str]
+            The point in time, formatted as 20201118T123052Z. If None, the latest ingested
+            snapshot is queried.
+
+        Returns
+        -------
+        List[str]
+            The RTS symbols, in lexicographical order.
+        """
+        rows: List[Tuple[str]]
+        if timestamp is None:
+            rows = self._query(
+                "SELECT symbol FROM memberships WHERE source_id = ? AND valid_to IS NULL "
+                "ORDER BY symbol",
+                int(source_id),
+            ).fetchall()
+        else:
+            rows = self._query(
+                f"SELECT DISTINCT symbol FROM memberships WHERE source_id = ? AND "
+                f"{HELD_AT_CONDITION} ORDER BY symbol",
+                int(source_id), timestamp, timestamp,
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def first_added(self, symbol: str, source_id: Optional[int] = None) -> Optional[str]:
+        """Returns the timestamp of the first snapshot listing an RTS symbol.
+
+        Parameters
+        ----------
+        symbol: str
+            The RTS symbol.
+        source_id: Optional[int]
+            If passed, only the snapshots listing the symbol under this source count.
+
+        Returns
+        -------
+        Optional[str]
+            The timestamp of the snapshot, or None if no ingested snapshot lists the symbol.
+        """
+        rows: List[Tuple[Optional[str]]]
+        if source_id is None:
+            rows = self._query(
+                "SELECT MIN(valid_from) FROM memberships WHERE symbol = ?", symbol,
+            ).fetchall()
+        else:
+            rows = self._query(
+                "SELECT MIN(valid_from) FROM memberships WHERE symbol = ? AND source_id = ?",
+                symbol, int(source_id),
+            ).fetchall()
+        return rows[0][0]
+
+    def symbol_history(self, symbol: str) -> List[MembershipInterval]:
+        """Returns every interval during which a source held an RTS symbol.
+
+        Parameters
+        ----------
+        symbol: str
+            The RTS symbol.
+
+        Returns
+        -------
+        List[MembershipInterval]
+            The intervals, sorted by start and then by source ID.
+        """
+        return [
+            MembershipInterval(*row)
+            for row in self._query(
+                "SELECT source_id, symbol, valid_from, valid_to FROM memberships "
+                "WHERE symbol = ? ORDER BY valid_from, source_id",
+                symbol,
+            )
+        ]
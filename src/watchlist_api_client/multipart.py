@@ -0,0 +1,139 @@
+"""Implements the streaming encoding of configuration files as multipart/form-data bodies."""
+import binascii
+import io
+import os
+import stat
+from typing import BinaryIO, Iterator, List, Optional
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def get_content_size(file_object: BinaryIO) -> Optional[int]:
+    """Returns the number of bytes left to read from a regular file.
+
+    Parameters
+    ----------
+    file_object: BinaryIO
+        A file opened in binary mode.
+
+    Returns
+    -------
+    Optional[int]
+        The number of bytes between the current position and the end of the file, or None
+        if the object is not a regular file, e.g. a pipe or a decompressing stream, whose
+        size is unknown until it is fully read.
+    """
+    if not isinstance(file_object, (io.BufferedReader, io.FileIO)):
+        return None
+    file_stat = os.fstat(file_object.fileno())
+    if not stat.S_ISREG(file_stat.st_mode):
+        return None
+    return file_stat.st_size - file_object.tell()
+
+
+class MultipartFileStream:
+    """A file-like object that streams a file as the body of a multipart/form-data request.
+
+    The body is made of a preamble, holding the boundary and the headers of the form
+    field, of the content of the file and of a closing boundary. Instead of building the
+    whole body in memory, the parts are read lazily, in chunks of at most chunk_size
+    bytes, when the HTTP client consumes the stream. When the length of the content is
+    known in advance, so is the length of the body, and the request is sent with a
+    Content-Length header; otherwise, e.g. for content piped through the standard input,
+    the length is None and the body has to be sent with chunked transfer encoding, by
+    passing the iterator of the stream to the HTTP client.
+
+    The produced body is byte for byte the one that requests builds when a file is passed
+    through the files argument of requests.post, with the same form field name and file
+    name.
+    """
+
+    def __init__(
+        self,
+        file_object: BinaryIO,
+        field_name: str = "file",
+        file_name: str = "file",
+        boundary: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        content_size: Optional[int] = None,
+    ) -> None:
+        """Initialises the stream.
+
+        Parameters
+        ----------
+        file_object: BinaryIO
+            A file opened in binary mode, positioned at the beginning of the content to send.
+        field_name: str
+            The name of the form field containing the file.
+        file_name: str
+            The file name reported in the Content-Disposition header of the form field.
+        boundary: Optional[str]
+            The boundary delimiting the parts of the body. If None, a random boundary is
+            generated.
+        chunk_size: int
+            The maximum number of bytes produced at a time when iterating over the stream.
+        content_size: Optional[int]
+            The number of bytes of content that will be read from file_object. If None, it
+            is computed by get_content_size.
+        """
+        self.boundary = boundary or binascii.hexlify(os.urandom(16)).decode()
+        self.chunk_size = chunk_size
+        preamble = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{file_name}"\r\n'
+            f'\r\n'
+        ).encode()
+        epilogue = f'\r\n--{self.boundary}--\r\n'.encode()
+        if content_size is None:
+            content_size = get_content_size(file_object)
+        self.length = (
+            None if content_size is None else len(preamble) + content_size + len(epilogue)
+        )
+        self._parts: List[BinaryIO] = [io.BytesIO(preamble), file_object, io.BytesIO(epilogue)]
+
+    @property
+    def content_type(self) -> str:
+        """The value of the Content-Type header to send along with the stream."""
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        """Returns the total length, in bytes, of the multipart body.
+
+        Raises
+        ------
+        TypeError
+            If the length of the body is unknown.
+        """
+        if self.length is None:
+            raise TypeError("The length of the multipart body is unknown")
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads up to size bytes of the multipart body.
+
+        Parameters
+        ----------
+        size: int
+            The maximum number of bytes to read. If negative, the remaining body is read
+            in full.
+
+        Returns
+        -------
+        bytes
+            The next bytes of the multipart body, or an empty bytes object once the body has
+            been fully read.
+        """
+        chunks = []
+        while self._parts and size != 0:
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterates over the multipart body in chunks of at most chunk_size bytes."""
+        return iter(lambda: self.read(self.chunk_size), b"")
@@ -0,0 +1,187 @@
+"""Implements the retry policy and the circuit breaker used by the Watchlist API client."""
+import datetime
+import email.utils
+import random
+import threading
+import time
+from typing import Callable, FrozenSet, NamedTuple, Optional
+
+import requests
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """An exception class that is raised when a request is refused by an open circuit breaker."""
+
+    pass
+
+
+class RetryPolicy(NamedTuple):
+    """Stores the settings controlling how failed requests to the Watchlist API are retried.
+
+    A request is attempted up to max_attempts times. Before attempt n + 1, the client waits
+    for a capped exponential backoff of min(max_backoff, backoff_factor * 2 ** (n - 1))
+    seconds; with jitter, the actual wait is drawn uniformly between 0 and that value, so
+    that clients failing together do not retry together. If the response carries a
+    Retry-After header, the server's indication is followed instead, up to max_retry_after
+    seconds.
+
+    Only idempotent requests are retried, unless retry_post is set: a POST that reached the
+    server before failing may have been processed already.
+    """
+
+    max_attempts: int = 4
+    backoff_factor: float = 0.25
+    max_backoff: float = 10.0
+    jitter: bool = True
+    max_retry_after: float = 60.0
+    retry_on_status: FrozenSet[int] = RETRYABLE_STATUS_CODES
+    retry_post: bool = False
+
+    def allows_retry_of(self, method: str) -> bool:
+        """Whether requests sent with the given HTTP method can be retried."""
+        return method.upper() in IDEMPOTENT_METHODS or (self.retry_post and method == "POST")
+
+    def compute_backoff(self, attempt: int) -> float:
+        """Computes the number of seconds to wait after the given failed attempt.
+
+        Parameters
+        ----------
+        attempt: int
+            The number of the failed attempt, starting from 1.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait before the next attempt.
+        """
+        backoff = min(self.max_backoff, self.backoff_factor * 2.0 ** (attempt - 1))
+        if self.jitter:
+            return random.uniform(0, backoff)  # noqa: S311
+        return backoff
+
+    def compute_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Computes the number of seconds to wait before retrying the given failed attempt.
+
+        Parameters
+        ----------
+        attempt: int
+            The number of the failed attempt, starting from 1.
+        retry_after: Optional[str]
+            The value of the Retry-After header of the response, if any.
+
+        Returns
+        -------
+        float
+            The server's indication, capped at max_retry_after seconds, or the backoff
+            if the header is missing or malformed.
+        """
+        parsed_retry_after = parse_retry_after(retry_after)
+        if parsed_retry_after is None:
+            return self.compute_backoff(attempt)
+        return min(parsed_retry_after, self.max_retry_after)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """Parses the value of a Retry-After header into a number of seconds.
+
+    Parameters
+    ----------
+    retry_after: Optional[str]
+        The value of the header, either a number of seconds or an HTTP date.
+
+    Returns
+    -------
+    Optional[float]
+        The number of seconds to wait, or None if the header is missing or malformed.
+    """
+    if not retry_after:
+        return None
+    if retry_after.strip().isdigit():
+        return float(retry_after)
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """A circuit breaker that fails fast after repeated server-side failures.
+
+    The breaker counts consecutive failures, i.e. responses with a 5xx status code and
+    connection errors. Once failure_threshold consecutive failures are recorded, the
+    circuit opens and every request is refused with a CircuitOpenError for reset_timeout
+    seconds. After that, a single trial request is let through: if it succeeds the circuit
+    closes again, otherwise it reopens for another reset_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialises a closed circuit breaker.
+
+        Parameters
+        ----------
+        failure_threshold: int
+            The number of consecutive failures that opens the circuit.
+        reset_timeout: float
+            The number of seconds the circuit stays open before letting a trial request
+            through.
+        clock: Callable[[], float]
+            The function returning the current time, in seconds.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the circuit is open and refusing requests."""
+        return self._opened_at is not None and (
+            self._clock() - self._opened_at < self.reset_timeout
+        )
+
+    def before_request(self) -> None:
+        """Checks whether a request can be sent.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit is open.
+        """
+        with self._lock:
+            if self.is_open:
+                raise CircuitOpenError(
+                    f"Circuit open after {self._consecutive_failures} consecutive failures"
+                )
+            if self._opened_at is not None:
+                # Half-open: let this trial request through, and reopen the circuit for the
+                # requests that follow until its outcome is recorded.
+                self._opened_at = self._clock()
+
+    def record_success(self) -> None:
+        """Records a successful request, closing the circuit."""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Records a failed request, opening the circuit if the threshold is reached."""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = self._clock()
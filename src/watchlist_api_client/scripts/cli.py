@@ -1,14 +1,76 @@
 """
 Module containing the command line app.
 """
+import contextlib
+import datetime
+import importlib.util
+import itertools
 import pathlib
+import signal
 import sys
-from typing import Tuple
+import tempfile
+import types
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 
 import click
-import requests
 
-from watchlist_api_client import config_retriever, config_sender, helpers
+from watchlist_api_client import defaults
+
+
+if TYPE_CHECKING:
+    from watchlist_api_client.data_structures import HistoryEntry, RequestSummary
+    from watchlist_api_client.snapshot_store import SnapshotStore
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Imports a module lazily, running its code when one of its attributes is first accessed.
+
+    Every invocation of the CLI only runs one command, so that the modules the other
+    commands depend on, and in particular requests, are never imported. This keeps the
+    startup of the short-lived invocations, e.g. 'watchlist --help', fast.
+
+    Parameters
+    ----------
+    name: str
+        The absolute name of the module.
+
+    Returns
+    -------
+    types.ModuleType
+        The module, which is loaded on first attribute access unless it was already
+        imported.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    if spec.loader is None:
+        raise ImportError(f"Module {name!r} has no loader to import it lazily", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent_name, _, child_name = name.rpartition(".")
+    if parent_name:
+        setattr(sys.modules[parent_name], child_name, module)
+    return module
+
+
+requests = lazy_import("requests")
+change_points = lazy_import("watchlist_api_client.change_points")
+client = lazy_import("watchlist_api_client.client")
+compression = lazy_import("watchlist_api_client.compression")
+config_diff = lazy_import("watchlist_api_client.config_diff")
+config_sender = lazy_import("watchlist_api_client.config_sender")
+daemon = lazy_import("watchlist_api_client.daemon")
+helpers = lazy_import("watchlist_api_client.helpers")
+history = lazy_import("watchlist_api_client.history")
+history_database = lazy_import("watchlist_api_client.history_database")
+retry = lazy_import("watchlist_api_client.retry")
+snapshot_cache = lazy_import("watchlist_api_client.snapshot_cache")
+snapshot_store = lazy_import("watchlist_api_client.snapshot_store")
 
 
 class MissingOnyxCredentialsError(Exception):
@@ -46,13 +108,62 @@ def validate_credentials(credentials: Tuple[str, str]) -> None:
         validate_credentials_type(credentials)
 
 
+def parse_timestamp_option(raw_timestamp: str, option_name: str) -> datetime.datetime:
+    """Parses the UTC timestamp passed to an option, exiting with code 1 if it is invalid."""
+    try:
+        parsed_timestamp: datetime.datetime = helpers.parse_utc_timestamp(raw_timestamp)
+    except (ValueError, OverflowError):
+        click.echo(f"Invalid {option_name} timestamp: {raw_timestamp}")
+        sys.exit("Process finished with exit code 1")
+    return parsed_timestamp
+
+
+def normalise_query_timestamp(timestamp: Optional[str]) -> Optional[str]:
+    """Converts the '--at' timestamp of a query command to the format of the snapshots.
+
+    Exits with code 1 if the timestamp is invalid.
+    """
+    if timestamp is None:
+        return None
+    query_timestamp: str = helpers.format_utc_timestamp(
+        parse_timestamp_option(timestamp, "--at"), snapshot_store.TIMESTAMP_FORMAT,
+    )
+    return query_timestamp
+
+
+def check_compression_option(
+    context: click.Context, parameter: click.Parameter, value: Optional[str],
+) -> Optional[str]:
+    """Checks the compression of a '--compress' option, exiting with code 1 if unavailable."""
+    try:
+        compression.check_compression(value)
+    except compression.CompressionUnavailableError as compression_unavailable_error:
+        click.echo(str(compression_unavailable_error))
+        sys.exit("Process finished with exit code 1")
+    return value
+
+
+def check_store_compression(store: Optional[str], compress: Optional[str]) -> None:
+    """Exits with code 1 if '--compress' is combined with '--store'.
+
+    The snapshot store always keeps the configurations uncompressed, so the compression
+    would otherwise be silently ignored.
+    """
+    if store and compress:
+        click.echo(
+            "The '--compress' option cannot be used with '--store': the snapshot store keeps "
+            "the configurations uncompressed, use 'store materialize --compress' instead"
+        )
+        sys.exit("Process finished with exit code 1")
+
+
 @click.group()
 def watchlist():
     pass
 
 
 @watchlist.command(name="submit")
-@click.argument('config_file', type=click.Path(exists=True))
+@click.argument('config_file', type=click.Path(exists=True, allow_dash=True))
 @click.option(
     '-u',
     '--user',
@@ -96,7 +207,102 @@ def watchlist():
         "current working directory."
     ),
 )
-def send_config(config_file, user, password, quiet, json, write_to):
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=1,
+    help=(
+        "The number of processes used to validate the configuration file before submitting "
+        "it. Use more than one process to speed up the validation of very large files."
+    ),
+)
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    help=(
+        "Validate the configuration file even if an identical file was already validated, "
+        "bypassing the validation cache."
+    ),
+)
+@click.option(
+    '--retries',
+    type=click.IntRange(min=0),
+    default=3,
+    help=(
+        "The number of times a request is retried after a connection error, a timeout or "
+        "a 429, 500, 502, 503 or 504 response, waiting for an exponentially increasing "
+        "delay between attempts."
+    ),
+)
+@click.option(
+    '--retry-submit',
+    is_flag=True,
+    help=(
+        "Retry the submission as well. Submissions are not retried by default, since a "
+        "failed submission may have been processed by the server already."
+    ),
+)
+@click.option(
+    '--only-if-changed',
+    is_flag=True,
+    help=(
+        "Retrieve the active configuration first, and submit the configuration file only if "
+        "it would change the symbols of any source."
+    ),
+)
+@click.option(
+    '--dry-run',
+    is_flag=True,
+    help=(
+        "Do not submit the configuration file. Instead, predict the summary of the actions "
+        "that submitting it would perform, by comparing it with a retrieved snapshot of the "
+        "active configuration. No request is sent to the server."
+    ),
+)
+@click.option(
+    '--snapshot',
+    type=click.Path(exists=True),
+    default=pathlib.Path().cwd().as_posix(),
+    help=(
+        "The snapshot of the active configuration used by '--dry-run': either a file "
+        "written by the retrieve command, or a directory, in which case the most recent "
+        "watchlist_config@<timestamp>.csv file in it is used. By default, the current "
+        "working directory is searched."
+    ),
+)
+@click.option(
+    '--compress',
+    type=click.Choice(defaults.COMPRESSIONS),
+    default=None,
+    callback=check_compression_option,
+    help="Compress the json summary written with '--json' with gzip or zstd.",
+)
+@click.option(
+    '--no-daemon',
+    is_flag=True,
+    help=(
+        "Submit the configuration file from this process, even if a daemon started by the "
+        "daemon command is running."
+    ),
+)
+def send_config(
+    config_file,
+    user,
+    password,
+    quiet,
+    json,
+    write_to,
+    jobs,
+    no_cache,
+    retries,
+    retry_submit,
+    only_if_changed,
+    dry_run,
+    snapshot,
+    compress,
+    no_daemon,
+):
     """Submits a configuration file to the Watchlist API server.
 
     This commands accepts a path to a Watchlist API configuration file and, after
@@ -115,63 +321,216 @@ def send_config(config_file, user, password, quiet, json, write_to):
     This will result in the raw request summary, which is returned by the Watchlist API
     server as a json object, being saved in its raw form in a json file.
 
+    The configuration file can be compressed with gzip, bzip2, xz or zstd, and is then
+    decompressed on the fly. Pass '-' to read the configuration from the standard input.
+    Compressed and piped configurations are validated while they are uploaded, in a
+    single pass, and an invalid configuration is never submitted in full.
+
+    If a daemon started by the daemon command is running, the validation and the
+    submission run in the daemon, unless the configuration is read from the standard
+    input or the '--no-daemon' option is used.
+
     \b
     Positional arguments:
     \b
-    CONFIG FILE          Full path to the Watchlist API configuration file location.
+    CONFIG FILE          Full path to the Watchlist API configuration file location,
+                         or '-' for the standard input.
     """
     credentials = (user, password)
-    try:
-        validate_credentials(credentials)
-    except MissingOnyxCredentialsError as missing_credentials_error:
-        click.echo(f"Missing Credentials Error: {str(missing_credentials_error)}")
-        sys.exit("Process finished with exit code 1")
-    except InvalidOnyxCredentialTypeError:
-        click.echo(f"Invalid credentials type")
+    if not dry_run:
+        try:
+            validate_credentials(credentials)
+        except MissingOnyxCredentialsError as missing_credentials_error:
+            click.echo(f"Missing Credentials Error: {str(missing_credentials_error)}")
+            sys.exit("Process finished with exit code 1")
+        except InvalidOnyxCredentialTypeError:
+            click.echo(f"Invalid credentials type")
+            sys.exit("Process finished with exit code 1")
+
+    if config_file == compression.STDIN_PATH and (dry_run or only_if_changed):
+        click.echo(
+            "The standard input can only be read once: it cannot be used with the "
+            "'--dry-run' and '--only-if-changed' options."
+        )
         sys.exit("Process finished with exit code 1")
 
+    if dry_run:
+        predicted_summary, path_to_snapshot = predict_submission(
+            config_file, snapshot, jobs, no_cache,
+        )
+        if not quiet:
+            click.echo(f"Dry run against the snapshot {path_to_snapshot}\n")
+        report_request_summary(
+            predicted_summary, quiet, json, write_to, compress,
+            "The predicted summary of the actions",
+        )
+        sys.exit("Process finished with exit code 0")
+
+    submission_arguments = dict(
+        credentials=credentials,
+        config_file=(
+            config_file if config_file == compression.STDIN_PATH
+            else pathlib.Path(config_file).absolute().as_posix()
+        ),
+        max_attempts=retries + 1,
+        retry_post=retry_submit,
+        workers=jobs,
+        use_cache=not no_cache,
+    )
+    # The daemon cannot read the standard input of this process.
+    use_daemon = not no_daemon and config_file != compression.STDIN_PATH
+    config_summary = run_submission_job(
+        submission_arguments, only_if_changed, quiet, use_daemon,
+    )
+    if config_summary is None:
+        sys.exit("Process finished with exit code 0")
+    report_request_summary(
+        config_summary, quiet, json, write_to, compress,
+        "The summary of the actions performed as a result of the request",
+    )
+    sys.exit("Process finished with exit code 0")
+
+
+def predict_submission(
+    config_file: str, snapshot: str, jobs: int, no_cache: bool,
+) -> Tuple["RequestSummary", str]:
+    """Validates a configuration file and predicts the outcome of its submission.
+
+    This is the '--dry-run' of the submit command: the prediction is made against the
+    snapshot of the active configuration, or the latest snapshot in a directory. Errors
+    are reported, and exit with code 1.
+
+    Returns
+    -------
+    Tuple[RequestSummary, str]
+        The predicted summary of the submission, and the path to the snapshot it was
+        predicted against.
+    """
     try:
-        config_sender.validate_watchlist_configuration_file(config_file)
+        config_sender.validate_watchlist_configuration_file(
+            config_file, workers=jobs, use_cache=not no_cache,
+        )
     except config_sender.ImproperFileFormat as e:
         click.echo(f"Invalid Configuration File: {str(e)}")
         sys.exit("Process finished with exit code 1")
+    except compression.CompressionUnavailableError as compression_unavailable_error:
+        click.echo(str(compression_unavailable_error))
+        sys.exit("Process finished with exit code 1")
 
-    watchlist_api_endpoint = (
-        "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
-    )
+    path_to_snapshot = snapshot
+    if pathlib.Path(snapshot).is_dir():
+        path_to_snapshot = config_diff.find_latest_snapshot(snapshot)
+    if path_to_snapshot is None:
+        click.echo(
+            f"No snapshot of the active configuration found in {snapshot}. Retrieve one "
+            f"with the retrieve command, or pass it with the '--snapshot' option."
+        )
+        sys.exit("Process finished with exit code 1")
+    predicted_summary = config_diff.predict_request_summary(config_file, path_to_snapshot)
+    return predicted_summary, path_to_snapshot
+
+
+def run_submission_job(
+    submission_arguments: Dict[str, object],
+    only_if_changed: bool,
+    quiet: bool,
+    use_daemon: bool,
+) -> Optional["RequestSummary"]:
+    """Runs the submission of the submit command, in the daemon if use_daemon is True.
+
+    The configuration is validated by the submission job. Errors are reported, and exit
+    with code 1.
+
+    Returns
+    -------
+    Optional[RequestSummary]
+        The summary of the submission, or None if only_if_changed is True and the
+        configuration matches the active configuration.
+    """
     known_error_causes = {
         "400": "Input CSV file is improperly formatted",
         "401": "Improper credentials",
         "500": "Failed request"
     }
     try:
-        config_summary = config_sender.send_config(
-            watchlist_api_endpoint,
-            credentials,
-            path_to_watchlist_config_file=config_file
-        )
+        return submit_configuration(submission_arguments, only_if_changed, quiet, use_daemon)
+    except config_sender.ImproperFileFormat as e:
+        click.echo(f"Invalid Configuration File: {str(e)}")
+        sys.exit("Process finished with exit code 1")
+    except compression.CompressionUnavailableError as compression_unavailable_error:
+        click.echo(str(compression_unavailable_error))
+        sys.exit("Process finished with exit code 1")
+    except retry.CircuitOpenError as circuit_open_error:
+        click.echo(f"Service Unavailable: {str(circuit_open_error)}")
+        sys.exit("Process finished with exit code 1")
     except requests.exceptions.HTTPError as http_error:
         error_type = str(http_error).split(":")[0]
-        error_code = error_type[:3]
-        if error_code in known_error_causes.keys():
-            click.echo(f"{error_type}: {known_error_causes.get(error_code)}")
-        else:
-            click.echo(f"{error_type}")
+        error_cause = known_error_causes.get(error_type[:3])
+        click.echo(f"{error_type}: {error_cause}" if error_cause else f"{error_type}")
+        sys.exit("Process finished with exit code 1")
+    except daemon.DaemonError as daemon_error:
+        click.echo(f"Daemon Error: {str(daemon_error)}")
         sys.exit("Process finished with exit code 1")
 
+
+def submit_configuration(
+    submission_arguments: Dict[str, object],
+    only_if_changed: bool,
+    quiet: bool,
+    use_daemon: bool,
+) -> Optional["RequestSummary"]:
+    """Runs the submit or submit_if_changed job of the submit command."""
+    if not only_if_changed:
+        # Compressed and piped configurations are validated while they are uploaded, rather
+        # than read twice.
+        validate_while_uploading = not compression.is_plain_file(
+            submission_arguments["config_file"],
+        )
+        request_summary: "RequestSummary" = daemon.run_job(
+            "submit",
+            dict(submission_arguments, validate_while_uploading=validate_while_uploading),
+            use_daemon=use_daemon,
+        )
+        return request_summary
+    conditional_submission = daemon.run_job(
+        "submit_if_changed", submission_arguments, use_daemon=use_daemon,
+    )
+    if not conditional_submission.submitted:
+        if not quiet:
+            click.echo(
+                "The configuration file matches the active configuration: "
+                "nothing was submitted."
+            )
+        return None
     if not quiet:
-        click.echo(config_sender.stringify_response_summary(config_summary))
+        click.echo(config_diff.stringify_changes(conditional_submission.local_summary))
+    request_summary = conditional_submission.request_summary
+    return request_summary
+
+
+def report_request_summary(
+    request_summary: "RequestSummary",
+    quiet: bool,
+    json: bool,
+    write_to: str,
+    compress: Optional[str],
+    description: str,
+) -> None:
+    """Prints a request summary unless quiet is True, and writes it to json if json is True.
 
+    The description names the summary in the message reporting where it was written.
+    """
+    if not quiet:
+        click.echo(config_sender.stringify_response_summary(request_summary))
     if json:
         path_to_request_summary = config_sender.write_request_summary_to_json(
-            config_summary, write_to
+            request_summary, write_to, compression=compress,
         )
         click.echo(
-            f"The summary of the actions performed as a result of the request has been written to: "
+            f"{description} has been written to: "
             f"\n"
             f"  {path_to_request_summary}"
         )
-    sys.exit("Process finished with exit code 0")
 
 
 @watchlist.command(name="retrieve")
@@ -211,7 +570,67 @@ def send_config(config_file, user, password, quiet, json, write_to):
         "current working directory."
     ),
 )
-def get_config(user, password, timestamp, write_to):
+@click.option(
+    '--retries',
+    type=click.IntRange(min=0),
+    default=3,
+    help=(
+        "The number of times a request is retried after a connection error, a timeout or "
+        "a 429, 500, 502, 503 or 504 response, waiting for an exponentially increasing "
+        "delay between attempts."
+    ),
+)
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    help=(
+        "Always retrieve the configuration from the server, bypassing the local cache of "
+        "retrieved configurations."
+    ),
+)
+@click.option(
+    '--cache-ttl',
+    type=click.FloatRange(min=0),
+    default=defaults.DEFAULT_ACTIVE_TTL,
+    help=(
+        "The number of seconds during which a retrieved active configuration is served from "
+        "the local cache. A configuration retrieved with '--timestamp' is final, and always "
+        "served from the cache, only if the requested time was before the response date; "
+        "otherwise it is served for this number of seconds, like the active configuration."
+    ),
+)
+@click.option(
+    '--store',
+    type=click.Path(file_okay=False),
+    default=None,
+    help=(
+        "Add the retrieved configuration to the deduplicated snapshot store in the given "
+        "directory, instead of writing it to '--write-to'. The store keeps configurations "
+        "uncompressed, so '--compress' cannot be used with it. See the 'store' command."
+    ),
+)
+@click.option(
+    '--compress',
+    type=click.Choice(defaults.COMPRESSIONS),
+    default=None,
+    callback=check_compression_option,
+    help=(
+        "Compress the retrieved configuration with gzip or zstd while writing it, adding "
+        "the .gz or .zst suffix to the name of the file."
+    ),
+)
+@click.option(
+    '--no-daemon',
+    is_flag=True,
+    help=(
+        "Retrieve the configuration from this process, even if a daemon started by the "
+        "daemon command is running."
+    ),
+)
+def get_config(
+    user, password, timestamp, write_to, retries, no_cache, cache_ttl, store, compress,
+    no_daemon,
+):
     """Retrieves a Watchlist API configuration.
 
     This command allows the retrieval of both currently active and deactivated
@@ -223,8 +642,12 @@ def get_config(user, password, timestamp, write_to):
     request to retrieve the configuration that was active at the time of the passed
     timestamp. If no active configuration is found, or if at the time of the passed
     timestamp no active configuration existed, an error is reported.
+
+    If a daemon started by the daemon command is running, the retrieval runs in the
+    daemon, unless the '--no-daemon' option is used.
     """
     credentials = (user, password)
+    check_store_compression(store, compress)
     try:
         validate_credentials(credentials)
     except MissingOnyxCredentialsError as missing_credentials_error:
@@ -234,32 +657,38 @@ def get_config(user, password, timestamp, write_to):
         click.echo(f"Invalid credentials type")
         sys.exit("Process finished with exit code 1")
 
-    watchlist_api_endpoint = (
-        "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
-    )
-    if timestamp:
-        watchlist_api_endpoint = helpers.join_base_url_and_query_string(
-            watchlist_api_endpoint,
-            helpers.prepare_timestamp_query_string(
-                helpers.convert_raw_utc_timestamp_to_string(timestamp)
-            )
-        )
-
     known_error_causes = {
         "401": "Improper credentials",
         "404": "No active configuration for the given date and time",
     }
+    retrieval_arguments = dict(
+        credentials=credentials,
+        path_to_directory=pathlib.Path(write_to).absolute().as_posix(),
+        timestamp=timestamp,
+        max_attempts=retries + 1,
+        use_cache=not no_cache,
+        active_ttl=cache_ttl,
+        compression=compress,
+        store=pathlib.Path(store).absolute().as_posix() if store else None,
+    )
     try:
-        retrieved_configuration = config_retriever.retrieve_config(
-            watchlist_api_endpoint,
-            credentials
-        )
-        file_path = config_retriever.retrieved_config_writer(retrieved_configuration, write_to)
-        click.echo(
-            f"The retrieved_configuration has been written to: "
-            f"\n"
-            f"  {file_path}"
+        retrieved_configuration_file, digest = daemon.run_job(
+            "retrieve", retrieval_arguments, use_daemon=not no_daemon,
         )
+        if store:
+            click.echo(
+                f"The configuration retrieved at {retrieved_configuration_file.timestamp} "
+                f"has been stored as {digest}"
+            )
+        else:
+            click.echo(
+                f"The retrieved_configuration has been written to: "
+                f"\n"
+                f"  {retrieved_configuration_file.path}"
+            )
+    except retry.CircuitOpenError as circuit_open_error:
+        click.echo(f"Service Unavailable: {str(circuit_open_error)}")
+        sys.exit("Process finished with exit code 1")
     except requests.exceptions.HTTPError as http_error:
         error_type = str(http_error).split(":")[0]
         error_code = error_type[:3]
@@ -268,9 +697,625 @@ def get_config(user, password, timestamp, write_to):
         else:
             click.echo(f"{error_type}")
         sys.exit("Process finished with exit code 1")
+    except daemon.DaemonError as daemon_error:
+        click.echo(f"Daemon Error: {str(daemon_error)}")
+        sys.exit("Process finished with exit code 1")
 
     sys.exit("Process finished with exit code 0")
 
 
+@watchlist.command(name="history")
+@click.option(
+    '-u',
+    '--user',
+    type=click.STRING,
+    envvar="ICE_API_USERNAME",
+    help="The username used to access the Watchlist API.",
+)
+@click.option(
+    '-p',
+    '--password',
+    type=click.STRING,
+    envvar="ICE_API_PASSWORD",
+    help="The password used to access the Watchlist API.",
+)
+@click.option(
+    '--from',
+    'from_timestamp',
+    type=click.STRING,
+    required=True,
+    help="The first UTC point in time to retrieve (YYYY-mm-ddTHH:MM:SSZ).",
+)
+@click.option(
+    '--to',
+    'to_timestamp',
+    type=click.STRING,
+    required=True,
+    help="The last UTC point in time to retrieve (YYYY-mm-ddTHH:MM:SSZ).",
+)
+@click.option(
+    '--step',
+    type=click.STRING,
+    default="1h",
+    help=(
+        "The interval between two retrieved points in time, as a number followed by one of "
+        "the units s, m, h, d and w (e.g. 30m, 1h, 1d). By default, 1h."
+    ),
+)
+@click.option(
+    '-w',
+    '--write-to',
+    type=click.Path(exists=True),
+    default=pathlib.Path().cwd().as_posix(),
+    help=(
+        "Specify the full path to the directory where the retrieved configurations will be "
+        "written. If no '--write-to' option is specified, the path will be set by default to "
+        "the current working directory."
+    ),
+)
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=defaults.DEFAULT_MAX_WORKERS,
+    help=(
+        f"The maximum number of configurations retrieved concurrently. By default, "
+        f"{defaults.DEFAULT_MAX_WORKERS}."
+    ),
+)
+@click.option(
+    '--retries',
+    type=click.IntRange(min=0),
+    default=3,
+    help=(
+        "The number of times each retrieval is retried after a connection error, a timeout "
+        "or a 429, 500, 502, 503 or 504 response."
+    ),
+)
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    help="Retrieve every configuration from the server, bypassing the local cache.",
+)
+@click.option(
+    '--store',
+    type=click.Path(file_okay=False),
+    default=None,
+    help=(
+        "Add the retrieved configurations to the deduplicated snapshot store in the given "
+        "directory, instead of writing them to '--write-to'. The store keeps configurations "
+        "uncompressed, so '--compress' cannot be used with it. See the 'store' command."
+    ),
+)
+@click.option(
+    '--compress',
+    type=click.Choice(defaults.COMPRESSIONS),
+    default=None,
+    callback=check_compression_option,
+    help="Compress the retrieved configurations with gzip or zstd while writing them.",
+)
+def get_history(
+    user, password, from_timestamp, to_timestamp, step, write_to, jobs, retries, no_cache,
+    store, compress,
+):
+    """Retrieves the Watchlist API configurations active over a time range.
+
+    This command retrieves the configurations that were active at every point in time
+    from the '--from' timestamp to the '--to' timestamp, every '--step'. The retrievals
+    run concurrently and every configuration is written to its own file as soon as it is
+    received. Points in time already retrieved before are served from the local cache.
+    The points in time at which no configuration was active are reported, and do not
+    stop the retrieval of the others.
+    """
+    credentials = (user, password)
+    check_store_compression(store, compress)
+    try:
+        validate_credentials(credentials)
+    except MissingOnyxCredentialsError as missing_credentials_error:
+        click.echo(f"Missing Credentials Error: {str(missing_credentials_error)}")
+        sys.exit("Process finished with exit code 1")
+    except InvalidOnyxCredentialTypeError:
+        click.echo(f"Invalid credentials type")
+        sys.exit("Process finished with exit code 1")
+
+    try:
+        history_step = history.parse_step(step)
+    except ValueError as value_error:
+        click.echo(str(value_error))
+        sys.exit("Process finished with exit code 1")
+    start = parse_timestamp_option(from_timestamp, "--from")
+    end = parse_timestamp_option(to_timestamp, "--to")
+
+    store_content = snapshot_store.SnapshotStore(store) if store else None
+    with contextlib.ExitStack() as exit_stack:
+        if store_content:
+            write_to = exit_stack.enter_context(tempfile.TemporaryDirectory(dir=store))
+        history_entries = history.retrieve_history(
+            client.WATCHLIST_API_ENDPOINT,
+            credentials,
+            write_to,
+            start,
+            end,
+            history_step,
+            max_workers=jobs,
+            retry_policy=retry.RetryPolicy(max_attempts=retries + 1),
+            use_cache=not no_cache,
+            compression=compress,
+        )
+        failed_retrievals = sum(
+            not report_history_entry(history_entry, store_content)
+            for history_entry in history_entries
+        )
+
+    if failed_retrievals:
+        click.echo(f"{failed_retrievals} configurations could not be retrieved")
+        sys.exit("Process finished with exit code 1")
+    sys.exit("Process finished with exit code 0")
+
+
+def report_history_entry(
+    history_entry: "HistoryEntry", store_content: Optional["SnapshotStore"],
+) -> bool:
+    """Reports the outcome of a retrieval of the history command, and whether it succeeded.
+
+    The retrieved configuration is moved to the snapshot store, if one is used.
+    """
+    retrieved_config_file = history_entry.retrieved_config_file
+    if retrieved_config_file is None:
+        click.echo(f"{history_entry.requested_timestamp}: {history_entry.error}")
+        return False
+    if store_content:
+        digest = store_content.add_file(retrieved_config_file)
+        pathlib.Path(retrieved_config_file.path).unlink()
+        click.echo(f"{history_entry.requested_timestamp}: stored as {digest}")
+    else:
+        click.echo(f"{history_entry.requested_timestamp}: {retrieved_config_file.path}")
+    return True
+
+
+@watchlist.command(name="changes")
+@click.option(
+    '-u',
+    '--user',
+    type=click.STRING,
+    envvar="ICE_API_USERNAME",
+    help="The username used to access the Watchlist API.",
+)
+@click.option(
+    '-p',
+    '--password',
+    type=click.STRING,
+    envvar="ICE_API_PASSWORD",
+    help="The password used to access the Watchlist API.",
+)
+@click.option(
+    '--from',
+    'from_timestamp',
+    type=click.STRING,
+    required=True,
+    help="The beginning of the searched time range (YYYY-mm-ddTHH:MM:SSZ).",
+)
+@click.option(
+    '--to',
+    'to_timestamp',
+    type=click.STRING,
+    required=True,
+    help="The end of the searched time range (YYYY-mm-ddTHH:MM:SSZ).",
+)
+@click.option(
+    '--resolution',
+    type=click.STRING,
+    default="1m",
+    help=(
+        "The precision with which the changes are located, as a number followed by one of "
+        "the units s, m, h, d and w (e.g. 1m, 1h). By default, 1m."
+    ),
+)
+@click.option(
+    '-s',
+    '--source',
+    type=click.STRING,
+    default=None,
+    help="Only look for the changes to the symbols of the given source ID.",
+)
+@click.option(
+    '--retries',
+    type=click.IntRange(min=0),
+    default=3,
+    help=(
+        "The number of times each retrieval is retried after a connection error, a timeout "
+        "or a 429, 500, 502, 503 or 504 response."
+    ),
+)
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    help="Retrieve every configuration from the server, bypassing the local cache.",
+)
+def get_changes(
+    user, password, from_timestamp, to_timestamp, resolution, source, retries, no_cache,
+):
+    """Finds when the active Watchlist API configuration changed over a time range.
+
+    This command locates the points in time at which the active configuration changed
+    between the '--from' and '--to' timestamps, to the precision set by '--resolution'.
+    Rather than retrieving the configuration at every step, the time range is bisected,
+    so that each change is located with a number of retrievals that only grows with the
+    logarithm of the number of steps. Use '--source' to find when the symbols of a single
+    source changed, e.g. when it was deactivated.
+    """
+    credentials = (user, password)
+    try:
+        validate_credentials(credentials)
+    except MissingOnyxCredentialsError as missing_credentials_error:
+        click.echo(f"Missing Credentials Error: {str(missing_credentials_error)}")
+        sys.exit("Process finished with exit code 1")
+    except InvalidOnyxCredentialTypeError:
+        click.echo(f"Invalid credentials type")
+        sys.exit("Process finished with exit code 1")
+
+    try:
+        change_point_resolution = history.parse_step(resolution)
+    except ValueError as value_error:
+        click.echo(str(value_error))
+        sys.exit("Process finished with exit code 1")
+
+    probe = change_points.ConfigurationProbe(
+        client.WATCHLIST_API_ENDPOINT,
+        credentials,
+        source_id=source,
+        retry_policy=retry.RetryPolicy(max_attempts=retries + 1),
+        use_cache=not no_cache,
+    )
+    start = parse_timestamp_option(from_timestamp, "--from")
+    end = parse_timestamp_option(to_timestamp, "--to")
+    try:
+        found_change_points = change_points.find_change_points(
+            probe, start, end, change_point_resolution,
+        )
+    except ValueError as value_error:
+        click.echo(str(value_error))
+        sys.exit("Process finished with exit code 1")
+    except requests.exceptions.HTTPError as http_error:
+        click.echo(str(http_error).split(":")[0])
+        sys.exit("Process finished with exit code 1")
+
+    for change_point in found_change_points:
+        click.echo(
+            f"Changed between {change_point.last_before_change} and "
+            f"{change_point.first_after_change}"
+        )
+    click.echo(
+        f"{len(found_change_points)} changes found with {probe.retrievals} retrievals"
+    )
+    sys.exit("Process finished with exit code 0")
+
+
+@watchlist.command(name="diff")
+@click.argument('old_config_file', type=click.Path(exists=True, allow_dash=True))
+@click.argument('new_config_file', type=click.Path(exists=True, allow_dash=True))
+@click.option(
+    '--presorted',
+    is_flag=True,
+    help=(
+        "Merge the rows of the two files in order rather than indexing them, which uses "
+        "much less memory. The rows of both files have to be sorted by source ID and then "
+        "by RTS symbol."
+    ),
+)
+@click.option(
+    '--max-memory',
+    type=click.IntRange(min=1),
+    default=None,
+    help=(
+        "Sort the two files on disk, in runs of at most the given number of MiB of rows, "
+        "and merge them, so that files larger than the available memory can be compared."
+    ),
+)
+@click.option(
+    '--include-unchanged',
+    is_flag=True,
+    help="List the unchanged symbols of every source, rather than only counting them.",
+)
+@click.option(
+    '-o',
+    '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the differences to the given JSON file instead of the standard output.",
+)
+def diff_configs(
+    old_config_file, new_config_file, presorted, max_memory, include_unchanged, output,
+):
+    """Compares two Watchlist configuration files and prints their differences as JSON.
+
+    For every source ID whose symbols differ, the symbols added and removed by
+    NEW_CONFIG_FILE with respect to OLD_CONFIG_FILE are reported, with the number of
+    symbols left unchanged, along with the sources that NEW_CONFIG_FILE activates and
+    deactivates. The files can be compressed, and either, but not both, can be "-" for
+    the standard input. The differences are written as the sources are compared.
+    """
+    if old_config_file == compression.STDIN_PATH and new_config_file == compression.STDIN_PATH:
+        click.echo("The standard input can only be read once: pass '-' for one file at most")
+        sys.exit("Process finished with exit code 1")
+    try:
+        source_diffs = config_diff.stream_diff(
+            old_config_file,
+            new_config_file,
+            presorted=presorted,
+            max_memory=max_memory * 1024 * 1024 if max_memory else None,
+        )
+        diff_chunks = itertools.chain(
+            config_diff.iterate_diff_json(source_diffs, include_unchanged), ["\n"],
+        )
+        if output:
+            helpers.write_file_atomically(output, (chunk.encode() for chunk in diff_chunks))
+        else:
+            for chunk in diff_chunks:
+                click.echo(chunk, nl=False)
+    except ValueError as value_error:
+        click.echo(str(value_error))
+        sys.exit("Process finished with exit code 1")
+    except compression.CompressionUnavailableError as compression_unavailable_error:
+        click.echo(str(compression_unavailable_error))
+        sys.exit("Process finished with exit code 1")
+    sys.exit("Process finished with exit code 0")
+
+
+@watchlist.group(name="store")
+def snapshots():
+    """Manages a deduplicated store of retrieved Watchlist API configurations.
+
+    The retrieve and history commands add the configurations they retrieve to a store
+    when passed the '--store' option. A store keeps every distinct configuration once,
+    however many times it was retrieved, and records which configuration was retrieved
+    at every point in time.
+    """
+    pass
+
+
+@snapshots.command(name="list")
+@click.argument('store', type=click.Path(exists=True, file_okay=False))
+def list_snapshots(store):
+    """Lists the points in time stored in STORE and the digest of their configuration."""
+    for timestamp, digest in snapshot_store.SnapshotStore(store).index().items():
+        click.echo(f"{timestamp} {digest}")
+    sys.exit("Process finished with exit code 0")
+
+
+@snapshots.command(name="materialize")
+@click.argument('store', type=click.Path(exists=True, file_okay=False))
+@click.argument('timestamp', type=click.STRING)
+@click.option(
+    '-w',
+    '--write-to',
+    type=click.Path(exists=True),
+    default=pathlib.Path().cwd().as_posix(),
+    help=(
+        "Specify the full path to the directory where the configuration will be written. "
+        "If no '--write-to' option is specified, the path will be set by default to the "
+        "current working directory."
+    ),
+)
+@click.option(
+    '--compress',
+    type=click.Choice(defaults.COMPRESSIONS),
+    default=None,
+    callback=check_compression_option,
+    help="Compress the written configuration with gzip or zstd.",
+)
+def materialize_snapshot(store, timestamp, write_to, compress):
+    """Writes the configuration stored in STORE for TIMESTAMP to a csv file.
+
+    TIMESTAMP is either formatted as in the names of the retrieved files
+    (YYYYmmddTHHMMSSZ) or according to the ISO 8601 standard (YYYY-mm-ddTHH:MM:SSZ).
+    """
+    timestamp = helpers.format_utc_timestamp(
+        parse_timestamp_option(timestamp, "TIMESTAMP"), snapshot_store.TIMESTAMP_FORMAT,
+    )
+    try:
+        materialized_file = snapshot_store.SnapshotStore(store).materialize(
+            timestamp, write_to, compression=compress,
+        )
+    except KeyError:
+        click.echo(f"No configuration stored for {timestamp}")
+        sys.exit("Process finished with exit code 1")
+    click.echo(
+        f"The stored configuration has been written to: "
+        f"\n"
+        f"  {materialized_file.path}"
+    )
+    sys.exit("Process finished with exit code 0")
+
+
+@snapshots.command(name="gc")
+@click.argument('store', type=click.Path(exists=True, file_okay=False))
+@click.option(
+    '--keep-latest',
+    type=click.IntRange(min=0),
+    default=None,
+    help="Only keep the given number of most recent points in time.",
+)
+@click.option(
+    '--older-than',
+    type=click.STRING,
+    default=None,
+    help="Drop the points in time before the given UTC timestamp (YYYY-mm-ddTHH:MM:SSZ).",
+)
+def collect_garbage(store, keep_latest, older_than):
+    """Applies a retention policy to STORE and removes the unreferenced configurations.
+
+    Without options, only the configurations that no point in time refers to anymore are
+    removed.
+    """
+    report = snapshot_store.SnapshotStore(store).gc(
+        keep_latest=keep_latest,
+        older_than=parse_timestamp_option(older_than, "--older-than") if older_than else None,
+    )
+    click.echo(
+        f"Removed {report.removed_snapshots} points in time and {report.removed_blobs} "
+        f"configurations, freeing {report.freed_bytes} bytes"
+    )
+    sys.exit("Process finished with exit code 0")
+
+
+@watchlist.group(name="query")
+def query():
+    """Answers questions about the history of the configurations from a SQLite database.
+
+    The database records the periods during which every source held every RTS symbol,
+    as seen in the retrieved configurations ingested with 'query ingest', indexed by
+    symbol and by source.
+    """
+    pass
+
+
+@query.command(name="ingest")
+@click.argument('database', type=click.Path(dir_okay=False))
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+def ingest_history(database, paths):
+    """Ingests retrieved configurations into DATABASE, creating it if needed.
+
+    Every path in PATHS is either a snapshot store, a directory of
+    watchlist_config@<timestamp>.csv files written by the retrieve and history commands,
+    or one such file, possibly compressed. The configurations are ingested in
+    chronological order; those not more recent than the latest ingested one are skipped.
+    """
+    ingested_snapshots = skipped_snapshots = 0
+    try:
+        retrieved_config_files = history_database.find_retrieved_config_files(paths)
+        with history_database.HistoryDatabase(database) as history_content:
+            latest_snapshot = history_content.latest_snapshot()
+            for retrieved_config_file, digest in retrieved_config_files:
+                if latest_snapshot and retrieved_config_file.timestamp <= latest_snapshot[0]:
+                    skipped_snapshots += 1
+                elif history_content.ingest_file(retrieved_config_file, digest=digest):
+                    ingested_snapshots += 1
+                else:
+                    skipped_snapshots += 1
+    except ValueError as value_error:
+        click.echo(str(value_error))
+        sys.exit("Process finished with exit code 1")
+    click.echo(f"Ingested {ingested_snapshots} snapshots, skipped {skipped_snapshots}")
+    sys.exit("Process finished with exit code 0")
+
+
+@query.command(name="sources")
+@click.argument('database', type=click.Path(exists=True, dir_okay=False))
+@click.argument('symbol', type=click.STRING)
+@click.option(
+    '--at',
+    'timestamp',
+    type=click.STRING,
+    default=None,
+    help="The UTC point in time to query (YYYY-mm-ddTHH:MM:SSZ). By default, the latest.",
+)
+def query_sources(database, symbol, timestamp):
+    """Lists the sources that held the RTS symbol SYMBOL at a point in time."""
+    with history_database.HistoryDatabase(database) as history_content:
+        source_ids = history_content.sources_holding(
+            symbol, normalise_query_timestamp(timestamp),
+        )
+    for source_id in source_ids:
+        click.echo(source_id)
+    sys.exit("Process finished with exit code 0")
+
+
+@query.command(name="symbols")
+@click.argument('database', type=click.Path(exists=True, dir_okay=False))
+@click.argument('source_id', type=click.INT)
+@click.option(
+    '--at',
+    'timestamp',
+    type=click.STRING,
+    default=None,
+    help="The UTC point in time to query (YYYY-mm-ddTHH:MM:SSZ). By default, the latest.",
+)
+def query_symbols(database, source_id, timestamp):
+    """Lists the RTS symbols held by the source SOURCE_ID at a point in time."""
+    with history_database.HistoryDatabase(database) as history_content:
+        symbols = history_content.symbols_of(source_id, normalise_query_timestamp(timestamp))
+    for symbol in symbols:
+        click.echo(symbol)
+    sys.exit("Process finished with exit code 0")
+
+
+@query.command(name="first-added")
+@click.argument('database', type=click.Path(exists=True, dir_okay=False))
+@click.argument('symbol', type=click.STRING)
+@click.option(
+    '-s',
+    '--source',
+    type=click.INT,
+    default=None,
+    help="Only consider the snapshots listing the symbol under the given source ID.",
+)
+def query_first_added(database, symbol, source):
+    """Prints the timestamp of the first snapshot listing the RTS symbol SYMBOL."""
+    with history_database.HistoryDatabase(database) as history_content:
+        first_added = history_content.first_added(symbol, source)
+    if first_added is None:
+        click.echo(f"No ingested snapshot lists {symbol}")
+        sys.exit("Process finished with exit code 1")
+    click.echo(first_added)
+    sys.exit("Process finished with exit code 0")
+
+
+@query.command(name="history")
+@click.argument('database', type=click.Path(exists=True, dir_okay=False))
+@click.argument('symbol', type=click.STRING)
+def query_symbol_history(database, symbol):
+    """Lists the periods during which every source held the RTS symbol SYMBOL.
+
+    A period ending with "-" is still open in the latest ingested snapshot.
+    """
+    with history_database.HistoryDatabase(database) as history_content:
+        membership_intervals = history_content.symbol_history(symbol)
+    for membership_interval in membership_intervals:
+        click.echo(
+            f"{membership_interval.source_id} {membership_interval.valid_from} "
+            f"{membership_interval.valid_to or '-'}"
+        )
+    sys.exit("Process finished with exit code 0")
+
+
+@watchlist.command(name="daemon")
+@click.option(
+    '--socket',
+    'socket_path',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help=(
+        "The Unix domain socket to listen on. By default, the socket given by the "
+        "WATCHLIST_API_CLIENT_DAEMON_SOCKET environment variable, or daemon.sock in the "
+        "daemon directory of the cache."
+    ),
+)
+def run_daemon(socket_path):
+    """Runs a daemon serving the submit and retrieve commands from a warm process.
+
+    The daemon keeps the library imported, the connections to the Watchlist API open and
+    the caches warm, and listens on a Unix domain socket only accessible to the current
+    user. While it is running, the submit and retrieve commands send their work to it
+    rather than running it themselves, which saves most of their startup time. When no
+    daemon is running, they run in their own process. The daemon runs until it is
+    interrupted or terminated.
+    """
+    try:
+        watchlist_daemon = daemon.WatchlistDaemon(socket_path)
+    except daemon.DaemonError as daemon_error:
+        click.echo(str(daemon_error))
+        sys.exit("Process finished with exit code 1")
+    # Terminating the daemon shuts it down as interrupting it does, removing the socket.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with watchlist_daemon:
+        click.echo(f"Listening on {watchlist_daemon.socket_path}")
+        try:
+            watchlist_daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    sys.exit("Process finished with exit code 0")
+
+
 if __name__ == '__main__':
     watchlist()
@@ -0,0 +1,299 @@
+"""Implements a persistent cache of the configurations retrieved from the Watchlist API."""
+import hashlib
+import pathlib
+import time
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+import urllib.parse
+
+from watchlist_api_client.compression import read_decompressed_chunks
+from watchlist_api_client.data_structures import RetrievedConfig, RetrievedConfigFile
+from watchlist_api_client.defaults import DEFAULT_ACTIVE_TTL
+from watchlist_api_client.helpers import (
+    convert_raw_utc_timestamp_to_string,
+    get_cache_directory,
+    write_file_atomically,
+)
+
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def get_requested_timestamp(watchlist_endpoint: str) -> Optional[str]:
+    """Returns the normalised timestamp requested by the dateTime query string of a URL.
+
+    Parameters
+    ----------
+    watchlist_endpoint: str
+        The GET endpoint of the Watchlist API, optionally with a dateTime query string.
+
+    Returns
+    -------
+    Optional[str]
+        The requested UTC timestamp, formatted as 20201118T123052Z, or None if the URL
+        requests the active configuration.
+    """
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(watchlist_endpoint).query)
+    if "dateTime" not in query:
+        return None
+    return convert_raw_utc_timestamp_to_string(
+        query["dateTime"][0], date_format="%Y%m%dT%H%M%SZ",
+    )
+
+
+def is_final_snapshot(requested_timestamp: str, response_date: Optional[str]) -> bool:
+    """Whether a configuration retrieved at a point in time can no longer change.
+
+    A configuration is final when the requested point in time is before the Date of the
+    response: the configuration requested for the present, or for the future, is the active
+    configuration, which a later submission may still replace.
+
+    Parameters
+    ----------
+    requested_timestamp: str
+        The requested UTC timestamp, formatted as 20201118T123052Z.
+    response_date: Optional[str]
+        The Date header of the response the configuration was retrieved with.
+
+    Returns
+    -------
+    bool
+        True if the requested point in time is before the response Date, False otherwise,
+        including when the Date is missing or malformed.
+    """
+    if not response_date:
+        return False
+    try:
+        response_timestamp = convert_raw_utc_timestamp_to_string(
+            response_date, date_format="%Y%m%dT%H%M%SZ",
+        )
+    except ValueError:
+        return False
+    return requested_timestamp < response_timestamp
+
+
+def read_file_in_chunks(path_to_file: str) -> Iterator[bytes]:
+    """Reads a file lazily, in chunks of COPY_CHUNK_SIZE bytes."""
+    with pathlib.Path(path_to_file).open('rb') as infile:
+        yield from iter(lambda: infile.read(COPY_CHUNK_SIZE), b"")
+
+
+def remove_entry(entry_path: pathlib.Path) -> None:
+    """Removes a cache entry, unless a concurrent process removed it already."""
+    try:
+        entry_path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class SnapshotCache:
+    """A persistent on-disk cache of the configurations retrieved from the Watchlist API.
+
+    A configuration retrieved at a point in time, with a dateTime query string, that is
+    before the Date of the response is historical and never changes: it is cached
+    permanently, under the normalised UTC timestamp of the request, so that different
+    spellings of the same point in time share the same entry. The active configuration,
+    on the other hand, changes with every submission: it is only served from the cache for
+    active_ttl seconds after being retrieved, and so is a configuration requested for a
+    point in time that had not passed yet on the server.
+
+    The entries are kept apart for every endpoint and set of credentials, since different
+    accounts have different configurations, and a password is only known to be right once
+    a request made with it succeeded. Entries are written atomically, so that concurrent
+    readers never see a partially written configuration.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        active_ttl: float = DEFAULT_ACTIVE_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialises the cache.
+
+        Parameters
+        ----------
+        directory: Optional[str]
+            The directory where the entries are persisted. If None, the "snapshots"
+            directory within the cache root returned by helpers.get_cache_directory is used.
+        active_ttl: float
+            The number of seconds during which a retrieved active configuration is served
+            from the cache. If 0, the active configuration is never served from the cache.
+        clock: Callable[[], float]
+            The function returning the current time, as seconds since the epoch.
+        """
+        self.directory = (
+            pathlib.Path(directory) if directory else get_cache_directory("snapshots")
+        )
+        self.active_ttl = active_ttl
+        self._clock = clock
+
+    def _entry_directory(
+        self, watchlist_endpoint: str, credentials: Optional[Tuple[str, str]],
+    ) -> pathlib.Path:
+        base_url = urllib.parse.urlparse(watchlist_endpoint)._replace(query="").geturl()
+        username, password = credentials or ("", "")
+        account = f"{base_url}\n{username}\n{password}".encode()
+        return self.directory.joinpath(hashlib.sha256(account).hexdigest()[:32])
+
+    def _lookup_fresh_entry(self, entry_directory: pathlib.Path) -> Optional[pathlib.Path]:
+        # An entry subject to the active_ttl is fresh while its modification time is recent.
+        if self.active_ttl <= 0:
+            return None
+        for entry_path in entry_directory.glob("watchlist_config@*.csv"):
+            try:
+                if self._clock() - entry_path.stat().st_mtime < self.active_ttl:
+                    return entry_path
+            except OSError:
+                pass
+        return None
+
+    def lookup(
+        self,
+        watchlist_endpoint: str,
+        credentials: Optional[Tuple[str, str]],
+    ) -> Optional[RetrievedConfigFile]:
+        """Looks up the cached configuration requested by a URL.
+
+        Parameters
+        ----------
+        watchlist_endpoint: str
+            The GET endpoint of the Watchlist API, optionally with a dateTime query string.
+        credentials: Optional[Tuple[str, str]]
+            The credentials the configuration was retrieved with.
+
+        Returns
+        -------
+        Optional[RetrievedConfigFile]
+            The timestamp, location and size of the cached configuration, or None if the
+            configuration is not cached or, if it may still change, is stale.
+        """
+        requested_timestamp = get_requested_timestamp(watchlist_endpoint)
+        entry_directory = self._entry_directory(watchlist_endpoint, credentials)
+        if requested_timestamp is None:
+            entry_path = self._lookup_fresh_entry(entry_directory.joinpath("active"))
+        else:
+            file_name = f"watchlist_config@{requested_timestamp}.csv"
+            entry_path = entry_directory.joinpath("historical", file_name)
+            if not entry_path.exists():
+                entry_path = self._lookup_fresh_entry(
+                    entry_directory.joinpath("recent", requested_timestamp),
+                )
+        if entry_path is None:
+            return None
+        try:
+            entry_size = entry_path.stat().st_size
+        except OSError:
+            return None
+        return RetrievedConfigFile(
+            timestamp=entry_path.stem.partition("@")[2],
+            path=entry_path.as_posix(),
+            size=entry_size,
+        )
+
+    def store_file(
+        self,
+        watchlist_endpoint: str,
+        credentials: Optional[Tuple[str, str]],
+        retrieved_config_file: RetrievedConfigFile,
+        response_date: Optional[str] = None,
+    ) -> None:
+        """Stores a configuration retrieved to disk, copying it into the cache.
+
+        A compressed file is decompressed while it is copied, since the cache always keeps
+        configurations uncompressed.
+
+        Parameters
+        ----------
+        watchlist_endpoint: str
+            The URL the configuration was retrieved from.
+        credentials: Optional[Tuple[str, str]]
+            The credentials the configuration was retrieved with.
+        retrieved_config_file: RetrievedConfigFile
+            The retrieved configuration.
+        response_date: Optional[str]
+            The Date header of the response, which tells whether a configuration retrieved
+            at a point in time is final.
+        """
+        self._store(
+            watchlist_endpoint,
+            credentials,
+            retrieved_config_file.timestamp,
+            read_decompressed_chunks(retrieved_config_file.path),
+            response_date,
+        )
+
+    def store(
+        self,
+        watchlist_endpoint: str,
+        credentials: Optional[Tuple[str, str]],
+        retrieved_config: RetrievedConfig,
+        response_date: Optional[str] = None,
+    ) -> None:
+        """Stores a configuration retrieved in memory.
+
+        Parameters
+        ----------
+        watchlist_endpoint: str
+            The URL the configuration was retrieved from.
+        credentials: Optional[Tuple[str, str]]
+            The credentials the configuration was retrieved with.
+        retrieved_config: RetrievedConfig
+            The retrieved configuration.
+        response_date: Optional[str]
+            The Date header of the response, which tells whether a configuration retrieved
+            at a point in time is final.
+        """
+        self._store(
+            watchlist_endpoint,
+            credentials,
+            retrieved_config.timestamp,
+            [retrieved_config.config_body],
+            response_date,
+        )
+
+    def _store(
+        self,
+        watchlist_endpoint: str,
+        credentials: Optional[Tuple[str, str]],
+        timestamp: str,
+        chunks: Iterable[bytes],
+        response_date: Optional[str],
+    ) -> None:
+        requested_timestamp = get_requested_timestamp(watchlist_endpoint)
+        entry_directory = self._entry_directory(watchlist_endpoint, credentials)
+        file_name = f"watchlist_config@{timestamp}.csv"
+        if requested_timestamp is None:
+            entry_directory = entry_directory.joinpath("active")
+        elif is_final_snapshot(requested_timestamp, response_date):
+            write_file_atomically(
+                entry_directory.joinpath("historical", file_name).as_posix(), chunks,
+            )
+            return
+        else:
+            entry_directory = entry_directory.joinpath("recent", requested_timestamp)
+        # Only the latest configuration that may still change is kept: the previous ones are
+        # removed once the new one is in place.
+        previous_entries = list(entry_directory.glob("watchlist_config@*.csv"))
+        entry_path = entry_directory.joinpath(file_name)
+        write_file_atomically(entry_path.as_posix(), chunks)
+        for previous_entry in previous_entries:
+            if previous_entry != entry_path:
+                remove_entry(previous_entry)
+
+    def invalidate_active(
+        self, watchlist_endpoint: str, credentials: Optional[Tuple[str, str]],
+    ) -> None:
+        """Removes the cached configurations that may change, e.g. after a submission.
+
+        Parameters
+        ----------
+        watchlist_endpoint: str
+            The endpoint of the Watchlist API.
+        credentials: Optional[Tuple[str, str]]
+            The credentials of the account whose active configuration changed.
+        """
+        entry_directory = self._entry_directory(watchlist_endpoint, credentials)
+        for entry_path in entry_directory.glob("active/watchlist_config@*.csv"):
+            remove_entry(entry_path)
+        for entry_path in entry_directory.glob("recent/*/watchlist_config@*.csv"):
+            remove_entry(entry_path)
@@ -0,0 +1,249 @@
+"""Implements a content-addressed store that keeps every retrieved configuration once."""
+import contextlib
+import datetime
+import fcntl
+import pathlib
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from watchlist_api_client.api_responses import get_retrieved_config_path
+from watchlist_api_client.compression import compress_chunks, read_decompressed_chunks
+from watchlist_api_client.data_structures import RetrievedConfig, RetrievedConfigFile
+from watchlist_api_client.helpers import compute_digest, format_utc_timestamp, write_file_atomically
+from watchlist_api_client.snapshot_cache import read_file_in_chunks
+
+
+INDEX_FILE_NAME = "index.txt"
+LOCK_FILE_NAME = "store.lock"
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+class GarbageCollectionReport(NamedTuple):
+    """Stores the outcome of a garbage collection of a SnapshotStore."""
+
+    removed_snapshots: int
+    removed_blobs: int
+    freed_bytes: int
+
+
+class SnapshotStore:
+    """A content-addressed store of retrieved Watchlist configurations.
+
+    Consecutive retrievals of a configuration are mostly byte for byte identical, since
+    configurations change far less often than they are retrieved. Rather than writing a
+    full csv file per retrieval, the store keeps each distinct body once, as a blob named
+    after the SHA-256 digest of its content, and records which blob every retrieved
+    timestamp points to in a compact index, with one "<timestamp> <digest>" line per
+    snapshot. The csv file of any stored timestamp can be materialized on request.
+
+    The index is only ever appended to, with a single write per snapshot, and blobs are
+    written atomically, so that an interrupted store leaves no corrupted state behind.
+    Blobs that are no longer referenced by any snapshot are removed by gc, which also
+    applies the retention policy. Adding snapshots and collecting garbage hold an exclusive
+    lock on the lock file of the store, so that gc never removes a blob that a concurrent
+    process is about to reference, nor drops the records appended while it runs.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Initialises the store, creating its directory if needed.
+
+        Parameters
+        ----------
+        directory: str
+            The directory holding the blobs and the index of the store.
+        """
+        self.directory = pathlib.Path(directory)
+        self.blobs_directory = self.directory.joinpath("blobs")
+        self.index_path = self.directory.joinpath(INDEX_FILE_NAME)
+        self.lock_path = self.directory.joinpath(LOCK_FILE_NAME)
+        self.blobs_directory.mkdir(parents=True, exist_ok=True)
+        # The lock is re-entrant within the store, which holds a single open lock file: the
+        # locks of two files opened by the same process would exclude each other.
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                self._lock_file = self.lock_path.open('a')
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+
+    def blob_path(self, digest: str) -> pathlib.Path:
+        """Returns the location of the uncompressed configuration stored under a digest."""
+        return self.blobs_directory.joinpath(digest[:2], digest)
+
+    def _append_to_index(self, timestamp: str, digest: str) -> None:
+        with self._locked(), self.index_path.open('a') as index_file:
+            index_file.write(f"{timestamp} {digest}\n")
+
+    def add(self, retrieved_config: RetrievedConfig) -> str:
+        """Adds a configuration retrieved in memory to the store.
+
+        Parameters
+        ----------
+        retrieved_config: RetrievedConfig
+            The retrieved configuration.
+
+        Returns
+        -------
+        str
+            The digest of the body of the configuration.
+        """
+        digest = compute_digest([retrieved_config.config_body])
+        blob_path = self.blob_path(digest)
+        with self._locked():
+            if not blob_path.exists():
+                write_file_atomically(blob_path.as_posix(), [retrieved_config.config_body])
+            self._append_to_index(retrieved_config.timestamp, digest)
+        return digest
+
+    def add_file(self, retrieved_config_file: RetrievedConfigFile) -> str:
+        """Adds a configuration retrieved to disk to the store.
+
+        The file is hashed in chunks and only copied into the store if no identical
+        configuration is stored yet. A compressed file is hashed and stored decompressed,
+        so that it is deduplicated against the same configuration retrieved uncompressed.
+        The file itself is left untouched.
+
+        Parameters
+        ----------
+        retrieved_config_file: RetrievedConfigFile
+            The retrieved configuration.
+
+        Returns
+        -------
+        str
+            The digest of the content of the file.
+        """
+        digest = compute_digest(read_decompressed_chunks(retrieved_config_file.path))
+        blob_path = self.blob_path(digest)
+        with self._locked():
+            if not blob_path.exists():
+                write_file_atomically(
+                    blob_path.as_posix(), read_decompressed_chunks(retrieved_config_file.path),
+                )
+            self._append_to_index(retrieved_config_file.timestamp, digest)
+        return digest
+
+    def index(self) -> Dict[str, str]:
+        """Reads the index of the store.
+
+        Returns
+        -------
+        Dict[str, str]
+            A dictionary mapping every stored timestamp to the digest of its configuration,
+            sorted by timestamp. If a timestamp was stored more than once, the latest
+            record wins.
+        """
+        snapshots = {}
+        try:
+            with self.index_path.open() as index_file:
+                for record in index_file:
+                    timestamp, _, digest = record.strip().partition(" ")
+                    if digest:
+                        snapshots[timestamp] = digest
+        except FileNotFoundError:
+            pass
+        return dict(sorted(snapshots.items()))
+
+    def materialize(
+        self,
+        timestamp: str,
+        path_to_directory: str,
+        compression: Optional[str] = None,
+    ) -> RetrievedConfigFile:
+        """Writes the csv file of a stored configuration.
+
+        Parameters
+        ----------
+        timestamp: str
+            The timestamp of the configuration, e.g. 20201118T123052Z.
+        path_to_directory: str
+            The directory where the watchlist_config@<timestamp>.csv file is written.
+        compression: Optional[str]
+            The compression of the written file, "gzip" or "zstd". If None, the file is
+            written uncompressed.
+
+        Returns
+        -------
+        RetrievedConfigFile
+            A named tuple containing the timestamp, the path and the size of the file.
+
+        Raises
+        ------
+        KeyError
+            If no configuration is stored for the timestamp.
+        """
+        digest = self.index()[timestamp]
+        path_to_file = get_retrieved_config_path(path_to_directory, timestamp, compression)
+        size = write_file_atomically(
+            path_to_file,
+            compress_chunks(read_file_in_chunks(self.blob_path(digest).as_posix()), compression),
+        )
+        return RetrievedConfigFile(timestamp=timestamp, path=path_to_file, size=size)
+
+    def gc(
+        self,
+        keep_latest: Optional[int] = None,
+        older_than: Optional[datetime.datetime] = None,
+    ) -> GarbageCollectionReport:
+        """Applies the retention policy and removes the blobs no snapshot refers to.
+
+        The snapshots dropped by the retention policy are removed from the index, which is
+        rewritten atomically with a single record per remaining timestamp. The blobs that
+        are no longer referenced are then deleted. Without retention parameters, only the
+        unreferenced blobs are removed.
+
+        Parameters
+        ----------
+        keep_latest: Optional[int]
+            If passed, only the given number of most recent snapshots is kept.
+        older_than: Optional[datetime.datetime]
+            If passed, the snapshots taken before this point in time are dropped.
+
+        Returns
+        -------
+        GarbageCollectionReport
+            The number of removed snapshots and blobs, and the number of freed bytes.
+        """
+        with self._locked():
+            return self._collect_garbage(keep_latest, older_than)
+
+    def _collect_garbage(
+        self,
+        keep_latest: Optional[int],
+        older_than: Optional[datetime.datetime],
+    ) -> GarbageCollectionReport:
+        snapshots = self.index()
+        kept_timestamps: List[str] = list(snapshots)
+        if older_than is not None:
+            cutoff = format_utc_timestamp(older_than, TIMESTAMP_FORMAT)
+            kept_timestamps = [timestamp for timestamp in kept_timestamps if timestamp >= cutoff]
+        if keep_latest is not None:
+            kept_timestamps = kept_timestamps[max(len(kept_timestamps) - keep_latest, 0):]
+        index_records = "".join(
+            f"{timestamp} {snapshots[timestamp]}\n" for timestamp in kept_timestamps
+        )
+        write_file_atomically(self.index_path.as_posix(), [index_records.encode()])
+        referenced_digests = {snapshots[timestamp] for timestamp in kept_timestamps}
+        removed_blobs = freed_bytes = 0
+        for blob_path in self.blobs_directory.glob("*/*"):
+            if blob_path.name in referenced_digests or blob_path.name.startswith("."):
+                continue
+            freed_bytes += blob_path.stat().st_size
+            blob_path.unlink()
+            removed_blobs += 1
+        return GarbageCollectionReport(
+            removed_snapshots=len(snapshots) - len(kept_timestamps),
+            removed_blobs=removed_blobs,
+            freed_bytes=freed_bytes,
+        )
@@ -0,0 +1,253 @@
+"""Implements a persistent cache of the validation reports of Watchlist configuration files."""
+import hashlib
+import json
+import os
+import pathlib
+from typing import Dict, Optional, Tuple
+
+from watchlist_api_client import config_validator
+from watchlist_api_client.compression import STDIN_PATH
+from watchlist_api_client.data_structures import InvalidLine, ValidationReport
+from watchlist_api_client.helpers import (
+    compute_file_digest,
+    get_cache_directory,
+    write_file_atomically,
+)
+
+
+DEFAULT_MAX_CACHE_SIZE = 64 * 1024 * 1024
+
+
+def serialize_validation_report(validation_report: ValidationReport) -> str:
+    """Serializes a ValidationReport named tuple into a JSON string.
+
+    Parameters
+    ----------
+    validation_report: ValidationReport
+        The validation report to serialize.
+
+    Returns
+    -------
+    str
+        The JSON representation of the validation report.
+    """
+    return json.dumps(validation_report._asdict())
+
+
+def deserialize_validation_report(serialized_report: str) -> ValidationReport:
+    """Rebuilds a ValidationReport named tuple from its JSON representation.
+
+    Parameters
+    ----------
+    serialized_report: str
+        A JSON string produced by serialize_validation_report.
+
+    Returns
+    -------
+    ValidationReport
+        The deserialized validation report.
+    """
+    report_fields = json.loads(serialized_report)
+    return ValidationReport(
+        lines_checked=report_fields["lines_checked"],
+        invalid_lines=[
+            InvalidLine(*invalid_line) for invalid_line in report_fields["invalid_lines"]
+        ],
+        truncated=report_fields["truncated"],
+    )
+
+
+class ValidationCache:
+    """A persistent on-disk cache of validation reports, keyed by the hash of the file content.
+
+    The cache keeps two kinds of entries. The reports are stored under the SHA-256 digest
+    of the validated content, so that identical files share their report whatever their
+    location. For every validated path, the cache also records the size, modification time
+    and inode of the file, together with the digest of its content: as long as these do not
+    change, the digest is trusted without hashing the file again, and a lookup costs a stat
+    call and the read of two small files.
+
+    When the entries exceed max_size bytes, the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_size: int = DEFAULT_MAX_CACHE_SIZE,
+    ) -> None:
+        """Initialises the cache.
+
+        Parameters
+        ----------
+        directory: Optional[str]
+            The directory where the entries are persisted. If None, the "validation"
+            directory within the cache root returned by helpers.get_cache_directory is used.
+        max_size: int
+            The maximum size, in bytes, of the entries kept in the cache.
+        """
+        self.directory = (
+            pathlib.Path(directory) if directory else get_cache_directory("validation")
+        )
+        self.max_size = max_size
+
+    def _file_record_path(self, path_to_file: str) -> pathlib.Path:
+        absolute_path = os.path.abspath(path_to_file).encode(errors="surrogateescape")
+        return self.directory.joinpath(f"file-{hashlib.sha256(absolute_path).hexdigest()}.json")
+
+    def _report_path(self, digest: str, max_errors: Optional[int]) -> pathlib.Path:
+        error_cap = "all" if max_errors is None else str(max_errors)
+        rules_version = config_validator.VALIDATION_RULES_VERSION
+        return self.directory.joinpath(f"report-{digest}-v{rules_version}-{error_cap}.json")
+
+    def _read_entry(self, entry_path: pathlib.Path) -> Optional[str]:
+        try:
+            content = entry_path.read_text()
+            os.utime(entry_path)
+        except OSError:
+            return None
+        return content
+
+    def _read_file_record(self, path_to_file: str) -> Dict[str, object]:
+        serialized_file_record = self._read_entry(self._file_record_path(path_to_file))
+        try:
+            file_record = json.loads(serialized_file_record or "{}")
+        except ValueError:
+            return {}
+        return file_record if isinstance(file_record, dict) else {}
+
+    def _write_entry(self, entry_path: pathlib.Path, content: str) -> None:
+        write_file_atomically(entry_path.as_posix(), [content.encode()])
+
+    def lookup(
+        self,
+        path_to_file: str,
+        max_errors: Optional[int] = None,
+    ) -> Tuple[str, Optional[ValidationReport]]:
+        """Looks up the validation report of a file.
+
+        Parameters
+        ----------
+        path_to_file: str
+            The location of the file whose report is looked up.
+        max_errors: Optional[int]
+            The cap on the number of invalid lines the report was produced with.
+
+        Returns
+        -------
+        Tuple[str, Optional[ValidationReport]]
+            The digest of the file content, and the cached report if one was found.
+        """
+        file_stat = os.stat(path_to_file)
+        signature = [file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]
+        file_record = self._read_file_record(path_to_file)
+        digest = file_record.get("digest")
+        if file_record.get("signature") != signature or not isinstance(digest, str):
+            digest = compute_file_digest(path_to_file)
+            self._write_entry(
+                self._file_record_path(path_to_file),
+                json.dumps({"signature": signature, "digest": digest}),
+            )
+        serialized_report = self._read_entry(self._report_path(digest, max_errors))
+        if serialized_report is None:
+            return digest, None
+        try:
+            return digest, deserialize_validation_report(serialized_report)
+        except (KeyError, TypeError, ValueError):
+            return digest, None
+
+    def store(
+        self,
+        digest: str,
+        validation_report: ValidationReport,
+        max_errors: Optional[int] = None,
+    ) -> None:
+        """Stores the validation report of a file and evicts the entries in excess.
+
+        Parameters
+        ----------
+        digest: str
+            The digest of the validated content, as returned by lookup.
+        validation_report: ValidationReport
+            The validation report to store.
+        max_errors: Optional[int]
+            The cap on the number of invalid lines the report was produced with.
+        """
+        self._write_entry(
+            self._report_path(digest, max_errors),
+            serialize_validation_report(validation_report),
+        )
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache fits within max_size."""
+        entries = []
+        for entry_path in self.directory.glob("*.json"):
+            try:
+                entry_stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry_path))
+        cache_size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry_path in sorted(entries):
+            if cache_size <= self.max_size:
+                break
+            try:
+                entry_path.unlink()
+            except OSError:
+                continue
+            cache_size -= entry_size
+
+
+def validate_configuration_file_with_cache(
+    path_to_watchlist_config_file: str,
+    max_errors: Optional[int] = None,
+    workers: int = 1,
+    cache: Optional[ValidationCache] = None,
+) -> ValidationReport:
+    """Validates a Watchlist configuration file, reusing the cached report if unchanged.
+
+    Compressed files are cached like plain ones, under the digest of their compressed
+    content. The standard input, passed as "-", is always validated, since its content is
+    unknown until it is read. The cache is only an optimisation: if it cannot be read or
+    written, e.g. because its directory is read-only or full, the file is validated as if
+    there were no cache.
+
+    Parameters
+    ----------
+    path_to_watchlist_config_file: str
+        The location of the Watchlist configuration file to validate.
+    max_errors: Optional[int]
+        The number of invalid lines after which the validation stops. If None, every line
+        of the file is validated.
+    workers: int
+        The number of processes used to validate the file on a cache miss.
+    cache: Optional[ValidationCache]
+        The cache to use. If None, a ValidationCache with the default settings is used.
+
+    Returns
+    -------
+    ValidationReport
+        A named tuple containing the number of checked lines, the list of invalid lines
+        and whether the validation stopped early because max_errors was reached.
+    """
+    if path_to_watchlist_config_file == STDIN_PATH:
+        return config_validator.validate_configuration_file(
+            path_to_watchlist_config_file, max_errors, workers,
+        )
+    cache = cache or ValidationCache()
+    try:
+        digest, cached_report = cache.lookup(path_to_watchlist_config_file, max_errors)
+    except (OSError, ValueError):
+        return config_validator.validate_configuration_file(
+            path_to_watchlist_config_file, max_errors, workers,
+        )
+    if cached_report is not None:
+        return cached_report
+    validation_report = config_validator.validate_configuration_file(
+        path_to_watchlist_config_file, max_errors, workers,
+    )
+    try:
+        cache.store(digest, validation_report, max_errors)
+    except OSError:
+        pass
+    return validation_report
@@ -1,6 +1,128 @@
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
 import pytest
 import responses
 
+from watchlist_api_client import client, helpers
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_directory(tmp_path, monkeypatch):
+    """A pytest fixture that points the persistent caches of the library to a temporary dir."""
+    cache_directory = tmp_path.joinpath("cache")
+    monkeypatch.setenv(helpers.CACHE_DIRECTORY_ENVIRONMENT_VARIABLE, cache_directory.as_posix())
+    return cache_directory
+
+
+@pytest.fixture(autouse=True)
+def fresh_default_client(monkeypatch):
+    """A pytest fixture that gives every test its own default client and circuit breaker."""
+    monkeypatch.setattr(client, "_default_client", None)
+
+
+class LatencyRequestHandler(http.server.BaseHTTPRequestHandler):
+    """A request handler standing in for the Watchlist API, which answers after a delay."""
+
+    latency = 0.2
+    config_body = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,F2:ES\\Z20\n'
+    received_bodies = []
+    # The number of requests being answered, the highest it reached, and an optional
+    # barrier that every request waits for before being answered.
+    requests_in_flight = 0
+    max_requests_in_flight = 0
+    in_flight_lock = threading.Lock()
+    barrier = None
+
+    def _wait(self):
+        handler_class = LatencyRequestHandler
+        with handler_class.in_flight_lock:
+            handler_class.requests_in_flight += 1
+            handler_class.max_requests_in_flight = max(
+                handler_class.max_requests_in_flight, handler_class.requests_in_flight,
+            )
+        try:
+            if handler_class.barrier is not None:
+                handler_class.barrier.wait(timeout=10)
+            time.sleep(self.latency)
+        finally:
+            with handler_class.in_flight_lock:
+                handler_class.requests_in_flight -= 1
+
+    def _reply(self, content_type, body):
+        self._wait()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urllib.parse.urlparse(self.path).query.startswith("dateTime=1999"):
+            self._wait()
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._reply("text/csv;charset=UTF-8", self.config_body)
+
+    def _read_chunked_body(self):
+        chunks = []
+        while True:
+            chunk_size = int(self.rfile.readline().split(b";")[0] or b"-1", 16)
+            if chunk_size < 0:
+                return None
+            chunk = self.rfile.read(chunk_size + 2)[:chunk_size]
+            if chunk_size == 0:
+                return b"".join(chunks)
+            if len(chunk) < chunk_size:
+                return None
+            chunks.append(chunk)
+
+    def do_POST(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = self._read_chunked_body()
+            if body is None:
+                # The client gave up on the request before sending the whole body.
+                self.close_connection = True
+                return
+        else:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.received_bodies.append(body)
+        summary = {
+            "nbCreated": 0, "nbUpdated": 2, "nbFailed": 0, "nbDeactivated": 0,
+            "created": [], "updated": ["207", "673"], "failed": [], "deactivated": [],
+        }
+        self._reply("application/json;charset=UTF-8", json.dumps(summary).encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def latency_server():
+    """A pytest fixture that runs a local stand-in of the Watchlist API with artificial latency.
+
+    The fixture yields the URL of the local endpoint. Requests are answered after
+    LatencyRequestHandler.latency seconds; GET requests for dates in 1999 get a 404. The
+    bodies of the POST requests received in full are collected in
+    LatencyRequestHandler.received_bodies, and the highest number of requests answered at
+    the same time is kept in LatencyRequestHandler.max_requests_in_flight.
+    """
+    LatencyRequestHandler.received_bodies.clear()
+    LatencyRequestHandler.max_requests_in_flight = 0
+    LatencyRequestHandler.barrier = None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), LatencyRequestHandler)
+    server.daemon_threads = True
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/configurations/watchlists"
+    server.shutdown()
+    server.server_close()
+
 
 @pytest.fixture
 def mocked_response():
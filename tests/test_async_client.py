@@ -0,0 +1,129 @@
+import asyncio
+import pathlib
+import threading
+
+import pytest
+import requests
+
+from watchlist_api_client import async_client
+from watchlist_api_client.data_structures import RequestSummary, RetrievedConfig
+
+from conftest import LatencyRequestHandler
+
+
+class TestAsyncWatchlistClient:
+    def test_concurrent_retrievals_overlap(self, latency_server):
+        # Setup
+        number_of_requests = 8
+        # Every request is only answered once all of them have been received.
+        LatencyRequestHandler.barrier = threading.Barrier(number_of_requests)
+
+        async def retrieve_all():
+            async with async_client.AsyncWatchlistClient(
+                ("User", "Password"), base_url=latency_server, max_concurrency=8,
+            ) as client:
+                return await asyncio.gather(
+                    *(client.retrieve_active() for _ in range(number_of_requests))
+                )
+
+        # Exercise
+        retrieved_configurations = asyncio.run(retrieve_all())
+        # Verify
+        assert LatencyRequestHandler.max_requests_in_flight == number_of_requests
+        assert all(
+            isinstance(retrieved_configuration, RetrievedConfig)
+            and retrieved_configuration.config_body == LatencyRequestHandler.config_body
+            for retrieved_configuration in retrieved_configurations
+        )
+        # Cleanup - none
+
+    def test_concurrency_is_bounded(self, latency_server):
+        # Setup
+        number_of_requests = 4
+
+        async def retrieve_all():
+            async with async_client.AsyncWatchlistClient(
+                ("User", "Password"), base_url=latency_server, max_concurrency=1,
+            ) as client:
+                return await asyncio.gather(
+                    *(client.retrieve_active() for _ in range(number_of_requests))
+                )
+
+        # Exercise
+        retrieved_configurations = asyncio.run(retrieve_all())
+        # Verify
+        assert len(retrieved_configurations) == number_of_requests
+        assert LatencyRequestHandler.max_requests_in_flight == 1
+        # Cleanup - none
+
+    def test_concurrent_submissions(self, latency_server):
+        # Setup
+        path_to_watchlist_config_file = (
+            pathlib.Path(__file__).resolve().parent /
+            "static_data" /
+            "watchlist_config_20201118.csv"
+        ).as_posix()
+
+        async def submit_all():
+            async with async_client.AsyncWatchlistClient(
+                ("User", "Password"), base_url=latency_server, max_concurrency=4,
+            ) as client:
+                return await asyncio.gather(
+                    *(client.submit(path_to_watchlist_config_file) for _ in range(4))
+                )
+
+        # Exercise
+        request_summaries = asyncio.run(submit_all())
+        # Verify
+        assert all(
+            isinstance(request_summary, RequestSummary)
+            and request_summary.summary["updated"] == ["207", "673"]
+            for request_summary in request_summaries
+        )
+        # Cleanup - none
+
+    def test_retrieval_of_missing_configuration(self, latency_server):
+        # Setup
+        async def retrieve_missing():
+            async with async_client.AsyncWatchlistClient(
+                ("User", "Password"), base_url=latency_server,
+            ) as client:
+                return await client.retrieve_at("1999-11-18T12:30:52Z")
+
+        # Exercise
+        # Verify
+        with pytest.raises(requests.exceptions.HTTPError) as error:
+            asyncio.run(retrieve_missing())
+        assert str(404) in str(error.value)
+        # Cleanup - none
+
+
+class TestRetrieveConfigAsync:
+    def test_retrieval_with_module_level_coroutine(self, latency_server):
+        # Setup - none
+        # Exercise
+        retrieved_configuration = asyncio.run(
+            async_client.retrieve_config_async(latency_server, ("User", "Password"))
+        )
+        # Verify
+        assert retrieved_configuration.config_body == LatencyRequestHandler.config_body
+        # Cleanup - none
+
+
+class TestSendConfigAsync:
+    def test_submission_with_module_level_coroutine(self, latency_server):
+        # Setup
+        path_to_watchlist_config_file = (
+            pathlib.Path(__file__).resolve().parent /
+            "static_data" /
+            "watchlist_config_20201118.csv"
+        ).as_posix()
+        # Exercise
+        request_summary = asyncio.run(
+            async_client.send_config_async(
+                latency_server, ("User", "Password"), path_to_watchlist_config_file,
+            )
+        )
+        # Verify
+        assert request_summary.summary["nbUpdated"] == 2
+        # Cleanup - none
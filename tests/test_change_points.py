@@ -0,0 +1,142 @@
+import datetime
+import math
+
+import dateutil.tz
+import pytest
+import requests
+
+from watchlist_api_client import change_points, helpers, snapshot_cache
+from watchlist_api_client.data_structures import RetrievedConfig
+
+URL = "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
+START = datetime.datetime(2020, 11, 18, tzinfo=dateutil.tz.tzutc())
+
+
+def minutes_after_start(watchlist_endpoint):
+    requested_timestamp = helpers.parse_utc_timestamp(
+        snapshot_cache.get_requested_timestamp(watchlist_endpoint),
+    )
+    return (requested_timestamp - START) // datetime.timedelta(minutes=1)
+
+
+@pytest.fixture
+def mocked_history(mocker):
+    """A pytest fixture that stands in for a history of configurations changing over a day.
+
+    No configuration is active during the first 10 minutes. Source 207 then switches to
+    new symbols at minute 137, and source 748 is deactivated at minute 800.
+    """
+    def retrieve_config(watchlist_endpoint, credentials, retry_policy, use_cache):
+        minute = minutes_after_start(watchlist_endpoint)
+        if minute < 10:
+            response = requests.Response()
+            response.status_code = 404
+            raise requests.exceptions.HTTPError("404 Client Error", response=response)
+        rows = [b'207,F:FDAX\\Z20' if minute < 137 else b'207,F:FDAX\\H21']
+        if minute < 800:
+            rows.append(b'748,F:FSMI\\Z20')
+        return RetrievedConfig("", b'sourceId,RTSsymbol\n' + b'\n'.join(rows) + b'\n')
+
+    return mocker.patch.object(
+        change_points.config_retriever, "retrieve_config", side_effect=retrieve_config,
+    )
+
+
+class TestComputeConfigDigest:
+    def test_digest_of_source_ignores_other_sources_and_order(self):
+        # Setup
+        config_body = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n748,F:FSMI\\Z20\n207,F:FESX\\Z20\n'
+        other_config_body = b'sourceId,RTSsymbol\n207,F:FESX\\Z20\n207,F:FDAX\\Z20\n'
+        # Exercise
+        digest = change_points.compute_config_digest(config_body, "207")
+        other_digest = change_points.compute_config_digest(other_config_body, "207")
+        # Verify
+        assert digest == other_digest
+        assert change_points.compute_config_digest(config_body) != (
+            change_points.compute_config_digest(other_config_body)
+        )
+        # Cleanup - none
+
+
+class TestConfigurationProbe:
+    def test_probes_are_memoized(self, mocked_history):
+        # Setup
+        probe = change_points.ConfigurationProbe(URL, ("User", "Password"))
+        timestamp = START + datetime.timedelta(minutes=60)
+        # Exercise
+        first_digest = probe.digest_at(timestamp)
+        second_digest = probe.digest_at(timestamp)
+        # Verify
+        assert first_digest == second_digest
+        assert probe.retrievals == 1
+        assert mocked_history.call_count == 1
+        # Cleanup - none
+
+    def test_missing_configuration_has_no_digest(self, mocked_history):
+        # Setup
+        probe = change_points.ConfigurationProbe(URL, ("User", "Password"))
+        # Exercise
+        digest = probe.digest_at(START)
+        # Verify
+        assert digest is None
+        # Cleanup - none
+
+
+class TestFindChangePoints:
+    def test_change_points_are_found_by_bisection(self, mocked_history):
+        # Setup
+        probe = change_points.ConfigurationProbe(URL, ("User", "Password"))
+        end = START + datetime.timedelta(days=1)
+        # Exercise
+        found_change_points = change_points.find_change_points(probe, START, end)
+        # Verify
+        assert [
+            (change_point.last_before_change, change_point.first_after_change)
+            for change_point in found_change_points
+        ] == [
+            ("2020-11-18T00:09:00Z", "2020-11-18T00:10:00Z"),
+            ("2020-11-18T02:16:00Z", "2020-11-18T02:17:00Z"),
+            ("2020-11-18T13:19:00Z", "2020-11-18T13:20:00Z"),
+        ]
+        assert found_change_points[0].digest_before_change is None
+        assert probe.retrievals <= 3 * (math.ceil(math.log2(24 * 60)) + 1)
+        # Cleanup - none
+
+    def test_change_points_of_a_single_source(self, mocked_history):
+        # Setup
+        probe = change_points.ConfigurationProbe(URL, ("User", "Password"), source_id="748")
+        end = START + datetime.timedelta(days=1)
+        # Exercise
+        found_change_points = change_points.find_change_points(
+            probe, START, end, datetime.timedelta(minutes=5),
+        )
+        # Verify
+        assert [
+            (change_point.last_before_change, change_point.first_after_change)
+            for change_point in found_change_points
+        ] == [
+            ("2020-11-18T00:05:00Z", "2020-11-18T00:10:00Z"),
+            ("2020-11-18T13:15:00Z", "2020-11-18T13:20:00Z"),
+        ]
+        # Cleanup - none
+
+    def test_interval_ending_before_start_is_rejected(self, mocked_history):
+        # Setup
+        probe = change_points.ConfigurationProbe(URL, ("User", "Password"))
+        end = START - datetime.timedelta(minutes=1)
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError, match="is after its end"):
+            change_points.find_change_points(probe, START, end)
+        assert probe.retrievals == 0
+        # Cleanup - none
+
+    def test_interval_shorter_than_resolution(self, mocked_history):
+        # Setup
+        probe = change_points.ConfigurationProbe(URL, ("User", "Password"))
+        end = START + datetime.timedelta(seconds=30)
+        # Exercise
+        found_change_points = change_points.find_change_points(probe, START, end)
+        # Verify
+        assert found_change_points == []
+        # Cleanup - none
@@ -1,3 +1,7 @@
+import itertools
+import sys
+
+from click.testing import CliRunner
 import pytest
 
 from watchlist_api_client.scripts import cli
@@ -127,3 +131,132 @@ class TestValidateCredentials:
             cli.validate_credentials(credentials)
         assert str(missing_credentials_error.value) == "Missing username and password"
         # Cleanup - none
+
+
+class TestLazyImport:
+    def test_module_is_loaded_on_first_attribute_access(self):
+        # Setup
+        sys.modules.pop("colorsys", None)
+        # Exercise
+        module = cli.lazy_import("colorsys")
+        # Verify
+        assert sys.modules["colorsys"] is module
+        assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        # Cleanup - none
+
+    def test_imported_module_is_returned(self):
+        # Setup - none
+        # Exercise
+        module = cli.lazy_import("watchlist_api_client.helpers")
+        # Verify
+        assert module is sys.modules["watchlist_api_client.helpers"]
+        # Cleanup - none
+
+    def test_unknown_module_is_rejected(self):
+        # Setup - none
+        # Exercise
+        # Verify
+        with pytest.raises(ModuleNotFoundError):
+            cli.lazy_import("watchlist_api_client_unknown_module")
+        # Cleanup - none
+
+
+class TestGetHistory:
+    @pytest.mark.parametrize("option", ["--from", "--to"])
+    def test_invalid_timestamp_is_reported(self, option):
+        # Setup
+        arguments = {"--from": "2020-11-18T12:00:00Z", "--to": "2020-11-18T18:00:00Z"}
+        arguments[option] = "2020-13-45T99:99:99Z"
+        # Exercise
+        result = CliRunner().invoke(
+            cli.watchlist,
+            ["history", "-u", "User", "-p", "Password", *itertools.chain(*arguments.items())],
+        )
+        # Verify
+        assert result.exit_code == 1
+        assert f"Invalid {option} timestamp: 2020-13-45T99:99:99Z" in result.output
+        # Cleanup - none
+
+    def test_compression_of_store_is_rejected(self, tmp_path):
+        # Setup - none
+        # Exercise
+        result = CliRunner().invoke(
+            cli.watchlist,
+            [
+                "history", "-u", "User", "-p", "Password",
+                "--from", "2020-11-18T12:00:00Z", "--to", "2020-11-18T18:00:00Z",
+                "--store", tmp_path.as_posix(), "--compress", "gzip",
+            ],
+        )
+        # Verify
+        assert result.exit_code == 1
+        assert "cannot be used with '--store'" in result.output
+        # Cleanup - none
+
+
+class TestDiffConfigs:
+    def test_standard_input_for_both_files_is_rejected(self):
+        # Setup - none
+        # Exercise
+        result = CliRunner().invoke(
+            cli.watchlist, ["diff", "-", "-"], input="sourceId,RTSsymbol\n207,F:FDAX\\Z20\n",
+        )
+        # Verify
+        assert result.exit_code == 1
+        assert "The standard input can only be read once" in result.output
+        # Cleanup - none
+
+
+class TestStore:
+    @pytest.mark.parametrize(
+        "arguments, message", [
+            (["materialize", "{store}", "yesterday"], "Invalid TIMESTAMP timestamp: yesterday"),
+            (["gc", "{store}", "--older-than", "yesterday"], "Invalid --older-than timestamp"),
+        ],
+    )
+    def test_invalid_timestamp_is_reported(self, arguments, message, tmp_path):
+        # Setup
+        store = tmp_path.joinpath("store")
+        store.mkdir()
+        # Exercise
+        result = CliRunner().invoke(
+            cli.watchlist,
+            ["store"] + [argument.format(store=store.as_posix()) for argument in arguments],
+        )
+        # Verify
+        assert result.exit_code == 1
+        assert message in result.output
+        # Cleanup - none
+
+
+class TestQuery:
+    def test_invalid_timestamp_is_reported(self, tmp_path):
+        # Setup
+        database = tmp_path.joinpath("history.db")
+        database.touch()
+        # Exercise
+        result = CliRunner().invoke(
+            cli.watchlist,
+            ["query", "sources", database.as_posix(), "F:FDAX\\Z20", "--at", "yesterday"],
+        )
+        # Verify
+        assert result.exit_code == 1
+        assert "Invalid --at timestamp: yesterday" in result.output
+        # Cleanup - none
+
+    def test_malformed_file_is_reported(self, tmp_path):
+        # Setup
+        path_to_config_file = tmp_path.joinpath("watchlist_config@20201118T120000Z.csv")
+        path_to_config_file.write_bytes(b'sourceId,RTSsymbol\nF:FDAX\\Z20\n')
+        # Exercise
+        result = CliRunner().invoke(
+            cli.watchlist,
+            [
+                "query", "ingest", tmp_path.joinpath("history.db").as_posix(),
+                path_to_config_file.as_posix(),
+            ],
+        )
+        # Verify
+        assert result.exit_code == 1
+        assert "Malformed row" in result.output
+        # Cleanup - none
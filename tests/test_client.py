@@ -0,0 +1,104 @@
+import concurrent.futures
+import pathlib
+import time
+
+import pytest
+import requests
+
+from watchlist_api_client import client
+from watchlist_api_client.data_structures import RequestSummary, RetrievedConfig
+
+
+class TestWatchlistClient:
+    def test_configuration_of_connection_pool(self):
+        # Setup - none
+        # Exercise
+        with client.WatchlistClient(("User", "Password"), pool_maxsize=32) as watchlist_client:
+            adapter = watchlist_client.session.get_adapter(client.WATCHLIST_API_ENDPOINT)
+        # Verify
+        assert adapter._pool_maxsize == 32
+        # Cleanup - none
+
+    def test_cookies_are_kept_apart_per_credentials(self):
+        # Setup
+        watchlist_client = client.WatchlistClient()
+        first_session = watchlist_client.get_session(("User", "Password"))
+        first_session.cookies.set("session", "user-session")
+        # Exercise
+        second_session = watchlist_client.get_session(("Other", "Password"))
+        # Verify
+        assert watchlist_client.get_session(("User", "Password")) is first_session
+        assert "session" not in second_session.cookies
+        assert second_session.get_adapter(client.WATCHLIST_API_ENDPOINT) is (
+            first_session.get_adapter(client.WATCHLIST_API_ENDPOINT)
+        )
+        # Cleanup
+        watchlist_client.close()
+
+    def test_submission_with_stored_credentials(
+        self, mocked_response, mocked_successful_post_request,
+    ):
+        # Setup
+        path_to_watchlist_config_file = (
+            pathlib.Path(__file__).resolve().parent /
+            "static_data" /
+            "watchlist_config_20201118.csv"
+        ).as_posix()
+        # Exercise
+        with client.WatchlistClient(("User", "Password")) as watchlist_client:
+            request_summary = watchlist_client.submit(path_to_watchlist_config_file)
+        # Verify
+        assert isinstance(request_summary, RequestSummary)
+        assert request_summary.submission_time == "Wed, 18 Nov 2020 10:06:41 GMT"
+        assert mocked_response.calls[0].request.headers["Authorization"] == (
+            requests.auth._basic_auth_str("User", "Password")
+        )
+        # Cleanup - none
+
+    def test_retrieval_at_point_in_time(self, mocked_deactivated_configuration_response):
+        # Setup - none
+        # Exercise
+        with client.WatchlistClient(("User", "Password")) as watchlist_client:
+            retrieved_configuration = watchlist_client.retrieve_at("2020-11-18T12:30:52Z")
+        # Verify
+        assert isinstance(retrieved_configuration, RetrievedConfig)
+        assert retrieved_configuration.timestamp == "20201118T123052Z"
+        assert retrieved_configuration.config_body.startswith(b'sourceId,RTSsymbol\n')
+        # Cleanup - none
+
+    def test_retrieval_of_missing_configuration(self, mocked_missing_configuration_response):
+        # Setup - none
+        # Exercise
+        # Verify
+        with client.WatchlistClient(("User", "Password")) as watchlist_client:
+            with pytest.raises(requests.exceptions.HTTPError) as error:
+                watchlist_client.retrieve_at("2019-11-18T12:30:52Z")
+        assert str(404) in str(error.value)
+        # Cleanup - none
+
+
+class TestGetDefaultClient:
+    def test_default_client_is_shared(self):
+        # Setup - none
+        # Exercise
+        first_client = client.get_default_client()
+        second_client = client.get_default_client()
+        # Verify
+        assert first_client is second_client
+        # Cleanup - none
+
+    def test_default_client_is_shared_across_threads(self, monkeypatch):
+        # Setup
+        watchlist_client_class = client.WatchlistClient
+
+        def create_slowly(**kwargs):
+            time.sleep(0.01)
+            return watchlist_client_class(**kwargs)
+
+        monkeypatch.setattr(client, "WatchlistClient", create_slowly)
+        # Exercise
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            default_clients = list(executor.map(lambda _: client.get_default_client(), range(8)))
+        # Verify
+        assert all(default_client is default_clients[0] for default_client in default_clients)
+        # Cleanup - none
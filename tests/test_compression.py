@@ -0,0 +1,120 @@
+import gzip
+import io
+import sys
+
+import pytest
+
+from watchlist_api_client import compression
+
+CONFIG_BODY = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n207,F:FESX\\Z20\n748,F:FDAX\\Z20\n'
+
+
+class TestCompressChunks:
+    def test_gzip_compression_of_chunks(self):
+        # Setup
+        chunks = [CONFIG_BODY[:10], CONFIG_BODY[10:], b""]
+        # Exercise
+        compressed_content = b"".join(compression.compress_chunks(chunks, "gzip"))
+        # Verify
+        assert gzip.decompress(compressed_content) == CONFIG_BODY
+        # Cleanup - none
+
+    def test_gzip_compression_is_deterministic(self):
+        # Setup - none
+        # Exercise
+        compressed_contents = [
+            b"".join(compression.compress_chunks([CONFIG_BODY], "gzip")) for _ in range(2)
+        ]
+        # Verify
+        assert compressed_contents[0] == compressed_contents[1]
+        # Cleanup - none
+
+    def test_chunks_are_untouched_without_compression(self):
+        # Setup - none
+        # Exercise
+        chunks = list(compression.compress_chunks([CONFIG_BODY], None))
+        # Verify
+        assert chunks == [CONFIG_BODY]
+        # Cleanup - none
+
+    def test_unknown_compression_is_rejected_eagerly(self):
+        # Setup - none
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError):
+            compression.compress_chunks([CONFIG_BODY], "lz4")
+        # Cleanup - none
+
+    @pytest.mark.skipif(compression.zstandard is not None, reason="zstandard is installed")
+    def test_missing_zstandard_is_reported(self):
+        # Setup - none
+        # Exercise
+        # Verify
+        with pytest.raises(compression.CompressionUnavailableError):
+            compression.compress_chunks([CONFIG_BODY], "zstd")
+        # Cleanup - none
+
+
+class TestOpenDecompressed:
+    @pytest.mark.parametrize(
+        "file_compression",
+        [
+            None,
+            "gzip",
+            "bzip2",
+            "xz",
+            pytest.param(
+                "zstd",
+                marks=pytest.mark.skipif(
+                    compression.zstandard is None, reason="zstandard is not installed",
+                ),
+            ),
+        ],
+    )
+    def test_round_trip_through_compressed_file(self, tmp_path, file_compression):
+        # Setup
+        path_to_file = tmp_path.joinpath(
+            f"watchlist_config.csv{compression.get_compression_suffix(file_compression)}"
+        )
+        path_to_file.write_bytes(
+            b"".join(compression.compress_chunks([CONFIG_BODY], file_compression))
+        )
+        # Exercise
+        content = b"".join(compression.read_decompressed_chunks(path_to_file.as_posix(), 7))
+        # Verify
+        assert compression.infer_compression(path_to_file.as_posix()) == file_compression
+        assert content == CONFIG_BODY
+        # Cleanup - none
+
+
+class TestDetectCompression:
+    @pytest.mark.parametrize("file_compression", ["gzip", "bzip2", "xz"])
+    def test_compressed_file_is_detected_whatever_its_name(self, tmp_path, file_compression):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(
+            b"".join(compression.compress_chunks([CONFIG_BODY], file_compression))
+        )
+        # Exercise
+        content = compression.read_decompressed_bytes(path_to_file.as_posix())
+        # Verify
+        assert not compression.is_plain_file(path_to_file.as_posix())
+        assert content == CONFIG_BODY
+        # Cleanup - none
+
+    def test_plain_configuration_is_not_compressed(self):
+        # Setup - none
+        # Exercise
+        detected_compression = compression.detect_compression(CONFIG_BODY)
+        # Verify
+        assert detected_compression is None
+        # Cleanup - none
+
+    def test_compressed_standard_input_is_decompressed(self, monkeypatch):
+        # Setup
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(gzip.compress(CONFIG_BODY))))
+        # Exercise
+        content = compression.read_decompressed_bytes(compression.STDIN_PATH)
+        # Verify
+        assert content == CONFIG_BODY
+        # Cleanup - none
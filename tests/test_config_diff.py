@@ -0,0 +1,409 @@
+import gzip
+import json
+import pathlib
+
+import pytest
+
+from watchlist_api_client import config_diff
+from watchlist_api_client.data_structures import RetrievedConfig, SourceDiff, WatchlistConfig
+
+OLD_CONFIG_BODY = (
+    b'sourceId,RTSsymbol\n'
+    b'207,F:FDAX\\Z20\n'
+    b'207,F:FESX\\Z20\n'
+    b'673,F2:ES\\Z20\n'
+    b'999,F:FDAX\\Z20\n'
+)
+NEW_CONFIG_BODY = (
+    b'sourceId,RTSsymbol\r\n'
+    b'207,F:FDAX\\Z20\r\n'
+    b'207,F:FDAX\\H21\r\n'
+    b'673,F2:ES\\Z20\r\n'
+    b'673,F2:ES\\Z20\r\n'
+    b'1000,IRNB\\Z20\r\n'
+)
+
+
+class TestLoadSourceSymbols:
+    def test_normalisation_of_rows(self):
+        # Setup
+        config_body = (
+            b'sourceId,RTSsymbol\r\n'
+            b'673,F2:ES\\Z20\r\n'
+            b'0207,F:FDAX\\Z20\n'
+            b'\n'
+            b'"673","F2:ES\\Z20"\r'
+            b'673,F2:NQ\\Z20'
+        )
+        # Exercise
+        source_symbols = config_diff.load_source_symbols_from_body(config_body)
+        # Verify
+        assert source_symbols == {
+            "207": frozenset({"F:FDAX\\Z20"}),
+            "673": frozenset({"F2:ES\\Z20", "F2:NQ\\Z20"}),
+        }
+        # Cleanup - none
+
+    def test_file_and_body_are_normalised_identically(self):
+        # Setup
+        path_to_watchlist_config_file = (
+            pathlib.Path(__file__).resolve().parent /
+            "static_data" /
+            "watchlist_config_20201118.csv"
+        )
+        config_body = path_to_watchlist_config_file.read_bytes()
+        # Exercise
+        file_source_symbols = config_diff.load_source_symbols(
+            path_to_watchlist_config_file.as_posix(),
+        )
+        body_source_symbols = config_diff.load_source_symbols_from_body(config_body)
+        # Verify
+        assert file_source_symbols == body_source_symbols
+        assert len(file_source_symbols) == 6
+        # Cleanup - none
+
+
+class TestSummarizeChanges:
+    def test_summary_of_changes(self):
+        # Setup
+        local_source_symbols = {
+            "207": frozenset({"F:FDAX\\Z20"}),
+            "673": frozenset({"F2:ES\\Z20", "F2:NQ\\Z20"}),
+            "1001": frozenset({"F:FESX\\Z20"}),
+            "676": frozenset({"F2:SP\\Z20"}),
+        }
+        active_source_symbols = {
+            "207": frozenset({"F:FDAX\\Z20"}),
+            "673": frozenset({"F2:ES\\Z20"}),
+            "748": frozenset({"F:FSMI\\Z20"}),
+        }
+        # Exercise
+        summary = config_diff.summarize_changes(local_source_symbols, active_source_symbols)
+        # Verify
+        assert summary == {
+            "nbCreated": 2,
+            "nbUpdated": 1,
+            "nbFailed": 0,
+            "nbDeactivated": 1,
+            "created": ["676", "1001"],
+            "updated": ["673"],
+            "failed": [],
+            "deactivated": ["748"],
+        }
+        # Cleanup - none
+
+    def test_summary_of_bodies_matches_summary_of_source_symbols(self):
+        # Setup
+        local_config_body = (
+            b'sourceId,RTSsymbol\r\n207,F:FDAX\\Z20\r\n673,F2:ES\\Z20\r\n673,F2:NQ\\Z20\r\n'
+            b'676,F2:SP\\Z20\r\n1001,F:FESX\\Z20\r\n'
+        )
+        active_config_body = (
+            b'sourceId,RTSsymbol\n673,F2:ES\\Z20\n207,F:FDAX\\Z20\n748,F:FSMI\\Z20\n'
+            b'207,F:FDAX\\Z20\n'
+        )
+        # Exercise
+        summary = config_diff.summarize_body_changes(local_config_body, active_config_body)
+        # Verify
+        assert summary == config_diff.summarize_changes(
+            config_diff.load_source_symbols_from_body(local_config_body),
+            config_diff.load_source_symbols_from_body(active_config_body),
+        )
+        assert summary["updated"] == ["673"]
+        # Cleanup - none
+
+    def test_rows_written_differently_are_not_changes(self):
+        # Setup
+        local_config_body = b'sourceId,RTSsymbol\n0207,F:FDAX\\Z20\n"673","F2:ES\\Z20"\n'
+        active_config_body = b'sourceId,RTSsymbol\r207,F:FDAX\\Z20\r673,F2:NQ\\Z20\r'
+        # Exercise
+        summary = config_diff.summarize_body_changes(local_config_body, active_config_body)
+        # Verify
+        assert summary["created"] == summary["deactivated"] == []
+        assert summary["updated"] == ["673"]
+        # Cleanup - none
+
+    def test_stringified_changes_list_affected_sources(self):
+        # Setup
+        summary = config_diff.summarize_changes(
+            {"207": frozenset({"F:FDAX\\Z20"})}, {"748": frozenset({"F:FSMI\\Z20"})},
+        )
+        # Exercise
+        changes = config_diff.stringify_changes(summary)
+        # Verify
+        assert "The following sources will be activated: 207\n" in changes
+        assert "The following sources will be deactivated: 748\n" in changes
+        assert "updated:" not in changes
+        # Cleanup - none
+
+
+class TestFindLatestSnapshot:
+    def test_latest_snapshot_is_found(self, tmp_path):
+        # Setup
+        for timestamp in ("20201118T123052Z", "20201120T114740Z", "20201119T090000Z"):
+            tmp_path.joinpath(f"watchlist_config@{timestamp}.csv").write_bytes(b"")
+        # Exercise
+        path_to_snapshot = config_diff.find_latest_snapshot(tmp_path.as_posix())
+        # Verify
+        assert path_to_snapshot.endswith("watchlist_config@20201120T114740Z.csv")
+        # Cleanup - none
+
+    def test_compressed_snapshots_are_found(self, tmp_path):
+        # Setup
+        tmp_path.joinpath("watchlist_config@20201118T123052Z.csv").write_bytes(b"")
+        tmp_path.joinpath("watchlist_config@20201120T114740Z.csv.gz").write_bytes(b"")
+        tmp_path.joinpath("watchlist_config@20201121T000000Z.csv.bak").write_bytes(b"")
+        # Exercise
+        path_to_snapshot = config_diff.find_latest_snapshot(tmp_path.as_posix())
+        # Verify
+        assert path_to_snapshot.endswith("watchlist_config@20201120T114740Z.csv.gz")
+        # Cleanup - none
+
+    def test_missing_snapshot(self, tmp_path):
+        # Setup - none
+        # Exercise
+        path_to_snapshot = config_diff.find_latest_snapshot(tmp_path.as_posix())
+        # Verify
+        assert path_to_snapshot is None
+        # Cleanup - none
+
+
+class TestPredictRequestSummary:
+    def test_prediction_against_snapshot(self, tmp_path):
+        # Setup
+        path_to_watchlist_config_file = (
+            pathlib.Path(__file__).resolve().parent /
+            "static_data" /
+            "watchlist_config_20201118.csv"
+        ).as_posix()
+        path_to_snapshot = tmp_path.joinpath("watchlist_config@20201118T123052Z.csv")
+        path_to_snapshot.write_bytes(
+            b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n207,F:FESX\\Z20\n207,F:FSMI\\Z20\n'
+            b'673,F2:ES\\Z20\n999,F:FDAX\\Z20\n'
+        )
+        # Exercise
+        request_summary = config_diff.predict_request_summary(
+            path_to_watchlist_config_file, path_to_snapshot.as_posix(),
+        )
+        # Verify
+        assert request_summary.summary["created"] == ["676", "680", "684", "748"]
+        assert request_summary.summary["updated"] == ["673"]
+        assert request_summary.summary["deactivated"] == ["999"]
+        assert request_summary.submission_time.endswith("GMT")
+        # Cleanup - none
+
+
+class TestDiff:
+    def test_differences_between_retrieved_configurations(self):
+        # Setup
+        old = RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY)
+        new = RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY)
+        # Exercise
+        configuration_diff = config_diff.diff(old, new)
+        # Verify
+        assert configuration_diff.activated == ["1000"]
+        assert configuration_diff.deactivated == ["999"]
+        assert configuration_diff.sources == {
+            "207": SourceDiff(
+                added=["F:FDAX\\H21"], removed=["F:FESX\\Z20"], unchanged=["F:FDAX\\Z20"],
+            ),
+            "673": SourceDiff(added=[], removed=[], unchanged=["F2:ES\\Z20"]),
+            "999": SourceDiff(added=[], removed=["F:FDAX\\Z20"], unchanged=[]),
+            "1000": SourceDiff(added=["IRNB\\Z20"], removed=[], unchanged=[]),
+        }
+        # Cleanup - none
+
+    def test_files_and_retrieved_configurations_give_the_same_differences(self, tmp_path):
+        # Setup
+        path_to_old_file = tmp_path.joinpath("old.csv")
+        path_to_old_file.write_bytes(OLD_CONFIG_BODY)
+        path_to_new_file = tmp_path.joinpath("new.csv.gz")
+        path_to_new_file.write_bytes(gzip.compress(NEW_CONFIG_BODY))
+        # Exercise
+        configuration_diff = config_diff.diff(
+            path_to_old_file.as_posix(), path_to_new_file.as_posix(),
+        )
+        # Verify
+        assert configuration_diff == config_diff.diff(
+            RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY),
+            RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY),
+        )
+        # Cleanup - none
+
+    def test_merge_of_presorted_rows_matches_hash_sets(self):
+        # Setup
+        old = RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY)
+        new = RetrievedConfig(
+            "20201118T130000Z",
+            b'sourceId,RTSsymbol\n207,F:FDAX\\H21\n207,F:FDAX\\Z20\n'
+            b'673,F2:ES\\Z20\n673,F2:ES\\Z20\n1000,IRNB\\Z20\n',
+        )
+        # Exercise
+        configuration_diff = config_diff.diff(old, new, presorted=True)
+        # Verify
+        assert configuration_diff == config_diff.diff(old, new)
+        # Cleanup - none
+
+    def test_zero_padded_source_ids_are_the_same_source(self):
+        # Setup
+        old = RetrievedConfig(
+            "20201118T120000Z", b'sourceId,RTSsymbol\n0207,F:FDAX\\Z20\n0673,F2:ES\\Z20\n',
+        )
+        new = RetrievedConfig(
+            "20201118T130000Z", b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,F2:ES\\H21\n',
+        )
+        # Exercise
+        configuration_diff = config_diff.diff(old, new)
+        # Verify
+        assert configuration_diff == config_diff.diff(old, new, presorted=True)
+        assert configuration_diff.activated == configuration_diff.deactivated == []
+        assert configuration_diff.sources["207"].unchanged == ["F:FDAX\\Z20"]
+        # Cleanup - none
+
+    def test_quoted_rows_are_unquoted(self):
+        # Setup
+        old = RetrievedConfig(
+            "20201118T120000Z", b'sourceId,RTSsymbol\n"207","F:FDAX\\Z20"\n"673","F2:ES\\Z20"\n',
+        )
+        new = RetrievedConfig(
+            "20201118T130000Z", b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,F2:ES\\H21\n',
+        )
+        # Exercise
+        configuration_diff = config_diff.diff(old, new)
+        # Verify
+        assert configuration_diff == config_diff.diff(old, new, presorted=True)
+        assert configuration_diff.activated == configuration_diff.deactivated == []
+        assert configuration_diff.sources["207"].unchanged == ["F:FDAX\\Z20"]
+        assert configuration_diff.sources["673"].removed == ["F2:ES\\Z20"]
+        # Cleanup - none
+
+    def test_watchlist_configs_are_merged(self):
+        # Setup
+        old = WatchlistConfig(OLD_CONFIG_BODY)
+        new = WatchlistConfig(NEW_CONFIG_BODY)
+        # Exercise
+        configuration_diff = config_diff.diff(old, new)
+        # Verify
+        assert configuration_diff == config_diff.diff(
+            RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY),
+            RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY),
+        )
+        # Cleanup - none
+
+    def test_unsorted_rows_are_rejected(self):
+        # Setup
+        old = RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY)
+        new = RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY)
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError, match="not sorted"):
+            config_diff.diff(old, new, presorted=True)
+        # Cleanup - none
+
+
+class TestConvertDiffToDict:
+    def test_unchanged_sources_are_left_out(self):
+        # Setup
+        configuration_diff = config_diff.diff(
+            RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY),
+            RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY),
+        )
+        # Exercise
+        diff_dict = config_diff.convert_diff_to_dict(configuration_diff)
+        # Verify
+        assert diff_dict["activated"] == ["1000"]
+        assert diff_dict["deactivated"] == ["999"]
+        assert list(diff_dict["sources"]) == ["207", "999", "1000"]
+        assert diff_dict["sources"]["207"] == {
+            "added": ["F:FDAX\\H21"], "removed": ["F:FESX\\Z20"], "nbUnchanged": 1,
+        }
+        # Cleanup - none
+
+    def test_unchanged_symbols_are_listed_on_request(self):
+        # Setup
+        configuration_diff = config_diff.diff(
+            RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY),
+            RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY),
+        )
+        # Exercise
+        diff_dict = config_diff.convert_diff_to_dict(configuration_diff, include_unchanged=True)
+        # Verify
+        assert list(diff_dict["sources"]) == ["207", "673", "999", "1000"]
+        assert diff_dict["sources"]["673"]["unchanged"] == ["F2:ES\\Z20"]
+        # Cleanup - none
+
+
+class TestStreamDiff:
+    def test_external_sort_gives_the_same_differences(self, tmp_path):
+        # Setup
+        old = RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY)
+        new = RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY)
+        # Exercise
+        source_diffs = list(
+            config_diff.stream_diff(
+                old, new, max_memory=100, temporary_directory=tmp_path.as_posix(),
+            )
+        )
+        # Verify
+        assert dict(source_diffs) == config_diff.diff(old, new).sources
+        assert config_diff.diff(old, new, max_memory=100) == config_diff.diff(old, new)
+        # Cleanup - none
+
+    @pytest.mark.parametrize("line_ending", [b"\n", b"\r\n", b"\r"])
+    def test_hashed_presorted_and_external_paths_agree(self, line_ending, tmp_path):
+        # Setup
+        path_to_old_file = tmp_path.joinpath("old.csv")
+        path_to_old_file.write_bytes(
+            b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n207,F:FESX\\Z20\n'
+            b'673,F2:ES\\Z20\n999,F:FDAX\\Z20\n'.replace(b"\n", line_ending)
+        )
+        path_to_new_file = tmp_path.joinpath("new.csv.gz")
+        path_to_new_file.write_bytes(gzip.compress(
+            b'sourceId,RTSsymbol\n207,F:FDAX\\H21\n207,F:FDAX\\Z20\n'
+            b'673,F2:ES\\Z20\n1000,IRNB\\Z20\n'.replace(b"\n", line_ending)
+        ))
+        old, new = path_to_old_file.as_posix(), path_to_new_file.as_posix()
+        # Exercise
+        hashed_diff = config_diff.diff(old, new)
+        presorted_diff = config_diff.diff(old, new, presorted=True)
+        external_diff = config_diff.diff(old, new, max_memory=100)
+        # Verify
+        assert hashed_diff == presorted_diff == external_diff == config_diff.diff(
+            RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY),
+            RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY),
+        )
+        # Cleanup - none
+
+    def test_streamed_json_matches_converted_dictionary(self):
+        # Setup
+        old = RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY)
+        new = RetrievedConfig("20201118T130000Z", NEW_CONFIG_BODY)
+        configuration_diff = config_diff.diff(old, new)
+        # Exercise
+        diff_json = {
+            include_unchanged: "".join(
+                config_diff.iterate_diff_json(
+                    config_diff.stream_diff(old, new, max_memory=100), include_unchanged,
+                )
+            )
+            for include_unchanged in (False, True)
+        }
+        # Verify
+        for include_unchanged in (False, True):
+            assert diff_json[include_unchanged] == json.dumps(
+                config_diff.convert_diff_to_dict(configuration_diff, include_unchanged),
+                indent=2,
+            )
+        # Cleanup - none
+
+    def test_streamed_json_of_identical_configurations(self):
+        # Setup
+        old = RetrievedConfig("20201118T120000Z", OLD_CONFIG_BODY)
+        # Exercise
+        diff_json = "".join(config_diff.iterate_diff_json(config_diff.stream_diff(old, old)))
+        # Verify
+        assert json.loads(diff_json) == {"sources": {}, "activated": [], "deactivated": []}
+        assert diff_json == json.dumps(
+            config_diff.convert_diff_to_dict(config_diff.diff(old, old)), indent=2,
+        )
+        # Cleanup - none
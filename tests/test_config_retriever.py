@@ -1,10 +1,12 @@
+import gzip
 import pathlib
 
 import pytest
 import requests
 
+from conftest import LatencyRequestHandler
 from watchlist_api_client import config_retriever
-from watchlist_api_client.data_structures import RetrievedConfig
+from watchlist_api_client.data_structures import RetrievedConfig, RetrievedConfigFile
 
 
 class TestInferTimestampFromRetrievedResponse:
@@ -291,3 +293,78 @@ class TestRetrievedConfigWriter:
         assert pathlib.Path(path_to_file).read_bytes() == retrieved_config.config_body
         # Cleanup - none
         pathlib.Path(path_to_file).unlink()
+
+    def test_compressed_configuration_file(self, tmp_path):
+        # Setup
+        retrieved_config = RetrievedConfig(
+            timestamp="20201118T123052Z",
+            config_body=b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n748,F:FDAX\\Z20\n',
+        )
+        # Exercise
+        path_to_file = config_retriever.retrieved_config_writer(
+            retrieved_config, tmp_path.as_posix(), compression="gzip",
+        )
+        # Verify
+        assert path_to_file == tmp_path.joinpath(
+            "watchlist_config@20201118T123052Z.csv.gz"
+        ).as_posix()
+        assert gzip.decompress(pathlib.Path(path_to_file).read_bytes()) == (
+            retrieved_config.config_body
+        )
+        # Cleanup - none
+
+
+class TestRetrieveConfigToFile:
+    def test_streamed_retrieval_of_configuration(self, latency_server, tmp_path):
+        # Setup
+        url = f"{latency_server}?dateTime=2020-11-18T12:30:52Z"
+        path_to_directory = tmp_path.joinpath("retrieved")
+        # Exercise
+        retrieved_configuration_file = config_retriever.retrieve_config_to_file(
+            url, ("User", "Password"), path_to_directory.as_posix(),
+        )
+        # Verify
+        path_to_file = path_to_directory.joinpath("watchlist_config@20201118T123052Z.csv")
+        assert retrieved_configuration_file == RetrievedConfigFile(
+            timestamp="20201118T123052Z",
+            path=path_to_file.as_posix(),
+            size=len(LatencyRequestHandler.config_body),
+        )
+        assert path_to_file.read_bytes() == LatencyRequestHandler.config_body
+        assert list(path_to_directory.iterdir()) == [path_to_file]
+        # Cleanup - none
+
+    def test_streamed_retrieval_of_compressed_configuration(self, latency_server, tmp_path):
+        # Setup
+        url = f"{latency_server}?dateTime=2020-11-18T12:30:52Z"
+        path_to_directory = tmp_path.joinpath("retrieved")
+        # Exercise
+        retrieved_configuration_file = config_retriever.retrieve_config_to_file(
+            url, ("User", "Password"), path_to_directory.as_posix(), use_cache=True,
+            compression="gzip",
+        )
+        cached_configuration_file = config_retriever.retrieve_config_to_file(
+            url, ("User", "Password"), tmp_path.joinpath("cached").as_posix(), use_cache=True,
+        )
+        # Verify
+        path_to_file = path_to_directory.joinpath("watchlist_config@20201118T123052Z.csv.gz")
+        assert retrieved_configuration_file.path == path_to_file.as_posix()
+        assert gzip.decompress(path_to_file.read_bytes()) == LatencyRequestHandler.config_body
+        assert pathlib.Path(cached_configuration_file.path).read_bytes() == (
+            LatencyRequestHandler.config_body
+        )
+        # Cleanup - none
+
+    def test_failed_retrieval_writes_nothing(self, latency_server, tmp_path):
+        # Setup
+        url = f"{latency_server}?dateTime=1999-11-18T12:30:52Z"
+        path_to_directory = tmp_path.joinpath("retrieved")
+        path_to_directory.mkdir()
+        # Exercise
+        with pytest.raises(requests.exceptions.HTTPError):
+            config_retriever.retrieve_config_to_file(
+                url, ("User", "Password"), path_to_directory.as_posix(),
+            )
+        # Verify
+        assert list(path_to_directory.iterdir()) == []
+        # Cleanup - none
@@ -1,12 +1,20 @@
+import email.parser
+import gzip
+import io
 import pathlib
 import json
+import sys
 
 import pytest
 import requests
+import responses
 
+from conftest import LatencyRequestHandler
 from watchlist_api_client import config_sender
 from watchlist_api_client import data_structures
 
+CONFIG_BODY = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,F2:ES\\Z20\n'
+
 
 class TestValidateHeader:
     def test_validation_of_incorrectly_formatted_header(self):
@@ -101,6 +109,20 @@ class TestValidateWatchlistConfigurationFile:
         )
         # Cleanup - none
 
+    def test_parallel_validation_of_file_with_incorrect_rows(self):
+        # Setup
+        path_to_file = pathlib.Path(__file__).resolve().parent.joinpath(
+            "static_data", "watchlist_config_wrong_rows.csv"
+        )
+        # Exercise
+        # Verify
+        with pytest.raises(config_sender.ImproperFileFormat) as invalid_config_file_format:
+            config_sender.validate_watchlist_configuration_file(path_to_file, workers=2)
+        assert str(invalid_config_file_format.value) == (
+            f"Line 6 - Improperly formatted"
+        )
+        # Cleanup - none
+
 
 class TestReactToStatusCode200:
     def test_reaction_to_status_code_200(self, mocked_successful_post_request):
@@ -166,6 +188,41 @@ class TestSendConfig:
         assert returned_config_summary == expected_config_summary
         # Cleanup - none
 
+    def test_streamed_payload_contains_the_file_form_field(self, mocked_response):
+        # Setup
+        credentials = ("User", "Password")
+        watchlist_endpoint = (
+            "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
+        )
+        path_to_watchlist_config_file = (
+            pathlib.Path(__file__).resolve().parent /
+            "static_data" /
+            "watchlist_config_20201118.csv"
+        )
+        received_form_fields = {}
+
+        def parse_multipart_body(request):
+            message = email.parser.BytesParser().parsebytes(
+                f"Content-Type: {request.headers['Content-Type']}\r\n\r\n".encode() +
+                request.body
+            )
+            for part in message.get_payload():
+                received_form_fields[part.get_param("name", header="content-disposition")] = (
+                    part.get_payload(decode=True)
+                )
+            return 200, {"Date": "Wed, 18 Nov 2020 10:06:41 GMT"}, json.dumps({})
+
+        mocked_response.add_callback(
+            responses.POST, watchlist_endpoint, callback=parse_multipart_body,
+        )
+        # Exercise
+        config_sender.send_config(
+            watchlist_endpoint, credentials, path_to_watchlist_config_file.as_posix(),
+        )
+        # Verify
+        assert received_form_fields == {"file": path_to_watchlist_config_file.read_bytes()}
+        # Cleanup - none
+
     def test_unsuccessful_submission_of_configuration_file(self, mocked_500_status_code_request):
         # Setup
         credentials = ("User", "Password")
@@ -187,6 +244,61 @@ class TestSendConfig:
         assert str(expected_error_code) in str(error.value)
         # Cleanup - none
 
+    def test_compressed_file_is_decompressed_while_uploaded(self, latency_server, tmp_path):
+        # Setup
+        path_to_watchlist_config_file = tmp_path.joinpath("watchlist_config.csv.gz")
+        path_to_watchlist_config_file.write_bytes(gzip.compress(CONFIG_BODY))
+        # Exercise
+        config_sender.send_config(
+            latency_server, ("User", "Password"), path_to_watchlist_config_file.as_posix(),
+            validate=True,
+        )
+        # Verify
+        [received_body] = LatencyRequestHandler.received_bodies
+        assert b"\r\n\r\n" + CONFIG_BODY + b"\r\n--" in received_body
+        # Cleanup - none
+
+    def test_invalid_file_is_never_submitted_in_full(self, latency_server, tmp_path):
+        # Setup
+        path_to_watchlist_config_file = tmp_path.joinpath("watchlist_config.csv.gz")
+        path_to_watchlist_config_file.write_bytes(
+            gzip.compress(CONFIG_BODY + b"207, F:FDAX\\Z20\n" + CONFIG_BODY[19:] * 100_000)
+        )
+        # Exercise
+        # Verify
+        with pytest.raises(config_sender.ImproperFileFormat) as error:
+            config_sender.send_config(
+                latency_server, ("User", "Password"), path_to_watchlist_config_file.as_posix(),
+                validate=True,
+            )
+        assert str(error.value) == "Line 3 - Improperly formatted"
+        assert LatencyRequestHandler.received_bodies == []
+        # Cleanup - none
+
+    def test_submission_leaves_missing_snapshot_cache_alone(
+        self, latency_server, isolated_cache_directory, tmp_path,
+    ):
+        # Setup
+        path_to_watchlist_config_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_watchlist_config_file.write_bytes(CONFIG_BODY)
+        # Exercise
+        config_sender.send_config(
+            latency_server, ("User", "Password"), path_to_watchlist_config_file.as_posix(),
+        )
+        # Verify
+        assert not isolated_cache_directory.joinpath("snapshots").exists()
+        # Cleanup - none
+
+    def test_submission_of_standard_input(self, latency_server, monkeypatch):
+        # Setup
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(gzip.compress(CONFIG_BODY))))
+        # Exercise
+        config_sender.send_config(latency_server, ("User", "Password"), "-", validate=True)
+        # Verify
+        [received_body] = LatencyRequestHandler.received_bodies
+        assert b"\r\n\r\n" + CONFIG_BODY + b"\r\n--" in received_body
+        # Cleanup - none
+
 
 class TestStringifyResponseSummary:
     def test_creation_of_summary_string_with_no_action(self):
@@ -428,3 +540,103 @@ class TestWriteRequestSummaryToJSON:
         assert content == request_summary.summary
         # Cleanup - none
         path_to_parent_dir.joinpath("request_summary_20201118T100641Z.json").unlink()
+
+    def test_content_of_compressed_json_file(self, tmp_path):
+        # Setup
+        request_summary = data_structures.RequestSummary(
+            submission_time='Wed, 18 Nov 2020 10:06:41 GMT',
+            summary={
+                "nbCreated": 1,
+                "nbUpdated": 0,
+                "nbFailed": 0,
+                "nbDeactivated": 0,
+                "created": ['676'],
+                "updated": [],
+                "failed": [],
+                "deactivated": []
+            }
+        )
+        # Exercise
+        fpth = config_sender.write_request_summary_to_json(
+            request_summary, tmp_path.as_posix(), compression="gzip",
+        )
+        # Verify
+        assert fpth.endswith("request_summary_20201118T100641Z.json.gz")
+        with gzip.open(fpth) as infile:
+            assert json.load(infile) == request_summary.summary
+        # Cleanup - none
+
+
+class TestSendConfigIfChanged:
+    watchlist_endpoint = (
+        "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
+    )
+    path_to_watchlist_config_file = (
+        pathlib.Path(__file__).resolve().parent /
+        "static_data" /
+        "watchlist_config_20201118.csv"
+    )
+
+    def test_unchanged_configuration_is_not_submitted(self, mocked_response):
+        # Setup
+        header, *rows = self.path_to_watchlist_config_file.read_bytes().splitlines(True)
+        mocked_response.add(
+            responses.GET,
+            self.watchlist_endpoint,
+            body=header + b"".join(reversed(rows)),
+            headers={"Date": "Wed, 18 Nov 2020 10:06:41 GMT"},
+        )
+        # Exercise
+        conditional_submission = config_sender.send_config_if_changed(
+            self.watchlist_endpoint,
+            ("User", "Password"),
+            self.path_to_watchlist_config_file.as_posix(),
+        )
+        # Verify
+        assert not conditional_submission.submitted
+        assert conditional_submission.request_summary is None
+        assert conditional_submission.local_summary["nbUpdated"] == 0
+        assert [call.request.method for call in mocked_response.calls] == ["GET"]
+        # Cleanup - none
+
+    def test_changed_configuration_is_submitted(
+        self, mocked_response, mocked_successful_post_request,
+    ):
+        # Setup
+        mocked_response.add(
+            responses.GET,
+            self.watchlist_endpoint,
+            body=b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n999,F:FDAX\\Z20\n',
+            headers={"Date": "Wed, 18 Nov 2020 10:06:41 GMT"},
+        )
+        # Exercise
+        conditional_submission = config_sender.send_config_if_changed(
+            self.watchlist_endpoint,
+            ("User", "Password"),
+            self.path_to_watchlist_config_file.as_posix(),
+        )
+        # Verify
+        assert conditional_submission.submitted
+        assert conditional_submission.request_summary.summary["nbUpdated"] == 6
+        assert conditional_submission.local_summary["created"] == [
+            "673", "676", "680", "684", "748",
+        ]
+        assert conditional_submission.local_summary["updated"] == ["207"]
+        assert conditional_submission.local_summary["deactivated"] == ["999"]
+        # Cleanup - none
+
+    def test_missing_active_configuration_counts_as_empty(
+        self, mocked_response, mocked_successful_post_request,
+    ):
+        # Setup
+        mocked_response.add(responses.GET, self.watchlist_endpoint, status=404)
+        # Exercise
+        conditional_submission = config_sender.send_config_if_changed(
+            self.watchlist_endpoint,
+            ("User", "Password"),
+            self.path_to_watchlist_config_file.as_posix(),
+        )
+        # Verify
+        assert conditional_submission.submitted
+        assert conditional_submission.local_summary["nbCreated"] == 6
+        # Cleanup - none
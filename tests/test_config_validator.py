@@ -0,0 +1,430 @@
+import gzip
+import io
+import pathlib
+
+import pytest
+
+from watchlist_api_client import config_validator
+from watchlist_api_client.data_structures import InvalidLine, ValidationReport
+
+
+class TestDescribeInvalidLine:
+    def test_description_of_invalid_header(self):
+        # Setup
+        invalid_line = InvalidLine(0, config_validator.HEADER_REASON, "SourceID,RTSSymbol")
+        # Exercise
+        description = config_validator.describe_invalid_line(invalid_line)
+        # Verify
+        assert description == "Improperly formatted header"
+        # Cleanup - none
+
+    def test_description_of_invalid_row(self):
+        # Setup
+        invalid_line = InvalidLine(6, config_validator.ROW_REASON, "676, F2:SP\\Z20")
+        # Exercise
+        description = config_validator.describe_invalid_line(invalid_line)
+        # Verify
+        assert description == "Line 6 - Improperly formatted"
+        # Cleanup - none
+
+
+class TestValidateRowsBlock:
+    def test_validation_of_block_of_valid_rows(self):
+        # Setup
+        block = "207,F:FDAX\\Z20\n207,F:FESX\\Z20\n"
+        invalid_lines = []
+        # Exercise
+        next_line_number = config_validator.validate_rows_block(block, 1, invalid_lines)
+        # Verify
+        assert next_line_number == 3
+        assert invalid_lines == []
+        # Cleanup - none
+
+    def test_validation_of_block_with_consecutive_invalid_rows(self):
+        # Setup
+        block = "207,F:FDAX\\Z20\n207, F:FESX\\Z20\n\n207,F:FSMI\\Z20\n"
+        invalid_lines = []
+        # Exercise
+        next_line_number = config_validator.validate_rows_block(block, 1, invalid_lines)
+        # Verify
+        assert next_line_number == 5
+        assert invalid_lines == [
+            InvalidLine(2, "Improperly formatted", "207, F:FESX\\Z20"),
+            InvalidLine(3, "Improperly formatted", ""),
+        ]
+        # Cleanup - none
+
+
+class TestValidateStream:
+    @pytest.mark.parametrize(
+        "row", [
+            "207,F:FDAX\\Z20",
+            "1234,F2:ES\\H21",
+            "207, F:FDAX\\Z20",
+            "207,F:FDAX??Z20",
+            "20,F:FDAX\\Z20",
+            "207,f:fdax\\z20",
+            "207,F:FDAX\\Z20,",
+            "",
+        ],
+    )
+    def test_agreement_with_row_pattern(self, row):
+        # Setup
+        stream = io.StringIO(f"sourceId,RTSsymbol\n{row}\n")
+        # Exercise
+        validation_report = config_validator.validate_stream(stream)
+        # Verify
+        expected_validity = config_validator.ROW_PATTERN.match(row) is not None
+        assert validation_report.is_valid is expected_validity
+        # Cleanup - none
+
+    def test_validation_of_rows_spanning_several_chunks(self):
+        # Setup
+        stream = io.StringIO(
+            "sourceId,RTSsymbol\n207,F:FDAX\\Z20\n207,F:FESX?Z20\n673,F2:ES\\Z20\n748,bad"
+        )
+        # Exercise
+        validation_report = config_validator.validate_stream(stream, chunk_size=7)
+        # Verify
+        expected_validation_report = ValidationReport(
+            lines_checked=5,
+            invalid_lines=[
+                InvalidLine(2, "Improperly formatted", "207,F:FESX?Z20"),
+                InvalidLine(4, "Improperly formatted", "748,bad"),
+            ],
+            truncated=False,
+        )
+        assert validation_report == expected_validation_report
+        # Cleanup - none
+
+    def test_validation_of_quoted_fields(self):
+        # Setup
+        stream = io.StringIO(
+            '"sourceId","RTSsymbol"\n"207",F:FDAX\\Z20\n207,"F:FESX\\Z20"\n"673,F2:ES\\Z20\n'
+        )
+        # Exercise
+        validation_report = config_validator.validate_stream(stream)
+        # Verify
+        expected_validation_report = ValidationReport(
+            lines_checked=4,
+            invalid_lines=[InvalidLine(3, "Improperly formatted", '"673,F2:ES\\Z20')],
+            truncated=False,
+        )
+        assert validation_report == expected_validation_report
+        # Cleanup - none
+
+    def test_validation_of_empty_stream(self):
+        # Setup
+        stream = io.StringIO("")
+        # Exercise
+        validation_report = config_validator.validate_stream(stream)
+        # Verify
+        assert validation_report == ValidationReport(0, [], False)
+        # Cleanup - none
+
+
+class TestSplitIntoByteRanges:
+    def test_alignment_of_ranges_on_row_boundaries(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(
+            b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n207,F:FESX\\Z20\n673,F2:ES\\Z20\n"
+        )
+        # Exercise
+        byte_ranges = config_validator.split_into_byte_ranges(path_to_file, 2)
+        # Verify
+        content = path_to_file.read_bytes()
+        assert byte_ranges[0][0] == len(b"sourceId,RTSsymbol\n")
+        assert byte_ranges[-1][1] == len(content)
+        assert all(content[end - 1:end] == b"\n" for _, end in byte_ranges)
+        assert all(
+            previous_end == start
+            for (_, previous_end), (start, _) in zip(byte_ranges, byte_ranges[1:])
+        )
+        # Cleanup - none
+
+
+class TestValidateByteRange:
+    def test_validation_of_range_with_relative_line_numbers(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(
+            b"sourceId,RTSsymbol\r\n207,F:FDAX\\Z20\r\n207,F:FESX?Z20\r\n673,F2:ES\\Z20"
+        )
+        start = len(b"sourceId,RTSsymbol\r\n")
+        end = len(path_to_file.read_bytes())
+        # Exercise
+        range_line_count, invalid_lines = config_validator.validate_byte_range(
+            path_to_file, start, end,
+        )
+        # Verify
+        assert range_line_count == 3
+        assert invalid_lines == [InvalidLine(1, "Improperly formatted", "207,F:FESX?Z20")]
+        # Cleanup - none
+
+
+class TestValidateConfigurationFile:
+    def test_validation_of_correct_configuration_file(self):
+        # Setup
+        path_to_file = pathlib.Path(__file__).resolve().parent.joinpath(
+            "static_data", "watchlist_config_20201118.csv"
+        )
+        # Exercise
+        validation_report = config_validator.validate_configuration_file(path_to_file)
+        # Verify
+        assert validation_report.is_valid
+        assert validation_report.lines_checked == 14
+        # Cleanup - none
+
+    def test_collection_of_all_invalid_lines(self):
+        # Setup
+        path_to_file = pathlib.Path(__file__).resolve().parent.joinpath(
+            "static_data", "watchlist_config_wrong_rows.csv"
+        )
+        # Exercise
+        validation_report = config_validator.validate_configuration_file(path_to_file)
+        # Verify
+        expected_invalid_lines = [
+            InvalidLine(6, "Improperly formatted", "676, F2:SP\\Z20"),
+            InvalidLine(8, "Improperly formatted", "684, F2:ES\\Z20"),
+            InvalidLine(9, "Improperly formatted", "684,F2?NQ\\Z20"),
+        ]
+        assert validation_report.invalid_lines == expected_invalid_lines
+        assert validation_report.truncated is False
+        # Cleanup - none
+
+    def test_collection_of_invalid_lines_with_cap(self):
+        # Setup
+        path_to_file = pathlib.Path(__file__).resolve().parent.joinpath(
+            "static_data", "watchlist_config_wrong_rows.csv"
+        )
+        # Exercise
+        validation_report = config_validator.validate_configuration_file(
+            path_to_file, max_errors=2,
+        )
+        # Verify
+        expected_invalid_lines = [
+            InvalidLine(6, "Improperly formatted", "676, F2:SP\\Z20"),
+            InvalidLine(8, "Improperly formatted", "684, F2:ES\\Z20"),
+        ]
+        assert validation_report.invalid_lines == expected_invalid_lines
+        assert validation_report.truncated is True
+        # Cleanup - none
+
+    def test_validation_of_file_with_incorrect_header(self):
+        # Setup
+        path_to_file = pathlib.Path(__file__).resolve().parent.joinpath(
+            "static_data", "watchlist_config_wrong_header.csv"
+        )
+        # Exercise
+        validation_report = config_validator.validate_configuration_file(path_to_file)
+        # Verify
+        assert validation_report.invalid_lines[0] == InvalidLine(
+            0, "Improperly formatted header", "SourceID,RTSSymbol",
+        )
+        # Cleanup - none
+
+    @pytest.mark.parametrize("max_errors", [None, 1, 2, 3])
+    @pytest.mark.parametrize("line_ending", ["\n", "\r\n", "\r"])
+    def test_agreement_of_parallel_and_sequential_validation(
+        self, max_errors, line_ending, tmp_path,
+    ):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        rows = [f"{207 + index % 5},F:FDAX{index}\\Z20" for index in range(2000)]
+        rows[17] = "207, F:FDAX\\Z20"
+        rows[1000] = ""
+        rows[1999] = "748,F:FESX?Z20"
+        path_to_file.write_bytes(
+            line_ending.join(["sourceId,RTSsymbol"] + rows).encode(),
+        )
+        # Exercise
+        parallel_report = config_validator.validate_configuration_file(
+            path_to_file, max_errors=max_errors, workers=2,
+        )
+        # Verify
+        sequential_report = config_validator.validate_configuration_file(
+            path_to_file, max_errors=max_errors,
+        )
+        assert parallel_report == sequential_report
+        # Cleanup - none
+
+    def test_undecodable_header_in_parallel_validation(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"sourceId,RTS\xffsymbol\n207,F:FDAX\\Z20\n")
+        # Exercise
+        parallel_report = config_validator.validate_configuration_file(path_to_file, workers=2)
+        # Verify
+        assert parallel_report == config_validator.validate_configuration_file(path_to_file)
+        assert not parallel_report.is_valid
+        # Cleanup - none
+
+    def test_validation_of_compressed_configuration_file(self, tmp_path):
+        # Setup
+        path_to_plain_file = pathlib.Path(__file__).resolve().parent.joinpath(
+            "static_data", "watchlist_config_wrong_rows.csv"
+        )
+        path_to_file = tmp_path.joinpath("watchlist_config.csv.gz")
+        path_to_file.write_bytes(gzip.compress(path_to_plain_file.read_bytes()))
+        # Exercise
+        validation_report = config_validator.validate_configuration_file(
+            path_to_file.as_posix(), workers=2,
+        )
+        # Verify
+        assert validation_report == config_validator.validate_configuration_file(
+            path_to_plain_file,
+        )
+        # Cleanup - none
+
+
+EDGE_CASE_CONTENTS = [
+    b"sourceId,RTSsymbol\r\n207,F:FDAX\\Z20\r\n207, F:FESX\\Z20\r\n",
+    b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n\n673,F2:ES\\Z20",
+    b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,f2:es",
+    b"sourceId,RTSsymbol",
+    b"SourceID,RTSSymbol\n207,F:FDAX\\Z20\n",
+    b"sourceId,RTSsymbol\r207,F:FDAX\\Z20\r673,f2:es\r\r\n673,F2:ES\\Z20\r",
+    b"sourceId,RTSsymbol\n207,F:FDAX\xff\\Z20\n673,F2:ES\\Z20\n",
+    b"",
+]
+
+
+class TestIncrementalValidator:
+    @pytest.mark.parametrize("content", EDGE_CASE_CONTENTS)
+    @pytest.mark.parametrize("max_errors", [None, 1])
+    def test_agreement_with_stream_validation(self, content, max_errors):
+        # Setup
+        validator = config_validator.IncrementalValidator(max_errors)
+        # Exercise
+        for start in range(0, len(content), 3):
+            validator.feed(content[start:start + 3])
+        validation_report = validator.close()
+        # Verify
+        assert validation_report == config_validator.validate_stream(
+            io.TextIOWrapper(io.BytesIO(content), encoding="utf-8", errors="replace"),
+            max_errors,
+        )
+        # Cleanup - none
+
+
+class TestValidatingReader:
+    def test_valid_configuration_is_read_in_full(self):
+        # Setup
+        content = b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,F2:ES\\Z20\n"
+        validating_reader = config_validator.ValidatingReader(io.BytesIO(content))
+        # Exercise
+        chunks = list(iter(lambda: validating_reader.read(4), b""))
+        # Verify
+        assert b"".join(chunks) == content
+        # Cleanup - none
+
+    def test_reading_stops_at_first_invalid_line(self):
+        # Setup
+        content = b"sourceId,RTSsymbol\n207, F:FDAX\\Z20\n" + b"673,F2:ES\\Z20\n" * 1000
+        validating_reader = config_validator.ValidatingReader(io.BytesIO(content))
+        chunks = []
+        # Exercise
+        with pytest.raises(config_validator.InvalidConfigurationError) as error_info:
+            while True:
+                chunks.append(validating_reader.read(64))
+        # Verify
+        assert str(error_info.value) == "Line 1 - Improperly formatted"
+        assert len(b"".join(chunks)) < len(content)
+        # Cleanup - none
+
+    def test_invalid_last_line_is_reported_at_the_end(self):
+        # Setup
+        content = b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,f2:es"
+        validating_reader = config_validator.ValidatingReader(io.BytesIO(content))
+        # Exercise
+        body = validating_reader.read()
+        # Verify
+        assert body == content
+        with pytest.raises(config_validator.InvalidConfigurationError):
+            validating_reader.read()
+        # Cleanup - none
+
+
+class TestValidateConfigurationFileMmap:
+    @pytest.mark.parametrize(
+        "file_name", [
+            "watchlist_config_20201118.csv",
+            "watchlist_config_wrong_header.csv",
+            "watchlist_config_wrong_rows.csv",
+        ],
+    )
+    def test_agreement_with_text_validation(self, file_name):
+        # Setup
+        path_to_file = pathlib.Path(__file__).resolve().parent.joinpath("static_data", file_name)
+        # Exercise
+        validation_report = config_validator.validate_configuration_file_mmap(path_to_file)
+        # Verify
+        assert validation_report == config_validator.validate_configuration_file(path_to_file)
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "content", [
+            b"sourceId,RTSsymbol\r\n207,F:FDAX\\Z20\r\n207, F:FESX\\Z20\r\n",
+            b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n\n673,F2:ES\\Z20",
+            b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,f2:es",
+            b"sourceId,RTSsymbol",
+            b"SourceID,RTSSymbol\n207,F:FDAX\\Z20\n",
+            b"sourceId,RTSsymbol\r207,F:FDAX\\Z20\r207, F:FESX\\Z20\r673,F2:ES\\Z20",
+            b"sourceId,RTSsymbol\r\r\n207,F:FDAX\\Z20\r\n\r673,f2:es\n",
+            b'"sourceId","RTSsymbol"\n"207",F:FDAX\\Z20\n207,"F:FESX\\Z20"\r"673,F2:ES\\Z20',
+        ],
+    )
+    def test_agreement_with_text_validation_on_edge_cases(self, content, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(content)
+        # Exercise
+        validation_report = config_validator.validate_configuration_file_mmap(path_to_file)
+        # Verify
+        assert validation_report == config_validator.validate_configuration_file(path_to_file)
+        # Cleanup - none
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 5, 16])
+    def test_agreement_with_text_validation_across_windows(self, chunk_size, monkeypatch, tmp_path):
+        # Setup
+        monkeypatch.setattr(config_validator, "CHUNK_SIZE", chunk_size)
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(
+            b"sourceId,RTSsymbol\r\n207,F:FDAX\\Z20\r207,F:FESX?Z20\r\n\r\n"
+            b"673,F2:ES\\Z20\n\r748,bad\r"
+        )
+        # Exercise
+        validation_report = config_validator.validate_configuration_file_mmap(path_to_file)
+        # Verify
+        assert validation_report == config_validator.validate_configuration_file(path_to_file)
+        assert len(validation_report.invalid_lines) == 4
+        # Cleanup - none
+
+    def test_validation_of_empty_file(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"")
+        # Exercise
+        validation_report = config_validator.validate_configuration_file_mmap(path_to_file)
+        # Verify
+        assert validation_report == ValidationReport(0, [], False)
+        # Cleanup - none
+
+    def test_collection_of_invalid_lines_with_cap(self):
+        # Setup
+        path_to_file = pathlib.Path(__file__).resolve().parent.joinpath(
+            "static_data", "watchlist_config_wrong_rows.csv"
+        )
+        # Exercise
+        validation_report = config_validator.validate_configuration_file_mmap(
+            path_to_file, max_errors=1,
+        )
+        # Verify
+        expected_validation_report = ValidationReport(
+            lines_checked=7,
+            invalid_lines=[InvalidLine(6, "Improperly formatted", "676, F2:SP\\Z20")],
+            truncated=True,
+        )
+        assert validation_report == expected_validation_report
+        # Cleanup - none
@@ -0,0 +1,256 @@
+import socket
+import stat
+import threading
+
+import pytest
+import requests
+
+from conftest import LatencyRequestHandler
+from watchlist_api_client import config_sender, daemon
+from watchlist_api_client.data_structures import RequestSummary, RetrievedConfigFile
+
+CONFIG_BODY = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n673,F2:ES\\Z20\n'
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    """A pytest fixture that runs a daemon in a background thread and yields it."""
+    watchlist_daemon = daemon.WatchlistDaemon(tmp_path.joinpath("daemon.sock").as_posix())
+    daemon_thread = threading.Thread(target=watchlist_daemon.serve_forever, daemon=True)
+    daemon_thread.start()
+    yield watchlist_daemon
+    watchlist_daemon.shutdown()
+    watchlist_daemon.server_close()
+
+
+class TestGetSocketPath:
+    def test_socket_path_from_environment_variable(self, monkeypatch):
+        # Setup
+        monkeypatch.setenv(daemon.DAEMON_SOCKET_ENVIRONMENT_VARIABLE, "/run/watchlist.sock")
+        # Exercise
+        socket_path = daemon.get_socket_path()
+        # Verify
+        assert socket_path == "/run/watchlist.sock"
+        # Cleanup - none
+
+    def test_default_socket_path_in_cache_directory(self, isolated_cache_directory, monkeypatch):
+        # Setup
+        monkeypatch.delenv(daemon.DAEMON_SOCKET_ENVIRONMENT_VARIABLE, raising=False)
+        # Exercise
+        socket_path = daemon.get_socket_path()
+        # Verify
+        assert socket_path == isolated_cache_directory.joinpath("daemon", "daemon.sock").as_posix()
+        # Cleanup - none
+
+
+class TestWatchlistDaemon:
+    def test_socket_is_private(self, running_daemon, tmp_path):
+        # Setup - none
+        # Exercise
+        socket_mode = tmp_path.joinpath("daemon.sock").stat().st_mode
+        # Verify
+        assert stat.S_ISSOCK(socket_mode)
+        assert stat.S_IMODE(socket_mode) == daemon.SOCKET_PERMISSIONS
+        # Cleanup - none
+
+    def test_retrieval_through_daemon(self, running_daemon, latency_server, tmp_path):
+        # Setup
+        arguments = dict(
+            credentials=["User", "Password"],
+            path_to_directory=tmp_path.as_posix(),
+            timestamp="2020-11-18T12:30:52Z",
+            watchlist_endpoint=latency_server,
+        )
+        # Exercise
+        retrieved_config_file, digest = daemon.send_job_request(
+            "retrieve", arguments, running_daemon.socket_path,
+        )
+        # Verify
+        assert isinstance(retrieved_config_file, RetrievedConfigFile)
+        assert retrieved_config_file.timestamp == "20201118T123052Z"
+        with open(retrieved_config_file.path, 'rb') as infile:
+            assert infile.read() == LatencyRequestHandler.config_body
+        assert digest is None
+        # Cleanup - none
+
+    def test_submission_through_daemon(self, running_daemon, latency_server, tmp_path):
+        # Setup
+        path_to_config_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_config_file.write_bytes(CONFIG_BODY)
+        arguments = dict(
+            credentials=["User", "Password"],
+            config_file=path_to_config_file.as_posix(),
+            watchlist_endpoint=latency_server,
+        )
+        # Exercise
+        request_summary = daemon.send_job_request(
+            "submit", arguments, running_daemon.socket_path,
+        )
+        # Verify
+        assert isinstance(request_summary, RequestSummary)
+        assert request_summary.summary["updated"] == ["207", "673"]
+        assert LatencyRequestHandler.received_bodies[0].count(CONFIG_BODY) == 1
+        # Cleanup - none
+
+    def test_job_errors_are_raised_again(self, running_daemon, latency_server, tmp_path):
+        # Setup
+        arguments = dict(
+            credentials=["User", "Password"],
+            path_to_directory=tmp_path.as_posix(),
+            timestamp="1999-12-31T23:00:00Z",
+            watchlist_endpoint=latency_server,
+        )
+        # Exercise
+        # Verify
+        with pytest.raises(requests.exceptions.HTTPError, match="404"):
+            daemon.send_job_request("retrieve", arguments, running_daemon.socket_path)
+        # Cleanup - none
+
+    def test_second_daemon_on_same_socket_is_rejected(self, running_daemon):
+        # Setup - none
+        # Exercise
+        # Verify
+        with pytest.raises(daemon.DaemonError):
+            daemon.WatchlistDaemon(running_daemon.socket_path)
+        # Cleanup - none
+
+    def test_stale_socket_is_replaced(self, tmp_path):
+        # Setup
+        socket_path = tmp_path.joinpath("daemon.sock").as_posix()
+        daemon.WatchlistDaemon(socket_path).socket.close()
+        # Exercise
+        watchlist_daemon = daemon.WatchlistDaemon(socket_path)
+        watchlist_daemon.server_close()
+        # Verify
+        assert not tmp_path.joinpath("daemon.sock").exists()
+        # Cleanup - none
+
+    def test_connections_above_the_limit_are_refused(self, monkeypatch, tmp_path):
+        # Setup
+        monkeypatch.setitem(daemon.JOBS, "retrieve", lambda: threading.current_thread().name)
+        watchlist_daemon = daemon.WatchlistDaemon(
+            tmp_path.joinpath("daemon.sock").as_posix(), max_connections=1,
+        )
+        daemon_thread = threading.Thread(target=watchlist_daemon.serve_forever, daemon=True)
+        daemon_thread.start()
+        idle_connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        idle_connection.connect(watchlist_daemon.socket_path)
+        # Exercise
+        result = daemon.run_job("retrieve", {}, socket_path=watchlist_daemon.socket_path)
+        # Verify
+        assert result == threading.current_thread().name
+        with pytest.raises(daemon.DaemonUnavailableError, match="too many connections"):
+            daemon.send_job_request("retrieve", {}, watchlist_daemon.socket_path)
+        # Cleanup
+        idle_connection.close()
+        watchlist_daemon.shutdown()
+        watchlist_daemon.server_close()
+
+    def test_unanswered_job_times_out(self, tmp_path):
+        # Setup
+        socket_path = tmp_path.joinpath("daemon.sock").as_posix()
+        listening_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listening_socket.bind(socket_path)
+        listening_socket.listen(1)
+        # Exercise
+        # Verify
+        with pytest.raises(daemon.DaemonError, match="timed out"):
+            daemon.send_job_request("retrieve", {}, socket_path, timeout=0.1)
+        # Cleanup
+        listening_socket.close()
+
+
+class TestRunJobRequest:
+    def test_job_from_other_environment_is_refused(self):
+        # Setup
+        request = {
+            "job": "retrieve",
+            "arguments": {},
+            "environment": dict(daemon.get_job_environment(), HTTPS_PROXY="http://proxy:3128"),
+        }
+        # Exercise
+        response = daemon.run_job_request(request)
+        # Verify
+        assert response["error"]["type"] == "watchlist_api_client.daemon.DaemonUnavailableError"
+        with pytest.raises(daemon.DaemonUnavailableError):
+            daemon.raise_job_error(response["error"])
+        # Cleanup - none
+
+    def test_files_are_validated_in_the_job_thread(self, monkeypatch):
+        # Setup
+        monkeypatch.setitem(daemon.JOBS, "submit", lambda workers: workers)
+        request = {
+            "job": "submit",
+            "arguments": {"workers": 4},
+            "environment": daemon.get_job_environment(),
+        }
+        # Exercise
+        response = daemon.run_job_request(request)
+        # Verify
+        assert response == {"result": 1}
+        # Cleanup - none
+
+
+class TestRaiseJobError:
+    def test_library_exceptions_are_raised_again(self):
+        # Setup
+        error = {
+            "type": "watchlist_api_client.config_sender.ImproperFileFormat",
+            "message": "Invalid header",
+        }
+        # Exercise
+        # Verify
+        with pytest.raises(config_sender.ImproperFileFormat, match="Invalid header"):
+            daemon.raise_job_error(error)
+        # Cleanup - none
+
+    def test_other_exceptions_are_raised_as_daemon_errors(self):
+        # Setup
+        error = {"type": "subprocess.CalledProcessError", "message": "Command failed"}
+        # Exercise
+        # Verify
+        with pytest.raises(daemon.DaemonError, match="subprocess.CalledProcessError"):
+            daemon.raise_job_error(error)
+        # Cleanup - none
+
+
+class TestRunJob:
+    def test_job_runs_in_process_without_daemon(self, latency_server, tmp_path):
+        # Setup
+        socket_path = tmp_path.joinpath("daemon.sock").as_posix()
+        arguments = dict(
+            credentials=("User", "Password"),
+            path_to_directory=tmp_path.as_posix(),
+            watchlist_endpoint=latency_server,
+        )
+        # Exercise
+        with pytest.raises(daemon.DaemonUnavailableError):
+            daemon.send_job_request("retrieve", arguments, socket_path)
+        retrieved_config_file, digest = daemon.run_job(
+            "retrieve", arguments, socket_path=socket_path,
+        )
+        # Verify
+        with open(retrieved_config_file.path, 'rb') as infile:
+            assert infile.read() == LatencyRequestHandler.config_body
+        assert digest is None
+        # Cleanup - none
+
+    def test_retrieval_to_store(self, running_daemon, latency_server, tmp_path):
+        # Setup
+        store = tmp_path.joinpath("store")
+        arguments = dict(
+            credentials=["User", "Password"],
+            path_to_directory=tmp_path.as_posix(),
+            timestamp="2020-11-18T12:30:52Z",
+            store=store.as_posix(),
+            watchlist_endpoint=latency_server,
+        )
+        # Exercise
+        retrieved_config_file, digest = daemon.run_job(
+            "retrieve", arguments, socket_path=running_daemon.socket_path,
+        )
+        # Verify
+        assert retrieved_config_file.timestamp == "20201118T123052Z"
+        assert len(digest) == 64
+        assert not list(store.glob("tmp*"))
+        # Cleanup - none
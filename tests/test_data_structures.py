@@ -0,0 +1,132 @@
+import pytest
+
+from watchlist_api_client.data_structures import RetrievedConfig, WatchlistConfig
+
+CONFIG_BODY = (
+    b'sourceId,RTSsymbol\n'
+    b'680,IRNB\\Z20\r\n'
+    b'207,F:FDAX\\Z20\n'
+    b'207,F:FDAX\\H21\n'
+    b'\n'
+    b'207,F:FDAX\\Z20\n'
+    b'1000,F:FDAX\\Z20\n'
+)
+
+
+class TestWatchlistConfig:
+    def test_rows_are_grouped_by_source(self):
+        # Setup
+        watchlist_config = WatchlistConfig.from_retrieved_config(
+            RetrievedConfig("20201118T123052Z", CONFIG_BODY),
+        )
+        # Exercise
+        sources = watchlist_config.sources()
+        # Verify
+        assert watchlist_config.timestamp == "20201118T123052Z"
+        assert sources == [207, 680, 1000]
+        assert watchlist_config.symbols_for(207) == ['F:FDAX\\H21', 'F:FDAX\\Z20']
+        assert watchlist_config.symbols_for("680") == ['IRNB\\Z20']
+        assert len(watchlist_config) == 4
+        # Cleanup - none
+
+    def test_rows_are_iterated_in_order(self):
+        # Setup
+        watchlist_config = WatchlistConfig(CONFIG_BODY)
+        # Exercise
+        rows = list(watchlist_config)
+        # Verify
+        assert rows == [
+            (207, 'F:FDAX\\H21'),
+            (207, 'F:FDAX\\Z20'),
+            (680, 'IRNB\\Z20'),
+            (1000, 'F:FDAX\\Z20'),
+        ]
+        # Cleanup - none
+
+    def test_membership_of_sources_and_rows(self):
+        # Setup
+        watchlist_config = WatchlistConfig(CONFIG_BODY)
+        # Exercise - none
+        # Verify
+        assert 207 in watchlist_config
+        assert "1000" in watchlist_config
+        assert 208 not in watchlist_config
+        assert (680, 'IRNB\\Z20') in watchlist_config
+        assert ("1000", 'F:FDAX\\Z20') in watchlist_config
+        assert (680, 'F:FDAX\\Z20') not in watchlist_config
+        assert (207, 'IRNB\\H21') not in watchlist_config
+        assert (208, 'IRNB\\Z20') not in watchlist_config
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "item", ["abc", None, 207.5j, ("x", "ABC"), (207,), (207, None), (207, "a", "b")],
+    )
+    def test_membership_of_malformed_items(self, item):
+        # Setup
+        watchlist_config = WatchlistConfig(CONFIG_BODY)
+        # Exercise
+        is_member = item in watchlist_config
+        # Verify
+        assert is_member is False
+        # Cleanup - none
+
+    def test_unknown_source_raises_key_error(self):
+        # Setup
+        watchlist_config = WatchlistConfig(CONFIG_BODY)
+        # Exercise
+        # Verify
+        with pytest.raises(KeyError):
+            watchlist_config.symbols_for(208)
+        # Cleanup - none
+
+    def test_configuration_without_rows_is_empty(self):
+        # Setup
+        watchlist_config = WatchlistConfig(b'sourceId,RTSsymbol\n')
+        # Exercise - none
+        # Verify
+        assert watchlist_config.sources() == []
+        assert list(watchlist_config) == []
+        assert 207 not in watchlist_config
+        assert (207, 'F:FDAX\\Z20') not in watchlist_config
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "config_body", [
+            b'sourceId,RTSsymbol\r207,F:FDAX\\Z20\r0207,F:FDAX\\Z20\r680,IRNB\\Z20\r',
+            b'sourceId,RTSsymbol\r\n"207","F:FDAX\\Z20"\r\n\r\n"680",IRNB\\Z20',
+        ],
+    )
+    def test_quoted_rows_and_lone_carriage_returns_are_read(self, config_body):
+        # Setup
+        watchlist_config = WatchlistConfig(config_body)
+        # Exercise
+        rows = list(watchlist_config)
+        # Verify
+        assert rows == [(207, 'F:FDAX\\Z20'), (680, 'IRNB\\Z20')]
+        # Cleanup - none
+
+    def test_malformed_row_is_rejected(self):
+        # Setup
+        watchlist_config = WatchlistConfig(b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\nF:FESX\\Z20\n')
+        # Exercise
+        # Verify
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Malformed row"):
+                watchlist_config.sources()
+        # Cleanup - none
+
+    def test_shared_symbols_are_interned(self):
+        # Setup
+        config_body = b'sourceId,RTSsymbol\n' + b''.join(
+            f'{source_id},F:FDAX{index:04d}\\Z20\n'.encode()
+            for source_id in range(200, 300)
+            for index in range(10)
+        )
+        watchlist_config = WatchlistConfig(config_body)
+        # Exercise
+        nbytes = watchlist_config.nbytes
+        # Verify
+        assert len(watchlist_config) == 1000
+        assert nbytes < len(config_body) / 2
+        assert not hasattr(watchlist_config, "__dict__")
+        # Cleanup - none
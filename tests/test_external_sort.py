@@ -0,0 +1,93 @@
+import gzip
+import random
+
+from watchlist_api_client import external_sort
+from watchlist_api_client.data_structures import RetrievedConfig, WatchlistConfig
+
+
+def build_config_body(rows, line_ending=b'\n'):
+    return line_ending.join([b'sourceId,RTSsymbol'] + rows)
+
+
+class TestSortRowsExternally:
+    def test_rows_are_sorted_across_many_runs(self, tmp_path):
+        # Setup
+        rng = random.Random(0)
+        rows = [
+            f'{rng.randint(100, 2000)},F:FDAX{rng.randint(0, 500):04d}\\Z20'.encode()
+            for _ in range(5000)
+        ]
+        retrieved_config = RetrievedConfig(
+            "20201118T123052Z", build_config_body(rows, line_ending=b'\r\n'),
+        )
+        # Exercise
+        sorted_rows = list(
+            external_sort.sort_rows_externally(
+                retrieved_config, max_memory=1000, temporary_directory=tmp_path.as_posix(),
+            )
+        )
+        # Verify
+        assert sorted_rows == sorted({
+            (int(source_id), symbol.decode())
+            for source_id, _, symbol in (row.partition(b',') for row in rows)
+        })
+        assert list(tmp_path.iterdir()) == []
+        # Cleanup - none
+
+    def test_quoted_rows_are_unquoted(self):
+        # Setup - none
+        # Exercise
+        encoded_row = external_sort.encode_sortable_row('"0207","F:FDAX\\Z20"')
+        # Verify
+        assert external_sort.decode_sortable_row(encoded_row) == (207, "F:FDAX\\Z20")
+        # Cleanup - none
+
+    def test_runs_are_reduced_to_the_fan_in(self, tmp_path):
+        # Setup
+        runs = [
+            external_sort.write_run(
+                [external_sort.encode_sortable_row(f'{207 + index},F:FDAX\\Z20')],
+                tmp_path.as_posix(),
+            )
+            for index in range(10)
+        ]
+        # Exercise
+        reduced_runs = external_sort.reduce_runs(runs, tmp_path.as_posix(), fan_in=3)
+        # Verify
+        assert len(reduced_runs) <= 3
+        assert len(list(tmp_path.iterdir())) == len(reduced_runs)
+        assert [
+            external_sort.decode_sortable_row(encoded_row)
+            for encoded_row in external_sort.merge_runs(reduced_runs)
+        ] == [(207 + index, 'F:FDAX\\Z20') for index in range(10)]
+        # Cleanup - none
+
+    def test_compressed_file_without_final_line_ending_is_sorted(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv.gz")
+        path_to_file.write_bytes(
+            gzip.compress(build_config_body([b'1000,IRNB\\Z20', b'207,F:FDAX\\Z20']))
+        )
+        # Exercise
+        sorted_rows = list(external_sort.sort_rows_externally(path_to_file.as_posix()))
+        # Verify
+        assert sorted_rows == [(207, 'F:FDAX\\Z20'), (1000, 'IRNB\\Z20')]
+        # Cleanup - none
+
+    def test_configuration_without_rows_gives_no_rows(self):
+        # Setup
+        retrieved_config = RetrievedConfig("20201118T123052Z", b'sourceId,RTSsymbol\n')
+        # Exercise
+        sorted_rows = list(external_sort.sort_rows_externally(retrieved_config))
+        # Verify
+        assert sorted_rows == []
+        # Cleanup - none
+
+    def test_watchlist_config_is_iterated_directly(self):
+        # Setup
+        watchlist_config = WatchlistConfig(build_config_body([b'680,IRNB\\Z20', b'207,A']))
+        # Exercise
+        sorted_rows = list(external_sort.sort_rows_externally(watchlist_config))
+        # Verify
+        assert sorted_rows == [(207, 'A'), (680, 'IRNB\\Z20')]
+        # Cleanup - none
@@ -1,6 +1,7 @@
 import pytest
 import datetime
 import dateutil.tz
+import stat
 
 from watchlist_api_client import helpers
 
@@ -27,6 +28,46 @@ class TestParseUTCTimestamp:
         # Cleanup - none
 
 
+class TestParseCommonUTCTimestamp:
+    @pytest.mark.parametrize(
+        "raw_utc_timestamp, expected_timestamp", [
+            (
+                'Wed, 18 Nov 2020 15:23:52 GMT',
+                datetime.datetime(2020, 11, 18, 15, 23, 52, tzinfo=dateutil.tz.tzutc()),
+            ),
+            (
+                "2020-11-18T15:23:52Z",
+                datetime.datetime(2020, 11, 18, 15, 23, 52, tzinfo=dateutil.tz.tzutc()),
+            ),
+            (
+                "20201118T152352Z",
+                datetime.datetime(2020, 11, 18, 15, 23, 52, tzinfo=dateutil.tz.tzutc()),
+            ),
+            ("Fri, 20 November 2020 18:00:00 UTC", None),
+            ("2020-11-18T15:23:52+01:00", None),
+            ("2020-02-30T15:23:52Z", None),
+        ],
+    )
+    def test_parsing_of_common_formats(self, raw_utc_timestamp, expected_timestamp):
+        # Setup - none
+        # Exercise
+        parsed_timestamp = helpers.parse_common_utc_timestamp(raw_utc_timestamp)
+        # Verify
+        assert parsed_timestamp == expected_timestamp
+        # Cleanup - none
+
+    def test_other_formats_fall_back_to_dateutil(self):
+        # Setup
+        raw_utc_timestamp = "Fri, 20 November 2020 18:00:00 UTC"
+        # Exercise
+        parsed_timestamp = helpers.parse_utc_timestamp(raw_utc_timestamp)
+        # Verify
+        assert parsed_timestamp == datetime.datetime(
+            2020, 11, 20, 18, 0, 0, tzinfo=dateutil.tz.tzutc(),
+        )
+        # Cleanup - none
+
+
 class TestFormatUTCTimestamp:
     @pytest.mark.parametrize(
         "datetime_object, date_format, formatted_timestamp", [
@@ -76,6 +117,19 @@ class TestConvertRawUTCTimestampToString:
         # Cleanup - none
 
 
+    def test_conversions_are_memoized(self):
+        # Setup
+        raw_timestamp = "Thu, 19 Nov 2020 15:23:52 GMT"
+        helpers.convert_raw_utc_timestamp_to_string(raw_timestamp)
+        hits = helpers.convert_raw_utc_timestamp_to_string.cache_info().hits
+        # Exercise
+        converted_timestamp = helpers.convert_raw_utc_timestamp_to_string(raw_timestamp)
+        # Verify
+        assert converted_timestamp == "2020-11-19T15:23:52Z"
+        assert helpers.convert_raw_utc_timestamp_to_string.cache_info().hits == hits + 1
+        # Cleanup - none
+
+
 class TestPrepareTimestampQueryString:
     def test_preparation_of_query_string(self):
         # Setup
@@ -122,3 +176,294 @@ class TestJoinBaseUrlAndQueryString:
         )
         assert generated_url == expected_url
         # Cleanup - none
+
+
+@pytest.fixture(params=["numpy", "pure python"])
+def batch_backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(helpers, "import_numpy", lambda: None)
+    return request.param
+
+
+class TestFormatUTCTimestamps:
+    @pytest.mark.parametrize(
+        "date_format, formatted_timestamps", [
+            ("%Y-%m-%dT%H:%M:%SZ", ["2020-11-18T15:23:52Z", "2020-11-18T16:00:00Z"]),
+            ("%Y%m%dT%H%M%SZ", ["20201118T152352Z", "20201118T160000Z"]),
+        ],
+    )
+    def test_formatting_of_datetime_objects(self, date_format, formatted_timestamps):
+        # Setup
+        utc_timestamps = [
+            datetime.datetime(2020, 11, 18, 15, 23, 52, 999, tzinfo=dateutil.tz.tzutc()),
+            datetime.datetime(2020, 11, 18, 16),
+        ]
+        # Exercise
+        timestamps = helpers.format_utc_timestamps(utc_timestamps, date_format)
+        # Verify
+        assert timestamps == formatted_timestamps
+        assert timestamps == [
+            helpers.format_utc_timestamp(utc_timestamp, date_format)
+            for utc_timestamp in utc_timestamps
+        ]
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "date_format, formatted_timestamps", [
+            ("%Y-%m-%dT%H:%M:%SZ", ["2020-11-18T15:23:52Z", "2020-11-18T16:00:00Z"]),
+            ("%Y%m%dT%H%M%SZ", ["20201118T152352Z", "20201118T160000Z"]),
+        ],
+    )
+    def test_formatting_of_datetime64_array(self, date_format, formatted_timestamps):
+        # Setup
+        numpy = pytest.importorskip("numpy")
+        utc_timestamps = numpy.array(
+            ["2020-11-18T15:23:52.250", "2020-11-18T16:00"], dtype="datetime64[ms]",
+        )
+        # Exercise
+        timestamps = helpers.format_utc_timestamps(utc_timestamps, date_format)
+        # Verify
+        assert timestamps == formatted_timestamps
+        # Cleanup - none
+
+
+class TestFormatUTCTimestampRange:
+    def test_range_includes_both_ends(self, batch_backend):
+        # Setup
+        start = datetime.datetime(2020, 11, 18, 23, tzinfo=dateutil.tz.tzutc())
+        end = datetime.datetime(2020, 11, 19, 1, tzinfo=dateutil.tz.tzutc())
+        # Exercise
+        timestamps = helpers.format_utc_timestamp_range(start, end, datetime.timedelta(hours=1))
+        # Verify
+        assert timestamps == [
+            "2020-11-18T23:00:00Z", "2020-11-19T00:00:00Z", "2020-11-19T01:00:00Z",
+        ]
+        # Cleanup - none
+
+    def test_range_with_other_format_and_end_off_step(self, batch_backend):
+        # Setup
+        start = datetime.datetime(2020, 11, 18, 10, 0, 30)
+        end = datetime.datetime(2020, 11, 18, 10, 50)
+        # Exercise
+        timestamps = helpers.format_utc_timestamp_range(
+            start, end, datetime.timedelta(minutes=20), "%Y%m%dT%H%M%SZ",
+        )
+        # Verify
+        assert timestamps == ["20201118T100030Z", "20201118T102030Z", "20201118T104030Z"]
+        # Cleanup - none
+
+    def test_empty_range(self, batch_backend):
+        # Setup
+        start = datetime.datetime(2020, 11, 19)
+        end = datetime.datetime(2020, 11, 18)
+        # Exercise
+        timestamps = helpers.format_utc_timestamp_range(start, end, datetime.timedelta(hours=1))
+        # Verify
+        assert timestamps == []
+        # Cleanup - none
+
+    def test_non_positive_step_is_rejected(self):
+        # Setup
+        start = datetime.datetime(2020, 11, 18)
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError):
+            helpers.format_utc_timestamp_range(start, start, datetime.timedelta(0))
+        # Cleanup - none
+
+
+class TestConvertRawUTCTimestampsToStrings:
+    def test_conversion_of_iso_timestamps(self):
+        # Setup
+        raw_timestamps = ("2020-11-18T15:23:52Z", "2020-11-18T16:00:00Z")
+        # Exercise
+        timestamps = helpers.convert_raw_utc_timestamps_to_strings(raw_timestamps)
+        # Verify
+        assert timestamps == ["2020-11-18T15:23:52Z", "2020-11-18T16:00:00Z"]
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "date_format", ["%Y-%m-%dT%H:%M:%SZ", "%Y%m%dT%H%M%SZ", "%d/%m/%Y %H:%M"],
+    )
+    def test_conversion_matches_single_conversions(self, date_format):
+        # Setup
+        raw_timestamps = [
+            "2020-11-18T15:23:52Z",
+            "20201118T160000Z",
+            "Wed, 18 Nov 2020 17:00:00 GMT",
+            "Wed, 18 November 2020 18:00:00 UTC",
+        ]
+        # Exercise
+        timestamps = helpers.convert_raw_utc_timestamps_to_strings(raw_timestamps, date_format)
+        # Verify
+        assert timestamps == [
+            helpers.convert_raw_utc_timestamp_to_string(raw_timestamp, date_format)
+            for raw_timestamp in raw_timestamps
+        ]
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "invalid_timestamp", ["2020-13-45T99:99:99Z", "2021-02-29T12:00:00Z"],
+    )
+    def test_invalid_iso_timestamps_are_rejected(self, invalid_timestamp):
+        # Setup
+        raw_timestamps = ["2020-11-18T15:23:52Z", invalid_timestamp]
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError):
+            helpers.convert_raw_utc_timestamp_to_string(invalid_timestamp)
+        with pytest.raises(ValueError):
+            helpers.convert_raw_utc_timestamps_to_strings(raw_timestamps)
+        # Cleanup - none
+
+    def test_conversion_of_datetime64_array(self):
+        # Setup
+        numpy = pytest.importorskip("numpy")
+        raw_timestamps = numpy.array(["2020-11-18T15:23:52"], dtype="datetime64[s]")
+        # Exercise
+        timestamps = helpers.convert_raw_utc_timestamps_to_strings(raw_timestamps)
+        # Verify
+        assert timestamps == ["2020-11-18T15:23:52Z"]
+        # Cleanup - none
+
+
+class TestPrepareTimestampQueryStrings:
+    def test_preparation_of_query_strings(self):
+        # Setup
+        timestamps = ["2020-11-18T15:23:52Z", "2020-11-18T16:00:00Z"]
+        # Exercise
+        query_strings = helpers.prepare_timestamp_query_strings(timestamps)
+        # Verify
+        assert query_strings == [
+            "dateTime=2020-11-18T15:23:52Z", "dateTime=2020-11-18T16:00:00Z",
+        ]
+        # Cleanup - none
+
+    def test_values_needing_escaping_are_encoded(self):
+        # Setup
+        timestamps = ["2020-11-18T15:23:52Z", "2020-11-18 15:23:52+00:00"]
+        # Exercise
+        query_strings = helpers.prepare_timestamp_query_strings(timestamps)
+        # Verify
+        assert query_strings == [
+            helpers.prepare_timestamp_query_string(timestamp) for timestamp in timestamps
+        ]
+        assert query_strings[1] == "dateTime=2020-11-18+15:23:52%2B00:00"
+        # Cleanup - none
+
+
+    def test_line_feeds_are_encoded(self):
+        # Setup
+        timestamps = ["2020-11-18T15:23:52Z\n2020-11-18T16:00:00Z"]
+        # Exercise
+        query_strings = helpers.prepare_timestamp_query_strings(timestamps)
+        # Verify
+        assert query_strings == ["dateTime=2020-11-18T15:23:52Z%0A2020-11-18T16:00:00Z"]
+        # Cleanup - none
+
+
+class TestJoinBaseUrlAndQueryStrings:
+    @pytest.mark.parametrize(
+        "base_url", [
+            "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists",
+            "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists/",
+        ],
+    )
+    def test_joining_of_combined_urls(self, base_url):
+        # Setup
+        query_strings = ["dateTime=2020-11-18T15:23:52Z", "dateTime=2020-11-18T16:00:00Z"]
+        # Exercise
+        urls = helpers.join_base_url_and_query_strings(base_url, query_strings)
+        # Verify
+        assert urls == [
+            helpers.join_base_url_and_query_string(base_url, query_string)
+            for query_string in query_strings
+        ]
+        assert urls[0] == (
+            "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
+            "?dateTime=2020-11-18T15:23:52Z"
+        )
+        # Cleanup - none
+
+
+class TestComputeFileDigest:
+    def test_digest_of_identical_contents(self, tmp_path):
+        # Setup
+        first_file = tmp_path.joinpath("first.csv")
+        second_file = tmp_path.joinpath("second.csv")
+        first_file.write_bytes(b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n")
+        second_file.write_bytes(b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n")
+        # Exercise
+        first_digest = helpers.compute_file_digest(first_file)
+        second_digest = helpers.compute_file_digest(second_file)
+        # Verify
+        assert first_digest == second_digest
+        assert first_digest == helpers.compute_digest(
+            [b"sourceId,RTSsymbol\n", b"207,F:FDAX\\Z20\n"],
+        )
+        # Cleanup - none
+
+
+class TestWriteFileAtomically:
+    def test_writing_of_chunks(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("nested", "watchlist_config.csv")
+        # Exercise
+        size = helpers.write_file_atomically(
+            path_to_file.as_posix(), iter([b'sourceId,RTSsymbol\n', b'207,F:FDAX\\Z20\n']),
+        )
+        # Verify
+        assert path_to_file.read_bytes() == b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n'
+        assert size == 34
+        assert list(path_to_file.parent.iterdir()) == [path_to_file]
+        # Cleanup - none
+
+    def test_written_file_follows_umask(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        # Exercise
+        helpers.write_file_atomically(path_to_file.as_posix(), iter([b'sourceId,RTSsymbol\n']))
+        # Verify
+        assert stat.S_IMODE(path_to_file.stat().st_mode) == 0o666 & ~helpers.get_umask()
+        # Cleanup - none
+
+    def test_interrupted_writing_keeps_previous_file(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b'previous content')
+
+        def interrupted_chunks():
+            yield b'sourceId,RTSsymbol\n'
+            raise ConnectionError()
+
+        # Exercise
+        with pytest.raises(ConnectionError):
+            helpers.write_file_atomically(path_to_file.as_posix(), interrupted_chunks())
+        # Verify
+        assert path_to_file.read_bytes() == b'previous content'
+        assert list(tmp_path.iterdir()) == [path_to_file]
+        # Cleanup - none
+
+
+class TestParseRow:
+    @pytest.mark.parametrize("line", ['207,F:FDAX\\Z20', '0207,F:FDAX\\Z20', '"207","F:FDAX\\Z20"'])
+    def test_rows_are_unquoted_and_normalised(self, line):
+        # Setup - none
+        # Exercise
+        row = helpers.parse_row(line)
+        # Verify
+        assert row == (207, "F:FDAX\\Z20")
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "line", ['sourceId,RTSsymbol', '"207,F:FDAX\\Z20', ',F:FDAX\\Z20', '207,'],
+    )
+    def test_malformed_rows_are_rejected(self, line):
+        # Setup - none
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError, match="Malformed row"):
+            helpers.parse_row(line)
+        # Cleanup - none
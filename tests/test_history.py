@@ -0,0 +1,116 @@
+import datetime
+import time
+
+import dateutil.tz
+import pytest
+
+from conftest import LatencyRequestHandler
+from watchlist_api_client import history
+
+
+class TestParseStep:
+    @pytest.mark.parametrize(
+        "raw_step, expected_step",
+        [
+            ("90s", datetime.timedelta(seconds=90)),
+            ("30m", datetime.timedelta(minutes=30)),
+            ("1h", datetime.timedelta(hours=1)),
+            ("7d", datetime.timedelta(days=7)),
+            ("2w", datetime.timedelta(weeks=2)),
+        ],
+    )
+    def test_parsing_of_valid_steps(self, raw_step, expected_step):
+        # Setup - none
+        # Exercise
+        step = history.parse_step(raw_step)
+        # Verify
+        assert step == expected_step
+        # Cleanup - none
+
+    @pytest.mark.parametrize("raw_step", ["0h", "1y", "h", "-1h", ""])
+    def test_parsing_of_invalid_steps(self, raw_step):
+        # Setup - none
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError):
+            history.parse_step(raw_step)
+        # Cleanup - none
+
+
+class TestGenerateTimestamps:
+    def test_generation_includes_both_ends(self):
+        # Setup
+        start = datetime.datetime(2020, 11, 18, 10, tzinfo=dateutil.tz.tzutc())
+        end = datetime.datetime(2020, 11, 18, 12, tzinfo=dateutil.tz.tzutc())
+        # Exercise
+        timestamps = list(history.generate_timestamps(start, end, datetime.timedelta(hours=1)))
+        # Verify
+        assert [timestamp.hour for timestamp in timestamps] == [10, 11, 12]
+        # Cleanup - none
+
+
+class TestPrepareHistoryUrl:
+    def test_preparation_of_url(self):
+        # Setup
+        timestamp = datetime.datetime(2020, 11, 18, 12, 30, 52, tzinfo=dateutil.tz.tzutc())
+        # Exercise
+        url = history.prepare_history_url(
+            "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists",
+            timestamp,
+        )
+        # Verify
+        assert url == (
+            "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
+            "?dateTime=2020-11-18T12:30:52Z"
+        )
+        # Cleanup - none
+
+
+class TestRetrieveHistory:
+    def test_concurrent_retrieval_of_history(self, latency_server, tmp_path):
+        # Setup
+        start = datetime.datetime(2020, 11, 18, 0, tzinfo=dateutil.tz.tzutc())
+        end = datetime.datetime(2020, 11, 18, 7, tzinfo=dateutil.tz.tzutc())
+        # Exercise
+        started = time.perf_counter()
+        history_entries = list(history.retrieve_history(
+            latency_server,
+            ("User", "Password"),
+            tmp_path.joinpath("history").as_posix(),
+            start,
+            end,
+            datetime.timedelta(hours=1),
+            max_workers=8,
+        ))
+        elapsed = time.perf_counter() - started
+        # Verify
+        assert len(history_entries) == 8
+        assert all(history_entry.error is None for history_entry in history_entries)
+        assert sorted(
+            history_entry.retrieved_config_file.timestamp for history_entry in history_entries
+        ) == [f"20201118T0{hour}0000Z" for hour in range(8)]
+        assert all(
+            path.read_bytes() == LatencyRequestHandler.config_body
+            for path in tmp_path.joinpath("history").iterdir()
+        )
+        assert elapsed < 8 * LatencyRequestHandler.latency / 2
+        # Cleanup - none
+
+    def test_missing_configurations_are_reported(self, latency_server, tmp_path):
+        # Setup
+        start = datetime.datetime(1999, 12, 31, 23, tzinfo=dateutil.tz.tzutc())
+        end = datetime.datetime(2000, 1, 1, 0, tzinfo=dateutil.tz.tzutc())
+        # Exercise
+        history_entries = sorted(history.retrieve_history(
+            latency_server,
+            ("User", "Password"),
+            tmp_path.joinpath("history").as_posix(),
+            start,
+            end,
+            datetime.timedelta(hours=1),
+        ))
+        # Verify
+        assert "404" in history_entries[0].error
+        assert history_entries[0].retrieved_config_file is None
+        assert history_entries[1].error is None
+        # Cleanup - none
@@ -0,0 +1,182 @@
+import gzip
+
+import pytest
+
+from watchlist_api_client import history_database, snapshot_store
+from watchlist_api_client.data_structures import MembershipInterval, RetrievedConfig
+
+SNAPSHOTS = [
+    RetrievedConfig(
+        "20201118T120000Z", b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n680,IRNB\\Z20\n',
+    ),
+    RetrievedConfig(
+        "20201118T130000Z", b'sourceId,RTSsymbol\r\n207,F:FDAX\\Z20\r\n748,IRNB\\Z20\r\n',
+    ),
+    RetrievedConfig(
+        "20201118T140000Z", b'sourceId,RTSsymbol\r\n207,F:FDAX\\Z20\r\n748,IRNB\\Z20\r\n',
+    ),
+    RetrievedConfig(
+        "20201118T150000Z",
+        b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n207,F:FDAX\\Z20\n680,IRNB\\Z20\n',
+    ),
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    history_content = history_database.HistoryDatabase(tmp_path.joinpath("history.db").as_posix())
+    for retrieved_config in SNAPSHOTS:
+        history_content.ingest(retrieved_config)
+    yield history_content
+    history_content.close()
+
+
+class TestHistoryDatabase:
+    def test_sources_holding_a_symbol_over_time(self, database):
+        # Setup - none
+        # Exercise
+        # Verify
+        assert database.sources_holding("IRNB\\Z20", "20201118T115959Z") == []
+        assert database.sources_holding("IRNB\\Z20", "20201118T120000Z") == [680]
+        assert database.sources_holding("IRNB\\Z20", "20201118T143000Z") == [748]
+        assert database.sources_holding("IRNB\\Z20") == [680]
+        # Cleanup - none
+
+    def test_symbols_of_a_source_over_time(self, database):
+        # Setup - none
+        # Exercise
+        # Verify
+        assert database.symbols_of(748, "20201118T130000Z") == ["IRNB\\Z20"]
+        assert database.symbols_of(748) == []
+        assert database.symbols_of(207) == ["F:FDAX\\Z20"]
+        # Cleanup - none
+
+    def test_first_addition_of_a_symbol(self, database):
+        # Setup - none
+        # Exercise
+        # Verify
+        assert database.first_added("IRNB\\Z20") == "20201118T120000Z"
+        assert database.first_added("IRNB\\Z20", source_id=748) == "20201118T130000Z"
+        assert database.first_added("F:FESX\\Z20") is None
+        # Cleanup - none
+
+    def test_intervals_are_opened_and_closed(self, database):
+        # Setup - none
+        # Exercise
+        membership_intervals = database.symbol_history("IRNB\\Z20")
+        # Verify
+        assert membership_intervals == [
+            MembershipInterval(680, "IRNB\\Z20", "20201118T120000Z", "20201118T130000Z"),
+            MembershipInterval(748, "IRNB\\Z20", "20201118T130000Z", "20201118T150000Z"),
+            MembershipInterval(680, "IRNB\\Z20", "20201118T150000Z", None),
+        ]
+        assert database.symbol_history("F:FDAX\\Z20") == [
+            MembershipInterval(207, "F:FDAX\\Z20", "20201118T120000Z", None),
+        ]
+        # Cleanup - none
+
+    def test_snapshots_are_recorded(self, database):
+        # Setup - none
+        # Exercise
+        snapshots = database.snapshots()
+        # Verify
+        assert list(snapshots) == [retrieved_config.timestamp for retrieved_config in SNAPSHOTS]
+        assert snapshots["20201118T130000Z"] == snapshots["20201118T140000Z"]
+        # Cleanup - none
+
+    def test_ingestion_order_is_enforced(self, database):
+        # Setup - none
+        # Exercise
+        # Verify
+        assert not database.ingest(SNAPSHOTS[-1])
+        with pytest.raises(ValueError):
+            database.ingest(SNAPSHOTS[0]._replace(timestamp="20201118T100000Z"))
+        # Cleanup - none
+
+
+    def test_quoted_rows_are_unquoted(self, database):
+        # Setup
+        retrieved_config = RetrievedConfig(
+            "20201118T160000Z", b'sourceId,RTSsymbol\n"207","F:FDAX\\Z20"\n',
+        )
+        # Exercise
+        database.ingest(retrieved_config)
+        # Verify
+        assert database.symbols_of(207) == ["F:FDAX\\Z20"]
+        # Cleanup - none
+
+    def test_malformed_row_is_rejected_without_ingestion(self, database):
+        # Setup
+        retrieved_config = RetrievedConfig(
+            "20201118T160000Z", b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\nF:FESX\\Z20\n',
+        )
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError, match="Malformed row"):
+            database.ingest(retrieved_config)
+        assert len(database.snapshots()) == len(SNAPSHOTS)
+        assert database.symbols_of(680) == ["IRNB\\Z20"]
+        # Cleanup - none
+
+
+class TestFindRetrievedConfigFiles:
+    def test_files_and_stores_are_ingested_in_order(self, tmp_path):
+        # Setup
+        retrieved_directory = tmp_path.joinpath("retrieved")
+        retrieved_directory.mkdir()
+        retrieved_directory.joinpath("watchlist_config@20201118T120000Z.csv").write_bytes(
+            SNAPSHOTS[0].config_body,
+        )
+        retrieved_directory.joinpath("watchlist_config@20201118T150000Z.csv.gz").write_bytes(
+            gzip.compress(SNAPSHOTS[3].config_body),
+        )
+        store = snapshot_store.SnapshotStore(tmp_path.joinpath("store").as_posix())
+        store.add(SNAPSHOTS[1])
+        store.add(SNAPSHOTS[2])
+        # Exercise
+        retrieved_config_files = history_database.find_retrieved_config_files(
+            [retrieved_directory.as_posix(), store.directory.as_posix()],
+        )
+        with history_database.HistoryDatabase(
+            tmp_path.joinpath("history.db").as_posix(),
+        ) as history_content:
+            for retrieved_config_file, digest in retrieved_config_files:
+                history_content.ingest_file(retrieved_config_file, digest=digest)
+            membership_intervals = history_content.symbol_history("IRNB\\Z20")
+        # Verify
+        assert [
+            retrieved_config_file.timestamp for retrieved_config_file, _ in retrieved_config_files
+        ] == [retrieved_config.timestamp for retrieved_config in SNAPSHOTS]
+        assert [membership_interval.source_id for membership_interval in membership_intervals] == [
+            680, 748, 680,
+        ]
+        # Cleanup - none
+
+    def test_store_is_ingested_incrementally(self, tmp_path):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.joinpath("store").as_posix())
+        for retrieved_config in SNAPSHOTS[:2]:
+            store.add(retrieved_config)
+        history_content = history_database.HistoryDatabase(
+            tmp_path.joinpath("history.db").as_posix(),
+        )
+        history_content.ingest_store(store)
+        for retrieved_config in SNAPSHOTS[2:]:
+            store.add(retrieved_config)
+        # Exercise
+        ingested_snapshots = history_content.ingest_store(store)
+        # Verify
+        assert ingested_snapshots == 2
+        assert len(history_content.snapshots()) == 4
+        # Cleanup
+        history_content.close()
+
+    def test_file_without_timestamp_is_rejected(self, tmp_path):
+        # Setup
+        path_to_config_file = tmp_path.joinpath("foo.csv")
+        path_to_config_file.write_bytes(SNAPSHOTS[0].config_body)
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError, match="Cannot infer the timestamp"):
+            history_database.find_retrieved_config_files([path_to_config_file.as_posix()])
+        # Cleanup - none
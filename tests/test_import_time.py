@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+import watchlist_api_client
+
+# The cumulative import time of 'watchlist --help', in microseconds, which was about 300 ms
+# before the dependencies were imported lazily and is about 50 ms after.
+HELP_IMPORT_TIME_BUDGET = 150_000
+# The budget depends on the speed of the machine, so it is only checked on request.
+TIMING_TESTS_ENVIRONMENT_VARIABLE = "WATCHLIST_API_CLIENT_TIMING_TESTS"
+HELP_SCRIPT = (
+    "from watchlist_api_client.scripts.cli import watchlist; "
+    "watchlist.main(['--help'], standalone_mode=False)"
+)
+HEAVY_MODULES = frozenset(
+    ["asyncio", "csv", "dateutil", "numpy", "requests", "sqlite3", "urllib3"],
+)
+
+
+def run_with_import_times(script: str) -> Dict[str, int]:
+    """Runs a script with -X importtime and returns the cumulative import time of each module.
+
+    The times are in microseconds. The names of the modules keep the indentation showing
+    which module imported them, the top-level ones being indented by a single space.
+    """
+    completed_process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    import_times = {}
+    for line in completed_process.stderr.splitlines():
+        _, cumulative_time, module = line.split("|")
+        if cumulative_time.strip().isdigit():
+            import_times[module.rstrip()] = int(cumulative_time)
+    return import_times
+
+
+def measure_import_times(script: str) -> Dict[str, int]:
+    """Returns the import times of a script, leaving out the imports of interpreter startup."""
+    startup_modules = {module.strip() for module in run_with_import_times("pass")}
+    return {
+        module: cumulative_time
+        for module, cumulative_time in run_with_import_times(script).items()
+        if module.strip() not in startup_modules
+    }
+
+
+class TestPackageLazyImport:
+    def test_submodules_are_accessible(self):
+        # Setup - none
+        # Exercise
+        submodules = [getattr(watchlist_api_client, name) for name in watchlist_api_client.__all__]
+        # Verify
+        assert [submodule.__name__ for submodule in submodules] == [
+            f"watchlist_api_client.{name}" for name in watchlist_api_client.__all__
+        ]
+        assert set(watchlist_api_client.__all__) <= set(dir(watchlist_api_client))
+        # Cleanup - none
+
+    def test_unknown_attribute_is_rejected(self):
+        # Setup - none
+        # Exercise
+        # Verify
+        with pytest.raises(AttributeError):
+            watchlist_api_client.unknown_module
+        # Cleanup - none
+
+
+class TestHelpImportTime:
+    def test_help_does_not_import_heavy_modules(self):
+        # Setup - none
+        # Exercise
+        import_times = measure_import_times(HELP_SCRIPT)
+        # Verify
+        imported_packages = {module.strip().partition(".")[0] for module in import_times}
+        assert not imported_packages & HEAVY_MODULES
+        # Cleanup - none
+
+    def test_help_only_runs_the_defaults_of_the_library(self):
+        # Setup - none
+        # Exercise
+        import_times = measure_import_times(HELP_SCRIPT)
+        # Verify
+        library_modules = {
+            module.strip() for module in import_times
+            if module.strip().startswith("watchlist_api_client")
+        }
+        assert library_modules <= {
+            "watchlist_api_client",
+            "watchlist_api_client.defaults",
+            "watchlist_api_client.scripts",
+            "watchlist_api_client.scripts.cli",
+        }
+        # Cleanup - none
+
+    @pytest.mark.skipif(
+        not os.environ.get(TIMING_TESTS_ENVIRONMENT_VARIABLE),
+        reason=f"set {TIMING_TESTS_ENVIRONMENT_VARIABLE} to check the import time budget",
+    )
+    def test_help_import_time_is_within_budget(self):
+        # Setup
+        # The fastest of a few runs is kept, to be robust to a busy machine.
+        measurements = [measure_import_times(HELP_SCRIPT) for _ in range(3)]
+        # Exercise
+        import_time = min(
+            sum(
+                cumulative_time
+                for module, cumulative_time in import_times.items()
+                if not module.startswith("  ")
+            )
+            for import_times in measurements
+        )
+        # Verify
+        assert import_time <= HELP_IMPORT_TIME_BUDGET
+        # Cleanup - none
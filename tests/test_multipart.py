@@ -0,0 +1,74 @@
+import gzip
+import io
+
+import pytest
+import urllib3
+
+from watchlist_api_client import multipart
+
+
+class TestMultipartFileStream:
+    def test_agreement_with_requests_multipart_encoding(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n")
+        field = urllib3.fields.RequestField("file", path_to_file.read_bytes(), filename="file")
+        field.make_multipart(content_type=None)
+        expected_body, expected_content_type = urllib3.encode_multipart_formdata(
+            [field], boundary="0123456789abcdef",
+        )
+        # Exercise
+        with path_to_file.open('rb') as config_file:
+            multipart_stream = multipart.MultipartFileStream(
+                config_file, boundary="0123456789abcdef",
+            )
+            streamed_body = multipart_stream.read()
+        # Verify
+        assert streamed_body == expected_body
+        assert multipart_stream.content_type == expected_content_type
+        assert len(multipart_stream) == len(expected_body)
+        # Cleanup - none
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1024])
+    def test_iteration_in_bounded_chunks(self, chunk_size, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"sourceId,RTSsymbol\n" + b"207,F:FDAX\\Z20\n" * 100)
+        with path_to_file.open('rb') as config_file:
+            expected_body = multipart.MultipartFileStream(config_file, boundary="b").read()
+        # Exercise
+        with path_to_file.open('rb') as config_file:
+            chunks = list(
+                multipart.MultipartFileStream(config_file, boundary="b", chunk_size=chunk_size)
+            )
+        # Verify
+        assert all(len(chunk) <= chunk_size for chunk in chunks)
+        assert b"".join(chunks) == expected_body
+        # Cleanup - none
+
+    def test_reading_past_the_end_of_the_body(self):
+        # Setup
+        file_object = io.BufferedReader(io.FileIO(__file__, 'rb'))
+        multipart_stream = multipart.MultipartFileStream(file_object, boundary="b")
+        multipart_stream.read()
+        # Exercise
+        remaining_body = multipart_stream.read(10)
+        # Verify
+        assert remaining_body == b""
+        # Cleanup
+        file_object.close()
+
+    def test_length_of_stream_of_unknown_size(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv.gz")
+        path_to_file.write_bytes(gzip.compress(b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n"))
+        # Exercise
+        with gzip.open(path_to_file, 'rb') as config_file:
+            multipart_stream = multipart.MultipartFileStream(config_file, boundary="b")
+            streamed_body = multipart_stream.read()
+        # Verify
+        assert multipart_stream.length is None
+        assert b"\r\n\r\nsourceId,RTSsymbol\n207,F:FDAX\\Z20\n\r\n--b--\r\n" in streamed_body
+        with pytest.raises(TypeError):
+            len(multipart_stream)
+        # Cleanup - none
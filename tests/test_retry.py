@@ -0,0 +1,255 @@
+import json
+import pathlib
+
+import pytest
+import requests
+import responses
+
+from watchlist_api_client import client, retry
+
+URL = "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
+CONFIG_BODY = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n'
+DATE_HEADER = {"Date": "Fri, 20 Nov 2020 11:47:40 GMT"}
+
+
+@pytest.fixture
+def path_to_config_file():
+    return (
+        pathlib.Path(__file__).resolve().parent /
+        "static_data" /
+        "watchlist_config_20201118.csv"
+    ).as_posix()
+
+
+@pytest.fixture
+def recorded_sleeps(mocker):
+    """A pytest fixture that replaces time.sleep in the client and records the delays."""
+    sleeps = []
+    mocker.patch.object(client.time, "sleep", side_effect=sleeps.append)
+    return sleeps
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRetryPolicy:
+    def test_backoff_without_jitter_is_capped(self):
+        # Setup
+        retry_policy = retry.RetryPolicy(backoff_factor=0.5, max_backoff=3.0, jitter=False)
+        # Exercise
+        backoffs = [retry_policy.compute_backoff(attempt) for attempt in range(1, 6)]
+        # Verify
+        assert backoffs == [0.5, 1.0, 2.0, 3.0, 3.0]
+        # Cleanup - none
+
+    def test_backoff_with_jitter_is_bounded(self):
+        # Setup
+        retry_policy = retry.RetryPolicy(backoff_factor=0.5, max_backoff=3.0)
+        # Exercise
+        backoffs = [retry_policy.compute_backoff(4) for _ in range(100)]
+        # Verify
+        assert all(0 <= backoff <= 3.0 for backoff in backoffs)
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "method, retry_post, expected",
+        [("GET", False, True), ("POST", False, False), ("POST", True, True)],
+    )
+    def test_retry_of_methods(self, method, retry_post, expected):
+        # Setup
+        retry_policy = retry.RetryPolicy(retry_post=retry_post)
+        # Exercise
+        allowed = retry_policy.allows_retry_of(method)
+        # Verify
+        assert allowed is expected
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "retry_after, expected", [("7", 7.0), ("600", 60.0), (None, 0.5), ("soon", 0.5)],
+    )
+    def test_delay_follows_retry_after(self, retry_after, expected):
+        # Setup
+        retry_policy = retry.RetryPolicy(backoff_factor=0.25, jitter=False)
+        # Exercise
+        delay = retry_policy.compute_delay(2, retry_after)
+        # Verify
+        assert delay == expected
+        # Cleanup - none
+
+
+class TestParseRetryAfter:
+    @pytest.mark.parametrize(
+        "retry_after, expected", [("7", 7.0), (None, None), ("soon", None)],
+    )
+    def test_parsing_of_retry_after(self, retry_after, expected):
+        # Setup - none
+        # Exercise
+        parsed_retry_after = retry.parse_retry_after(retry_after)
+        # Verify
+        assert parsed_retry_after == expected
+        # Cleanup - none
+
+    def test_parsing_of_past_http_date(self):
+        # Setup - none
+        # Exercise
+        parsed_retry_after = retry.parse_retry_after("Wed, 18 Nov 2020 10:06:41 GMT")
+        # Verify
+        assert parsed_retry_after == 0.0
+        # Cleanup - none
+
+
+class TestCircuitBreaker:
+    def test_circuit_opens_after_threshold(self):
+        # Setup
+        circuit_breaker = retry.CircuitBreaker(failure_threshold=2, clock=FakeClock())
+        # Exercise
+        circuit_breaker.record_failure()
+        circuit_breaker.record_failure()
+        # Verify
+        assert circuit_breaker.is_open
+        with pytest.raises(retry.CircuitOpenError):
+            circuit_breaker.before_request()
+        # Cleanup - none
+
+    def test_success_resets_consecutive_failures(self):
+        # Setup
+        circuit_breaker = retry.CircuitBreaker(failure_threshold=2, clock=FakeClock())
+        # Exercise
+        circuit_breaker.record_failure()
+        circuit_breaker.record_success()
+        circuit_breaker.record_failure()
+        # Verify
+        assert not circuit_breaker.is_open
+        # Cleanup - none
+
+    def test_half_open_circuit_lets_a_single_trial_through(self):
+        # Setup
+        clock = FakeClock()
+        circuit_breaker = retry.CircuitBreaker(
+            failure_threshold=1, reset_timeout=10.0, clock=clock,
+        )
+        circuit_breaker.record_failure()
+        clock.now = 11.0
+        # Exercise
+        circuit_breaker.before_request()
+        # Verify
+        with pytest.raises(retry.CircuitOpenError):
+            circuit_breaker.before_request()
+        circuit_breaker.record_success()
+        circuit_breaker.before_request()
+        # Cleanup - none
+
+
+class TestSendWithRetries:
+    def test_retrieval_is_retried_after_server_errors(self, mocked_response, recorded_sleeps):
+        # Setup
+        mocked_response.add(responses.GET, URL, status=503)
+        mocked_response.add(responses.GET, URL, status=502)
+        mocked_response.add(responses.GET, URL, body=CONFIG_BODY, status=200, headers=DATE_HEADER)
+        retry_policy = retry.RetryPolicy(jitter=False)
+        # Exercise
+        with client.WatchlistClient(
+            ("User", "Password"), retry_policy=retry_policy,
+        ) as watchlist_client:
+            retrieved_configuration = watchlist_client.retrieve_active()
+        # Verify
+        assert retrieved_configuration.config_body == CONFIG_BODY
+        assert len(mocked_response.calls) == 3
+        assert recorded_sleeps == [0.25, 0.5]
+        # Cleanup - none
+
+    def test_retry_after_header_is_honoured(self, mocked_response, recorded_sleeps):
+        # Setup
+        mocked_response.add(responses.GET, URL, status=429, headers={"Retry-After": "120"})
+        mocked_response.add(responses.GET, URL, body=CONFIG_BODY, status=200, headers=DATE_HEADER)
+        # Exercise
+        with client.WatchlistClient(("User", "Password")) as watchlist_client:
+            watchlist_client.retrieve_active()
+        # Verify
+        assert recorded_sleeps == [60.0]
+        # Cleanup - none
+
+    def test_last_response_is_returned_when_attempts_are_exhausted(
+        self, mocked_response, recorded_sleeps,
+    ):
+        # Setup
+        mocked_response.add(responses.GET, URL, status=500)
+        retry_policy = retry.RetryPolicy(max_attempts=3)
+        # Exercise
+        # Verify
+        with client.WatchlistClient(
+            ("User", "Password"), retry_policy=retry_policy,
+        ) as watchlist_client:
+            with pytest.raises(requests.exceptions.HTTPError) as error:
+                watchlist_client.retrieve_active()
+        assert str(500) in str(error.value)
+        assert len(mocked_response.calls) == 3
+        # Cleanup - none
+
+    def test_connection_errors_are_retried(self, mocked_response, recorded_sleeps):
+        # Setup
+        mocked_response.add(responses.GET, URL, body=requests.exceptions.ConnectionError())
+        mocked_response.add(responses.GET, URL, body=CONFIG_BODY, status=200, headers=DATE_HEADER)
+        # Exercise
+        with client.WatchlistClient(("User", "Password")) as watchlist_client:
+            retrieved_configuration = watchlist_client.retrieve_active()
+        # Verify
+        assert retrieved_configuration.config_body == CONFIG_BODY
+        assert len(recorded_sleeps) == 1
+        # Cleanup - none
+
+    def test_submission_is_not_retried_by_default(
+        self, mocked_response, recorded_sleeps, path_to_config_file,
+    ):
+        # Setup
+        mocked_response.add(responses.POST, URL, status=503)
+        # Exercise
+        # Verify
+        with client.WatchlistClient(("User", "Password")) as watchlist_client:
+            with pytest.raises(requests.exceptions.HTTPError):
+                watchlist_client.submit(path_to_config_file)
+        assert len(mocked_response.calls) == 1
+        assert recorded_sleeps == []
+        # Cleanup - none
+
+    def test_submission_is_retried_with_a_fresh_body(
+        self, mocked_response, recorded_sleeps, path_to_config_file,
+    ):
+        # Setup
+        received_bodies = []
+        status_codes = iter([503, 200])
+
+        def record_body(request):
+            received_bodies.append(request.body)
+            return next(status_codes), {}, json.dumps({})
+
+        mocked_response.add_callback(responses.POST, URL, callback=record_body)
+        retry_policy = retry.RetryPolicy(retry_post=True)
+        # Exercise
+        with client.WatchlistClient(("User", "Password")) as watchlist_client:
+            watchlist_client.post_config(URL, path_to_config_file, retry_policy=retry_policy)
+        # Verify
+        first_body, second_body = received_bodies
+        assert b"sourceId,RTSsymbol" in second_body
+        assert first_body.split(b"\r\n")[1:-2] == second_body.split(b"\r\n")[1:-2]
+        assert len(recorded_sleeps) == 1
+        # Cleanup - none
+
+    def test_open_circuit_fails_fast(self, mocked_response, recorded_sleeps):
+        # Setup
+        mocked_response.add(responses.GET, URL, status=500)
+        circuit_breaker = retry.CircuitBreaker(failure_threshold=2)
+        # Exercise
+        # Verify
+        with client.WatchlistClient(
+            ("User", "Password"), circuit_breaker=circuit_breaker,
+        ) as watchlist_client:
+            with pytest.raises(retry.CircuitOpenError):
+                watchlist_client.retrieve_active()
+        assert len(mocked_response.calls) == 2
+        # Cleanup - none
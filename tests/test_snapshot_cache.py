@@ -0,0 +1,179 @@
+import json
+import pathlib
+
+import pytest
+import responses
+
+from watchlist_api_client import config_retriever, config_sender, snapshot_cache
+from watchlist_api_client.data_structures import RetrievedConfig
+
+URL = "https://watchlistapi.icedatavault.icedataservices.com/v1/configurations/watchlists"
+CONFIG_BODY = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n'
+DATE_HEADER = {"Date": "Fri, 20 Nov 2020 11:47:40 GMT"}
+CREDENTIALS = ("User", "Password")
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestGetRequestedTimestamp:
+    @pytest.mark.parametrize(
+        "watchlist_endpoint, expected_timestamp",
+        [
+            (URL, None),
+            (f"{URL}?dateTime=2020-11-18T12:30:52Z", "20201118T123052Z"),
+            (f"{URL}?dateTime=2020-11-18T12:30:52.000Z", "20201118T123052Z"),
+        ],
+    )
+    def test_normalisation_of_requested_timestamp(self, watchlist_endpoint, expected_timestamp):
+        # Setup - none
+        # Exercise
+        requested_timestamp = snapshot_cache.get_requested_timestamp(watchlist_endpoint)
+        # Verify
+        assert requested_timestamp == expected_timestamp
+        # Cleanup - none
+
+
+class TestSnapshotCache:
+    def test_historical_configuration_never_expires(self, tmp_path):
+        # Setup
+        clock = FakeClock(1_000_000_000.0)
+        cache = snapshot_cache.SnapshotCache(tmp_path.as_posix(), active_ttl=60, clock=clock)
+        url = f"{URL}?dateTime=2020-11-18T12:30:52Z"
+        cache.store(
+            url, CREDENTIALS, RetrievedConfig("20201118T123052Z", CONFIG_BODY),
+            DATE_HEADER["Date"],
+        )
+        clock.now += 10 ** 9
+        # Exercise
+        cached_config_file = cache.lookup(url, CREDENTIALS)
+        # Verify
+        assert cached_config_file.timestamp == "20201118T123052Z"
+        assert cached_config_file.size == len(CONFIG_BODY)
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "response_date", ["Wed, 18 Nov 2020 12:30:52 GMT", "Tue, 17 Nov 2020 12:30:52 GMT", None],
+    )
+    def test_configuration_of_point_in_time_not_passed_expires(self, tmp_path, response_date):
+        # Setup
+        clock = FakeClock(0.0)
+        cache = snapshot_cache.SnapshotCache(tmp_path.as_posix(), active_ttl=60, clock=clock)
+        url = f"{URL}?dateTime=2020-11-18T12:30:52Z"
+        cache.store(
+            url, CREDENTIALS, RetrievedConfig("20201118T123052Z", CONFIG_BODY), response_date,
+        )
+        # Exercise
+        clock.now = tmp_path.stat().st_mtime + 3600
+        stale_config_file = cache.lookup(url, CREDENTIALS)
+        clock.now -= 3590
+        fresh_config_file = cache.lookup(url, CREDENTIALS)
+        # Verify
+        assert stale_config_file is None
+        assert fresh_config_file.timestamp == "20201118T123052Z"
+        # Cleanup - none
+
+    def test_active_configuration_expires(self, tmp_path):
+        # Setup
+        clock = FakeClock(0.0)
+        cache = snapshot_cache.SnapshotCache(tmp_path.as_posix(), active_ttl=60, clock=clock)
+        cache.store(URL, CREDENTIALS, RetrievedConfig("20201120T114740Z", CONFIG_BODY))
+        # Exercise
+        clock.now = tmp_path.stat().st_mtime + 3600
+        stale_config_file = cache.lookup(URL, CREDENTIALS)
+        clock.now -= 3590
+        fresh_config_file = cache.lookup(URL, CREDENTIALS)
+        # Verify
+        assert stale_config_file is None
+        assert fresh_config_file.timestamp == "20201120T114740Z"
+        # Cleanup - none
+
+    def test_only_latest_active_configuration_is_kept(self, tmp_path):
+        # Setup
+        cache = snapshot_cache.SnapshotCache(tmp_path.as_posix())
+        cache.store(URL, CREDENTIALS, RetrievedConfig("20201120T114740Z", CONFIG_BODY))
+        # Exercise
+        cache.store(URL, CREDENTIALS, RetrievedConfig("20201121T114740Z", CONFIG_BODY))
+        # Verify
+        assert cache.lookup(URL, CREDENTIALS).timestamp == "20201121T114740Z"
+        assert len(list(tmp_path.glob("*/active/*.csv"))) == 1
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "other_credentials", [("Another User", "Password"), ("User", "Wrong Password"), None],
+    )
+    def test_entries_are_kept_apart_by_credentials(self, tmp_path, other_credentials):
+        # Setup
+        cache = snapshot_cache.SnapshotCache(tmp_path.as_posix())
+        cache.store(URL, CREDENTIALS, RetrievedConfig("20201120T114740Z", CONFIG_BODY))
+        # Exercise
+        cached_config_file = cache.lookup(URL, other_credentials)
+        # Verify
+        assert cached_config_file is None
+        # Cleanup - none
+
+
+class TestRetrieveConfigWithCache:
+    def test_historical_configuration_is_retrieved_once(self, mocked_response):
+        # Setup
+        mocked_response.add(responses.GET, URL, body=CONFIG_BODY, headers=DATE_HEADER)
+        # Exercise
+        first_configuration = config_retriever.retrieve_config(
+            f"{URL}?dateTime=2020-11-18T12:30:52Z", CREDENTIALS, use_cache=True,
+        )
+        second_configuration = config_retriever.retrieve_config(
+            f"{URL}?dateTime=2020-11-18T12:30:52.000Z", CREDENTIALS, use_cache=True,
+        )
+        # Verify
+        assert first_configuration == second_configuration
+        assert len(mocked_response.calls) == 1
+        # Cleanup - none
+
+    def test_cache_is_not_used_by_default(self, mocked_response):
+        # Setup
+        mocked_response.add(responses.GET, URL, body=CONFIG_BODY, headers=DATE_HEADER)
+        url = f"{URL}?dateTime=2020-11-18T12:30:52Z"
+        # Exercise
+        config_retriever.retrieve_config(url, CREDENTIALS, use_cache=True)
+        config_retriever.retrieve_config(url, CREDENTIALS)
+        # Verify
+        assert len(mocked_response.calls) == 2
+        # Cleanup - none
+
+    def test_cached_configuration_is_copied_to_directory(self, mocked_response, tmp_path):
+        # Setup
+        mocked_response.add(responses.GET, URL, body=CONFIG_BODY, headers=DATE_HEADER)
+        url = f"{URL}?dateTime=2020-11-18T12:30:52Z"
+        config_retriever.retrieve_config(url, CREDENTIALS, use_cache=True)
+        # Exercise
+        retrieved_configuration_file = config_retriever.retrieve_config_to_file(
+            url, CREDENTIALS, tmp_path.joinpath("retrieved").as_posix(), use_cache=True,
+        )
+        # Verify
+        assert len(mocked_response.calls) == 1
+        assert retrieved_configuration_file.path == (
+            tmp_path.joinpath("retrieved", "watchlist_config@20201118T123052Z.csv").as_posix()
+        )
+        assert pathlib.Path(retrieved_configuration_file.path).read_bytes() == CONFIG_BODY
+        # Cleanup - none
+
+    def test_submission_invalidates_active_configuration(self, mocked_response, tmp_path):
+        # Setup
+        mocked_response.add(responses.GET, URL, body=CONFIG_BODY, headers=DATE_HEADER)
+        mocked_response.add(
+            responses.POST, URL, body=json.dumps({}), headers=DATE_HEADER,
+        )
+        path_to_watchlist_config_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_watchlist_config_file.write_bytes(CONFIG_BODY)
+        config_retriever.retrieve_config(URL, CREDENTIALS, use_cache=True)
+        # Exercise
+        config_sender.send_config(URL, CREDENTIALS, path_to_watchlist_config_file.as_posix())
+        config_retriever.retrieve_config(URL, CREDENTIALS, use_cache=True)
+        # Verify
+        assert [call.request.method for call in mocked_response.calls] == ["GET", "POST", "GET"]
+        # Cleanup - none
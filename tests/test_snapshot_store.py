@@ -0,0 +1,143 @@
+import datetime
+import fcntl
+import gzip
+
+import pytest
+
+from watchlist_api_client import snapshot_store
+from watchlist_api_client.data_structures import RetrievedConfig, RetrievedConfigFile
+
+CONFIG_BODY = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n'
+OTHER_CONFIG_BODY = b'sourceId,RTSsymbol\n207,F:FDAX\\Z20\n680,IRNB\\Z20\n'
+
+
+def count_blobs(store):
+    return len(list(store.blobs_directory.glob("*/*")))
+
+
+class TestSnapshotStore:
+    def test_identical_configurations_are_stored_once(self, tmp_path):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.as_posix())
+        # Exercise
+        digests = [
+            store.add(RetrievedConfig("20201118T120000Z", CONFIG_BODY)),
+            store.add(RetrievedConfig("20201118T130000Z", CONFIG_BODY)),
+            store.add(RetrievedConfig("20201118T140000Z", OTHER_CONFIG_BODY)),
+        ]
+        # Verify
+        assert digests[0] == digests[1] != digests[2]
+        assert count_blobs(store) == 2
+        assert list(store.index()) == [
+            "20201118T120000Z", "20201118T130000Z", "20201118T140000Z",
+        ]
+        # Cleanup - none
+
+    def test_configuration_file_is_added(self, tmp_path):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.joinpath("store").as_posix())
+        path_to_file = tmp_path.joinpath("watchlist_config@20201118T120000Z.csv")
+        path_to_file.write_bytes(CONFIG_BODY)
+        retrieved_config_file = RetrievedConfigFile(
+            "20201118T120000Z", path_to_file.as_posix(), len(CONFIG_BODY),
+        )
+        # Exercise
+        digest = store.add_file(retrieved_config_file)
+        # Verify
+        assert digest == store.add(RetrievedConfig("20201118T130000Z", CONFIG_BODY))
+        assert count_blobs(store) == 1
+        # Cleanup - none
+
+    def test_compressed_configuration_file_is_stored_decompressed(self, tmp_path):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.joinpath("store").as_posix())
+        path_to_file = tmp_path.joinpath("watchlist_config@20201118T120000Z.csv.gz")
+        path_to_file.write_bytes(gzip.compress(CONFIG_BODY))
+        retrieved_config_file = RetrievedConfigFile(
+            "20201118T120000Z", path_to_file.as_posix(), path_to_file.stat().st_size,
+        )
+        # Exercise
+        digest = store.add_file(retrieved_config_file)
+        # Verify
+        assert digest == store.add(RetrievedConfig("20201118T130000Z", CONFIG_BODY))
+        assert count_blobs(store) == 1
+        # Cleanup - none
+
+    def test_materialized_configuration_matches_added_one(self, tmp_path):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.joinpath("store").as_posix())
+        store.add(RetrievedConfig("20201118T120000Z", CONFIG_BODY))
+        store.add(RetrievedConfig("20201118T130000Z", OTHER_CONFIG_BODY))
+        # Exercise
+        materialized_file = store.materialize("20201118T130000Z", tmp_path.as_posix())
+        # Verify
+        assert materialized_file.path == tmp_path.joinpath(
+            "watchlist_config@20201118T130000Z.csv"
+        ).as_posix()
+        assert tmp_path.joinpath(materialized_file.path).read_bytes() == OTHER_CONFIG_BODY
+        assert materialized_file.size == len(OTHER_CONFIG_BODY)
+        # Cleanup - none
+
+    def test_latest_record_of_a_timestamp_wins(self, tmp_path):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.as_posix())
+        store.add(RetrievedConfig("20201118T120000Z", CONFIG_BODY))
+        # Exercise
+        digest = store.add(RetrievedConfig("20201118T120000Z", OTHER_CONFIG_BODY))
+        # Verify
+        assert store.index() == {"20201118T120000Z": digest}
+        # Cleanup - none
+
+    def test_gc_removes_unreferenced_blobs_only(self, tmp_path):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.as_posix())
+        store.add(RetrievedConfig("20201118T120000Z", OTHER_CONFIG_BODY))
+        store.add(RetrievedConfig("20201118T120000Z", CONFIG_BODY))
+        store.add(RetrievedConfig("20201118T130000Z", CONFIG_BODY))
+        # Exercise
+        report = store.gc()
+        # Verify
+        assert report == snapshot_store.GarbageCollectionReport(
+            removed_snapshots=0, removed_blobs=1, freed_bytes=len(OTHER_CONFIG_BODY),
+        )
+        assert count_blobs(store) == 1
+        assert len(store.index_path.read_text().splitlines()) == 2
+        # Cleanup - none
+
+    def test_gc_applies_retention_policy(self, tmp_path):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.as_posix())
+        store.add(RetrievedConfig("20201117T120000Z", OTHER_CONFIG_BODY))
+        store.add(RetrievedConfig("20201118T120000Z", CONFIG_BODY))
+        store.add(RetrievedConfig("20201119T120000Z", CONFIG_BODY))
+        store.add(RetrievedConfig("20201120T120000Z", CONFIG_BODY))
+        # Exercise
+        report = store.gc(
+            keep_latest=2,
+            older_than=datetime.datetime(2020, 11, 18, 0, 0, 0),
+        )
+        # Verify
+        assert report.removed_snapshots == 2
+        assert report.removed_blobs == 1
+        assert list(store.index()) == ["20201119T120000Z", "20201120T120000Z"]
+        # Cleanup - none
+
+    def test_store_is_locked_while_adding(self, tmp_path, mocker):
+        # Setup
+        store = snapshot_store.SnapshotStore(tmp_path.as_posix())
+
+        def assert_store_is_locked(*args):
+            with store.lock_path.open('a') as lock_file:
+                with pytest.raises(BlockingIOError):
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        mocker.patch.object(
+            snapshot_store, "write_file_atomically", side_effect=assert_store_is_locked,
+        )
+        # Exercise
+        store.add(RetrievedConfig("20201118T120000Z", CONFIG_BODY))
+        # Verify
+        assert snapshot_store.write_file_atomically.call_count == 1
+        with store.lock_path.open('a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # Cleanup - none
@@ -0,0 +1,151 @@
+import os
+import pathlib
+
+from watchlist_api_client import config_validator, validation_cache
+from watchlist_api_client.data_structures import InvalidLine, ValidationReport
+
+
+class TestSerializeValidationReport:
+    def test_serialization_round_trip(self):
+        # Setup
+        validation_report = ValidationReport(
+            lines_checked=10,
+            invalid_lines=[InvalidLine(6, "Improperly formatted", "676, F2:SP\\Z20")],
+            truncated=True,
+        )
+        # Exercise
+        serialized_report = validation_cache.serialize_validation_report(validation_report)
+        # Verify
+        assert validation_cache.deserialize_validation_report(serialized_report) == (
+            validation_report
+        )
+        # Cleanup - none
+
+
+class TestValidateConfigurationFileWithCache:
+    def test_unchanged_file_is_not_validated_again(self, tmp_path, mocker):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n")
+        cache = validation_cache.ValidationCache(tmp_path.joinpath("cache"))
+        first_report = validation_cache.validate_configuration_file_with_cache(
+            path_to_file, cache=cache,
+        )
+        spied_validation = mocker.spy(config_validator, "validate_configuration_file")
+        spied_hashing = mocker.spy(validation_cache, "compute_file_digest")
+        # Exercise
+        second_report = validation_cache.validate_configuration_file_with_cache(
+            path_to_file, cache=cache,
+        )
+        # Verify
+        assert second_report == first_report
+        assert spied_validation.call_count == 0
+        assert spied_hashing.call_count == 0
+        # Cleanup - none
+
+    def test_modified_file_is_validated_again(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n")
+        cache = validation_cache.ValidationCache(tmp_path.joinpath("cache"))
+        validation_cache.validate_configuration_file_with_cache(path_to_file, cache=cache)
+        path_to_file.write_bytes(b"sourceId,RTSsymbol\n207, F:FDAX\\Z20\n")
+        os.utime(path_to_file, ns=(0, 0))
+        # Exercise
+        validation_report = validation_cache.validate_configuration_file_with_cache(
+            path_to_file, cache=cache,
+        )
+        # Verify
+        assert validation_report.invalid_lines == [
+            InvalidLine(1, "Improperly formatted", "207, F:FDAX\\Z20"),
+        ]
+        # Cleanup - none
+
+    def test_copied_file_reuses_the_report_of_identical_content(self, tmp_path, mocker):
+        # Setup
+        path_to_file = pathlib.Path(__file__).resolve().parent.joinpath(
+            "static_data", "watchlist_config_wrong_rows.csv"
+        )
+        path_to_copy = tmp_path.joinpath("watchlist_config_copy.csv")
+        path_to_copy.write_bytes(path_to_file.read_bytes())
+        cache = validation_cache.ValidationCache(tmp_path.joinpath("cache"))
+        validation_cache.validate_configuration_file_with_cache(path_to_file, cache=cache)
+        spied_validation = mocker.spy(config_validator, "validate_configuration_file")
+        # Exercise
+        validation_report = validation_cache.validate_configuration_file_with_cache(
+            path_to_copy, cache=cache,
+        )
+        # Verify
+        assert spied_validation.call_count == 0
+        assert len(validation_report.invalid_lines) == 3
+        # Cleanup - none
+
+    def test_change_of_validation_rules_invalidates_the_reports(self, tmp_path, mocker):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n")
+        cache = validation_cache.ValidationCache(tmp_path.joinpath("cache"))
+        validation_cache.validate_configuration_file_with_cache(path_to_file, cache=cache)
+        mocker.patch.object(
+            config_validator,
+            "VALIDATION_RULES_VERSION",
+            config_validator.VALIDATION_RULES_VERSION + 1,
+        )
+        spied_validation = mocker.spy(config_validator, "validate_configuration_file")
+        # Exercise
+        validation_cache.validate_configuration_file_with_cache(path_to_file, cache=cache)
+        # Verify
+        assert spied_validation.call_count == 1
+        # Cleanup - none
+
+    def test_corrupt_entries_are_ignored(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"sourceId,RTSsymbol\n207, F:FDAX\\Z20\n")
+        cache = validation_cache.ValidationCache(tmp_path.joinpath("cache"))
+        validation_cache.validate_configuration_file_with_cache(path_to_file, cache=cache)
+        for entry_path in cache.directory.glob("*.json"):
+            entry_path.write_text('{"signature": [')
+        # Exercise
+        validation_report = validation_cache.validate_configuration_file_with_cache(
+            path_to_file, cache=cache,
+        )
+        # Verify
+        assert validation_report.invalid_lines == [
+            InvalidLine(1, "Improperly formatted", "207, F:FDAX\\Z20"),
+        ]
+        # Cleanup - none
+
+    def test_unusable_cache_directory_falls_back_to_validation(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("watchlist_config.csv")
+        path_to_file.write_bytes(b"sourceId,RTSsymbol\n207,F:FDAX\\Z20\n")
+        cache_parent = tmp_path.joinpath("not_a_directory")
+        cache_parent.write_bytes(b"")
+        cache = validation_cache.ValidationCache(cache_parent.joinpath("cache"))
+        # Exercise
+        validation_report = validation_cache.validate_configuration_file_with_cache(
+            path_to_file, cache=cache,
+        )
+        # Verify
+        assert validation_report.is_valid
+        # Cleanup - none
+
+
+class TestValidationCacheEviction:
+    def test_eviction_of_least_recently_used_entries(self, tmp_path):
+        # Setup
+        cache = validation_cache.ValidationCache(tmp_path.joinpath("cache"), max_size=300)
+        validation_report = ValidationReport(lines_checked=1, invalid_lines=[], truncated=False)
+        for index in range(10):
+            cache.store(f"{index:064x}", validation_report)
+            os.utime(cache._report_path(f"{index:064x}", None), ns=(index, index))
+        # Exercise
+        cache.evict()
+        # Verify
+        remaining_entries = sorted(path.name for path in cache.directory.glob("*.json"))
+        cache_size = sum(path.stat().st_size for path in cache.directory.glob("*.json"))
+        assert cache_size <= 300
+        assert remaining_entries[-1] == cache._report_path(f"{9:064x}", None).name
+        assert cache._report_path(f"{0:064x}", None).name not in remaining_entries
+        # Cleanup - none